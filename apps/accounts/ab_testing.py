@@ -15,14 +15,26 @@ Usage:
 
     # Get test results
     results = ABTestingService.get_test_results('onboarding_flow')
+
+Test definitions are held in process memory and reloaded when the shared
+version key changes (any ABTest / ABTestVariant save or delete). Variants
+are picked by hashing the user id, so neither get_variant nor
+track_conversion reads the database; the assignment and conversion rows
+are buffered (recovery_hub.event_buffer) and bulk-inserted every minute by
+the flush_ab_test_events task.
 """
 
-from django.db import models
+from django.db import DatabaseError, models, transaction
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Count, Q
-import random
 import hashlib
+import time
+import uuid
+
+from recovery_hub import event_buffer
 
 
 class ABTest(models.Model):
@@ -141,115 +153,201 @@ class ABTestConversion(models.Model):
         return f"{self.assignment.user.username}: {self.conversion_type}"
 
 
-class ABTestingService:
-    """Service class for A/B testing operations"""
+ASSIGNMENT_BUFFER = 'ab-assignments'
+CONVERSION_BUFFER = 'ab-conversions'
+DEFINITIONS_VERSION_KEY = 'ab-tests:version'
+# How often a process re-reads the shared version key; edits to tests
+# reach every process within this long.
+VERSION_CHECK_SECONDS = 30
+# Per-user "already queued" flags, so page loads don't re-queue records.
+SEEN_SECONDS = 30 * 24 * 60 * 60
 
-    @classmethod
-    def get_variant(cls, user, test_name, create_if_missing=True):
-        """
-        Get the variant for a user in a specific test.
-        If user isn't assigned yet, assigns them randomly.
+_definitions = {'version': None, 'checked_at': 0.0, 'tests': {}}
 
-        Returns: variant name (string) or None if test not running
-        """
-        # Check if user already has an assignment
-        try:
-            assignment = ABTestAssignment.objects.select_related('variant').get(
-                user=user,
-                test__name=test_name
+
+def invalidate_definitions():
+    """Make every process reload test definitions. Called on test/variant changes."""
+    cache.set(DEFINITIONS_VERSION_KEY, uuid.uuid4().hex, None)
+    _definitions['checked_at'] = 0.0
+
+
+def _load_definitions():
+    tests = {}
+    for test in ABTest.objects.prefetch_related('variants'):
+        tests[test.name] = {
+            'test': test,
+            'variants': sorted(test.variants.all(), key=lambda v: v.id),
+        }
+    return tests
+
+
+def get_definition(test_name):
+    """{'test': ABTest, 'variants': [...]} from process memory, or None."""
+    now = time.monotonic()
+    if now - _definitions['checked_at'] >= VERSION_CHECK_SECONDS:
+        version = cache.get(DEFINITIONS_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(DEFINITIONS_VERSION_KEY, version, None)
+            version = cache.get(DEFINITIONS_VERSION_KEY, version)
+        if version != _definitions['version']:
+            _definitions['tests'] = _load_definitions()
+            _definitions['version'] = version
+        _definitions['checked_at'] = now
+    return _definitions['tests'].get(test_name)
+
+
+def _bucket(user_id, test_name, purpose):
+    return int(hashlib.md5(f"{user_id}:{test_name}:{purpose}".encode()).hexdigest(), 16)
+
+
+def flush_events(limit=event_buffer.DRAIN_BATCH):
+    """Write a batch of buffered assignments, then conversions. Returns events drained.
+
+    Conversions wait until the assignment backlog is written: one whose
+    assignment isn't in the database yet would be dropped, and the
+    ab-converted flag stops it from ever being queued again.
+
+    If the write fails the drained records are pushed back, so the task's
+    retry (or the next run) writes them instead of losing the batch.
+    """
+    assignments = event_buffer.drain(ASSIGNMENT_BUFFER, limit)
+    conversions = []
+    if not event_buffer.size(ASSIGNMENT_BUFFER):
+        conversions = event_buffer.drain(CONVERSION_BUFFER, limit)
+        # Assignments queued since the first drain may be what these convert.
+        assignments += event_buffer.drain(ASSIGNMENT_BUFFER, limit)
+    if not assignments and not conversions:
+        return 0
+    try:
+        with transaction.atomic():
+            _write_events(assignments, conversions)
+    except DatabaseError:
+        event_buffer.push(ASSIGNMENT_BUFFER, *assignments)
+        event_buffer.push(CONVERSION_BUFFER, *conversions)
+        raise
+    return len(assignments) + len(conversions)
+
+
+def _write_events(assignments, conversions):
+    if assignments:
+        # ignore_conflicts covers duplicates, not foreign keys: skip records
+        # whose user, test or variant was deleted since they were queued.
+        users = set(get_user_model().objects.filter(
+            pk__in={a['user_id'] for a in assignments}).values_list('pk', flat=True))
+        variants = set(ABTestVariant.objects.filter(
+            pk__in={a['variant_id'] for a in assignments}).values_list('id', 'test_id'))
+        ABTestAssignment.objects.bulk_create([
+            ABTestAssignment(user_id=a['user_id'], test_id=a['test_id'], variant_id=a['variant_id'])
+            for a in assignments
+            if a['user_id'] in users and (a['variant_id'], a['test_id']) in variants
+        ], ignore_conflicts=True)
+    if conversions:
+        pairs = Q()
+        for c in conversions:
+            pairs |= Q(user_id=c['user_id'], test_id=c['test_id'])
+        assignment_ids = {
+            (user_id, test_id): pk
+            for pk, user_id, test_id in ABTestAssignment.objects.filter(pairs).values_list('id', 'user_id', 'test_id')
+        }
+        # Conversions only count for assigned users, as before.
+        rows = [
+            ABTestConversion(
+                assignment_id=assignment_ids[(c['user_id'], c['test_id'])],
+                conversion_type=c['conversion_type'], metadata=c['metadata'],
             )
-            return assignment.variant.name
-        except ABTestAssignment.DoesNotExist:
-            pass
-
-        # Get the test
-        try:
-            test = ABTest.objects.get(name=test_name)
-        except ABTest.DoesNotExist:
-            return None
+            for c in conversions if (c['user_id'], c['test_id']) in assignment_ids
+        ]
+        ABTestConversion.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class ABTestingService:
+    """Service class for A/B testing operations
+
+    Test definitions come from process memory (get_definition) and
+    variants are picked by hash, so get_variant and track_conversion don't
+    touch the database; the assignment and conversion rows they produce are
+    buffered and written by the flush_ab_test_events task.
+    """
+
+    @classmethod
+    def _select(cls, user, test_name, require_running=True):
+        definition = get_definition(test_name)
+        if definition is None:
+            return None, None
+        test = definition['test']
 
         # Check if test is running
-        if not test.is_running():
-            return None
+        if require_running and not test.is_running():
+            return test, None
 
         # Check traffic percentage (deterministic based on user id)
         if test.traffic_percentage < 100:
-            hash_input = f"{user.id}:{test_name}:traffic"
-            hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-            if (hash_value % 100) >= test.traffic_percentage:
-                return None  # User not included in test
-
-        if not create_if_missing:
-            return None
+            if (_bucket(user.id, test_name, 'traffic') % 100) >= test.traffic_percentage:
+                return test, None  # User not included in test
 
-        # Assign user to a variant
-        variants = list(test.variants.all())
+        variants = definition['variants']
         if not variants:
-            return None
-
-        # Weighted random selection (deterministic based on user id)
-        hash_input = f"{user.id}:{test_name}:variant"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
+            return test, None
 
+        # Weighted selection (deterministic based on user id)
         total_weight = sum(v.weight for v in variants)
-        selection = hash_value % total_weight
+        selection = _bucket(user.id, test_name, 'variant') % total_weight
 
         cumulative = 0
-        selected_variant = variants[0]
         for variant in variants:
             cumulative += variant.weight
             if selection < cumulative:
-                selected_variant = variant
-                break
-
-        # Create assignment
-        ABTestAssignment.objects.create(
-            user=user,
-            test=test,
-            variant=selected_variant
-        )
+                return test, variant
+        return test, variants[0]
+
+    @classmethod
+    def get_variant(cls, user, test_name, create_if_missing=True):
+        """
+        Get the variant for a user in a specific test.
+        The assignment is queued for recording the first time it's seen.
+
+        Returns: variant name (string) or None if test not running
+        """
+        test, variant = cls._select(user, test_name)
+        if variant is None:
+            return None
+        if not create_if_missing:
+            return None
 
-        return selected_variant.name
+        if cache.add(f'ab-assigned:{test.id}:{user.id}', 1, SEEN_SECONDS):
+            recorded = event_buffer.push(ASSIGNMENT_BUFFER, {
+                'user_id': user.id, 'test_id': test.id, 'variant_id': variant.id,
+            })
+            if not recorded:
+                ABTestAssignment.objects.get_or_create(
+                    user=user, test=test, defaults={'variant': variant})
+        return variant.name
 
     @classmethod
     def get_variant_config(cls, user, test_name):
         """Get the configuration for a user's variant"""
-        try:
-            assignment = ABTestAssignment.objects.select_related('variant').get(
-                user=user,
-                test__name=test_name
-            )
-            return assignment.variant.config
-        except ABTestAssignment.DoesNotExist:
-            return {}
+        _, variant = cls._select(user, test_name)
+        return variant.config if variant else {}
 
     @classmethod
     def track_conversion(cls, user, test_name, conversion_type, metadata=None):
         """
-        Track a conversion event for a user in a test.
-        Only tracks if user is assigned to a variant.
+        Queue a conversion event for a user in a test.
+        The flush only records it if the user is assigned to a variant.
 
-        Returns: True if tracked, False otherwise
+        Returns: True if queued, False otherwise
         """
-        try:
-            assignment = ABTestAssignment.objects.get(
-                user=user,
-                test__name=test_name
-            )
-        except ABTestAssignment.DoesNotExist:
+        test, _ = cls._select(user, test_name, require_running=False)
+        if test is None:
             return False
-
-        # Create conversion (ignore if already exists)
-        try:
-            ABTestConversion.objects.create(
-                assignment=assignment,
-                conversion_type=conversion_type,
-                metadata=metadata or {}
-            )
-            return True
-        except Exception:
+        if not cache.add(f'ab-converted:{test.id}:{user.id}:{conversion_type}', 1, SEEN_SECONDS):
             # Already converted
             return False
+        return event_buffer.push(CONVERSION_BUFFER, {
+            'user_id': user.id, 'test_id': test.id,
+            'conversion_type': conversion_type, 'metadata': metadata or {},
+        })
 
     @classmethod
     def get_test_results(cls, test_name):
@@ -267,24 +365,31 @@ class ABTestingService:
             }
         }
         """
-        try:
-            test = ABTest.objects.get(name=test_name)
-        except ABTest.DoesNotExist:
+        definition = get_definition(test_name)
+        if definition is None:
             return {}
 
-        results = {}
+        # One grouped query: users and each conversion type per variant.
+        counts = {
+            row['variant_id']: row
+            for row in ABTestAssignment.objects.filter(test=definition['test']).order_by()
+            .values('variant_id').annotate(
+                total_users=Count('id', distinct=True),
+                **{
+                    conv_type: Count('conversions', filter=Q(conversions__conversion_type=conv_type))
+                    for conv_type, _ in ABTestConversion.CONVERSION_TYPES
+                },
+            )
+        }
 
-        for variant in test.variants.all():
-            assignments = ABTestAssignment.objects.filter(variant=variant)
-            total_users = assignments.count()
+        results = {}
+        for variant in definition['variants']:
+            row = counts.get(variant.id, {})
+            total_users = row.get('total_users', 0)
 
             conversions = {}
             for conv_type, conv_label in ABTestConversion.CONVERSION_TYPES:
-                count = ABTestConversion.objects.filter(
-                    assignment__variant=variant,
-                    conversion_type=conv_type
-                ).count()
-
+                count = row.get(conv_type, 0)
                 rate = (count / total_users) if total_users > 0 else 0
                 conversions[conv_type] = {
                     'label': conv_label,
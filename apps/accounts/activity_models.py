@@ -0,0 +1,74 @@
+"""
+Denormalized per-member activity summary.
+
+Batch jobs (pal nudges, supporter alerts, re-engagement, facility risk) all
+need "when did this member last do X" for thousands of members at once. The
+source tables answer that with one ORDER BY ... LIMIT 1 per member; this row
+answers it with a join. It is maintained by signals as activity happens and
+rebuilt nightly by verify_activity_summaries, which also corrects anything
+written behind the signals' back (bulk_create, queryset.update). See
+activity_summary.py for the write side.
+
+Streaks and 7-day aggregates are stored as of the moment they were computed;
+use the current_* helpers, which account for days passing since.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class UserActivitySummary(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        primary_key=True, related_name='activity_summary',
+    )
+
+    last_checkin_date = models.DateField(null=True, blank=True, db_index=True)
+    last_checkin_at = models.DateTimeField(null=True, blank=True)
+    last_pledge_date = models.DateField(null=True, blank=True)
+    last_post_at = models.DateTimeField(null=True, blank=True)
+    last_journal_at = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+
+    # Consecutive days ending at last_checkin_date / last_pledge_date.
+    checkin_streak = models.PositiveIntegerField(default=0)
+    pledge_streak = models.PositiveIntegerField(default=0)
+
+    # Check-ins dated within 7 days before window_date (inclusive).
+    window_date = models.DateField(null=True, blank=True)
+    checkins_7d = models.PositiveSmallIntegerField(default=0)
+    mood_avg_7d = models.FloatField(null=True, blank=True)
+    mood_min_7d = models.PositiveSmallIntegerField(null=True, blank=True)
+    craving_avg_7d = models.FloatField(null=True, blank=True)
+    craving_max_7d = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'user activity summaries'
+
+    def __str__(self):
+        return f"Activity summary for {self.user_id}"
+
+    @staticmethod
+    def _live_streak(streak, last_date, today):
+        # A streak survives until the end of the day after its last entry,
+        # matching User.get_checkin_streak().
+        if last_date is None or last_date < today - timedelta(days=1):
+            return 0
+        return streak
+
+    def current_checkin_streak(self, today=None):
+        return self._live_streak(
+            self.checkin_streak, self.last_checkin_date, today or timezone.localdate())
+
+    def current_pledge_streak(self, today=None):
+        return self._live_streak(
+            self.pledge_streak, self.last_pledge_date, today or timezone.localdate())
+
+    def days_since_checkin(self, today=None):
+        if self.last_checkin_date is None:
+            return None
+        return ((today or timezone.localdate()) - self.last_checkin_date).days
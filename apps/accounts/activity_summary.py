@@ -0,0 +1,195 @@
+"""
+Write side of UserActivitySummary (see activity_models.py).
+
+Signals keep each member's row current as they act:
+
+- check-ins and pledges re-derive that member's check-in / pledge fields
+  (a couple of indexed queries; edits to old dates can change a streak, so
+  these are recomputed rather than patched),
+- posts, journal entries and last_seen only ever move a timestamp forward,
+  which is a single conditional UPDATE.
+
+rebuild() recomputes whole rows from the source tables with grouped
+queries. The nightly verify_activity_summaries task runs it over every
+member, which rolls the 7-day windows forward and repairs anything written
+without signals. Batch readers should use the current_* helpers on the row,
+or get_summary() when a member may not have one yet.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Avg, Count, Max, Min, Q
+from django.utils import timezone
+
+from apps.accounts.activity_models import UserActivitySummary
+
+WINDOW_DAYS = 7
+
+CHECKIN_FIELDS = (
+    'last_checkin_date', 'last_checkin_at', 'checkin_streak', 'window_date',
+    'checkins_7d', 'mood_avg_7d', 'mood_min_7d', 'craving_avg_7d', 'craving_max_7d',
+)
+PLEDGE_FIELDS = ('last_pledge_date', 'pledge_streak')
+TIMESTAMP_FIELDS = ('last_post_at', 'last_journal_at', 'last_seen')
+ALL_FIELDS = CHECKIN_FIELDS + PLEDGE_FIELDS + TIMESTAMP_FIELDS
+
+
+def get_summary(user):
+    """The member's summary row, or an empty unsaved one if none exists yet."""
+    try:
+        return user.activity_summary
+    except ObjectDoesNotExist:
+        return UserActivitySummary(user=user)
+
+
+def ensure(user):
+    UserActivitySummary.objects.get_or_create(user=user, defaults={'last_seen': user.last_seen})
+
+
+def _streak(dates_desc):
+    """Consecutive days ending at the first (newest) date."""
+    streak = 0
+    expected = None
+    for day in dates_desc:
+        if expected is not None and day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    return streak
+
+
+def _dates_by_user(model, user_ids):
+    dates = defaultdict(list)
+    rows = model.objects.filter(user_id__in=user_ids).order_by('user_id', '-date')
+    for user_id, day in rows.values_list('user_id', 'date'):
+        dates[user_id].append(day)
+    return dates
+
+
+def _checkin_stats(user_ids, today):
+    from apps.accounts.models import DailyCheckIn
+
+    stats = {user_id: {
+        'last_checkin_date': None, 'last_checkin_at': None, 'checkin_streak': 0,
+        'window_date': today, 'checkins_7d': 0, 'mood_avg_7d': None, 'mood_min_7d': None,
+        'craving_avg_7d': None, 'craving_max_7d': None,
+    } for user_id in user_ids}
+
+    for user_id, dates in _dates_by_user(DailyCheckIn, user_ids).items():
+        stats[user_id]['last_checkin_date'] = dates[0]
+        stats[user_id]['checkin_streak'] = _streak(dates)
+
+    rows = (
+        DailyCheckIn.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            last_at=Max('created_at'),
+            checkins_7d=Count('id', filter=Q(date__gte=today - timedelta(days=WINDOW_DAYS))),
+            mood_avg_7d=Avg('mood', filter=Q(date__gte=today - timedelta(days=WINDOW_DAYS))),
+            mood_min_7d=Min('mood', filter=Q(date__gte=today - timedelta(days=WINDOW_DAYS))),
+            craving_avg_7d=Avg('craving_level', filter=Q(date__gte=today - timedelta(days=WINDOW_DAYS))),
+            craving_max_7d=Max('craving_level', filter=Q(date__gte=today - timedelta(days=WINDOW_DAYS))),
+        )
+    )
+    for row in rows:
+        user_stats = stats[row.pop('user_id')]
+        user_stats['last_checkin_at'] = row.pop('last_at')
+        user_stats.update(row)
+    return stats
+
+
+def _pledge_stats(user_ids):
+    from apps.accounts.models import DailyPledge
+
+    stats = {user_id: {'last_pledge_date': None, 'pledge_streak': 0} for user_id in user_ids}
+    for user_id, dates in _dates_by_user(DailyPledge, user_ids).items():
+        stats[user_id] = {'last_pledge_date': dates[0], 'pledge_streak': _streak(dates)}
+    return stats
+
+
+def _latest(model, user_field, user_ids):
+    return dict(
+        model.objects.filter(**{f'{user_field}__in': user_ids})
+        .values(user_field).annotate(latest=Max('created_at'))
+        .values_list(user_field, 'latest')
+    )
+
+
+def _timestamp_stats(user_ids):
+    from apps.accounts.models import SocialPost, User
+    from apps.journal.models import JournalEntry
+
+    posts = _latest(SocialPost, 'author_id', user_ids)
+    journals = _latest(JournalEntry, 'user_id', user_ids)
+    seen = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'last_seen'))
+    return {
+        user_id: {
+            'last_post_at': posts.get(user_id),
+            'last_journal_at': journals.get(user_id),
+            'last_seen': seen.get(user_id),
+        }
+        for user_id in user_ids
+    }
+
+
+def _save(user_id, values, create=True):
+    # Deletes pass create=False: when the member themselves is being
+    # deleted, the cascade must not recreate their summary row.
+    if create:
+        UserActivitySummary.objects.update_or_create(user_id=user_id, defaults=values)
+    else:
+        UserActivitySummary.objects.filter(user_id=user_id).update(**values)
+
+
+def refresh_checkins(user_id, today=None, create=True):
+    today = today or timezone.localdate()
+    _save(user_id, _checkin_stats([user_id], today)[user_id], create)
+
+
+def refresh_pledges(user_id, create=True):
+    _save(user_id, _pledge_stats([user_id])[user_id], create)
+
+
+def refresh_timestamp(user_id, field):
+    """Re-derive one timestamp after its newest source row may have gone."""
+    _save(user_id, {field: _timestamp_stats([user_id])[user_id][field]}, create=False)
+
+
+def touch(user_id, field, when):
+    """Move a timestamp forward; never backwards."""
+    updated = UserActivitySummary.objects.filter(user_id=user_id).filter(
+        Q(**{f'{field}__lt': when}) | Q(**{f'{field}__isnull': True})
+    ).update(**{field: when})
+    if not updated:
+        UserActivitySummary.objects.get_or_create(user_id=user_id, defaults={field: when})
+
+
+def rebuild(user_ids, today=None):
+    """Recompute rows for `user_ids` from source tables.
+
+    Returns how many rows were missing or differed, i.e. how much drift the
+    incremental path had accumulated (rolling 7-day windows forward counts).
+    """
+    today = today or timezone.localdate()
+    user_ids = list(user_ids)
+    computed = defaultdict(dict)
+    for stats in (_checkin_stats(user_ids, today), _pledge_stats(user_ids), _timestamp_stats(user_ids)):
+        for user_id, values in stats.items():
+            computed[user_id].update(values)
+
+    existing = UserActivitySummary.objects.in_bulk(user_ids)
+    to_create, to_update = [], []
+    for user_id in user_ids:
+        values = computed[user_id]
+        summary = existing.get(user_id)
+        if summary is None:
+            to_create.append(UserActivitySummary(user_id=user_id, **values))
+        elif any(getattr(summary, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(summary, field, value)
+            to_update.append(summary)
+
+    UserActivitySummary.objects.bulk_create(to_create, ignore_conflicts=True)
+    UserActivitySummary.objects.bulk_update(to_update, ALL_FIELDS, batch_size=500)
+    return len(to_create) + len(to_update)
@@ -2,9 +2,10 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Milestone, SupportMessage, ActivityFeed, DailyCheckIn, ActivityComment
 from .models import GroupChallenge, ChallengeParticipant, ChallengeCheckIn, ChallengeComment, ChallengeBadge, UserChallengeBadge
+from . import challenge_progress
 # Add to apps/accounts/admin.py
 from .admin_invite import *
-from .payment_models import Subscription, SubscriptionPlan, Transaction, PaymentMethod, Invoice
+from .payment_models import Subscription, SubscriptionPlan, Transaction, PaymentMethod, Invoice, StripeEvent
 
 class CustomUserAdmin(UserAdmin):
     list_display = ['username', 'email', 'first_name', 'last_name', 'is_active',
@@ -50,6 +51,7 @@ class SupportMessageAdmin(admin.ModelAdmin):
     list_filter = ['is_read', 'created_at']
     search_fields = ['sender__username',
                      'recipient__username', 'subject', 'message']
+    raw_id_fields = ['sender', 'recipient', 'conversation']
     date_hierarchy = 'created_at'
 
 
@@ -153,6 +155,7 @@ class GroupChallengeAdmin(admin.ModelAdmin):
 
     def complete_challenges(self, request, queryset):
         updated = queryset.filter(status='active').update(status='completed')
+        self._invalidate_stats(queryset)
         self.message_user(
             request, f'{updated} challenges were marked as completed.')
     complete_challenges.short_description = "Mark selected challenges as completed"
@@ -189,7 +192,10 @@ class ChallengeParticipantAdmin(admin.ModelAdmin):
             'fields': ('user', 'challenge', 'status', 'joined_date', 'completion_date')
         }),
         ('Progress', {
-            'fields': ('days_completed', 'current_streak', 'longest_streak', 'completion_percentage')
+            'fields': (
+                'days_completed', 'current_streak', 'longest_streak', 'completion_percentage',
+                'check_in_count', 'last_check_in_date', 'last_completed_date',
+            )
         }),
         ('Personal Goals', {
             'fields': ('personal_goal', 'motivation_note')
@@ -213,16 +219,23 @@ class ChallengeParticipantAdmin(admin.ModelAdmin):
 
     def mark_completed(self, request, queryset):
         updated = queryset.filter(status='active').update(status='completed')
+        self._invalidate_stats(queryset)
         self.message_user(
             request, f'{updated} participants were marked as completed.')
     mark_completed.short_description = "Mark selected participants as completed"
 
     def reset_streak(self, request, queryset):
         updated = queryset.update(current_streak=0)
+        self._invalidate_stats(queryset)
         self.message_user(
             request, f'Reset streaks for {updated} participants.')
     reset_streak.short_description = "Reset current streak for selected participants"
 
+    def _invalidate_stats(self, queryset):
+        # update() skips the post_save signal that normally does this.
+        for challenge_id in set(queryset.values_list('challenge_id', flat=True)):
+            challenge_progress.invalidate(challenge_id)
+
 
 @admin.register(ChallengeCheckIn)
 class ChallengeCheckInAdmin(admin.ModelAdmin):
@@ -427,6 +440,37 @@ class TransactionAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = [
+        'stripe_event_id', 'event_type', 'customer_id', 'status',
+        'attempts', 'stripe_created', 'processed_at'
+    ]
+    list_filter = ['status', 'event_type']
+    search_fields = ['stripe_event_id', 'customer_id']
+    readonly_fields = [
+        'stripe_event_id', 'event_type', 'customer_id', 'payload', 'stripe_created',
+        'status', 'attempts', 'last_error', 'next_attempt_at', 'locked_at',
+        'received_at', 'processed_at'
+    ]
+    date_hierarchy = 'stripe_created'
+
+    actions = ['replay_events']
+
+    def replay_events(self, request, queryset):
+        from .stripe_events import enqueue, replay
+
+        customers = replay(queryset)
+        for customer_id in customers:
+            enqueue(customer_id)
+        self.message_user(
+            request, f'Replaying events for {len(customers)} customer(s).')
+    replay_events.short_description = "Replay selected events"
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(PaymentMethod)
 class PaymentMethodAdmin(admin.ModelAdmin):
     list_display = [
@@ -4,9 +4,14 @@ Admin Engagement Dashboard for MyRecoveryPal
 Provides key metrics for monitoring user engagement and growth.
 Access at: /admin/dashboard/
 A/B Testing results at: /admin/dashboard/ab-tests/
+Celery queue depth and age (JSON) at: /admin/dashboard/queues/
+Celery task metrics (Prometheus text) at: /admin/dashboard/task-metrics/
+Staff request profiles (?__profile=1) at: /admin/dashboard/profiles/
 """
 
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from django.http import Http404
 from django.shortcuts import render
 from django.utils import timezone
 from django.db.models import Count, Avg, Q
@@ -279,3 +284,73 @@ def ab_test_results(request):
     }
 
     return render(request, 'admin/ab_test_results.html', context)
+
+
+@staff_member_required
+def celery_queue_metrics(request):
+    """Depth and oldest-message age per Celery queue, for monitoring."""
+    from recovery_hub.celery_metrics import queue_stats
+
+    try:
+        queues = queue_stats()
+    except Exception as e:
+        return JsonResponse({'error': f'Broker unavailable: {e}'}, status=503)
+    return JsonResponse({'queues': queues})
+
+
+def task_metrics(request):
+    """Per-task run metrics in Prometheus text format.
+
+    Staff sessions, or a scraper sending "Authorization: Bearer
+    <TASK_METRICS_TOKEN>".
+    """
+    import hmac
+    from django.conf import settings
+    from .task_instrumentation import prometheus_metrics
+
+    token = getattr(settings, 'TASK_METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = (request.user.is_authenticated and request.user.is_staff) or (
+        token and hmac.compare_digest(header, f'Bearer {token}'))
+    if not authorized:
+        return HttpResponse(status=403)
+    return HttpResponse(prometheus_metrics(), content_type='text/plain; version=0.0.4')
+
+
+@staff_member_required
+def request_profiles(request):
+    """Recent staff request profiles (see request_profiler)."""
+    from django.conf import settings
+    from .request_profiler import recent_profiles
+
+    return render(request, 'admin/request_profiles.html', {
+        'title': 'Request Profiles',
+        'profiles': recent_profiles(),
+        'enabled': getattr(settings, 'REQUEST_PROFILER_ENABLED', False),
+    })
+
+
+@staff_member_required
+def request_profile_detail(request, profile_id):
+    """One profile: flame graph or cProfile listing, plus the SQL timeline."""
+    from .request_profiler import flame_layout, get_profile
+
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise Http404('Profile expired or not found')
+
+    total_ms = profile['total_ms'] or 1
+    for query in profile['sql']:
+        query['left'] = round(query['start_ms'] / total_ms * 100, 3)
+        query['width'] = max(round(query['duration_ms'] / total_ms * 100, 3), 0.2)
+
+    boxes = flame_layout(profile.get('stacks', []), profile.get('samples', 0))
+    for box in boxes:
+        box['top'] = box['depth'] * 18
+        box['shade'] = box['depth'] % 4
+    return render(request, 'admin/request_profile.html', {
+        'title': f"Profile: {profile['method']} {profile['path']}",
+        'profile': profile,
+        'flame_boxes': boxes,
+        'flame_height': (max((box['depth'] for box in boxes), default=0) + 1) * 18,
+    })
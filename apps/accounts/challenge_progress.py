@@ -0,0 +1,139 @@
+"""
+Challenge progress, leaderboards and per-challenge stats.
+
+ChallengeCheckIn.save used to recount all of the participant's completed
+check-ins and look up yesterday's check-in on every save, and
+challenge_detail aggregated the whole participant list on every view.
+Instead:
+
+- Progress: each check-in save or delete applies its delta to the
+  participant row in one UPDATE. days_completed and check_in_count move by
+  F() increments; the streak is decided in SQL from last_completed_date, so
+  concurrent check-ins can't lose updates and nothing is recounted.
+- Leaderboard: the ranking columns are kept current by those UPDATEs and
+  challenge_leaderboard_idx orders them, so the top LEADERBOARD_SIZE is an
+  index range read whatever the participant count.
+- Stats: participant counts, completion rate, average streak and total
+  check-ins come from one aggregate, cached per challenge until a check-in
+  or participant change calls invalidate().
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_ORDER = ('-days_completed', '-current_streak', '-longest_streak')
+STATS_SECONDS = 60 * 60
+
+
+def _models():
+    from apps.accounts.models import ChallengeCheckIn, ChallengeParticipant
+    return ChallengeCheckIn, ChallengeParticipant
+
+
+def _key(challenge_id):
+    return f'challenge-stats:{challenge_id}'
+
+
+def invalidate(challenge_id):
+    cache.delete(_key(challenge_id))
+
+
+def _later(field, day):
+    # Greatest() is NULL on SQLite when any argument is, so coalesce first.
+    return Greatest(Coalesce(field, Value(day)), Value(day))
+
+
+def _streak_through(day):
+    """The participant's streak once `day` is completed."""
+    return Case(
+        When(last_completed_date__gte=day, then=F('current_streak')),
+        When(last_completed_date=day - timedelta(days=1), then=F('current_streak') + 1),
+        default=Value(1),
+    )
+
+
+def record_check_in(check_in, created, was_completed):
+    """Apply a saved check-in to its participant."""
+    _, ChallengeParticipant = _models()
+    # The field default is timezone.now, so a fresh instance may hold a datetime.
+    day = check_in._meta.get_field('date').to_python(check_in.date)
+    changes = {}
+    if created:
+        changes['check_in_count'] = F('check_in_count') + 1
+        changes['last_check_in_date'] = _later('last_check_in_date', day)
+    if check_in.completed_daily_goal and not was_completed:
+        streak = _streak_through(day)
+        # UPDATE reads the pre-update row, so "finishes" means this check-in
+        # brings days_completed up to the challenge length.
+        finishes = Q(status='active', days_completed__gte=check_in.participant.challenge.duration_days - 1)
+        changes.update(
+            days_completed=F('days_completed') + 1,
+            current_streak=streak,
+            longest_streak=Greatest(F('longest_streak'), streak),
+            last_completed_date=_later('last_completed_date', day),
+            status=Case(When(finishes, then=Value('completed')), default=F('status')),
+            completion_date=Case(When(finishes, then=Value(timezone.now())), default=F('completion_date')),
+        )
+    elif was_completed and not check_in.completed_daily_goal:
+        changes['days_completed'] = Greatest(F('days_completed') - 1, Value(0))
+    if not changes:
+        return
+
+    ChallengeParticipant.objects.filter(pk=check_in.participant_id).update(**changes)
+    invalidate(check_in.participant.challenge_id)
+
+
+def retract_check_in(check_in):
+    """Take a deleted check-in back out of its participant's progress."""
+    ChallengeCheckIn, ChallengeParticipant = _models()
+    changes = {
+        'check_in_count': Greatest(F('check_in_count') - 1, Value(0)),
+        'last_check_in_date': Subquery(
+            ChallengeCheckIn.objects.filter(participant=OuterRef('pk'))
+            .order_by('-date').values('date')[:1]
+        ),
+    }
+    if check_in.completed_daily_goal:
+        changes['days_completed'] = Greatest(F('days_completed') - 1, Value(0))
+    if ChallengeParticipant.objects.filter(pk=check_in.participant_id).update(**changes):
+        invalidate(check_in.participant.challenge_id)
+
+
+def _compute(challenge_id):
+    _, ChallengeParticipant = _models()
+    totals = ChallengeParticipant.objects.filter(challenge_id=challenge_id).aggregate(
+        active=Count('id', filter=Q(status='active')),
+        completed=Count('id', filter=Q(status='completed')),
+        average_streak=Avg('current_streak', filter=Q(status='active')),
+        check_ins=Sum('check_in_count'),
+    )
+    active = totals['active']
+    return {
+        'total_participants': active,
+        'completion_rate': round((totals['completed'] / active) * 100, 1) if active else 0,
+        'average_streak': totals['average_streak'] or 0,
+        'total_check_ins': totals['check_ins'] or 0,
+    }
+
+
+def stats(challenge_id):
+    """Cached {'total_participants', 'completion_rate', 'average_streak', 'total_check_ins'}."""
+    key = _key(challenge_id)
+    values = cache.get(key)
+    if values is None:
+        values = _compute(challenge_id)
+        cache.set(key, values, STATS_SECONDS)
+    return values
+
+
+def leaderboard(challenge_id, size=LEADERBOARD_SIZE):
+    """Top active participants, with their users, off challenge_leaderboard_idx."""
+    _, ChallengeParticipant = _models()
+    return list(
+        ChallengeParticipant.objects.filter(challenge_id=challenge_id, status='active')
+        .select_related('user').order_by(*LEADERBOARD_ORDER)[:size]
+    )
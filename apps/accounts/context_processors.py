@@ -29,3 +29,11 @@ def subscription_context(request):
         pass
 
     return context
+
+
+def notification_context(request):
+    """
+    Exposes the live notification stream URL (empty when clients should poll)
+    """
+    from django.conf import settings
+    return {'notification_stream_url': getattr(settings, 'NOTIFICATION_STREAM_URL', '')}
@@ -0,0 +1,55 @@
+"""
+Direct-message conversations.
+
+Every SupportMessage belongs to the Conversation between its sender and
+recipient (one per pair of members, user_low < user_high). Each member has
+a ConversationParticipant row carrying their inbox state: the thread's
+last_message_at (copied so the inbox is one index range over
+(user, last_message_at)), an unread counter and a last-read watermark.
+messaging.py keeps them current as messages are sent, read and deleted.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Conversation(models.Model):
+    user_low = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey(
+        'accounts.SupportMessage', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+',
+    )
+    last_message_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user_low', 'user_high')
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id} / {self.user_high_id}"
+
+    def other_user_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversations')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Id of the newest message this member has seen in the thread.
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('conversation', 'user')
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id'], name='conversation_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in conversation {self.conversation_id}"
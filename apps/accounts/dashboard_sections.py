@@ -0,0 +1,145 @@
+"""
+Cacheable sections of the member dashboard.
+
+dashboard_view used to run every query on every load, including two whose
+cost grows with the community: the weekly Milestone / last_seen counts over
+the whole table and the Count-annotated follow suggestions (now read from
+the precomputed recommendations). It is now built from independent sections:
+
+- community_stats(): site-wide, shared by every member and cached for
+  COMMUNITY_STATS_SECONDS.
+- Per-member sections (network, milestones, inbox): cached for
+  USER_SECTION_SECONDS and deleted by the signals that change them
+  (follows, sponsorships, pals, group memberships, milestones, messages).
+  All three are read with one get_many.
+
+The network section stores ids only; follow edges and counts come from
+the cached follow graph (social_graph.py). load_network() then fetches the
+sponsor, pal, sponsees and suggestions in one User query and the groups in
+one query, so names and avatars are never stale.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.accounts.models import (
+    Milestone, RecoveryGroup, RecoveryPal, SponsorRelationship, User,
+)
+from apps.accounts import recommendations, social_graph
+
+COMMUNITY_STATS_KEY = 'dashboard:community-stats'
+COMMUNITY_STATS_SECONDS = 5 * 60
+USER_SECTION_SECONDS = 60 * 60
+USER_SECTIONS = ('network', 'milestones', 'inbox')
+SPONSEES_SHOWN = 3
+GROUPS_SHOWN = 3
+SUGGESTIONS = 3
+MILESTONES_SHOWN = 5
+
+
+def _key(section, user_id):
+    return f'dashboard:{section}:{user_id}'
+
+
+def invalidate(user_ids, *sections):
+    """Drop the given per-member sections (all of them by default)."""
+    sections = sections or USER_SECTIONS
+    cache.delete_many([_key(section, user_id) for user_id in user_ids for section in sections])
+
+
+def community_stats(now=None):
+    stats = cache.get(COMMUNITY_STATS_KEY)
+    if stats is None:
+        week_ago = (now or timezone.now()) - timedelta(days=7)
+        stats = {
+            'recent_milestones_count': Milestone.objects.filter(created_at__gte=week_ago).count(),
+            'active_users_week': User.objects.filter(last_seen__gte=week_ago, is_active=True).count(),
+        }
+        cache.set(COMMUNITY_STATS_KEY, stats, COMMUNITY_STATS_SECONDS)
+    return stats
+
+
+def _build_network(user):
+    pal = RecoveryPal.objects.filter(
+        Q(user1=user) | Q(user2=user), status='active',
+    ).values_list('user1_id', 'user2_id').first()
+    group_ids = list(user.get_joined_groups().values_list('id', flat=True))
+    # Spare ids so follows made while this section is cached can be skipped.
+    suggested_ids = [
+        candidate_id for candidate_id, _ in recommendations.suggested_ids(user, SUGGESTIONS * 3)
+    ]
+
+    return {
+        'sponsor_id': (
+            SponsorRelationship.objects.filter(sponsee=user, status='active')
+            .values_list('sponsor_id', flat=True).first()
+        ),
+        'sponsee_ids': list(
+            SponsorRelationship.objects.filter(sponsor=user, status='active')
+            .values_list('sponsee_id', flat=True)[:SPONSEES_SHOWN]
+        ),
+        'pal_id': (pal[1] if pal[0] == user.pk else pal[0]) if pal else None,
+        'group_ids': group_ids[:GROUPS_SHOWN],
+        'groups_count': len(group_ids),
+        'suggested_ids': suggested_ids,
+    }
+
+
+def _build_milestones(user):
+    return list(user.milestones.all()[:MILESTONES_SHOWN])
+
+
+def _build_inbox(user):
+    from apps.accounts import messaging
+    return {'unread_messages': messaging.unread_total(user.pk)}
+
+
+_BUILDERS = {
+    'network': _build_network,
+    'milestones': _build_milestones,
+    'inbox': _build_inbox,
+}
+
+
+def user_sections(user):
+    """{section: value} for every per-member section, building any misses."""
+    keys = {section: _key(section, user.pk) for section in USER_SECTIONS}
+    cached = cache.get_many(keys.values())
+    sections, missing = {}, {}
+    for section, key in keys.items():
+        if key in cached:
+            sections[section] = cached[key]
+        else:
+            sections[section] = missing[key] = _BUILDERS[section](user)
+    if missing:
+        cache.set_many(missing, USER_SECTION_SECONDS)
+    return sections
+
+
+def load_network(user, network):
+    """Model instances for a cached network section, in two queries."""
+    following_ids = social_graph.following_ids(user.pk)
+    suggested_ids = [i for i in network['suggested_ids'] if i not in following_ids]
+    user_ids = {network['sponsor_id'], network['pal_id'], *network['sponsee_ids'], *suggested_ids}
+    user_ids.discard(None)
+    users = User.objects.in_bulk(user_ids) if user_ids else {}
+    groups = {
+        group.id: group for group in RecoveryGroup.objects.filter(id__in=network['group_ids'])
+        .annotate(active_members=Count('memberships', filter=Q(memberships__status='active')))
+    } if network['group_ids'] else {}
+
+    return {
+        'followers_count': user.followers_count,
+        'following_count': user.following_count,
+        'active_sponsor': users.get(network['sponsor_id']),
+        'recovery_pal': users.get(network['pal_id']),
+        'active_sponsees': [users[i] for i in network['sponsee_ids'] if i in users],
+        'suggested_users': [
+            users[i] for i in suggested_ids
+            if i in users and users[i].is_active and users[i].is_profile_public
+        ][:SUGGESTIONS],
+        'user_groups': [groups[i] for i in network['group_ids'] if i in groups],
+        'groups_count': network['groups_count'],
+    }
@@ -0,0 +1,209 @@
+"""
+Weekly digest payloads, computed for a chunk of members at a time.
+
+send_weekly_digests used to run five or six queries per member. Here each
+section is one grouped query for the whole chunk, keyed by user id:
+
+- new followers: the five newest per member plus the total, via
+  ROW_NUMBER()/COUNT() windows partitioned by the followed member;
+- unread notifications: one grouped COUNT;
+- popular posts: public posts from everyone a member follows, joined
+  through UserConnection and ranked per follower with ROW_NUMBER() over
+  like count, keeping the top three;
+- premium recap: this week's and last week's check-in aggregates in one
+  grouped query, streaks from UserActivitySummary.
+
+build_digests() returns ready-to-render context dicts for
+emails/weekly_digest.html.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from apps.accounts.activity_summary import get_summary
+
+CHUNK_SIZE = 500
+FOLLOWERS_SHOWN = 5
+POPULAR_POSTS = 3
+
+MILESTONE_DAYS = [1, 7, 14, 30, 60, 90, 180, 365, 548, 730, 1095, 1460, 1825, 2555, 3650]
+
+
+def _new_followers(user_ids, since):
+    from apps.accounts.models import UserConnection
+
+    connections = (
+        UserConnection.objects
+        .filter(following_id__in=user_ids, connection_type='follow', created_at__gte=since)
+        .select_related('follower')
+        .annotate(
+            rank=Window(RowNumber(), partition_by=F('following_id'),
+                        order_by=[F('created_at').desc(), F('id').desc()]),
+            total=Window(Count('id'), partition_by=F('following_id')),
+        )
+        .filter(rank__lte=FOLLOWERS_SHOWN)
+        .order_by('following_id', 'rank')
+    )
+    shown, totals = defaultdict(list), {}
+    for connection in connections:
+        shown[connection.following_id].append(connection)
+        totals[connection.following_id] = connection.total
+    return shown, totals
+
+
+def _unread_counts(user_ids, since):
+    from apps.accounts.models import Notification
+
+    return dict(
+        Notification.objects
+        .filter(recipient_id__in=user_ids, is_read=False, created_at__gte=since)
+        .values('recipient_id').annotate(n=Count('id'))
+        .values_list('recipient_id', 'n')
+    )
+
+
+def _popular_posts(user_ids, since):
+    from apps.accounts.models import SocialPost
+
+    likes = (
+        SocialPost.likes.through.objects
+        .filter(socialpost_id=OuterRef('pk'))
+        .values('socialpost_id').annotate(n=Count('*')).values('n')
+    )
+    # One row per (post, member following its author); the filter and the
+    # annotations share the same UserConnection join.
+    posts = (
+        SocialPost.objects
+        .filter(
+            author__follower_connections__follower_id__in=user_ids,
+            author__follower_connections__connection_type='follow',
+            created_at__gte=since,
+            visibility='public',
+        )
+        .select_related('author')
+        .annotate(
+            digest_user_id=F('author__follower_connections__follower_id'),
+            like_count=Coalesce(Subquery(likes, output_field=IntegerField()), Value(0)),
+        )
+        .annotate(
+            rank=Window(RowNumber(), partition_by=F('digest_user_id'),
+                        order_by=[F('like_count').desc(), F('created_at').desc(), F('id').desc()]),
+        )
+        .filter(rank__lte=POPULAR_POSTS)
+        .order_by('digest_user_id', 'rank')
+    )
+    popular = defaultdict(list)
+    for post in posts:
+        popular[post.digest_user_id].append(post)
+    return popular
+
+
+def _is_premium(user):
+    try:
+        return user.subscription.is_premium()
+    except Exception:
+        return False
+
+
+def _trend(current, previous, lower_is_better=False):
+    if current is None or previous is None:
+        return ''
+    delta = current - previous
+    if abs(delta) < 0.25:
+        return 'steady'
+    improving = delta < 0 if lower_is_better else delta > 0
+    return 'improving' if improving else 'dipping'
+
+
+def premium_recaps(users, today):
+    """{user_id: recap} for the premium members among `users`.
+
+    Members with nothing to show (no check-ins this week, no sober days, no
+    pledge streak) are left out, as are free members.
+    """
+    from apps.accounts.models import DailyCheckIn
+
+    premium = [user for user in users if _is_premium(user)]
+    if not premium:
+        return {}
+
+    week_ago = today - timedelta(days=7)
+    two_weeks_ago = today - timedelta(days=14)
+    this_week = Q(date__gt=week_ago)
+    last_week = Q(date__lte=week_ago)
+    stats = {
+        row['user_id']: row for row in
+        DailyCheckIn.objects
+        .filter(user_id__in=[user.pk for user in premium], date__gt=two_weeks_ago, date__lte=today)
+        .values('user_id')
+        .annotate(
+            checkin_count=Count('id', filter=this_week),
+            mood_avg=Avg('mood', filter=this_week),
+            craving_avg=Avg('craving_level', filter=this_week),
+            prev_mood=Avg('mood', filter=last_week),
+            prev_craving=Avg('craving_level', filter=last_week),
+        )
+    }
+
+    recaps = {}
+    for user in premium:
+        row = stats.get(user.pk, {})
+        checkin_count = row.get('checkin_count', 0)
+        mood, craving = row.get('mood_avg'), row.get('craving_avg')
+        summary = get_summary(user)
+        pledge_streak = summary.current_pledge_streak(today)
+        days_sober = user.get_days_sober() or 0
+        if checkin_count == 0 and days_sober == 0 and pledge_streak == 0:
+            continue
+
+        next_milestone = next((m for m in MILESTONE_DAYS if m > days_sober), None)
+        recaps[user.pk] = {
+            'checkin_count': checkin_count,
+            'avg_mood': round(mood, 1) if mood is not None else None,
+            'mood_trend': _trend(mood, row.get('prev_mood')),
+            'avg_craving': round(craving, 1) if craving is not None else None,
+            'craving_trend': _trend(craving, row.get('prev_craving'), lower_is_better=True),
+            'pledge_streak': pledge_streak,
+            'checkin_streak': summary.current_checkin_streak(today),
+            'days_sober': days_sober,
+            'next_milestone': next_milestone,
+            'days_to_milestone': (next_milestone - days_sober) if next_milestone else None,
+        }
+    return recaps
+
+
+def build_digests(users, now=None):
+    """{user_id: context} for a chunk of members; None for nothing to send.
+
+    `users` should come with select_related('subscription',
+    'activity_summary') so the premium recap needs no per-member queries.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=7)
+    users = list(users)
+    user_ids = [user.pk for user in users]
+
+    followers, follower_totals = _new_followers(user_ids, since)
+    unread = _unread_counts(user_ids, since)
+    popular = _popular_posts(user_ids, since)
+    recaps = premium_recaps(users, now.date())
+
+    digests = {}
+    for user in users:
+        context = {
+            'new_followers': followers.get(user.pk, []),
+            'new_follower_count': follower_totals.get(user.pk, 0),
+            'unread_notifications': unread.get(user.pk, 0),
+            'popular_posts': popular.get(user.pk, []),
+            'days_sober': user.get_days_sober(),
+            'premium_recap': recaps.get(user.pk),
+        }
+        has_content = (
+            context['new_followers'] or context['unread_notifications']
+            or context['popular_posts'] or context['premium_recap'] is not None
+        )
+        digests[user.pk] = context if has_content else None
+    return digests
@@ -9,6 +9,10 @@ Two sequences (spec: docs/plans/2026-07-08-email-sequences.md):
 Suppression (both): unsubscribed, notifications off, or a crisis-triggered
 coach session in the last 48h. A person in crisis must never receive
 "check your streak!".
+
+The per-user predicates below also read Exists() annotations added by
+with_sequence_flags(), which is how the daily drivers evaluate them for a
+whole candidate set in one query.
 """
 from datetime import timedelta
 
@@ -24,20 +28,62 @@ REENGAGEMENT_REENTRY_DAYS = 90
 REENGAGEMENT_MAX_SENDS_PER_RUN = 25
 
 
+def _crisis_cutoff():
+    return timezone.now() - timedelta(hours=CRISIS_SUPPRESSION_HOURS)
+
+
+def sequence_flag_subqueries():
+    """Exists() subqueries for every activation and suppression signal.
+
+    Batch drivers annotate their candidate queryset with these (see
+    with_sequence_flags) so the helpers below read a boolean attribute
+    instead of issuing their own EXISTS per user.
+    """
+    from django.db.models import Exists, OuterRef
+    from apps.journal.models import JournalEntry
+    from .models import (
+        CoachMessage, DailyCheckIn, PostReaction, RecoveryCoachSession,
+        SocialPost, SocialPostComment,
+    )
+
+    user = OuterRef('pk')
+    return {
+        'flag_checkin': Exists(DailyCheckIn.objects.filter(user=user)),
+        'flag_journal': Exists(JournalEntry.objects.filter(user=user)),
+        'flag_post': Exists(SocialPost.objects.filter(author=user)),
+        'flag_comment': Exists(SocialPostComment.objects.filter(author=user)),
+        'flag_reaction': Exists(PostReaction.objects.filter(user=user)),
+        'flag_like': Exists(SocialPost.likes.through.objects.filter(user=user)),
+        'flag_anchor': Exists(CoachMessage.objects.filter(session__user=user, role='user')),
+        'flag_crisis': Exists(RecoveryCoachSession.objects.filter(
+            user=user, trigger='checkin_support', updated_at__gte=_crisis_cutoff())),
+    }
+
+
+def with_sequence_flags(users):
+    return users.annotate(**sequence_flag_subqueries())
+
+
+def _flag(user, name, query):
+    """Annotated flag if with_sequence_flags() was applied, else query."""
+    value = getattr(user, name, None)
+    return value if value is not None else query()
+
+
 def has_started_streak(user):
-    return user.daily_checkins.exists()
+    return _flag(user, 'flag_checkin', user.daily_checkins.exists)
 
 
 def has_journal_entry(user):
-    return user.journal_entries.exists()
+    return _flag(user, 'flag_journal', user.journal_entries.exists)
 
 
 def has_community_action(user):
     return (
-        user.social_posts.exists()
-        or user.post_comments.exists()
-        or user.post_reactions.exists()
-        or user.liked_posts.exists()
+        _flag(user, 'flag_post', user.social_posts.exists)
+        or _flag(user, 'flag_comment', user.post_comments.exists)
+        or _flag(user, 'flag_reaction', user.post_reactions.exists)
+        or _flag(user, 'flag_like', user.liked_posts.exists)
     )
 
 
@@ -52,17 +98,22 @@ def is_activated(user):
 
 def has_used_anchor(user):
     from .models import CoachMessage
-    return CoachMessage.objects.filter(
-        session__user=user, role='user').exists()
+    return _flag(user, 'flag_anchor', CoachMessage.objects.filter(
+        session__user=user, role='user').exists)
 
 
 def is_crisis_suppressed(user):
     """True if the user opened a crisis-triggered coach session recently."""
     from .models import RecoveryCoachSession
-    cutoff = timezone.now() - timedelta(hours=CRISIS_SUPPRESSION_HOURS)
-    return RecoveryCoachSession.objects.filter(
-        user=user, trigger='checkin_support', updated_at__gte=cutoff,
-    ).exists()
+    return _flag(user, 'flag_crisis', RecoveryCoachSession.objects.filter(
+        user=user, trigger='checkin_support', updated_at__gte=_crisis_cutoff(),
+    ).exists)
+
+
+ACTIVITY_SIGNALS = (
+    'last_login', 'last_seen', 'activity_summary__last_checkin_at',
+    'activity_summary__last_post_at', 'activity_summary__last_journal_at',
+)
 
 
 def get_last_activity(user):
@@ -70,31 +121,25 @@ def get_last_activity(user):
 
     ANY activity should exit the re-engagement sequence, so this looks past
     `last_login`/`last_seen` (which are only updated by explicit login and a
-    single page) to the user's most recent check-in, post, or journal entry.
+    single page) to the user's most recent check-in, post, or journal entry,
+    as recorded in their UserActivitySummary.
     """
-    candidates = [user.date_joined]
-    if user.last_login:
-        candidates.append(user.last_login)
-    if user.last_seen:
-        candidates.append(user.last_seen)
-
-    last_checkin = user.daily_checkins.order_by(
-        '-created_at').values_list('created_at', flat=True).first()
-    if last_checkin:
-        candidates.append(last_checkin)
-
-    last_post = user.social_posts.order_by(
-        '-created_at').values_list('created_at', flat=True).first()
-    if last_post:
-        candidates.append(last_post)
+    from .activity_models import UserActivitySummary
 
-    from apps.journal.models import JournalEntry
-    last_journal = JournalEntry.objects.filter(user=user).order_by(
-        '-created_at').values_list('created_at', flat=True).first()
-    if last_journal:
-        candidates.append(last_journal)
+    candidates = [user.date_joined, user.last_login, user.last_seen]
+    summary = UserActivitySummary.objects.filter(user=user).first()
+    if summary:
+        candidates += [summary.last_checkin_at, summary.last_post_at, summary.last_journal_at]
+    return max(c for c in candidates if c)
+
+
+def last_activity_expression():
+    """get_last_activity() as a User queryset expression, for batch filters."""
+    from django.db.models.functions import Coalesce, Greatest
 
-    return max(candidates)
+    # Greatest() is NULL on SQLite if any argument is, so every signal falls
+    # back to date_joined, which is never later than real activity.
+    return Greatest(*(Coalesce(field, 'date_joined') for field in ACTIVITY_SIGNALS))
 
 
 def marketing_unsubscribe_url(user):
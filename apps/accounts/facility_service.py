@@ -1,14 +1,18 @@
 """
 At-risk computation for treatment-center aftercare. Derives engagement signals
 from DailyCheckIn — never exposes raw note text. Computed on read.
-"""
-from datetime import timedelta
 
+Risk level and flags come from the member's UserActivitySummary, which the
+roster and digest get through visible_memberships' join; only the per-member
+trend lines still read check-in rows.
+"""
 from django.utils import timezone
 
+from apps.accounts.activity_summary import WINDOW_DAYS, get_summary, refresh_checkins
+
 DISENGAGED_DAYS = 5
 WATCH_DAYS = 3
-RISK_WINDOW_DAYS = 7
+RISK_WINDOW_DAYS = WINDOW_DAYS
 HIGH_CRAVING_LEVEL = 4   # Intense
 LOW_MOOD_LEVEL = 1       # Struggling
 
@@ -31,23 +35,24 @@ def _trend(values):
     return 'flat'
 
 
-def compute_member_risk(membership):
-    user = membership.user
-    today = timezone.now().date()
-    # Most recent 14 check-ins, newest first.
-    checkins = list(user.daily_checkins.order_by('-date')[:14])
-    last_date = checkins[0].date if checkins else None
-    days_since = (today - last_date).days if last_date else None
+def _current_summary(user, today):
+    summary = get_summary(user)
+    if summary.window_date != today:
+        # The nightly rebuild hasn't rolled this member's window to today.
+        refresh_checkins(user.pk, today=today)
+        user.activity_summary = summary = type(summary).objects.get(user=user)
+    return summary
 
-    window_start = today - timedelta(days=RISK_WINDOW_DAYS)
-    recent = [c for c in checkins if c.date >= window_start]
+
+def _assess(summary, today):
+    days_since = summary.days_since_checkin(today)
 
     flags = []
     if days_since is None or days_since >= DISENGAGED_DAYS:
         flags.append('disengaged')
-    if any(c.craving_level >= HIGH_CRAVING_LEVEL for c in recent):
+    if summary.craving_max_7d is not None and summary.craving_max_7d >= HIGH_CRAVING_LEVEL:
         flags.append('high_craving')
-    if any(c.mood <= LOW_MOOD_LEVEL for c in recent):
+    if summary.mood_min_7d is not None and summary.mood_min_7d <= LOW_MOOD_LEVEL:
         flags.append('low_mood')
 
     if flags:
@@ -56,16 +61,31 @@ def compute_member_risk(membership):
         risk = RISK_WATCH
     else:
         risk = RISK_OK
+    return risk, flags
+
+
+def member_risk_level(membership):
+    """Just the risk level: no check-in queries when the summary is current."""
+    today = timezone.now().date()
+    return _assess(_current_summary(membership.user, today), today)[0]
+
+
+def compute_member_risk(membership):
+    user = membership.user
+    today = timezone.now().date()
+    summary = _current_summary(user, today)
+    risk, flags = _assess(summary, today)
 
-    chrono = list(reversed(checkins))  # oldest first
+    # Most recent 14 check-ins, oldest first, for the trend lines.
+    chrono = list(reversed(user.daily_checkins.order_by('-date').values('craving_level', 'mood')[:14]))
     return {
         'risk_level': risk,
         'flags': flags,
-        'last_checkin_date': last_date,
-        'checkin_streak': user.get_checkin_streak(),
+        'last_checkin_date': summary.last_checkin_date,
+        'checkin_streak': summary.current_checkin_streak(today),
         'days_sober': user.get_days_sober(),
-        'craving_trend': _trend([c.craving_level for c in chrono]),
-        'mood_trend': _trend([c.mood for c in chrono]),
+        'craving_trend': _trend([c['craving_level'] for c in chrono]),
+        'mood_trend': _trend([c['mood'] for c in chrono]),
     }
 
 
@@ -73,12 +93,12 @@ def visible_memberships(facility):
     """Active, consented members only — the privacy boundary."""
     return facility.memberships.filter(
         status='active', consent_granted_at__isnull=False
-    ).select_related('user')
+    ).select_related('user', 'user__activity_summary')
 
 
 def cohort_summary(facility):
     counts = {'total': 0, RISK_OK: 0, RISK_WATCH: 0, RISK_AT_RISK: 0}
     for m in visible_memberships(facility):
         counts['total'] += 1
-        counts[compute_member_risk(m)['risk_level']] += 1
+        counts[member_risk_level(m)] += 1
     return counts
@@ -0,0 +1,254 @@
+"""
+Group activity fan-out.
+
+Creating a group post used to bulk-create a Notification for every member
+inside the request, and sent no push. The request now only commits the post
+and calls schedule(); the rest runs on the push_fanout queue:
+
+- Coalescing: the first post in a quiet group schedules fanout_group_posts
+  COALESCE_SECONDS out, and later posts ride along (a cache flag marks the
+  pending run). The run claims every unclaimed post in the group with one
+  UPDATE of GroupPost.fanout_at, so a burst becomes one "5 new posts in
+  Morning Group" notification and push per member instead of five.
+- Recipients are paged through GroupMembership by id (keyset), BATCH_SIZE
+  at a time: one bulk_create of notifications and one batched push per page.
+- Preferences (GroupMembership.notification_level): 'all' members get the
+  notification and push; 'digest' members get one summary per group a day
+  from send_group_digests instead; 'muted' members get nothing.
+- Resuming: every fan-out is a GroupFanoutRun whose cursor (the last
+  membership id delivered to) commits with each page. A retried task
+  picks up after it, so a failure part-way neither drops the remaining
+  members nor notifies the delivered pages twice. The cursor only moves
+  from the value a worker read, so two workers on one run never deliver
+  the same page. The post claim commits together with its run.
+- retry_stuck_group_fanouts re-runs groups with posts left unclaimed, e.g.
+  because the broker was down when they were created, and prunes old runs.
+
+announce() covers one-off group-wide notices (archiving a group): the same
+paging, in-app only, no coalescing.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.accounts.models import GroupFanoutRun, GroupMembership, GroupPost, Notification
+from apps.accounts.notification_service import notifications_created
+from apps.accounts.push_notifications import send_push_to_users
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('active', 'moderator', 'admin')
+BATCH_SIZE = 500
+COALESCE_SECONDS = 60
+STUCK_AFTER_MINUTES = 10
+DIGEST_HOURS = 24
+RUN_RETENTION_DAYS = 7
+
+
+def _scheduled_key(group_id):
+    return f'group-fanout:scheduled:{group_id}'
+
+
+def schedule(group_id):
+    """Fan out the group's new posts shortly. Call on commit of each post."""
+    from apps.accounts.tasks import fanout_group_posts
+
+    # The flag outlives the countdown so a lost run can't block the group
+    # for long; retry_stuck_group_fanouts picks up anything it missed.
+    if not cache.add(_scheduled_key(group_id), 1, COALESCE_SECONDS * 5):
+        return
+    try:
+        fanout_group_posts.apply_async(args=[group_id], countdown=COALESCE_SECONDS)
+    except Exception as e:
+        cache.delete(_scheduled_key(group_id))
+        logger.warning(f"group_fanout: could not schedule group {group_id}: {e}")
+
+
+def recipients(group_id, levels, exclude_ids=(), after=0):
+    """Yield (last membership id, [(user_id, level), ...]) pages for members
+    at `levels`, by membership id, starting after membership `after`."""
+    memberships = GroupMembership.objects.filter(
+        group_id=group_id, status__in=ACTIVE_STATUSES,
+        notification_level__in=levels, user__is_active=True,
+    ).order_by('id')
+    last_id = after
+    while True:
+        page = list(
+            memberships.filter(id__gt=last_id)
+            .values_list('id', 'user_id', 'notification_level')[:BATCH_SIZE]
+        )
+        if not page:
+            return
+        last_id = page[-1][0]
+        yield last_id, [(user_id, level) for _, user_id, level in page if user_id not in exclude_ids]
+
+
+def deliver(group_id, levels, notification_type, title, message, link,
+            sender=None, exclude_ids=(), push_data=None, run=None):
+    """Notify members at `levels` a page at a time. Returns how many.
+
+    With push_data, 'all' members are also pushed `title` / `message`.
+    With a run, delivery starts after its cursor, the cursor commits with
+    each page, and the run is marked complete at the end. Delivery stops
+    if another worker moves the cursor first.
+    """
+    notified = pushed = 0
+    cursor = run.last_membership_id if run else 0
+    for last_id, page in recipients(group_id, levels, exclude_ids, after=cursor):
+        with transaction.atomic():
+            # Advance the cursor only from where this worker read it. A
+            # second worker on the same run (a stuck-run retry racing the
+            # original task) waits on the row and then matches nothing.
+            if run and not GroupFanoutRun.objects.filter(
+                    pk=run.pk, last_membership_id=cursor, completed_at__isnull=True,
+            ).update(last_membership_id=last_id, notified=F('notified') + len(page)):
+                logger.info(f"group_fanout: run {run.key} is being delivered by another worker")
+                return notified
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=user_id, sender=sender, notification_type=notification_type,
+                    title=title, message=message, link=link,
+                )
+                for user_id, _ in page
+            ])
+        cursor = last_id
+        if not notifications:
+            continue
+        # bulk_create skips post_save, so count and announce them here.
+        notifications_created(notifications)
+        notified += len(notifications)
+
+        if push_data is not None:
+            push_ids = [user_id for user_id, level in page if level == 'all']
+            if push_ids:
+                pushed += send_push_to_users(push_ids, title, message, push_data)['sent']
+    if run:
+        GroupFanoutRun.objects.filter(pk=run.pk, last_membership_id=cursor).update(completed_at=timezone.now())
+    if pushed:
+        logger.info(f"group_fanout: group={group_id} pushed={pushed}")
+    return notified
+
+
+def _poster(post):
+    if post.is_anonymous:
+        return 'Someone'
+    return post.author.get_full_name() or post.author.username
+
+
+def fanout_posts(group_id, now=None):
+    """Claim the group's unclaimed posts and notify members once for all of them.
+
+    Runs an earlier attempt left unfinished are resumed first.
+    """
+    now = now or timezone.now()
+    cache.delete(_scheduled_key(group_id))
+    notified = 0
+    unfinished = GroupFanoutRun.objects.filter(
+        group_id=group_id, claimed_at__isnull=False, completed_at__isnull=True).order_by('id')
+    for run in unfinished:
+        notified += _deliver_posts(run)
+
+    with transaction.atomic():
+        if not GroupPost.objects.filter(group_id=group_id, fanout_at__isnull=True).update(fanout_at=now):
+            return notified
+        run = GroupFanoutRun.objects.create(
+            key=f'posts:{group_id}:{now.isoformat()}', group_id=group_id, claimed_at=now)
+    return notified + _deliver_posts(run)
+
+
+def _deliver_posts(run):
+    posts = list(
+        GroupPost.objects.filter(group_id=run.group_id, fanout_at=run.claimed_at)
+        .select_related('author', 'group').order_by('created_at')
+    )
+    if not posts or not posts[0].group.is_active:
+        GroupFanoutRun.objects.filter(pk=run.pk).update(completed_at=timezone.now())
+        return 0
+    group = posts[0].group
+
+    link = f'/accounts/groups/{group.id}/'
+    push_data = {'type': 'group_post', 'notification_type': 'group_post', 'group_id': str(group.id), 'link': link}
+    if len(posts) == 1:
+        post = posts[0]
+        title = f'New post in {group.name}'
+        message = f'{_poster(post)} posted "{post.title}" in {group.name}'
+        push_data['post_id'] = str(post.id)
+    else:
+        title = f'{len(posts)} new posts in {group.name}'
+        message = f'"{posts[-1].title}" and {len(posts) - 1} more in {group.name}'
+
+    authors = {post.author_id for post in posts}
+    named = [post for post in posts if not post.is_anonymous]
+    sender = named[0].author if len(authors) == 1 and len(named) == len(posts) else None
+    # Whoever posted in the burst was just in the group.
+    return deliver(
+        group.id, ('all',), 'group_post', title, message, link,
+        sender=sender, exclude_ids=authors, push_data=push_data, run=run,
+    )
+
+
+def send_digests(now=None):
+    """One in-app summary per group for 'digest' members. Returns groups covered.
+
+    Each group's digest is a run keyed by the day, so a retry finishes
+    unfinished groups and skips the ones already sent.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(hours=DIGEST_HOURS)
+    active_groups = (
+        GroupPost.objects.filter(created_at__gte=since, created_at__lt=now, group__is_active=True)
+        .order_by().values_list('group_id', 'group__name').annotate(n=Count('id'))
+    )
+    for group_id, name, n in active_groups:
+        run, _ = GroupFanoutRun.objects.get_or_create(
+            key=f'digest:{group_id}:{now.date().isoformat()}', defaults={'group_id': group_id})
+        if run.completed_at:
+            continue
+        deliver(
+            group_id, ('digest',), 'group_post',
+            f'{n} new post{"s" if n != 1 else ""} in {name} today',
+            f'Catch up on what {name} shared today.',
+            f'/accounts/groups/{group_id}/',
+            run=run,
+        )
+    return len(active_groups)
+
+
+def prune_runs(now=None):
+    """Delete finished runs older than RUN_RETENTION_DAYS."""
+    cutoff = (now or timezone.now()) - timedelta(days=RUN_RETENTION_DAYS)
+    return GroupFanoutRun.objects.filter(completed_at__lt=cutoff).delete()[0]
+
+
+def stuck_group_ids(now=None):
+    """Groups with posts nobody claimed, or a post run left unfinished (its
+    task gave up retrying), within STUCK_AFTER_MINUTES."""
+    cutoff = (now or timezone.now()) - timedelta(minutes=STUCK_AFTER_MINUTES)
+    unclaimed = set(
+        GroupPost.objects.filter(fanout_at__isnull=True, created_at__lte=cutoff)
+        .order_by().values_list('group_id', flat=True).distinct()
+    )
+    unfinished = set(
+        GroupFanoutRun.objects.filter(
+            claimed_at__lte=cutoff, completed_at__isnull=True,
+        ).values_list('group_id', flat=True).distinct()
+    )
+    return sorted(unclaimed | unfinished)
+
+
+def announce(group, notification_type, title, message, link, sender=None, exclude_user=None):
+    """Queue an in-app notice to every member who hasn't muted the group."""
+    from apps.accounts.tasks import fanout_group_notification
+
+    fanout_group_notification.delay(
+        group.id, notification_type, title, message, link,
+        sender_id=sender.pk if sender else None,
+        exclude_ids=[exclude_user.pk] if exclude_user else [],
+        # Retries of the task reuse its arguments, and so its run.
+        run_key=f'notice:{uuid.uuid4().hex}',
+    )
@@ -0,0 +1,30 @@
+"""
+Progress of a paged group fan-out (see group_fanout.py).
+
+Fan-outs commit one page of notifications at a time. Each run records the
+last membership id it delivered to in the same transaction as that page,
+so a retried task resumes after it instead of skipping the rest of the
+group or notifying the first pages twice.
+"""
+from django.db import models
+
+
+class GroupFanoutRun(models.Model):
+    # 'posts:<group>:<claim time>', 'notice:<uuid>' or 'digest:<group>:<date>'.
+    key = models.CharField(max_length=100, unique=True)
+    group = models.ForeignKey(
+        'accounts.RecoveryGroup', on_delete=models.CASCADE, related_name='+')
+    # For post fan-outs: the fanout_at stamped on the posts this run claimed.
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_membership_id = models.BigIntegerField(default=0)
+    notified = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'completed_at'], name='group_fanout_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Fan-out {self.key} at membership {self.last_membership_id}"
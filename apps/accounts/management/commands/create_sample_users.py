@@ -8,6 +8,17 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Creates sample users for testing'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--members', type=int, default=0,
+            help='Also seed this many generated members with follows, posts, '
+                 'reactions, check-ins, notifications and meetings',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed for --members (same seed, same data)',
+        )
+
     def handle(self, *args, **kwargs):
         # Sample user data
         users_data = [
@@ -91,4 +102,13 @@ class Command(BaseCommand):
                             date_achieved=user.sobriety_date + timedelta(days=days_ago)
                         )
         
+        if kwargs.get('members'):
+            from apps.accounts.sample_data import seed_community
+            members = seed_community(
+                members=kwargs['members'],
+                seed=kwargs['seed'],
+                prefix=f"member{kwargs['seed']}",
+            )
+            self.stdout.write(f'Seeded {len(members)} community members')
+
         self.stdout.write(self.style.SUCCESS('Sample users created successfully!'))
\ No newline at end of file
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.accounts.notification_retention import (
+    is_partitioned, partition_notification_table,
+)
+
+
+class Command(BaseCommand):
+    help = ('Converts the notification table to monthly range partitions (Postgres only). '
+            'Locks the table for the duration of the copy; run it in a quiet window.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Notification partitioning needs PostgreSQL')
+        if is_partitioned():
+            self.stdout.write('Notification table is already partitioned')
+            return
+        partition_notification_table(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Notification table partitioned by month'))
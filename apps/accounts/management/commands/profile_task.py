@@ -0,0 +1,45 @@
+"""
+Capture a cProfile of one Celery task run.
+
+    python manage.py profile_task apps.accounts.tasks.send_weekly_digests
+        arms the next run (by beat or anyone else, within a day)
+    python manage.py profile_task apps.accounts.tasks.verify_activity_summaries --now
+        runs it here, inline, and prints the profile
+
+The pstats summary (top functions by cumulative time) is stored on that
+run's TaskRun.profile either way.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.task_instrumentation import arm_profile
+from apps.accounts.task_metrics_models import TaskRun
+
+
+class Command(BaseCommand):
+    help = 'Profile the next run of a Celery task, or run it now under cProfile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('task_name', help='Registered task name, e.g. apps.accounts.tasks.send_weekly_digests')
+        parser.add_argument('--now', action='store_true', help='Run the task inline now (no arguments).')
+
+    def handle(self, *args, **opts):
+        from recovery_hub.celery import app
+
+        app.loader.import_default_modules()
+        name = opts['task_name']
+        if name not in app.tasks:
+            raise CommandError(f'Unknown task {name}')
+
+        arm_profile(name)
+        if not opts['now']:
+            self.stdout.write(self.style.SUCCESS(f'The next run of {name} will be profiled'))
+            return
+
+        result = app.tasks[name].apply()
+        run = TaskRun.objects.filter(task_id=result.id).first()
+        if run is None or not run.profile:
+            raise CommandError('No profile was recorded (is TASK_METRICS_ENABLED off?)')
+        self.stdout.write(run.profile)
+        self.stdout.write(self.style.SUCCESS(
+            f'{name} {run.state} in {run.runtime_seconds:.2f}s, '
+            f'{run.db_queries} queries ({run.db_seconds:.2f}s), HTTP {run.http_seconds:.2f}s'))
@@ -0,0 +1,51 @@
+"""
+Put stored Stripe webhook events back in line for processing.
+
+    python manage.py replay_stripe_events                 # every dead-lettered event
+    python manage.py replay_stripe_events evt_123 evt_456 # specific events, any status
+    python manage.py replay_stripe_events --customer cus_123 --status failed
+    python manage.py replay_stripe_events evt_123 --now   # process inline, no worker
+
+Replayed events get a fresh attempt budget and run in Stripe creation order
+with the rest of their customer's queue.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.payment_models import StripeEvent
+from apps.accounts.stripe_events import enqueue, process_customer, replay
+
+
+class Command(BaseCommand):
+    help = 'Replay stored Stripe webhook events (dead-lettered ones by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', help='Stripe event ids (evt_...).')
+        parser.add_argument('--customer', help='Only events for this Stripe customer id.')
+        parser.add_argument('--status', choices=[s for s, _ in StripeEvent.STATUS_CHOICES],
+                            help='Only events in this status (default: dead, unless ids are given).')
+        parser.add_argument('--now', action='store_true',
+                            help='Process inline instead of enqueueing to Celery.')
+
+    def handle(self, *args, **opts):
+        events = StripeEvent.objects.all()
+        if opts['event_ids']:
+            events = events.filter(stripe_event_id__in=opts['event_ids'])
+            missing = set(opts['event_ids']) - set(events.values_list('stripe_event_id', flat=True))
+            if missing:
+                raise CommandError(f"Unknown Stripe events: {', '.join(sorted(missing))}")
+        if opts['customer']:
+            events = events.filter(customer_id=opts['customer'])
+        status = opts['status'] or (None if opts['event_ids'] else 'dead')
+        if status:
+            events = events.filter(status=status)
+
+        count = events.exclude(status='processing').count()
+        customers = replay(events)
+        for customer_id in sorted(customers):
+            if opts['now']:
+                process_customer(customer_id)
+            else:
+                enqueue(customer_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {count} event(s) across {len(customers)} customer(s)'))
@@ -0,0 +1,150 @@
+"""
+Member directory behind the community page (EnhancedCommunityView).
+
+The page used to run two full-table COUNTs per request, annotate follow
+status with a Case/When over the member's whole following list, search
+with unanchored icontains across four columns, and page with OFFSET (plus
+the COUNT the paginator needs). At six-figure member counts each of those
+is a scan. Instead:
+
+- Search: terms shorter than TRIGRAM_MIN_LENGTH match name prefixes only;
+  longer terms match anywhere in names and bios. On PostgreSQL both are
+  served by the pg_trgm GIN indexes from migration 0072, which index the
+  UPPER(column) expressions Django's icontains / istartswith compile to.
+- Order and paging: newest last_seen first, then id, walked with a keyset
+  cursor against the partial users_directory_idx index; never-seen members
+  come last. There are no page numbers, only "next" and "back to start".
+- Counts: total and online members are cached for COUNTS_SECONDS and
+  refreshed on a schedule by refresh_directory_counts.
+- Per page: follow status, follower counts and recovery pals are resolved
+  in one batch for the members shown.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts import social_graph
+
+PAGE_SIZE = 24
+TRIGRAM_MIN_LENGTH = 3
+ONLINE_MINUTES = 5
+NEW_MEMBER_DAYS = 30
+COUNTS_KEY = 'member-directory:counts'
+COUNTS_SECONDS = 5 * 60
+
+
+def _models():
+    from apps.accounts.models import RecoveryPal, User, UserProfile
+    return RecoveryPal, User, UserProfile
+
+
+def refresh_counts(now=None):
+    """Recount and cache {'total', 'online'} active members."""
+    _, User, _ = _models()
+    online_since = (now or timezone.now()) - timedelta(minutes=ONLINE_MINUTES)
+    active = User.objects.filter(is_active=True)
+    counts = {'total': active.count(), 'online': active.filter(last_seen__gte=online_since).count()}
+    cache.set(COUNTS_KEY, counts, COUNTS_SECONDS)
+    return counts
+
+
+def counts():
+    return cache.get(COUNTS_KEY) or refresh_counts()
+
+
+def search_q(term):
+    """Q matching `term` in member names (and bios for longer terms)."""
+    _, _, UserProfile = _models()
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return Q(username__istartswith=term) | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+    return (
+        Q(username__icontains=term) | Q(first_name__icontains=term) | Q(last_name__icontains=term)
+        | Q(id__in=UserProfile.objects.filter(bio__icontains=term).values('user_id'))
+    )
+
+
+def encode_cursor(member):
+    seen = member.last_seen
+    return f"{int(seen.timestamp() * 1_000_000) if seen else 'n'}-{member.pk}"
+
+
+def decode_cursor(cursor):
+    """(last_seen or None, id) from encode_cursor(), or None if malformed."""
+    try:
+        seen, member_id = cursor.split('-', 1)
+        member_id = int(member_id)
+        if seen == 'n':
+            return None, member_id
+        return datetime.fromtimestamp(int(seen) / 1_000_000, tz=dt_timezone.utc), member_id
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def members(viewer, connection_filter=None, search=None, now=None):
+    """Filtered directory queryset; page() orders and slices it."""
+    _, User, _ = _models()
+    now = now or timezone.now()
+    queryset = User.objects.filter(is_active=True).exclude(pk=viewer.pk)
+
+    if connection_filter == 'online':
+        queryset = queryset.filter(last_seen__gte=now - timedelta(minutes=ONLINE_MINUTES))
+    elif connection_filter == 'following':
+        queryset = queryset.filter(id__in=social_graph.following_ids(viewer.pk))
+    elif connection_filter == 'sponsors':
+        queryset = queryset.filter(is_sponsor=True)
+    elif connection_filter == 'new':
+        queryset = queryset.filter(date_joined__gte=now - timedelta(days=NEW_MEMBER_DAYS))
+
+    search = (search or '').strip()
+    if search:
+        queryset = queryset.filter(search_q(search))
+    return queryset.select_related('profile')
+
+
+def page(queryset, cursor=None, size=PAGE_SIZE):
+    """(members, next_cursor) for the page after `cursor`.
+
+    Members who have been seen come first, by (last_seen, id) descending
+    off users_directory_idx; never-seen members follow by id. A page that
+    straddles the two takes a second query.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    rows = []
+    if position is None or position[0] is not None:
+        seen = queryset.filter(last_seen__isnull=False).order_by('-last_seen', '-id')
+        if position is not None:
+            last_seen, member_id = position
+            seen = seen.filter(Q(last_seen__lt=last_seen) | Q(last_seen=last_seen, id__lt=member_id))
+        rows = list(seen[:size + 1])
+    if len(rows) <= size:
+        never_seen = queryset.filter(last_seen__isnull=True).order_by('-id')
+        if position is not None and position[0] is None:
+            never_seen = never_seen.filter(id__lt=position[1])
+        rows += never_seen[:size + 1 - len(rows)]
+    if len(rows) > size:
+        return rows[:size], encode_cursor(rows[size - 1])
+    return rows, None
+
+
+def annotate_page(viewer, page_members):
+    """Set is_followed, has_recovery_pal and follow counts on each member.
+
+    Returns whether the viewer has a recovery pal, from the same query.
+    """
+    RecoveryPal, _, _ = _models()
+    ids = [member.pk for member in page_members]
+    followed = social_graph.followed_among(viewer.pk, ids)
+    social_graph.attach_counts(page_members)
+
+    paired = set()
+    for user1_id, user2_id in RecoveryPal.objects.filter(
+        Q(user1_id__in=ids + [viewer.pk]) | Q(user2_id__in=ids + [viewer.pk]), status='active',
+    ).values_list('user1_id', 'user2_id'):
+        paired.update((user1_id, user2_id))
+
+    for member in page_members:
+        member.is_followed = member.pk in followed
+        member.has_recovery_pal = member.pk in paired
+    return viewer.pk in paired
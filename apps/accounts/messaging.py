@@ -0,0 +1,214 @@
+"""
+Direct messages threaded into conversations (see conversation_models.py).
+
+The inbox used to list raw SupportMessage rows with sender OR recipient
+across the whole table, every inbox GET marked everything read with a
+blanket UPDATE, and unread badges ran an EXISTS / COUNT per render. Now:
+
+- Sending: SupportMessage.save() files the message under the pair's
+  Conversation, and record_message() moves both participants'
+  last_message_at, bumps the recipient's unread_count and advances the
+  sender's read watermark, in one UPDATE.
+- Inbox: threads() is one query per page over conversation_inbox_idx,
+  walked by (last_message_at, id) keyset cursor.
+- Thread: thread_page() reads messages newest-first by id off
+  supportmessage_thread_idx, `before` an id cursor. Opening a thread
+  (mark_read) zeroes that participant's counter and moves the watermark;
+  nothing else is touched.
+- Badges: unread_total() is cached per member under dm:unread:<user>.
+  New messages INCR it once committed; reads and deletes drop it, and a miss is rebuilt
+  with one SUM over the member's participant rows.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, PositiveIntegerField, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from apps.accounts import dashboard_sections
+
+THREADS_PER_PAGE = 20
+MESSAGES_PER_PAGE = 30
+UNREAD_KEY = 'dm:unread:{user_id}'
+UNREAD_SECONDS = 60 * 60 * 24
+
+
+def _models():
+    from apps.accounts.models import Conversation, ConversationParticipant, SupportMessage
+    return Conversation, ConversationParticipant, SupportMessage
+
+
+# ---- Unread badge ----
+
+def unread_total(user_id):
+    key = UNREAD_KEY.format(user_id=user_id)
+    total = cache.get(key)
+    if total is None:
+        _, ConversationParticipant, _ = _models()
+        total = ConversationParticipant.objects.filter(
+            user_id=user_id, unread_count__gt=0,
+        ).aggregate(total=Sum('unread_count'))['total'] or 0
+        cache.set(key, total, UNREAD_SECONDS)
+    return total
+
+
+def _unread_changed(user_id, delta=None):
+    key = UNREAD_KEY.format(user_id=user_id)
+    if delta is None:
+        cache.delete(key)
+    else:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass  # Not cached; the next read rebuilds it.
+    dashboard_sections.invalidate([user_id], 'inbox')
+
+
+# ---- Write path ----
+
+def conversation_between(user_a_id, user_b_id):
+    """The pair's Conversation, created with both participant rows if new."""
+    Conversation, ConversationParticipant, _ = _models()
+    low, high = sorted((user_a_id, user_b_id))
+    conversation = Conversation.objects.filter(user_low_id=low, user_high_id=high).first()
+    if conversation is not None:
+        return conversation
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(user_low_id=low, user_high_id=high)
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation=conversation, user_id=user_id)
+                for user_id in {low, high}
+            ])
+    except IntegrityError:
+        # Both members messaged each other at once; the other request won.
+        conversation = Conversation.objects.get(user_low_id=low, user_high_id=high)
+    return conversation
+
+
+def record_message(message):
+    """Apply a newly saved message to its conversation and participants."""
+    Conversation, ConversationParticipant, _ = _models()
+    Conversation.objects.filter(pk=message.conversation_id).update(
+        last_message=message, last_message_at=message.created_at)
+    ConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+        last_message_at=message.created_at,
+        unread_count=Case(
+            When(user_id=message.recipient_id, then=F('unread_count') + 1),
+            default=F('unread_count'),
+            output_field=PositiveIntegerField(),
+        ),
+        last_read_message_id=Case(
+            When(user_id=message.sender_id, then=Value(message.pk)),
+            default=F('last_read_message_id'),
+            output_field=BigIntegerField(),
+        ),
+    )
+    # After commit, so a rolled-back send can't leave the badge one too high.
+    recipient_id = message.recipient_id
+    transaction.on_commit(lambda: _unread_changed(recipient_id, 1))
+
+
+def mark_read(participant):
+    """Mark the participant's thread read up to its latest message."""
+    _, ConversationParticipant, SupportMessage = _models()
+    conversation = participant.conversation
+    if not participant.unread_count and participant.last_read_message_id == conversation.last_message_id:
+        return False
+    ConversationParticipant.objects.filter(pk=participant.pk).update(
+        unread_count=0, last_read_message_id=conversation.last_message_id)
+    # Kept for the admin and anything still reading per-message flags.
+    SupportMessage.objects.filter(
+        conversation=conversation, recipient_id=participant.user_id, is_read=False,
+    ).update(is_read=True)
+    participant.unread_count = 0
+    participant.last_read_message_id = conversation.last_message_id
+    _unread_changed(participant.user_id)
+    return True
+
+
+def retract_message(message):
+    """Take a deleted message back out of its conversation."""
+    Conversation, ConversationParticipant, SupportMessage = _models()
+    if not message.conversation_id:
+        return
+    if not message.is_read and message.sender_id != message.recipient_id:
+        # Still counted as unread if it's past the recipient's watermark.
+        ConversationParticipant.objects.filter(
+            Q(last_read_message_id__isnull=True) | Q(last_read_message_id__lt=message.pk),
+            conversation_id=message.conversation_id, user_id=message.recipient_id,
+        ).update(unread_count=Greatest(
+            F('unread_count') - 1, Value(0), output_field=PositiveIntegerField()))
+    # Deleting the thread's last message nulled the pointer (SET_NULL).
+    latest_id = SupportMessage.objects.filter(
+        conversation_id=message.conversation_id).order_by('-id').values_list('id', flat=True).first()
+    Conversation.objects.filter(pk=message.conversation_id, last_message__isnull=True).update(
+        last_message_id=latest_id)
+    _unread_changed(message.recipient_id)
+
+
+# ---- Read path ----
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(participant):
+    micros = (participant.last_message_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{participant.pk}"
+
+
+def decode_cursor(cursor):
+    """(last_message_at, participant id) from encode_cursor(), or None if malformed."""
+    try:
+        micros, pk = cursor.split('-', 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def threads(user, cursor=None, unread_only=False, size=THREADS_PER_PAGE):
+    """(participants, next_cursor): the member's threads, newest activity first.
+
+    Each participant has .other_user and .is_unread set; the conversation's
+    last message is loaded alongside.
+    """
+    _, ConversationParticipant, _ = _models()
+    queryset = ConversationParticipant.objects.filter(user=user).select_related(
+        'conversation__last_message', 'conversation__user_low', 'conversation__user_high',
+    ).order_by('-last_message_at', '-id')
+    if unread_only:
+        queryset = queryset.filter(unread_count__gt=0)
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        at, pk = position
+        queryset = queryset.filter(Q(last_message_at__lt=at) | Q(last_message_at=at, id__lt=pk))
+
+    rows = list(queryset[:size + 1])
+    page, next_cursor = rows[:size], None
+    if len(rows) > size:
+        next_cursor = encode_cursor(page[-1])
+    for participant in page:
+        conversation = participant.conversation
+        participant.other_user = (
+            conversation.user_high if conversation.user_low_id == user.pk else conversation.user_low
+        )
+        participant.is_unread = participant.unread_count > 0
+    return page, next_cursor
+
+
+def thread_page(participant, before=None, size=MESSAGES_PER_PAGE):
+    """(messages oldest-first, older_cursor) for one page of a thread."""
+    _, _, SupportMessage = _models()
+    queryset = SupportMessage.objects.filter(
+        conversation_id=participant.conversation_id).select_related('sender').order_by('-id')
+    if before:
+        queryset = queryset.filter(id__lt=before)
+    rows = list(queryset[:size + 1])
+    page = rows[:size]
+    older = page[-1].pk if len(rows) > size else None
+    watermark = participant.last_read_message_id or 0
+    for message in page:
+        message.is_new = message.sender_id != participant.user_id and message.pk > watermark
+    page.reverse()
+    return page, older
@@ -1,5 +1,6 @@
 import logging
 import time
+from django.middleware.gzip import GZipMiddleware
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.db import close_old_connections, connection, connections, OperationalError, InterfaceError
@@ -117,6 +118,19 @@ class DatabaseConnectionMiddleware:
             self._close_all_connections()
         return None
 
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves Server-Sent Events alone. The compressor
+    holds small writes back until it has a full block, so gzipped events
+    would sit on the server instead of reaching the client.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        return super().process_response(request, response)
+
+
 class NoCacheHTMLMiddleware:
     """
     Set Cache-Control: no-cache on HTML responses so WKWebView
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.10 on 2026-10-19 05:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_summaries(apps, schema_editor):
+    """Seed last-activity timestamps so batch jobs don't see every existing
+    member as never active. Streaks and 7-day aggregates are filled in by
+    the first verify_activity_summaries run."""
+    User = apps.get_model('accounts', 'User')
+    UserActivitySummary = apps.get_model('accounts', 'UserActivitySummary')
+    DailyCheckIn = apps.get_model('accounts', 'DailyCheckIn')
+    DailyPledge = apps.get_model('accounts', 'DailyPledge')
+    SocialPost = apps.get_model('accounts', 'SocialPost')
+    JournalEntry = apps.get_model('journal', 'JournalEntry')
+
+    def latest(model, user_field, field):
+        return dict(model.objects.values(user_field).annotate(v=Max(field)).values_list(user_field, 'v'))
+
+    checkin_dates = latest(DailyCheckIn, 'user_id', 'date')
+    checkin_times = latest(DailyCheckIn, 'user_id', 'created_at')
+    pledge_dates = latest(DailyPledge, 'user_id', 'date')
+    posts = latest(SocialPost, 'author_id', 'created_at')
+    journals = latest(JournalEntry, 'user_id', 'created_at')
+
+    batch = []
+    for user_id, last_seen in User.objects.values_list('id', 'last_seen').iterator():
+        batch.append(UserActivitySummary(
+            user_id=user_id, last_seen=last_seen,
+            last_checkin_date=checkin_dates.get(user_id),
+            last_checkin_at=checkin_times.get(user_id),
+            last_pledge_date=pledge_dates.get(user_id),
+            last_post_at=posts.get(user_id),
+            last_journal_at=journals.get(user_id),
+        ))
+        if len(batch) >= 1000:
+            UserActivitySummary.objects.bulk_create(batch)
+            batch = []
+    UserActivitySummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0067_notification_retention'),
+        ('journal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivitySummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_checkin_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('last_checkin_at', models.DateTimeField(blank=True, null=True)),
+                ('last_pledge_date', models.DateField(blank=True, null=True)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+                ('last_journal_at', models.DateTimeField(blank=True, null=True)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('checkin_streak', models.PositiveIntegerField(default=0)),
+                ('pledge_streak', models.PositiveIntegerField(default=0)),
+                ('window_date', models.DateField(blank=True, null=True)),
+                ('checkins_7d', models.PositiveSmallIntegerField(default=0)),
+                ('mood_avg_7d', models.FloatField(blank=True, null=True)),
+                ('mood_min_7d', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('craving_avg_7d', models.FloatField(blank=True, null=True)),
+                ('craving_max_7d', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'user activity summaries',
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.10 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0069_stripe_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=200)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('queue', models.CharField(blank=True, max_length=50)),
+                ('state', models.CharField(max_length=20)),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('runtime_seconds', models.FloatField()),
+                ('queue_wait_seconds', models.FloatField(blank=True, null=True)),
+                ('db_queries', models.PositiveIntegerField(default=0)),
+                ('db_seconds', models.FloatField(default=0)),
+                ('http_calls', models.PositiveIntegerField(default=0)),
+                ('http_seconds', models.FloatField(default=0)),
+                ('items', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_rss_kb', models.PositiveIntegerField(blank=True, null=True)),
+                ('rss_growth_kb', models.PositiveIntegerField(blank=True, null=True)),
+                ('profile', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['task_name', '-started_at'], name='accounts_ta_task_na_5001fe_idx')],
+            },
+        ),
+    ]
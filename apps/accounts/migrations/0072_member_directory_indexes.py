@@ -0,0 +1,45 @@
+# Generated by Django 5.0.10 on 2026-10-19 07:11
+
+from django.db import migrations, models
+
+# pg_trgm GIN indexes over the UPPER(column) expressions that Django's
+# icontains / istartswith compile to on PostgreSQL, so member directory
+# searches (member_directory.search_q) don't scan the users table.
+TRIGRAM_INDEXES = (
+    ('users_username_trgm', 'users', 'username'),
+    ('users_first_name_trgm', 'users', 'first_name'),
+    ('users_last_name_trgm', 'users', 'last_name'),
+    ('accounts_userprofile_bio_trgm', 'accounts_userprofile', 'bio'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0071_user_recommendations'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True), ('last_seen__isnull', False)), fields=['-last_seen', '-id'], name='users_directory_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
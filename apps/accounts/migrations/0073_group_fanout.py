@@ -0,0 +1,34 @@
+# Generated by Django 5.0.10 on 2026-10-19 07:23
+
+from django.db import migrations, models
+
+
+def mark_existing_posts_fanned_out(apps, schema_editor):
+    """Existing posts were notified synchronously; don't fan them out again."""
+    GroupPost = apps.get_model('accounts', 'GroupPost')
+    GroupPost.objects.filter(fanout_at__isnull=True).update(fanout_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0072_member_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupmembership',
+            name='notification_level',
+            field=models.CharField(choices=[('all', 'Every post (notification and push)'), ('digest', 'Daily summary'), ('muted', 'Muted')], default='all', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='grouppost',
+            name='fanout_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_posts_fanned_out, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='grouppost',
+            index=models.Index(condition=models.Q(('fanout_at__isnull', True)), fields=['group'], name='grouppost_pending_fanout_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.10 on 2026-10-19 07:35
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_progress(apps, schema_editor):
+    ChallengeCheckIn = apps.get_model('accounts', 'ChallengeCheckIn')
+    ChallengeParticipant = apps.get_model('accounts', 'ChallengeParticipant')
+    check_ins = ChallengeCheckIn.objects.filter(participant=OuterRef('pk')).order_by().values('participant')
+    completed = check_ins.filter(completed_daily_goal=True)
+    ChallengeParticipant.objects.update(
+        days_completed=Coalesce(Subquery(completed.annotate(n=Count('id')).values('n')), 0),
+        check_in_count=Coalesce(Subquery(check_ins.annotate(n=Count('id')).values('n')), 0),
+        last_check_in_date=Subquery(check_ins.annotate(last=Max('date')).values('last')),
+        last_completed_date=Subquery(completed.annotate(last=Max('date')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0073_group_fanout'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='challengeparticipant',
+            name='accounts_ch_challen_3fca55_idx',
+        ),
+        migrations.AddField(
+            model_name='challengeparticipant',
+            name='check_in_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='challengeparticipant',
+            name='last_check_in_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='challengeparticipant',
+            name='last_completed_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='challengeparticipant',
+            index=models.Index(fields=['challenge', 'status', '-days_completed', '-current_streak', '-longest_streak'], name='challenge_leaderboard_idx'),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
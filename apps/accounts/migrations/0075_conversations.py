@@ -0,0 +1,100 @@
+# Generated by Django 5.0.10 on 2026-10-19 08:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    Conversation = apps.get_model('accounts', 'Conversation')
+    ConversationParticipant = apps.get_model('accounts', 'ConversationParticipant')
+    SupportMessage = apps.get_model('accounts', 'SupportMessage')
+
+    threads = {}
+    rows = SupportMessage.objects.order_by('id').values_list(
+        'id', 'sender_id', 'recipient_id', 'is_read', 'created_at')
+    for pk, sender_id, recipient_id, is_read, created_at in rows.iterator():
+        pair = tuple(sorted((sender_id, recipient_id)))
+        thread = threads.setdefault(pair, {'ids': [], 'unread': {}, 'last': None})
+        thread['ids'].append(pk)
+        thread['last'] = (pk, created_at)
+        if not is_read and sender_id != recipient_id:
+            thread['unread'][recipient_id] = thread['unread'].get(recipient_id, 0) + 1
+
+    for (low, high), thread in threads.items():
+        last_id, last_at = thread['last']
+        conversation = Conversation.objects.create(
+            user_low_id=low, user_high_id=high, last_message_id=last_id, last_message_at=last_at)
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(
+                conversation=conversation, user_id=user_id, last_message_at=last_at,
+                unread_count=thread['unread'].get(user_id, 0),
+                # Threads with unread messages start without a watermark until opened.
+                last_read_message_id=None if thread['unread'].get(user_id) else last_id,
+            )
+            for user_id in {low, high}
+        ])
+        SupportMessage.objects.filter(id__in=thread['ids']).update(conversation=conversation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0074_challenge_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_message_id', models.BigIntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.supportmessage')),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='supportmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='accounts.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='supportmessage',
+            index=models.Index(fields=['conversation', '-id'], name='supportmessage_thread_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='accounts.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversation',
+            unique_together={('user_low', 'user_high')},
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_message_at', '-id'], name='conversation_inbox_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversationparticipant',
+            unique_together={('conversation', 'user')},
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.10 on 2026-10-19 09:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0075_conversations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFanoutRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_membership_id', models.BigIntegerField(default=0)),
+                ('notified', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.recoverygroup')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'completed_at'], name='group_fanout_run_idx')],
+            },
+        ),
+    ]
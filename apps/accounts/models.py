@@ -9,6 +9,7 @@ from datetime import timedelta
 from .invite_models import WaitlistRequest, InviteCode, SystemSettings
 from .payment_models import Subscription, Transaction, PaymentMethod, Invoice, SubscriptionPlan
 from .ab_testing import ABTest, ABTestVariant, ABTestAssignment, ABTestConversion
+from . import social_graph
 
 # Recovery stage choices for onboarding and matching
 RECOVERY_STAGE_CHOICES = [
@@ -170,6 +171,13 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Keyset order of the member directory (see member_directory.page).
+            models.Index(
+                fields=['-last_seen', '-id'], name='users_directory_idx',
+                condition=models.Q(is_active=True, last_seen__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.username
@@ -392,30 +400,27 @@ class User(AbstractUser):
 
     @property
     def has_unread_messages(self):
-        return self.received_messages.filter(is_read=False).exists()
+        from apps.accounts import messaging
+        return messaging.unread_total(self.pk) > 0
 
     # NEW COMMUNITY METHODS
+    # Follow edges are read from the cached graph (social_graph.py); callers
+    # that only need ids should use it directly.
     def get_following(self):
         """Get users this user is following"""
-        return User.objects.filter(
-            follower_connections__follower=self,
-            follower_connections__connection_type='follow'
-        ).distinct()
+        return User.objects.filter(id__in=social_graph.following_ids(self.pk))
 
     def get_followers(self):
         """Get users following this user"""
-        return User.objects.filter(
-            following_connections__following=self,
-            following_connections__connection_type='follow'
-        ).distinct()
+        return User.objects.filter(id__in=social_graph.follower_ids(self.pk))
 
     def is_following(self, user):
         """Check if this user is following another user"""
-        return UserConnection.objects.filter(
-            follower=self,
-            following=user,
-            connection_type='follow'
-        ).exists()
+        return social_graph.is_following(self.pk, user.pk)
+
+    def get_connected_ids(self):
+        """Ids of users this user follows or is followed by"""
+        return social_graph.connected_ids(self.pk)
 
     def follow_user(self, user):
         """Follow another user"""
@@ -469,13 +474,18 @@ class User(AbstractUser):
             memberships__status__in=['active', 'moderator', 'admin']
         ).distinct()
 
+    # Lists prime these for a whole page with social_graph.attach_counts().
     @property
     def followers_count(self):
-        return self.follower_connections.filter(connection_type='follow').count()
+        if hasattr(self, '_graph_counts'):
+            return self._graph_counts[0]
+        return social_graph.counts([self.pk])[self.pk][0]
 
     @property
     def following_count(self):
-        return self.following_connections.filter(connection_type='follow').count()
+        if hasattr(self, '_graph_counts'):
+            return self._graph_counts[1]
+        return social_graph.counts([self.pk])[self.pk][1]
 
 
 class UserProfile(models.Model):
@@ -565,13 +575,32 @@ class SupportMessage(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set on save; see messaging.py.
+    conversation = models.ForeignKey(
+        'accounts.Conversation', on_delete=models.CASCADE,
+        null=True, blank=True, related_name='messages',
+    )
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Thread pages are keyset reads by id within a conversation.
+            models.Index(fields=['conversation', '-id'], name='supportmessage_thread_idx'),
+        ]
 
     def __str__(self):
         return f"From {self.sender} to {self.recipient}: {self.subject}"
 
+    def save(self, *args, **kwargs):
+        from apps.accounts import messaging
+
+        created = self._state.adding
+        if created and self.conversation_id is None:
+            self.conversation = messaging.conversation_between(self.sender_id, self.recipient_id)
+        super().save(*args, **kwargs)
+        if created:
+            messaging.record_message(self)
+
 
 # ACTIVITY FEED MODELS
 class ActivityFeed(models.Model):
@@ -1115,6 +1144,15 @@ class GroupMembership(models.Model):
     # Engagement tracking
     last_active = models.DateTimeField(null=True, blank=True)
 
+    # How new posts reach this member (see group_fanout.py)
+    NOTIFICATION_LEVELS = (
+        ('all', 'Every post (notification and push)'),
+        ('digest', 'Daily summary'),
+        ('muted', 'Muted'),
+    )
+    notification_level = models.CharField(
+        max_length=10, choices=NOTIFICATION_LEVELS, default='all')
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1169,6 +1207,9 @@ class GroupPost(models.Model):
     is_pinned = models.BooleanField(default=False)
     is_anonymous = models.BooleanField(default=False)
 
+    # Set when group_fanout claims the post for member notifications.
+    fanout_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1177,6 +1218,11 @@ class GroupPost(models.Model):
         indexes = [
             models.Index(fields=['group', 'post_type']),
             models.Index(fields=['author', 'created_at']),
+            # Posts not yet claimed by group_fanout; stays tiny.
+            models.Index(
+                fields=['group'], name='grouppost_pending_fanout_idx',
+                condition=models.Q(fanout_at__isnull=True),
+            ),
         ]
 
     def __str__(self):
@@ -1332,16 +1378,13 @@ class GroupChallenge(models.Model):
 
     @property
     def participant_count(self):
-        return self.participants.filter(status='active').count()
+        from apps.accounts import challenge_progress
+        return challenge_progress.stats(self.pk)['total_participants']
 
     @property
     def completion_rate(self):
-        active_participants = self.participants.filter(status='active').count()
-        if active_participants == 0:
-            return 0
-        completed_participants = self.participants.filter(
-            status='completed').count()
-        return round((completed_participants / active_participants) * 100, 1)
+        from apps.accounts import challenge_progress
+        return challenge_progress.stats(self.pk)['completion_rate']
 
     @property
     def days_remaining(self):
@@ -1424,6 +1467,9 @@ class ChallengeParticipant(models.Model):
     days_completed = models.IntegerField(default=0)
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
+    check_in_count = models.IntegerField(default=0)
+    last_check_in_date = models.DateField(null=True, blank=True)
+    last_completed_date = models.DateField(null=True, blank=True)
 
     # Motivation and Notes
     personal_goal = models.TextField(
@@ -1451,7 +1497,12 @@ class ChallengeParticipant(models.Model):
         unique_together = ('challenge', 'user')
         ordering = ['-days_completed', '-current_streak']
         indexes = [
-            models.Index(fields=['challenge', 'status']),
+            # Serves challenge_progress.leaderboard() and plain
+            # (challenge, status) lookups alike.
+            models.Index(
+                fields=['challenge', 'status', '-days_completed', '-current_streak', '-longest_streak'],
+                name='challenge_leaderboard_idx',
+            ),
             models.Index(fields=['user', 'status']),
         ]
 
@@ -1542,29 +1593,24 @@ class ChallengeCheckIn(models.Model):
     def encouragement_count(self):
         return self.encouragement_received.count()
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        # Update participant progress
-        if self.completed_daily_goal:
-            participant = self.participant
-            participant.days_completed = participant.check_ins.filter(
-                completed_daily_goal=True
-            ).count()
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() can tell whether the goal was just completed.
+        instance._loaded_completed = dict(zip(field_names, values)).get('completed_daily_goal')
+        return instance
 
-            # Update streak logic
-            yesterday = self.date - timezone.timedelta(days=1)
-            if participant.check_ins.filter(
-                date=yesterday, completed_daily_goal=True
-            ).exists():
-                participant.current_streak += 1
-            else:
-                participant.current_streak = 1
+    def save(self, *args, **kwargs):
+        from apps.accounts import challenge_progress
 
-            if participant.current_streak > participant.longest_streak:
-                participant.longest_streak = participant.current_streak
+        created = self._state.adding
+        super().save(*args, **kwargs)
 
-            participant.update_progress()
+        # Apply this check-in to the participant's progress
+        challenge_progress.record_check_in(
+            self, created=created, was_completed=bool(getattr(self, '_loaded_completed', False)),
+        )
+        self._loaded_completed = self.completed_daily_goal
 
 
 class ChallengeComment(models.Model):
@@ -1723,11 +1769,35 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
 
+    ICONS = {
+        'pal_request': 'fa-user-friends',
+        'pal_accepted': 'fa-handshake',
+        'message': 'fa-envelope',
+        'follow': 'fa-user-plus',
+        'sponsor_request': 'fa-hand-holding-heart',
+        'sponsor_accepted': 'fa-heart',
+        'challenge_invite': 'fa-trophy',
+        'challenge_pal': 'fa-users',
+        'milestone': 'fa-award',
+        'group_invite': 'fa-users',
+        'comment': 'fa-comment',
+        'like': 'fa-heart',
+        'new_blog_post': 'fa-newspaper',
+        'checkin_reminder': 'fa-circle-check',
+        'meeting_reminder': 'fa-calendar-check',
+        'pal_nudge': 'fa-hand-holding-heart',
+        'group_post': 'fa-users',
+        'group_comment': 'fa-comment-dots',
+        'group_join': 'fa-user-plus',
+    }
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of a member's list (notification_service).
+            models.Index(fields=['recipient', '-created_at', '-id'], name='accounts_notif_recip_keyset'),
         ]
 
     def __str__(self):
@@ -1741,28 +1811,7 @@ class Notification(models.Model):
 
     def get_icon(self):
         """Return appropriate icon for notification type"""
-        icons = {
-            'pal_request': 'fa-user-friends',
-            'pal_accepted': 'fa-handshake',
-            'message': 'fa-envelope',
-            'follow': 'fa-user-plus',
-            'sponsor_request': 'fa-hand-holding-heart',
-            'sponsor_accepted': 'fa-heart',
-            'challenge_invite': 'fa-trophy',
-            'challenge_pal': 'fa-users',
-            'milestone': 'fa-award',
-            'group_invite': 'fa-users',
-            'comment': 'fa-comment',
-            'like': 'fa-heart',
-            'new_blog_post': 'fa-newspaper',
-            'checkin_reminder': 'fa-circle-check',
-            'meeting_reminder': 'fa-calendar-check',
-            'pal_nudge': 'fa-hand-holding-heart',
-            'group_post': 'fa-users',
-            'group_comment': 'fa-comment-dots',
-            'group_join': 'fa-user-plus',
-        }
-        return icons.get(self.notification_type, 'fa-bell')
+        return self.ICONS.get(self.notification_type, 'fa-bell')
 
 
 class DeviceToken(models.Model):
@@ -1916,25 +1965,26 @@ class SocialPost(models.Model):
     def likes_count(self):
         return self.likes.count()
 
-    def is_visible_to(self, user):
-        """Check if a post is visible to a specific user"""
+    def is_visible_to(self, user, connected_ids=None):
+        """Check if a post is visible to a specific user.
+
+        Feeds that check many posts pass `connected_ids` — the ids of
+        everyone `user` follows or is followed by — so the cached follow
+        graph is read once per feed rather than once per post.
+        """
         if self.visibility == 'public':
             return True
         if self.visibility == 'private':
-            return user == self.author
+            return user is not None and user.pk == self.author_id
         if self.visibility == 'friends':
             # Visible to author and their followers/following (mutual connections)
-            if user == self.author:
+            if user is not None and user.pk == self.author_id:
                 return True
-            return UserConnection.objects.filter(
-                follower=self.author,
-                following=user,
-                connection_type='follow'
-            ).exists() or UserConnection.objects.filter(
-                follower=user,
-                following=self.author,
-                connection_type='follow'
-            ).exists()
+            if user is None:
+                return False
+            if connected_ids is None:
+                connected_ids = social_graph.connected_ids(user.pk)
+            return self.author_id in connected_ids
         return False
 
     def get_reaction_counts(self):
@@ -2065,3 +2115,23 @@ from apps.accounts.supporter_models import SupporterLink  # noqa: E402, F401
 
 # Re-export the relapse prevention plan model so Django discovers it at app load
 from apps.accounts.plan_models import RelapsePreventionPlan  # noqa: E402, F401
+
+# Re-export broadcast notification models so Django discovers them at app load
+from apps.accounts.notification_models import (  # noqa: E402, F401
+    ArchivedNotification, BroadcastNotification, BroadcastRead, NotificationReadState,
+)
+
+# Re-export the activity summary model so Django discovers it at app load
+from apps.accounts.activity_models import UserActivitySummary  # noqa: E402, F401
+
+# Re-export the task metrics model so Django discovers it at app load
+from apps.accounts.task_metrics_models import TaskRun  # noqa: E402, F401
+
+# Re-export the precomputed recommendations model so Django discovers it at app load
+from apps.accounts.recommendation_models import UserRecommendations  # noqa: E402, F401
+
+# Re-export the direct-message conversation models so Django discovers them at app load
+from apps.accounts.conversation_models import Conversation, ConversationParticipant  # noqa: E402, F401
+
+# Re-export the group fan-out progress model so Django discovers it at app load
+from apps.accounts.group_fanout_models import GroupFanoutRun  # noqa: E402, F401
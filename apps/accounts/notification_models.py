@@ -0,0 +1,124 @@
+"""Broadcast notifications — one row per announcement, not per recipient.
+
+Site-wide announcements (new blog posts today) used to be fanned out as one
+Notification per active member, so every publish wrote N rows. A broadcast is
+stored once; read state lives in two small per-user structures:
+
+- NotificationReadState.broadcasts_read_at is a watermark. Every broadcast
+  created at or before it is read ("mark all as read" just moves it).
+- BroadcastRead marks single broadcasts read above the watermark (clicking
+  one item). Rows below the watermark are redundant and get pruned when the
+  watermark moves.
+
+Members only see broadcasts created after they joined, matching what the
+per-user fan-out used to deliver. See notification_service.py for the
+queries that merge these with personal notifications, and
+notification_retention.py for how old rows leave the hot tables.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class BroadcastNotification(models.Model):
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='sent_broadcasts',
+    )
+    # Same vocabulary as Notification so icons and client handling are shared.
+    notification_type = models.CharField(max_length=30)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.CharField(max_length=500, blank=True)
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, null=True, blank=True
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    # Set per-user by notification_service when listing; never stored.
+    is_read = False
+    is_broadcast = True
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"broadcast {self.notification_type}: {self.title}"
+
+    def get_icon(self):
+        from apps.accounts.models import Notification
+        return Notification.ICONS.get(self.notification_type, 'fa-bell')
+
+
+class NotificationReadState(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='notification_read_state',
+    )
+    broadcasts_read_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Broadcast watermark for {self.user_id}: {self.broadcasts_read_at}"
+
+
+class BroadcastRead(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='broadcast_reads',
+    )
+    broadcast = models.ForeignKey(
+        BroadcastNotification, on_delete=models.CASCADE, related_name='reads',
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'broadcast']
+
+    def __str__(self):
+        return f"{self.user_id} read broadcast {self.broadcast_id}"
+
+
+class ArchivedNotification(models.Model):
+    """Cold copy of a Notification moved out of the hot table by retention.
+
+    Nothing in the app reads these; they exist so support can answer "did
+    this member get told about X" after the live row is gone. Columns mirror
+    Notification; the original id is kept for cross-referencing logs.
+    """
+    original_id = models.PositiveBigIntegerField()
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='archived_notifications',
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+',
+    )
+    notification_type = models.CharField(max_length=30)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.CharField(max_length=500, blank=True)
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"archived {self.notification_type} for {self.recipient_id}"
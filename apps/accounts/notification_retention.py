@@ -0,0 +1,264 @@
+"""
+Notification storage lifecycle.
+
+Retention (archive_old_notifications task, nightly):
+
+- Read notifications older than NOTIFICATION_RETENTION_DAYS, and unread ones
+  older than NOTIFICATION_UNREAD_RETENTION_DAYS, leave the hot table. With
+  NOTIFICATION_ARCHIVE enabled they are copied to ArchivedNotification first;
+  otherwise they are simply deleted.
+- Broadcasts older than NOTIFICATION_RETENTION_DAYS are deleted along with
+  their read markers.
+
+Work happens in id-ordered batches, each its own short transaction, so the
+job never holds long locks and can stop at any point and resume next run.
+
+Partitioning (Postgres only): `manage.py partition_notifications` converts
+accounts_notification into a table range-partitioned by month on
+created_at, and maintain_notification_partitions keeps the next few months'
+partitions created ahead of time. Queries that filter on recipient and a
+recent created_at then touch only the newest partitions' indexes, and
+vacuum work stays proportional to recent activity.
+"""
+import logging
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts.models import Notification
+from apps.accounts.notification_models import ArchivedNotification, BroadcastNotification
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+# Stop starting new batches after this long; the next run picks up the rest.
+MAX_RUN_SECONDS = 10 * 60
+
+ARCHIVE_FIELDS = (
+    'id', 'recipient_id', 'sender_id', 'notification_type', 'title', 'message',
+    'link', 'content_type_id', 'object_id', 'is_read', 'created_at', 'read_at',
+)
+
+
+def _retention_days():
+    return (
+        getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+        getattr(settings, 'NOTIFICATION_UNREAD_RETENTION_DAYS', 365),
+    )
+
+
+def expired_notifications(now=None):
+    from django.db.models import Q
+
+    now = now or timezone.now()
+    read_days, unread_days = _retention_days()
+    return Notification.objects.filter(
+        Q(is_read=True, created_at__lt=now - timedelta(days=read_days))
+        | Q(is_read=False, created_at__lt=now - timedelta(days=unread_days))
+    )
+
+
+def _archive_batch(rows):
+    ArchivedNotification.objects.bulk_create([
+        ArchivedNotification(
+            original_id=row['id'],
+            recipient_id=row['recipient_id'],
+            sender_id=row['sender_id'],
+            notification_type=row['notification_type'],
+            title=row['title'],
+            message=row['message'],
+            link=row['link'],
+            content_type_id=row['content_type_id'],
+            object_id=row['object_id'],
+            is_read=row['is_read'],
+            created_at=row['created_at'],
+            read_at=row['read_at'],
+        )
+        for row in rows
+    ])
+
+
+def archive_old_notifications(now=None, archive=None, batch_size=BATCH_SIZE,
+                              max_seconds=MAX_RUN_SECONDS):
+    """Move (or delete) expired notifications in batches.
+
+    Returns the number of notifications removed from the hot table.
+    """
+    from apps.accounts.notification_service import invalidate_unread
+
+    if archive is None:
+        archive = getattr(settings, 'NOTIFICATION_ARCHIVE', True)
+    expired = expired_notifications(now).order_by('id')
+    started = time.monotonic()
+    moved = 0
+    last_id = 0
+
+    while time.monotonic() - started < max_seconds:
+        with transaction.atomic():
+            rows = list(expired.filter(id__gt=last_id).values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            if archive:
+                _archive_batch(rows)
+            ids = [row['id'] for row in rows]
+            Notification.objects.filter(id__in=ids).delete()
+        last_id = ids[-1]
+        moved += len(rows)
+        # Expired unread rows were still counted in their recipients' badges.
+        for recipient_id in {row['recipient_id'] for row in rows if not row['is_read']}:
+            invalidate_unread(recipient_id)
+
+    return moved
+
+
+def prune_old_broadcasts(now=None):
+    from apps.accounts.notification_service import broadcasts_pruned
+
+    now = now or timezone.now()
+    read_days, _ = _retention_days()
+    deleted, _ = BroadcastNotification.objects.filter(
+        created_at__lt=now - timedelta(days=read_days)
+    ).delete()
+    if deleted:
+        # Members who never read them still had them in their cached badge.
+        broadcasts_pruned()
+    return deleted
+
+
+# ========================================
+# Monthly partitions (Postgres)
+# ========================================
+
+TABLE = Notification._meta.db_table
+UNPARTITIONED_TABLE = f'{TABLE}_unpartitioned'
+ID_SEQUENCE = f'{TABLE}_partitioned_id_seq'
+MONTHS_AHEAD = 3
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def month_ranges(first, last):
+    """[(start, end), ...] month boundaries covering first..last inclusive."""
+    ranges = []
+    start = _month_start(first)
+    while start <= last:
+        end = _next_month(start)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def partition_name(start):
+    return f'{TABLE}_p{start:%Y%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD, today=None):
+    """Create any missing monthly partitions up to `months_ahead` from now."""
+    today = today or timezone.now().date()
+    last = _month_start(today)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+    created = []
+    with connection.cursor() as cursor:
+        for start, end in month_ranges(_month_start(today), last):
+            name = partition_name(start)
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            created.append(name)
+    return created
+
+
+def partition_notification_table(stdout=None):
+    """Convert accounts_notification into a monthly range-partitioned table.
+
+    Runs in one transaction under an exclusive lock: rename the old table,
+    create the partitioned parent with the same columns, create a partition
+    per month of existing data plus MONTHS_AHEAD, copy the rows, drop the old
+    table, then recreate its indexes and foreign keys under their original
+    names so later Django migrations still find them.
+
+    Partitioned tables need the partition key in the primary key, so the
+    PK becomes (id, created_at); ids still come from a single sequence and
+    stay unique.
+    """
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [TABLE])
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at), max(id) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{UNPARTITIONED_TABLE}"')
+        # Free the index names (including the pkey) for the new table.
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{UNPARTITIONED_TABLE}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        # Identity columns can't be used on partitioned tables before
+        # Postgres 17, so ids come from a plain sequence.
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{ID_SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute("SELECT setval(%s, %s, false)", [ID_SEQUENCE, (max_id or 0) + 1])
+        cursor.execute(
+            f"ALTER TABLE \"{TABLE}\" ALTER COLUMN id SET DEFAULT nextval('\"{ID_SEQUENCE}\"')")
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+
+        first = oldest.date() if oldest else timezone.now().date()
+        for start, end in month_ranges(first, timezone.now().date()):
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(start)}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        log(f'Created partitions from {first:%Y-%m}')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{UNPARTITIONED_TABLE}"')
+        log(f'Copied {cursor.rowcount} notifications')
+        cursor.execute(f'DROP TABLE "{UNPARTITIONED_TABLE}"')
+
+        # The definitions were read before the rename, so they already
+        # target the new parent; on a partitioned table each becomes a
+        # partitioned index that cascades to every partition.
+        for name, ddl in indexes:
+            if not name.endswith('_pkey'):
+                cursor.execute(ddl)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        ensure_partitions()
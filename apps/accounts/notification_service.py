@@ -0,0 +1,334 @@
+"""
+Read side of notifications: personal Notification rows merged with
+site-wide BroadcastNotification rows (see notification_models.py).
+
+Views should go through these helpers rather than `user.notifications`
+directly, otherwise broadcasts silently disappear from counts and lists.
+
+Unread counts are served from the cache so that badge polling and the push
+badge never touch the database on a hit:
+
+- notif:unread:<user> holds the personal unread count. New notifications
+  INCR it (see notification_created); marking one read DECRs it; anything
+  less precise (page marks, deletes) just drops the key.
+- notif:bunread:<user>:<latest broadcast id> holds the broadcast unread
+  count. Publishing a broadcast moves the latest id, so every member's key
+  misses once and is recomputed lazily rather than touched at publish.
+
+Missing keys are rebuilt with one COUNT. reconcile_unread_counters (beat)
+rewrites the keys of recently active members to undo any drift.
+"""
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Func, IntegerField, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.accounts.models import Notification
+from apps.accounts.notification_models import (
+    BroadcastNotification, BroadcastRead, NotificationReadState,
+)
+
+
+UNREAD_KEY = 'notif:unread:{user_id}'
+BROADCAST_UNREAD_KEY = 'notif:bunread:{user_id}:{latest}'
+LATEST_BROADCAST_KEY = 'notif:latest_broadcast'
+COUNTER_TIMEOUT = 60 * 60 * 24
+
+
+def _watermark(user):
+    return NotificationReadState.objects.filter(user=user).values('broadcasts_read_at')[:1]
+
+
+def visible_broadcasts(user):
+    """Broadcasts this member should see, annotated with their read state."""
+    return (
+        BroadcastNotification.objects
+        .filter(created_at__gt=user.date_joined)
+        .exclude(sender=user)
+        .select_related('sender')
+        .annotate(
+            read_watermark=Subquery(_watermark(user)),
+            has_read_marker=Exists(
+                BroadcastRead.objects.filter(user=user, broadcast=OuterRef('pk'))
+            ),
+        )
+    )
+
+
+def unread_broadcasts(user):
+    return (
+        visible_broadcasts(user)
+        .filter(created_at__gt=Coalesce(Subquery(_watermark(user)), user.date_joined))
+        .filter(has_read_marker=False)
+    )
+
+
+def _resolve_read_state(broadcasts):
+    for broadcast in broadcasts:
+        broadcast.is_read = broadcast.has_read_marker or (
+            broadcast.read_watermark is not None
+            and broadcast.created_at <= broadcast.read_watermark
+        )
+    return broadcasts
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Tie-break rank at equal created_at: personal rows sort before broadcasts.
+_PERSONAL, _BROADCAST = 1, 0
+
+
+def _sort_key(notification):
+    rank = _BROADCAST if getattr(notification, 'is_broadcast', False) else _PERSONAL
+    return (notification.created_at, rank, notification.pk)
+
+
+def encode_cursor(notification):
+    created_at, rank, pk = _sort_key(notification)
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{rank}.{pk}'
+
+
+def decode_cursor(cursor):
+    """(created_at, rank, pk) from encode_cursor output; ValueError if malformed."""
+    micros, rank, pk = (int(part) for part in cursor.split('.'))
+    if rank not in (_PERSONAL, _BROADCAST):
+        raise ValueError(cursor)
+    return _EPOCH + timedelta(microseconds=micros), rank, pk
+
+
+class MergedNotifications:
+    """
+    Newest-first sequence of a member's personal notifications and
+    broadcasts. Slicing ([:20]) reads at most the slice end from each table;
+    page() walks it by keyset cursor so deep pages cost the same as the
+    first and nothing ever needs a COUNT.
+    """
+
+    def __init__(self, user, unread_only=False):
+        self.personal = user.notifications.select_related('sender')
+        self.broadcasts = visible_broadcasts(user)
+        if unread_only:
+            self.personal = self.personal.filter(is_read=False)
+            self.broadcasts = unread_broadcasts(user)
+        self.personal = self.personal.order_by('-created_at', '-id')
+        self.broadcasts = self.broadcasts.order_by('-created_at', '-id')
+
+    def page(self, after=None, size=20):
+        """(items, next_cursor) for the `size` items after cursor `after`.
+
+        next_cursor is None on the last page.
+        """
+        personal, broadcasts = self.personal, self.broadcasts
+        if after:
+            created_at, rank, pk = decode_cursor(after)
+            if rank == _PERSONAL:
+                personal = personal.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+                broadcasts = broadcasts.filter(created_at__lte=created_at)
+            else:
+                personal = personal.filter(created_at__lt=created_at)
+                broadcasts = broadcasts.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # One extra row from each side tells us whether another page exists.
+        merged = list(personal[:size + 1]) + _resolve_read_state(list(broadcasts[:size + 1]))
+        merged.sort(key=_sort_key, reverse=True)
+        items = merged[:size]
+        next_cursor = encode_cursor(items[-1]) if len(merged) > size else None
+        return items, next_cursor
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        if stop is None:
+            raise TypeError('MergedNotifications slices need an end; use page() to walk it')
+        merged = list(self.personal[:stop]) + _resolve_read_state(list(self.broadcasts[:stop]))
+        merged.sort(key=_sort_key, reverse=True)
+        return merged[start:stop]
+
+
+def _latest_broadcast_id():
+    latest = cache.get(LATEST_BROADCAST_KEY)
+    if latest is None:
+        latest = BroadcastNotification.objects.aggregate(latest=Max('id'))['latest'] or 0
+        cache.set(LATEST_BROADCAST_KEY, latest, None)
+    return latest
+
+
+def _broadcast_unread_key(user_id):
+    return BROADCAST_UNREAD_KEY.format(user_id=user_id, latest=_latest_broadcast_id())
+
+
+def unread_count(user):
+    """Personal plus broadcast unread count, from the cache when possible."""
+    personal_key = UNREAD_KEY.format(user_id=user.pk)
+    broadcast_key = _broadcast_unread_key(user.pk)
+    cached = cache.get_many([personal_key, broadcast_key])
+
+    personal = cached.get(personal_key)
+    if personal is None:
+        personal = user.notifications.filter(is_read=False).count()
+        cache.add(personal_key, personal, COUNTER_TIMEOUT)
+    broadcasts = cached.get(broadcast_key)
+    if broadcasts is None:
+        broadcasts = unread_broadcasts(user).count()
+        cache.add(broadcast_key, broadcasts, COUNTER_TIMEOUT)
+    return personal + broadcasts
+
+
+def adjust_unread(user_id, delta):
+    """INCR/DECR a member's cached personal count, if it is cached at all.
+
+    A missing key is left missing: the next read rebuilds it from the
+    database, which already includes the change.
+    """
+    key = UNREAD_KEY.format(user_id=user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        return
+    if value < 0:
+        cache.delete(key)
+
+
+def invalidate_unread(user_id):
+    cache.delete_many([UNREAD_KEY.format(user_id=user_id), _broadcast_unread_key(user_id)])
+
+
+def notifications_created(notifications):
+    """Count and announce newly created personal notifications.
+
+    Called on commit by the Notification post_save handler, and directly by
+    code that bulk_creates notifications (which skips signals).
+    """
+    from apps.accounts import notification_stream
+
+    for notification in notifications:
+        if notification.is_read:
+            continue
+        adjust_unread(notification.recipient_id, 1)
+        notification_stream.publish(
+            notification.recipient_id, serialize_notification(notification))
+
+
+def broadcast_created(broadcast):
+    from apps.accounts import notification_stream
+
+    cache.set(LATEST_BROADCAST_KEY, broadcast.pk, None)
+    notification_stream.publish_broadcast(broadcast, serialize_notification(broadcast))
+
+
+def broadcasts_pruned():
+    """Drop every member's cached broadcast count after old broadcasts are
+    deleted; the latest id is unchanged, so move the key suffix instead."""
+    cache.set(LATEST_BROADCAST_KEY, f'{_latest_broadcast_id()}.{time.time_ns()}', None)
+
+
+def _unread_broadcast_counts(user_ids):
+    """{user_id: unread broadcasts}, as unread_broadcasts(user).count() for
+    each member, in one query over the users."""
+    from apps.accounts.models import User
+
+    member = OuterRef(OuterRef('pk'))
+    watermark = NotificationReadState.objects.filter(user=member).values('broadcasts_read_at')[:1]
+    unread = (
+        BroadcastNotification.objects
+        .filter(created_at__gt=OuterRef('date_joined'))
+        .filter(created_at__gt=Coalesce(Subquery(watermark), OuterRef('date_joined')))
+        .exclude(sender=OuterRef('pk'))
+        .exclude(Exists(BroadcastRead.objects.filter(user=member, broadcast=OuterRef('pk'))))
+        .order_by()
+        .annotate(n=Func('id', function='COUNT'))
+        .values('n')
+    )
+    return dict(
+        User.objects.filter(pk__in=user_ids)
+        .annotate(n=Coalesce(Subquery(unread, output_field=IntegerField()), 0))
+        .values_list('id', 'n')
+    )
+
+
+def reconcile_unread_counters(user_ids):
+    """Rewrite the cached counts for `user_ids` from the database."""
+    personal = dict(
+        Notification.objects.filter(recipient_id__in=user_ids, is_read=False)
+        .values_list('recipient_id').annotate(n=Count('id')).values_list('recipient_id', 'n')
+    )
+    values = {}
+    for user_id, broadcasts in _unread_broadcast_counts(user_ids).items():
+        values[UNREAD_KEY.format(user_id=user_id)] = personal.get(user_id, 0)
+        values[_broadcast_unread_key(user_id)] = broadcasts
+    cache.set_many(values, COUNTER_TIMEOUT)
+    return len(values) // 2
+
+
+def time_ago(created_at):
+    time_diff = timezone.now() - created_at
+    if time_diff.days > 0:
+        return f"{time_diff.days}d ago"
+    elif time_diff.seconds > 3600:
+        return f"{time_diff.seconds // 3600}h ago"
+    elif time_diff.seconds > 60:
+        return f"{time_diff.seconds // 60}m ago"
+    return "Just now"
+
+
+def serialize_notification(notif):
+    """The JSON shape shared by notifications_api and the event stream."""
+    from django.urls import reverse
+
+    if getattr(notif, 'is_broadcast', False):
+        # Broadcast ids share a number space with personal ones, so they
+        # get their own prefix and read endpoint.
+        notif_id = f'broadcast-{notif.id}'
+        read_url = reverse('accounts:mark_broadcast_read', args=[notif.id])
+    else:
+        notif_id = notif.id
+        read_url = reverse('accounts:mark_notification_read', args=[notif.id])
+
+    sender = notif.sender
+    return {
+        'id': notif_id,
+        'type': notif.notification_type,
+        'title': notif.title,
+        'message': notif.message,
+        'link': notif.link,
+        'is_read': notif.is_read,
+        'read_url': read_url,
+        'time_ago': time_ago(notif.created_at),
+        'icon': notif.get_icon(),
+        'sender_name': sender.get_full_name() or sender.username if sender else None,
+        'sender_avatar': sender.avatar.url if sender and sender.avatar else None,
+    }
+
+
+def mark_read(user, notifications):
+    """Mark a page of merged notifications read for `user`."""
+    now = timezone.now()
+    personal_ids = [n.pk for n in notifications if not n.is_read and not getattr(n, 'is_broadcast', False)]
+    broadcast_ids = [n.pk for n in notifications if not n.is_read and getattr(n, 'is_broadcast', False)]
+    if personal_ids:
+        Notification.objects.filter(recipient=user, pk__in=personal_ids).update(is_read=True, read_at=now)
+    if broadcast_ids:
+        BroadcastRead.objects.bulk_create(
+            [BroadcastRead(user=user, broadcast_id=pk) for pk in broadcast_ids],
+            ignore_conflicts=True,
+        )
+    if personal_ids or broadcast_ids:
+        invalidate_unread(user.pk)
+
+
+def mark_all_read(user):
+    now = timezone.now()
+    user.notifications.filter(is_read=False).update(is_read=True, read_at=now)
+    NotificationReadState.objects.update_or_create(user=user, defaults={'broadcasts_read_at': now})
+    # Markers at or below the watermark carry no information any more.
+    BroadcastRead.objects.filter(user=user, broadcast__created_at__lte=now).delete()
+    cache.set_many({
+        UNREAD_KEY.format(user_id=user.pk): 0,
+        _broadcast_unread_key(user.pk): 0,
+    }, COUNTER_TIMEOUT)
@@ -0,0 +1,141 @@
+"""
+Server-Sent Events stream of notification activity.
+
+Connected clients receive `count` events whenever their unread count changes
+and `notification` events (the notifications_api JSON shape) as new
+notifications land, instead of polling unread_count_api.
+
+Publishing goes over Redis pub/sub: one channel per member plus a shared
+broadcast channel. Without Redis (local dev) the stream falls back to
+re-reading the cached unread counter every few seconds, which still never
+touches the database on a cache hit.
+
+The stream holds its connection open, so it is only served under ASGI
+(recovery_hub.asgi, see the `stream` process in the Procfile). Under WSGI it
+answers 503 and clients keep polling — a held-open response would pin a
+whole sync worker.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from apps.accounts.notification_service import unread_count
+
+logger = logging.getLogger(__name__)
+
+USER_CHANNEL = 'notifications:user:{user_id}'
+BROADCAST_CHANNEL = 'notifications:broadcast'
+
+# Streams end after this long and the browser's EventSource reconnects, so
+# connections rebalance across stream workers and deploys drain quickly.
+STREAM_MAX_SECONDS = 300
+RECONNECT_MS = 3000
+HEARTBEAT_SECONDS = 20
+# Counter re-check interval when there is no Redis pub/sub to wake us.
+FALLBACK_POLL_SECONDS = 10
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _publish(channel, payload):
+    if not getattr(settings, 'REDIS_URL', None):
+        return
+    try:
+        _redis().publish(channel, json.dumps(payload))
+    except Exception as e:
+        # Delivery is best-effort: clients still see the change on their
+        # next count check.
+        logger.warning(f"Notification stream publish to {channel} failed: {e}")
+
+
+def publish(user_id, notification_data):
+    _publish(USER_CHANNEL.format(user_id=user_id), {'notification': notification_data})
+
+
+def publish_broadcast(broadcast, notification_data):
+    _publish(BROADCAST_CHANNEL, {
+        'notification': notification_data,
+        'sender_id': broadcast.sender_id,
+    })
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _redis_messages(user, deadline):
+    """Yield notification payloads for `user`, or None on each idle tick."""
+    import redis.asyncio as aioredis
+
+    client = aioredis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(USER_CHANNEL.format(user_id=user.pk), BROADCAST_CHANNEL)
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=HEARTBEAT_SECONDS)
+            if message is None:
+                yield None
+                continue
+            payload = json.loads(message['data'])
+            if payload.get('sender_id') == user.pk:
+                continue
+            yield payload['notification']
+    finally:
+        await pubsub.reset()
+        await client.close()
+
+
+async def _polling_ticks(deadline):
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        await asyncio.sleep(FALLBACK_POLL_SECONDS)
+        yield None
+
+
+async def _event_stream(user):
+    count_for = sync_to_async(unread_count)
+    deadline = asyncio.get_running_loop().time() + STREAM_MAX_SECONDS
+
+    last_count = await count_for(user)
+    yield f'retry: {RECONNECT_MS}\n\n'
+    yield _sse('count', {'count': last_count})
+
+    if getattr(settings, 'REDIS_URL', None):
+        messages = _redis_messages(user, deadline)
+    else:
+        messages = _polling_ticks(deadline)
+
+    async for notification in messages:
+        if notification is not None:
+            yield _sse('notification', notification)
+        count = await count_for(user)
+        if count != last_count:
+            last_count = count
+            yield _sse('count', {'count': count})
+        elif notification is None:
+            # Comment line: keeps proxies from timing out an idle stream.
+            yield ': keepalive\n\n'
+
+
+async def notification_stream(request):
+    """GET /accounts/api/notifications/stream/ — text/event-stream."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Streaming is not available here; poll instead'}, status=503)
+
+    response = StreamingHttpResponse(_event_stream(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -438,3 +438,54 @@ class PromoRedemption(models.Model):
 
     def __str__(self):
         return f"{self.user.username} redeemed {self.promo.code}"
+
+
+class StripeEvent(models.Model):
+    """
+    A verified Stripe webhook event, stored before it is handled.
+
+    The webhook only records the event (stripe_event_id is the idempotency
+    key, so Stripe's redeliveries are no-ops) and returns; the
+    process_stripe_events task applies events per customer in Stripe's
+    creation order. Failures back off and are retried by the
+    retry_stripe_events sweep; after MAX_ATTEMPTS an event is dead-lettered
+    until replayed with `manage.py replay_stripe_events`. See
+    stripe_events.py.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed (will retry)'),
+        ('dead', 'Dead (needs replay)'),
+    ]
+    OPEN_STATUSES = ('pending', 'processing', 'failed')
+
+    stripe_event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    # Events are ordered per customer; '' groups events without one.
+    customer_id = models.CharField(max_length=255, blank=True, default='')
+    payload = models.JSONField()
+    stripe_created = models.DateTimeField()
+
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'stripe_events'
+        verbose_name = 'Stripe Event'
+        verbose_name_plural = 'Stripe Events'
+        ordering = ['-stripe_created']
+        indexes = [
+            models.Index(fields=['customer_id', 'status', 'stripe_created']),
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.stripe_event_id} ({self.status})"
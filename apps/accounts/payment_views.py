@@ -290,7 +290,12 @@ def payment_canceled(request):
 def stripe_webhook(request):
     """
     Stripe webhook endpoint for handling events
+
+    Verified events are stored and acknowledged straight away; the
+    process_stripe_events task applies them (see stripe_events.py).
     """
+    from .stripe_events import handles, record_event
+
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     webhook_secret = getattr(settings, 'STRIPE_WEBHOOK_SECRET', '')
@@ -312,34 +317,13 @@ def stripe_webhook(request):
         logger.error('Invalid webhook signature')
         return HttpResponse(status=400)
 
-    # Handle the event
     event_type = event['type']
-    event_data = event['data']['object']
-
     logger.info(f'Received Stripe webhook: {event_type}')
 
-    try:
-        if event_type == 'checkout.session.completed':
-            handle_checkout_session_completed(event_data)
-
-        elif event_type == 'invoice.paid':
-            handle_invoice_paid(event_data)
-
-        elif event_type == 'invoice.payment_failed':
-            handle_invoice_payment_failed(event_data)
-
-        elif event_type == 'customer.subscription.updated':
-            handle_subscription_updated(event_data)
-
-        elif event_type == 'customer.subscription.deleted':
-            handle_subscription_deleted(event_data)
-
-        elif event_type == 'customer.subscription.trial_will_end':
-            handle_trial_will_end(event_data)
-
-    except Exception as e:
-        logger.error(f'Error handling webhook {event_type}: {e}')
-        return HttpResponse(status=500)
+    if handles(event_type):
+        _, created = record_event(payload)
+        if not created:
+            logger.info(f'Duplicate Stripe webhook {event["id"]} ignored')
 
     return HttpResponse(status=200)
 
@@ -587,6 +571,17 @@ def handle_trial_will_end(stripe_subscription):
         logger.error(f'Subscription not found: {subscription_id}')
 
 
+# Stripe event type -> handler, run by stripe_events.process_customer
+EVENT_HANDLERS = {
+    'checkout.session.completed': handle_checkout_session_completed,
+    'invoice.paid': handle_invoice_paid,
+    'invoice.payment_failed': handle_invoice_payment_failed,
+    'customer.subscription.updated': handle_subscription_updated,
+    'customer.subscription.deleted': handle_subscription_deleted,
+    'customer.subscription.trial_will_end': handle_trial_will_end,
+}
+
+
 @login_required
 def subscription_management(request):
     """
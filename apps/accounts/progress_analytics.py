@@ -0,0 +1,161 @@
+"""
+Check-in analytics for the progress page.
+
+progress_view used to evaluate the same check-in queryset several times
+over and then run separate queries for the weekly comparison, heatmap and
+today's check-in. get_analytics() instead fetches the last HISTORY_DAYS of
+check-ins once as (date, mood, craving, energy) tuples and derives every
+range's charts and statistics, the weekly comparison, the heatmap and
+today's check-in from them in a single pass.
+
+The result is memoized per member and day in the default cache. The
+DailyCheckIn save/delete signals call invalidate(), so a new check-in shows
+up on the next page load; a new day simply misses and rebuilds.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.accounts.models import DailyCheckIn
+
+RANGES = (7, 30, 90)
+HISTORY_DAYS = 90
+CACHE_SECONDS = 24 * 60 * 60
+MOOD_LABELS = dict(DailyCheckIn.MOOD_CHOICES)
+MOOD_EMOJIS = {1: '😰', 2: '😔', 3: '😐', 4: '😊', 5: '😄', 6: '🌟'}
+
+
+def _key(user_id):
+    return f'progress-analytics:{user_id}'
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
+
+
+class _Totals:
+    def __init__(self):
+        self.count = 0
+        self.mood = 0
+        self.craving = 0
+        self.energy = 0
+
+    def add(self, mood, craving, energy):
+        self.count += 1
+        self.mood += mood
+        self.craving += craving
+        self.energy += energy
+
+    def avg(self, total):
+        return round(total / self.count, 1) if self.count else 0
+
+
+def _new_range():
+    return {
+        'labels': [], 'mood': [], 'craving': [], 'energy': [],
+        'totals': _Totals(), 'best': None, 'worst': None,
+        'zero_craving_days': 0, 'mood_distribution': {},
+    }
+
+
+def _finish_range(acc):
+    totals = acc.pop('totals')
+    acc.update(
+        total=totals.count,
+        avg_mood=totals.avg(totals.mood),
+        avg_craving=totals.avg(totals.craving),
+        avg_energy=totals.avg(totals.energy),
+    )
+    return acc
+
+
+def _week(totals):
+    return {
+        'count': totals.count,
+        'avg_mood': totals.avg(totals.mood),
+        'avg_craving': totals.avg(totals.craving),
+    }
+
+
+def build(user, today):
+    rows = (
+        DailyCheckIn.objects
+        .filter(user=user, date__gte=today - timedelta(days=HISTORY_DAYS))
+        .order_by('date')
+        .values_list('date', 'mood', 'craving_level', 'energy_level')
+    )
+
+    starts = {days: today - timedelta(days=days) for days in RANGES}
+    ranges = {days: _new_range() for days in RANGES}
+    this_week_start = today - timedelta(days=today.weekday())
+    last_week_start = this_week_start - timedelta(days=7)
+    this_week, last_week = _Totals(), _Totals()
+    heatmap = {}
+    todays_checkin = None
+
+    for day, mood, craving, energy in rows:
+        label = day.strftime('%b %d')
+        mood_label = MOOD_LABELS.get(mood, mood)
+        for days, acc in ranges.items():
+            if day < starts[days]:
+                continue
+            acc['labels'].append(label)
+            acc['mood'].append(mood)
+            acc['craving'].append(craving)
+            acc['energy'].append(energy)
+            acc['totals'].add(mood, craving, energy)
+            # First occurrence wins on ties, as max()/min() over the dates did.
+            if acc['best'] is None or mood > acc['best'][1]:
+                acc['best'] = (day, mood)
+            if acc['worst'] is None or mood < acc['worst'][1]:
+                acc['worst'] = (day, mood)
+            if craving == 0:
+                acc['zero_craving_days'] += 1
+            acc['mood_distribution'][mood_label] = acc['mood_distribution'].get(mood_label, 0) + 1
+
+        if this_week_start <= day <= today:
+            this_week.add(mood, craving, energy)
+        elif last_week_start <= day < this_week_start:
+            last_week.add(mood, craving, energy)
+        heatmap[day.isoformat()] = mood
+        # Today or yesterday: check-in dates are server-local, the page
+        # decides client-side whether the latest one counts as "today".
+        if today - timedelta(days=1) <= day <= today:
+            todays_checkin = (day, mood)
+
+    weekly = {'this_week': _week(this_week), 'last_week': _week(last_week)}
+    last_mood = weekly['last_week']['avg_mood']
+    mood_change = round((weekly['this_week']['avg_mood'] - last_mood) / last_mood * 100) if last_mood > 0 else 0
+    weekly['mood_change'] = mood_change
+    weekly['mood_improved'] = mood_change > 0
+
+    return {
+        'day': today,
+        'ranges': {days: _finish_range(acc) for days, acc in ranges.items()},
+        'weekly_comparison': weekly,
+        'heatmap': heatmap,
+        'todays_checkin': todays_checkin,
+    }
+
+
+def get_analytics(user, today=None):
+    """Memoized build() for `user` on `today` (defaults to the local date)."""
+    today = today or timezone.localdate()
+    analytics = cache.get(_key(user.pk))
+    if analytics is None or analytics['day'] != today:
+        analytics = build(user, today)
+        cache.set(_key(user.pk), analytics, CACHE_SECONDS)
+    return analytics
+
+
+def checkin(day_mood):
+    """An unsaved DailyCheckIn for templates that need .date and get_mood_display."""
+    if day_mood is None:
+        return None
+    day, mood = day_mood
+    return DailyCheckIn(date=day, mood=mood)
+
+
+def avg_mood_emoji(avg_mood):
+    return MOOD_EMOJIS.get(round(avg_mood), '😐') if avg_mood else ''
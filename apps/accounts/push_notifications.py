@@ -313,7 +313,8 @@ def send_push_to_user(user, title, body, data=None):
     Returns:
         dict: Results with success/failure counts per platform
     """
-    from .models import DeviceToken, Notification
+    from .models import DeviceToken
+    from .notification_service import unread_count as get_unread_count
 
     results = {
         'android': {'sent': 0, 'failed': 0},
@@ -324,7 +325,7 @@ def send_push_to_user(user, title, body, data=None):
     device_tokens = DeviceToken.objects.filter(user=user, active=True)
 
     # Get actual unread notification count for accurate iOS badge
-    unread_count = Notification.objects.filter(recipient=user, is_read=False).count()
+    unread_count = get_unread_count(user)
 
     for device in device_tokens:
         if device.platform == 'android':
@@ -354,6 +355,54 @@ def send_push_to_user(user, title, body, data=None):
     return results
 
 
+
+def send_push_to_users(user_ids, title, body, data=None):
+    """
+    Send the same push notification to many users' devices.
+
+    The batch counterpart of send_push_to_user for fan-outs: device tokens
+    for every recipient are loaded in one query, and users who turned
+    notifications off are skipped (PushNotificationService._should_send_push).
+
+    Returns:
+        dict: {'sent': n, 'failed': n} across all platforms
+    """
+    from .models import DeviceToken
+    from .notification_service import unread_count as get_unread_count
+
+    totals = {'sent': 0, 'failed': 0}
+    devices = DeviceToken.objects.filter(
+        user_id__in=user_ids, active=True, user__email_notifications=True,
+    ).select_related('user')
+
+    badges = {}
+    used = []
+    for device in devices:
+        if device.platform == 'ios':
+            if device.user_id not in badges:
+                badges[device.user_id] = get_unread_count(device.user)
+            status = send_apns_notification(
+                device.token, title, body, data, badge_count=badges[device.user_id]
+            )
+        elif device.platform in ('android', 'web'):
+            status = send_fcm_notification(device.token, title, body, data)
+        else:
+            status = PUSH_FAILED
+
+        if status == PUSH_SENT:
+            totals['sent'] += 1
+            used.append(device.pk)
+        else:
+            totals['failed'] += 1
+            if status == PUSH_INVALID:
+                device.deactivate()
+                logger.info(f"Deactivated invalid token for {device.user.username}")
+
+    # One UPDATE for the batch instead of DeviceToken.mark_used() per device.
+    if used:
+        DeviceToken.objects.filter(pk__in=used).update(last_used_at=timezone.now())
+    return totals
+
 class PushNotificationService:
     """
     Centralized push notification service.
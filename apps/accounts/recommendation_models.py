@@ -0,0 +1,30 @@
+"""
+Precomputed "people you may know" list per member.
+
+Computing suggestions on request meant a Count-annotated join over the
+follow table for every page that showed them. The rows here are written
+offline by recommendations.py: nightly for everyone, and every few minutes
+for members flagged stale (they followed someone, or changed their
+interests or recovery stage). Readers filter out anyone the member has
+followed since in memory, so a stale row is never wrong, only less fresh.
+"""
+from django.conf import settings
+from django.db import models
+
+
+class UserRecommendations(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        primary_key=True, related_name='recommendations',
+    )
+
+    # [[candidate_id, score, mutual_follows], ...], best first.
+    suggestions = models.JSONField(default=list)
+    stale = models.BooleanField(default=False, db_index=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'user recommendations'
+
+    def __str__(self):
+        return f"Recommendations for {self.user_id}"
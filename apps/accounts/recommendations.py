@@ -0,0 +1,244 @@
+"""
+Offline "people you may know" (see recommendation_models.py).
+
+Each candidate is scored against a member from three signals:
+
+- graph: how many of the people the member follows also follow the
+  candidate (friends of friends), read from the cached follow graph and
+  saturating at a few mutual follows;
+- similarity: cosine of the two members' sparse feature vectors, one
+  dimension per interest plus their recovery stage (neighbouring stages
+  get partial weight, so "building" is close to "starting" and "growing");
+- recency: how recently the candidate was seen, halving every
+  RECENCY_HALF_LIFE_DAYS.
+
+The candidate pool (active, public profiles) is loaded once per run with
+an inverted index from feature to candidates, so similarity only touches
+candidates sharing at least one feature. Postings are capped at the
+POSTING_LIMIT most recently seen candidates, which bounds the work per
+member on common interests. The most recently seen candidates are always
+scored too, so new members with no follows or interests still get a list.
+
+The top TOP_K per member are upserted by rebuild(). The nightly
+rebuild_recommendations task covers everyone with one pool;
+refresh_stale_recommendations recomputes members mark_stale() flagged.
+Readers use suggested_ids() / suggestions_for(), which drop anyone the
+member has followed since the row was computed. A member without a row
+yet gets the most recently seen members (one cached query shared by every
+such reader) and a stale placeholder row for refresh_stale to fill in.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.accounts import social_graph
+from apps.accounts.recommendation_models import UserRecommendations
+
+TOP_K = 30
+POSTING_LIMIT = 300
+RECENT_POOL = 50
+STALE_BATCH = 500
+RECENT_KEY = 'recommendations:recent'
+RECENT_SECONDS = 5 * 60
+
+GRAPH_WEIGHT = 0.5
+SIMILARITY_WEIGHT = 0.35
+RECENCY_WEIGHT = 0.15
+# Mutual follows at which the graph signal reaches half its weight.
+GRAPH_SATURATION = 3
+RECENCY_HALF_LIFE_DAYS = 14
+
+STAGES = ('starting', 'building', 'growing', 'thriving', 'supporting')
+NEIGHBOUR_STAGE_WEIGHT = 0.5
+
+
+def _user_model():
+    from apps.accounts.models import User
+    return User
+
+
+def _interests(value):
+    # Stored as a JSON list; a few early profiles hold a comma-separated string.
+    if isinstance(value, str):
+        value = value.split(',')
+    return {str(item).strip().lower() for item in value or () if str(item).strip()}
+
+
+def vector(interests, recovery_stage):
+    """Unit-length sparse feature vector: {feature: weight}."""
+    features = {f'interest:{interest}': 1.0 for interest in _interests(interests)}
+    if recovery_stage in STAGES:
+        position = STAGES.index(recovery_stage)
+        features[f'stage:{recovery_stage}'] = 1.0
+        for neighbour in STAGES[max(position - 1, 0):position + 2]:
+            features.setdefault(f'stage:{neighbour}', NEIGHBOUR_STAGE_WEIGHT)
+    norm = math.sqrt(sum(weight * weight for weight in features.values()))
+    return {feature: weight / norm for feature, weight in features.items()} if norm else {}
+
+
+def _recency(last_seen, date_joined, now):
+    seen = last_seen or date_joined
+    if seen is None:
+        return 0.0
+    days = max((now - seen).total_seconds(), 0) / 86400
+    return 0.5 ** (days / RECENCY_HALF_LIFE_DAYS)
+
+
+class CandidatePool:
+    """Every suggestible member's features and recency, loaded in one query."""
+
+    def __init__(self, now=None):
+        now = now or timezone.now()
+        self.recency = {}
+        postings = defaultdict(list)
+        rows = _user_model().objects.filter(is_active=True, is_profile_public=True).values_list(
+            'id', 'interests', 'recovery_stage', 'last_seen', 'date_joined')
+        for user_id, interests, stage, last_seen, date_joined in rows.iterator(chunk_size=2000):
+            self.recency[user_id] = _recency(last_seen, date_joined, now)
+            for feature, weight in vector(interests, stage).items():
+                postings[feature].append((user_id, weight))
+
+        by_recency = self.recency.__getitem__
+        self.postings = {
+            feature: heapq.nlargest(POSTING_LIMIT, entries, key=lambda entry: by_recency(entry[0]))
+            for feature, entries in postings.items()
+        }
+        self.recent = heapq.nlargest(RECENT_POOL, self.recency, key=by_recency)
+
+    def similarities(self, features):
+        """{candidate_id: cosine} for candidates sharing a feature."""
+        scores = defaultdict(float)
+        for feature, weight in features.items():
+            for candidate_id, candidate_weight in self.postings.get(feature, ()):
+                scores[candidate_id] += weight * candidate_weight
+        return scores
+
+
+def _mutual_counts(following, second_degree):
+    mutual = defaultdict(int)
+    for followed_id in following:
+        for candidate_id in second_degree.get(followed_id, ()):
+            mutual[candidate_id] += 1
+    return mutual
+
+
+def score(user_id, features, following, second_degree, pool):
+    """The member's top TOP_K [candidate_id, score, mutual] lists."""
+    mutual = _mutual_counts(following, second_degree)
+    similarity = pool.similarities(features)
+    excluded = following | {user_id}
+
+    scored = []
+    for candidate_id in set(mutual).union(similarity, pool.recent):
+        recency = pool.recency.get(candidate_id)
+        if recency is None or candidate_id in excluded:
+            continue
+        n = mutual.get(candidate_id, 0)
+        total = (
+            GRAPH_WEIGHT * n / (n + GRAPH_SATURATION)
+            + SIMILARITY_WEIGHT * similarity.get(candidate_id, 0.0)
+            + RECENCY_WEIGHT * recency
+        )
+        scored.append((total, candidate_id, n))
+    return [
+        [candidate_id, round(total, 4), n]
+        for total, candidate_id, n in heapq.nlargest(TOP_K, scored)
+    ]
+
+
+def rebuild(user_ids, pool=None, now=None):
+    """Recompute and store these members' rows. Returns {user_id: suggestions}."""
+    now = now or timezone.now()
+    pool = pool or CandidatePool(now)
+    members = _user_model().objects.filter(id__in=user_ids).values_list('id', 'interests', 'recovery_stage')
+    features = {user_id: vector(interests, stage) for user_id, interests, stage in members}
+    if not features:
+        return {}
+
+    following = social_graph.following_map(features)
+    second_degree = social_graph.following_map(set().union(*following.values()))
+    results = {
+        user_id: score(user_id, member_features, following[user_id], second_degree, pool)
+        for user_id, member_features in features.items()
+    }
+    UserRecommendations.objects.bulk_create(
+        [
+            UserRecommendations(user_id=user_id, suggestions=suggestions, stale=False, computed_at=now)
+            for user_id, suggestions in results.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['suggestions', 'stale', 'computed_at'],
+    )
+    return results
+
+
+def refresh_stale(limit=STALE_BATCH):
+    """Recompute up to `limit` rows flagged by mark_stale()."""
+    user_ids = list(
+        UserRecommendations.objects.filter(stale=True)
+        .order_by('computed_at').values_list('user_id', flat=True)[:limit]
+    )
+    return len(rebuild(user_ids)) if user_ids else 0
+
+
+def mark_stale(user_ids):
+    UserRecommendations.objects.filter(user_id__in=user_ids, stale=False).update(stale=True)
+
+
+def recent_ids():
+    """The RECENT_POOL most recently seen suggestible members, cached briefly."""
+    ids = cache.get(RECENT_KEY)
+    if ids is None:
+        ids = list(
+            _user_model().objects.filter(is_active=True, is_profile_public=True)
+            .order_by('-last_seen').values_list('id', flat=True)[:RECENT_POOL]
+        )
+        cache.set(RECENT_KEY, ids, RECENT_SECONDS)
+    return ids
+
+
+def suggested_ids(user, limit=None):
+    """[(candidate_id, mutual)] best first, without anyone followed since.
+
+    Members without a computed row yet (new signups) get recently seen
+    members until refresh_stale computes theirs.
+    """
+    row = (
+        UserRecommendations.objects.filter(user_id=user.pk)
+        .values_list('suggestions', 'stale').first()
+    )
+    if row is None:
+        UserRecommendations.objects.bulk_create(
+            [UserRecommendations(user_id=user.pk, stale=True, computed_at=timezone.now())],
+            ignore_conflicts=True,
+        )
+        row = ([], True)
+    suggestions, stale = row
+    if not suggestions and stale:
+        suggestions = [[candidate_id, 0.0, 0] for candidate_id in recent_ids()]
+    following = social_graph.following_ids(user.pk)
+    ids = [
+        (candidate_id, mutual) for candidate_id, _, mutual in suggestions
+        if candidate_id not in following and candidate_id != user.pk
+    ]
+    return ids[:limit] if limit is not None else ids
+
+
+def suggestions_for(user, limit):
+    """Up to `limit` suggested User instances, each with mutual_count set."""
+    ids = suggested_ids(user)
+    users = _user_model().objects.filter(is_active=True, is_profile_public=True).in_bulk(
+        [candidate_id for candidate_id, _ in ids])
+    found = []
+    for candidate_id, mutual in ids:
+        candidate = users.get(candidate_id)
+        if candidate is not None:
+            candidate.mutual_count = mutual
+            found.append(candidate)
+            if len(found) == limit:
+                break
+    return found
@@ -0,0 +1,248 @@
+"""
+On-demand request profiler for staff.
+
+Off unless REQUEST_PROFILER_ENABLED. A staff member adds `?__profile=1` (or
+the header `X-Profile: 1`) to any request; that request is profiled and the
+response carries `X-Profile-URL` pointing at the result under
+/admin/dashboard/profiles/. Everyone else's flag is ignored.
+
+- Mode `1` / `sample`: a background thread samples the request thread's
+  stack every SAMPLE_INTERVAL seconds. Low overhead, so timings stay close
+  to production; rendered as a flame graph.
+- Mode `cprofile`: deterministic cProfile of the view, rendered as a call
+  list by cumulative time. Slower, but counts every call.
+
+Both record a SQL timeline: when each query started relative to the
+request, how long it took, and its SQL.
+
+Profiles live in the default cache (Redis in production) for
+REQUEST_PROFILER_TTL seconds. Each staff member may profile
+REQUEST_PROFILER_RATE[0] requests per REQUEST_PROFILER_RATE[1] seconds.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from apps.accounts.rate_limiting import get_rate_limit_cache
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.005
+MAX_SQL = 1000
+SQL_CHARS = 2000
+MAX_STACK_DEPTH = 80
+RECENT_KEY = 'request-profile:recent'
+RECENT_LIMIT = 50
+# Flame graph boxes narrower than this share of samples are dropped.
+MIN_FLAME_SHARE = 0.005
+
+
+def _key(profile_id):
+    return f'request-profile:{profile_id}'
+
+
+def _requested_mode(request):
+    flag = request.GET.get('__profile') or request.META.get('HTTP_X_PROFILE')
+    if not flag or flag == '0':
+        return None
+    return 'cprofile' if flag == 'cprofile' else 'sample'
+
+
+def _allowed(user):
+    limit, window = getattr(settings, 'REQUEST_PROFILER_RATE', (20, 3600))
+    rate_cache = get_rate_limit_cache()
+    key = f'rate_limit:request_profile:{user.pk}'
+    try:
+        if rate_cache.add(key, 1, window):
+            return True
+        return rate_cache.incr(key) <= limit
+    except Exception as e:
+        logger.warning(f'Request profiler rate limit check failed: {e}')
+        return False
+
+
+class _SQLTimeline:
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+        self.total = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.total += 1
+            self.seconds += duration
+            if len(self.queries) < MAX_SQL:
+                self.queries.append({
+                    'start_ms': round((start - self.started) * 1000, 2),
+                    'duration_ms': round(duration * 1000, 2),
+                    'sql': str(sql)[:SQL_CHARS],
+                })
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({code.co_filename.rsplit("/site-packages/", 1)[-1]}:{code.co_firstlineno})'
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack, innermost frames up to `boundary`."""
+
+    def __init__(self, thread_id, boundary):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.boundary = boundary
+        self.stacks = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.boundary:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack[-MAX_STACK_DEPTH:]))] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def flame_layout(stacks, total):
+    """Boxes for an icicle-style flame graph: depth, left %, width %, label."""
+    root = {}
+    for stack, count in stacks:
+        node = root
+        for name in stack:
+            child = node.setdefault(name, {'count': 0, 'children': {}})
+            child['count'] += count
+            node = child['children']
+
+    boxes = []
+
+    def walk(children, depth, left):
+        for name, child in sorted(children.items(), key=lambda item: -item[1]['count']):
+            share = child['count'] / total
+            if share >= MIN_FLAME_SHARE:
+                boxes.append({
+                    'depth': depth, 'left': round(left * 100, 3), 'width': round(share * 100, 3),
+                    'label': name, 'samples': child['count'],
+                })
+                walk(child['children'], depth + 1, left)
+            left += share
+
+    if total:
+        walk(root, 0, 0.0)
+    return boxes
+
+
+def _run_profiled(get_response, request):
+    # The sampler stops walking at this frame, so stacks start at the view
+    # chain rather than at the WSGI server.
+    return get_response(request)
+
+
+def _remember(profile_id, summary, ttl):
+    recent = cache.get(RECENT_KEY) or []
+    recent = [summary] + [item for item in recent if item['id'] != profile_id]
+    cache.set(RECENT_KEY, recent[:RECENT_LIMIT], ttl)
+
+
+def get_profile(profile_id):
+    return cache.get(_key(profile_id))
+
+
+def recent_profiles():
+    return cache.get(RECENT_KEY) or []
+
+
+class RequestProfilerMiddleware:
+    """Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = _requested_mode(request)
+        if (mode is None or not getattr(settings, 'REQUEST_PROFILER_ENABLED', False)
+                or not request.user.is_authenticated or not request.user.is_staff
+                or not _allowed(request.user)):
+            return self.get_response(request)
+        return self._profile(request, mode)
+
+    def _profile(self, request, mode):
+        profile_id = uuid.uuid4().hex
+        started = time.perf_counter()
+        timeline = _SQLTimeline(started)
+        for connection in connections.all():
+            connection.execute_wrappers.append(timeline)
+
+        sampler = profiler = None
+        if mode == 'sample':
+            sampler = _Sampler(threading.get_ident(), _run_profiled.__code__)
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            response = _run_profiled(self.get_response, request)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            if profiler is not None:
+                profiler.disable()
+            for connection in connections.all():
+                if timeline in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(timeline)
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        try:
+            self._store(request, response, profile_id, mode, total_ms, timeline, sampler, profiler)
+            response['X-Profile-URL'] = f'/admin/dashboard/profiles/{profile_id}/'
+        except Exception as e:
+            logger.warning(f'Failed to store request profile for {request.path}: {e}')
+        return response
+
+    def _store(self, request, response, profile_id, mode, total_ms, timeline, sampler, profiler):
+        ttl = getattr(settings, 'REQUEST_PROFILER_TTL', 3600)
+        summary = {
+            'id': profile_id,
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path()[:500],
+            'status': response.status_code,
+            'user': request.user.get_username(),
+            'created_at': timezone.now().isoformat(),
+            'total_ms': total_ms,
+            'sql_count': timeline.total,
+            'sql_ms': round(timeline.seconds * 1000, 1),
+        }
+        profile = dict(summary, sql=timeline.queries)
+        if sampler is not None:
+            profile['samples'] = sampler.samples
+            profile['stacks'] = [[list(stack), count] for stack, count in sampler.stacks.most_common()]
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(80)
+            profile['cprofile'] = out.getvalue()
+
+        cache.set(_key(profile_id), profile, ttl)
+        _remember(profile_id, summary, ttl)
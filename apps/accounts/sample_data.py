@@ -0,0 +1,196 @@
+"""
+Deterministic community data generator for performance tests and local dev.
+
+`seed_community` builds a realistic slice of the community — members with
+follows, feed posts (mixed visibility), reactions, comments, check-ins,
+milestones, notifications and meetings — from a fixed random seed, so two
+runs with the same arguments produce the same shape of data. Calling it
+again with a different `prefix` adds a second, disjoint batch, which is how
+the query-budget tests double the data size between measurements.
+"""
+import random
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+# Per-member volumes. Kept small so a doubling run stays fast under the
+# test runner, while still exercising every relation the hot views touch.
+FOLLOWS_PER_MEMBER = 4
+POSTS_PER_MEMBER = 2
+REACTIONS_PER_POST = 3
+COMMENTS_PER_POST = 2
+CHECKIN_DAYS = 14
+NOTIFICATIONS_PER_MEMBER = 3
+MEETINGS_PER_MEMBER = 1
+
+VISIBILITY_WEIGHTS = [('public', 6), ('friends', 3), ('private', 1)]
+
+# Rough bounding box around the continental US for seeded meeting coordinates.
+_LAT_RANGE = (30.0, 45.0)
+_LNG_RANGE = (-120.0, -75.0)
+_MEETING_TIMEZONES = ['America/Chicago', 'America/New_York', 'America/Los_Angeles']
+
+
+def seed_community(members=50, seed=0, prefix='member', viewer=None, viewer_follow_ratio=0.25):
+    """
+    Create `members` users plus their social graph and activity.
+
+    If `viewer` is given, that user follows roughly `viewer_follow_ratio` of
+    the new members and receives a share of the notifications, so per-user
+    views measured as the viewer see data that grows with the batch.
+
+    Returns the list of created users.
+    """
+    from apps.accounts.models import (
+        DailyCheckIn, Milestone, Notification, PostReaction, SocialPost,
+        SocialPostComment, UserConnection,
+    )
+    from apps.accounts import social_graph
+    from apps.accounts.activity_summary import rebuild
+    from apps.support_services.meeting_schedule import utc_minute_of_week
+    from apps.support_services.models import Meeting
+
+    User = get_user_model()
+    rng = random.Random(f'{prefix}:{seed}')
+    now = timezone.now()
+    today = timezone.localdate()
+
+    users = []
+    for i in range(members):
+        user = User.objects.create_user(
+            username=f'{prefix}_{i}',
+            email=f'{prefix}_{i}@example.com',
+            password=None,
+            first_name=f'{prefix.title()}{i}',
+            bio=f'Member {i} sharing the journey.',
+            sobriety_date=today - timedelta(days=rng.randint(1, 1500)),
+            is_profile_public=rng.random() < 0.8,
+            recovery_stage=rng.choice(['starting', 'building', 'growing', 'thriving']),
+            interests=rng.sample(['exercise', 'meditation', 'music', 'reading', 'outdoors'], 2),
+        )
+        users.append(user)
+
+    # last_seen is set after creation so the post_save signals run untouched.
+    for user in users:
+        user.last_seen = now - timedelta(minutes=rng.randint(0, 60 * 24 * 10))
+    User.objects.bulk_update(users, ['last_seen'])
+
+    # Follow graph. bulk_create skips UserConnection.save() and its signals,
+    # so mutual flags are resolved here instead of with one EXISTS per edge,
+    # and the cached graph is refreshed explicitly.
+    edges = set()
+    for user in users:
+        for target in rng.sample(users, min(FOLLOWS_PER_MEMBER + 1, len(users))):
+            if target.pk != user.pk:
+                edges.add((user.pk, target.pk))
+    if viewer is not None:
+        for target in rng.sample(users, max(1, int(len(users) * viewer_follow_ratio))):
+            edges.add((viewer.pk, target.pk))
+            if rng.random() < 0.5:
+                edges.add((target.pk, viewer.pk))
+    UserConnection.objects.bulk_create(
+        [
+            UserConnection(
+                follower_id=a, following_id=b, connection_type='follow',
+                is_mutual=(b, a) in edges,
+            )
+            for a, b in edges
+        ],
+        ignore_conflicts=True,
+    )
+    social_graph.refresh({pk for edge in edges for pk in edge})
+
+    # Feed posts with reactions and comments.
+    visibilities = [v for v, _ in VISIBILITY_WEIGHTS]
+    weights = [w for _, w in VISIBILITY_WEIGHTS]
+    posts = SocialPost.objects.bulk_create([
+        SocialPost(
+            author=user,
+            content=f'Day {rng.randint(1, 900)}: grateful for today.',
+            visibility=rng.choices(visibilities, weights)[0],
+        )
+        for user in users
+        for _ in range(POSTS_PER_MEMBER)
+    ])
+    reactions, comments = [], []
+    for post in posts:
+        for reactor in rng.sample(users, min(REACTIONS_PER_POST, len(users))):
+            reactions.append(PostReaction(
+                post=post, user=reactor,
+                reaction_type=rng.choice(['like', 'support', 'strong', 'celebrate']),
+            ))
+        for commenter in rng.sample(users, min(COMMENTS_PER_POST, len(users))):
+            comments.append(SocialPostComment(
+                post=post, author=commenter, content='Proud of you!'))
+    PostReaction.objects.bulk_create(reactions, ignore_conflicts=True)
+    SocialPostComment.objects.bulk_create(comments)
+
+    # Check-in history and a milestone each.
+    checkin_users = users + ([viewer] if viewer is not None else [])
+    DailyCheckIn.objects.bulk_create(
+        [
+            DailyCheckIn(
+                user=user,
+                date=today - timedelta(days=offset),
+                mood=rng.randint(1, 6),
+                craving_level=rng.randint(0, 4),
+                energy_level=rng.randint(1, 5),
+            )
+            for user in checkin_users
+            for offset in range(CHECKIN_DAYS)
+            if rng.random() < 0.7
+        ],
+        ignore_conflicts=True,
+    )
+    Milestone.objects.bulk_create([
+        Milestone(
+            user=user, title='30 days', milestone_type='days', days_sober=30,
+            date_achieved=today - timedelta(days=rng.randint(0, 30)),
+        )
+        for user in users
+    ])
+
+    # Notifications: most go to the members themselves, some to the viewer.
+    notifications = []
+    for user in users:
+        for _ in range(NOTIFICATIONS_PER_MEMBER):
+            recipient = viewer if viewer is not None and rng.random() < 0.3 else user
+            notifications.append(Notification(
+                recipient=recipient,
+                sender=rng.choice(users),
+                notification_type=rng.choice(['like', 'comment', 'follow']),
+                title='New activity',
+                message='Someone interacted with your post.',
+                is_read=rng.random() < 0.5,
+            ))
+    Notification.objects.bulk_create(notifications)
+
+    # Meetings spread across zones, days and coordinates.
+    meetings = [
+        Meeting(
+            name=f'{prefix.title()} Group {i}-{j}',
+            slug=f'{prefix}-meeting-{seed}-{i}-{j}',
+            day=rng.randint(0, 6),
+            time=time(rng.randint(6, 21), rng.choice([0, 15, 30, 45])),
+            timezone=rng.choice(_MEETING_TIMEZONES),
+            attendance_option=rng.choice(['in_person', 'online', 'hybrid']),
+            city='Springfield',
+            state='IL',
+            latitude=round(rng.uniform(*_LAT_RANGE), 6),
+            longitude=round(rng.uniform(*_LNG_RANGE), 6),
+            is_approved=True,
+            is_active=True,
+        )
+        for i in range(members)
+        for j in range(MEETINGS_PER_MEMBER)
+    ]
+    # bulk_create skips Meeting.save(), which maintains the schedule index.
+    for meeting in meetings:
+        meeting.utc_minute_of_week = utc_minute_of_week(meeting.day, meeting.time, meeting.timezone)
+    Meeting.objects.bulk_create(meetings)
+
+    # Bulk inserts bypass the signals that maintain activity summaries.
+    rebuild([user.pk for user in checkin_users])
+
+    return users
@@ -1,8 +1,16 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from .models import User, Milestone, ActivityFeed, DailyCheckIn
+from .models import (
+    User, Milestone, ActivityFeed, DailyCheckIn, DailyPledge, Notification, SocialPost,
+    UserConnection, SponsorRelationship, RecoveryPal, GroupMembership, SupportMessage,
+    ChallengeParticipant, ChallengeCheckIn,
+)
+from apps.journal.models import JournalEntry
+from . import activity_summary, challenge_progress, dashboard_sections, messaging, progress_analytics, recommendations, social_graph
 from .payment_models import Subscription
+from .ab_testing import ABTest, ABTestVariant, invalidate_definitions
 import logging
 
 logger = logging.getLogger(__name__)
@@ -159,6 +167,159 @@ def create_checkin_activity(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    """Bump the cached unread counter and notify connected clients"""
+    if created:
+        from .notification_service import notifications_created
+        transaction.on_commit(lambda: notifications_created([instance]))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        from .notification_service import invalidate_unread
+        invalidate_unread(instance.recipient_id)
+
+
+# ---- Activity summary maintenance (see activity_summary.py) ----
+
+@receiver(post_save, sender=User)
+def track_user_activity(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        activity_summary.ensure(instance)
+    elif update_fields and 'last_seen' in update_fields and instance.last_seen:
+        activity_summary.touch(instance.pk, 'last_seen', instance.last_seen)
+
+
+@receiver(post_save, sender=DailyCheckIn)
+def track_checkin_activity(sender, instance, **kwargs):
+    activity_summary.refresh_checkins(instance.user_id)
+    progress_analytics.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=DailyCheckIn)
+def untrack_checkin_activity(sender, instance, **kwargs):
+    activity_summary.refresh_checkins(instance.user_id, create=False)
+    progress_analytics.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=DailyPledge)
+def track_pledge_activity(sender, instance, **kwargs):
+    activity_summary.refresh_pledges(instance.user_id)
+
+
+@receiver(post_delete, sender=DailyPledge)
+def untrack_pledge_activity(sender, instance, **kwargs):
+    activity_summary.refresh_pledges(instance.user_id, create=False)
+
+
+@receiver(post_save, sender=SocialPost)
+def track_post_activity(sender, instance, created, **kwargs):
+    if created:
+        activity_summary.touch(instance.author_id, 'last_post_at', instance.created_at)
+
+
+@receiver(post_save, sender=JournalEntry)
+def track_journal_activity(sender, instance, created, **kwargs):
+    if created:
+        activity_summary.touch(instance.user_id, 'last_journal_at', instance.created_at)
+
+
+@receiver(post_delete, sender=SocialPost)
+def untrack_post_activity(sender, instance, **kwargs):
+    activity_summary.refresh_timestamp(instance.author_id, 'last_post_at')
+
+
+@receiver(post_delete, sender=JournalEntry)
+def untrack_journal_activity(sender, instance, **kwargs):
+    activity_summary.refresh_timestamp(instance.user_id, 'last_journal_at')
+
+
+
+# ---- Follow graph cache (see social_graph.py) ----
+
+@receiver(post_save, sender=User)
+def reset_new_user_graph(sender, instance, created, **kwargs):
+    if created:
+        social_graph.reset([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=UserConnection)
+def write_through_follow_graph(sender, instance, **kwargs):
+    social_graph.write_through([instance.follower_id, instance.following_id])
+
+# ---- Dashboard section invalidation (see dashboard_sections.py) ----
+
+@receiver([post_save, post_delete], sender=UserConnection)
+def invalidate_connection_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.follower_id, instance.following_id], 'network')
+
+
+@receiver([post_save, post_delete], sender=SponsorRelationship)
+def invalidate_sponsor_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.sponsor_id, instance.sponsee_id], 'network')
+
+
+@receiver([post_save, post_delete], sender=RecoveryPal)
+def invalidate_pal_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.user1_id, instance.user2_id], 'network')
+
+
+@receiver([post_save, post_delete], sender=GroupMembership)
+def invalidate_group_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.user_id], 'network')
+
+
+@receiver([post_save, post_delete], sender=Milestone)
+def invalidate_milestone_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.user_id], 'milestones')
+
+
+@receiver([post_save, post_delete], sender=SupportMessage)
+def invalidate_inbox_sections(sender, instance, **kwargs):
+    dashboard_sections.invalidate([instance.recipient_id], 'inbox')
+
+
+@receiver(post_delete, sender=SupportMessage)
+def retract_conversation_message(sender, instance, **kwargs):
+    messaging.retract_message(instance)
+
+# ---- Recommendation staleness (see recommendations.py) ----
+
+RECOMMENDATION_FIELDS = {'interests', 'recovery_stage'}
+
+
+@receiver([post_save, post_delete], sender=UserConnection)
+def mark_follower_recommendations_stale(sender, instance, **kwargs):
+    # A new follow changes the follower's friends-of-friends.
+    recommendations.mark_stale([instance.follower_id])
+
+
+@receiver(post_save, sender=User)
+def mark_profile_recommendations_stale(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or RECOMMENDATION_FIELDS & set(update_fields)):
+        recommendations.mark_stale([instance.pk])
+
+# ---- A/B test definitions held in process memory (see ab_testing.py) ----
+
+@receiver([post_save, post_delete], sender=ABTest)
+@receiver([post_save, post_delete], sender=ABTestVariant)
+def invalidate_ab_test_definitions(sender, instance, **kwargs):
+    invalidate_definitions()
+
+
+# ---- Challenge progress and stats (see challenge_progress.py) ----
+
+@receiver(post_delete, sender=ChallengeCheckIn)
+def retract_challenge_check_in(sender, instance, **kwargs):
+    challenge_progress.retract_check_in(instance)
+
+
+@receiver([post_save, post_delete], sender=ChallengeParticipant)
+def invalidate_challenge_stats(sender, instance, **kwargs):
+    challenge_progress.invalidate(instance.challenge_id)
+
 def create_blog_post_activity(user, blog_post):
     """Helper function to create blog post activity - call this from blog app"""
     ActivityFeed.objects.create(
@@ -0,0 +1,229 @@
+"""
+Cached follow graph.
+
+Every member's following and follower ids are kept in the default cache
+(Redis in production) as compact sorted int arrays, one key per member and
+direction, with the two counts under a third key. A small in-process LRU
+sits in front for LOCAL_SECONDS, so repeated checks within a request, and
+across requests on the same worker, cost a dict lookup.
+
+Writes go through: the UserConnection post_save / post_delete signals
+(which cover User.follow_user, unfollow_user and UserConnection.save)
+re-read both members' edges and overwrite their entries in both layers.
+Inside a transaction the shared entries are deleted instead, the new
+edges go only to this process's LRU (so the request reads its own write),
+and both layers are written once the transaction commits; a rollback
+leaves nothing uncommitted in the shared cache. Other workers may serve a
+follow or unfollow up to LOCAL_SECONDS late. bulk_create skips the
+signals; callers that use it call refresh().
+
+Readers should prefer the batch helpers (following_map, follower_map,
+counts, followed_among, attach_counts) over per-member calls in loops.
+Misses are filled with one query per direction for the whole batch.
+"""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+CACHE_SECONDS = 24 * 60 * 60
+LOCAL_SIZE = 4096
+LOCAL_SECONDS = 5
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+COUNTS = 'counts'
+
+
+def _key(kind, user_id):
+    return f'social-graph:{kind}:{user_id}'
+
+
+class _LocalLRU:
+    """Bounded, short-lived per-process copy of recently used cache entries."""
+
+    def __init__(self, size, seconds):
+        self.size = size
+        self.seconds = seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                item = self._items.get(key)
+                if item is None:
+                    continue
+                if item[0] < now:
+                    del self._items[key]
+                    continue
+                self._items.move_to_end(key)
+                found[key] = item[1]
+        return found
+
+    def set_many(self, values):
+        expires = time.monotonic() + self.seconds
+        with self._lock:
+            for key, value in values.items():
+                self._items[key] = (expires, value)
+                self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_local = _LocalLRU(LOCAL_SIZE, LOCAL_SECONDS)
+
+
+def _pack(ids):
+    return array('q', sorted(ids))
+
+
+def _thaw(kind, value):
+    # The LRU holds frozensets so membership checks don't rebuild them.
+    return value if kind == COUNTS else frozenset(value)
+
+
+def _get_many(kind, user_ids, load):
+    """{user_id: value} for `kind`, from the LRU, then the cache, then `load`."""
+    keys = {_key(kind, user_id): user_id for user_id in user_ids}
+    found = _local.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        shared = {key: _thaw(kind, value) for key, value in cache.get_many(missing).items()}
+        found.update(shared)
+        _local.set_many(shared)
+        missing = [key for key in missing if key not in shared]
+    if missing:
+        loaded = {_key(kind, user_id): value for user_id, value in load([keys[key] for key in missing]).items()}
+        cache.set_many(loaded, CACHE_SECONDS)
+        thawed = {key: _thaw(kind, value) for key, value in loaded.items()}
+        _local.set_many(thawed)
+        found.update(thawed)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def _store(entries):
+    """Write {(kind, user_id): value} to both layers."""
+    cache.set_many({_key(*entry): value for entry, value in entries.items()}, CACHE_SECONDS)
+    _local.set_many({_key(*entry): _thaw(entry[0], value) for entry, value in entries.items()})
+
+
+def _follow_edges():
+    from apps.accounts.models import UserConnection
+    return UserConnection.objects.filter(connection_type='follow')
+
+
+def _load_ids(kind, user_ids):
+    if kind == FOLLOWING:
+        own, other = 'follower_id', 'following_id'
+    else:
+        own, other = 'following_id', 'follower_id'
+    ids = {user_id: [] for user_id in user_ids}
+    for user_id, other_id in _follow_edges().filter(**{f'{own}__in': user_ids}).values_list(own, other):
+        ids[user_id].append(other_id)
+    return {user_id: _pack(values) for user_id, values in ids.items()}
+
+
+def _load_counts(user_ids):
+    counts = {user_id: [0, 0] for user_id in user_ids}
+    edges = _follow_edges().order_by()
+    for user_id, n in edges.filter(following_id__in=user_ids).values_list('following_id').annotate(n=Count('id')):
+        counts[user_id][0] = n
+    for user_id, n in edges.filter(follower_id__in=user_ids).values_list('follower_id').annotate(n=Count('id')):
+        counts[user_id][1] = n
+    return {user_id: tuple(value) for user_id, value in counts.items()}
+
+
+def following_map(user_ids):
+    """{user_id: frozenset of ids they follow}."""
+    return _get_many(FOLLOWING, set(user_ids), lambda ids: _load_ids(FOLLOWING, ids))
+
+
+def follower_map(user_ids):
+    """{user_id: frozenset of ids following them}."""
+    return _get_many(FOLLOWERS, set(user_ids), lambda ids: _load_ids(FOLLOWERS, ids))
+
+
+def following_ids(user_id):
+    return following_map([user_id])[user_id]
+
+
+def follower_ids(user_id):
+    return follower_map([user_id])[user_id]
+
+
+def connected_ids(user_id):
+    """Everyone `user_id` follows or is followed by."""
+    return following_ids(user_id) | follower_ids(user_id)
+
+
+def is_following(follower_id, following_id):
+    return following_id in following_ids(follower_id)
+
+
+def followed_among(user_id, candidate_ids):
+    """The subset of `candidate_ids` that `user_id` follows."""
+    return following_ids(user_id).intersection(candidate_ids)
+
+
+def counts(user_ids):
+    """{user_id: (followers, following)}."""
+    return _get_many(COUNTS, set(user_ids), _load_counts)
+
+
+def attach_counts(users):
+    """Prime followers_count / following_count on each user in one batch."""
+    users = list(users)
+    by_id = counts(user.pk for user in users)
+    for user in users:
+        user._graph_counts = by_id[user.pk]
+    return users
+
+
+def _load_entries(user_ids):
+    following = _load_ids(FOLLOWING, user_ids)
+    followers = _load_ids(FOLLOWERS, user_ids)
+    entries = {}
+    for user_id in user_ids:
+        entries[FOLLOWING, user_id] = following[user_id]
+        entries[FOLLOWERS, user_id] = followers[user_id]
+        entries[COUNTS, user_id] = (len(followers[user_id]), len(following[user_id]))
+    return entries
+
+
+def refresh(user_ids):
+    """Re-read these members' edges and write them through both cache layers."""
+    _store(_load_entries(set(user_ids)))
+
+
+def write_through(user_ids):
+    """Called after a follow edge changes; see the module docstring."""
+    user_ids = set(user_ids)
+    if not transaction.get_connection().in_atomic_block:
+        refresh(user_ids)
+        return
+    # Uncommitted: keep it out of the shared cache until the commit, so a
+    # rollback can't leave other workers a follow that never happened.
+    entries = _load_entries(user_ids)
+    cache.delete_many([_key(*entry) for entry in entries])
+    _local.set_many({_key(*entry): _thaw(entry[0], value) for entry, value in entries.items()})
+    transaction.on_commit(lambda: refresh(user_ids))
+
+
+def reset(user_ids):
+    """Members known to have no edges yet, e.g. just created."""
+    entries = {}
+    for user_id in user_ids:
+        entries[FOLLOWING, user_id] = entries[FOLLOWERS, user_id] = _pack(())
+        entries[COUNTS, user_id] = (0, 0)
+    _store(entries)
@@ -0,0 +1,161 @@
+"""
+Stripe webhook ingestion and processing.
+
+The webhook view verifies the signature, calls record_event() and returns
+200. Handling happens in the process_stripe_events task, one customer at a
+time:
+
+- Events for a customer are applied oldest-first by Stripe's `created`
+  timestamp. A worker claims the head event with a conditional UPDATE, so
+  two workers never run the same customer's events concurrently and a later
+  event never overtakes an earlier one that is still retrying.
+- A failed event is retried after RETRY_BACKOFF[attempts - 1]; the
+  retry_stripe_events sweep re-dispatches anything due, including events
+  whose enqueue was lost or whose worker died mid-run (claims older than
+  STALE_CLAIM are taken over).
+- After MAX_ATTEMPTS the event is dead-lettered and stops blocking the
+  customer's queue. `manage.py replay_stripe_events` puts dead (or any)
+  events back in line.
+
+Redeliveries of an event Stripe already sent are dropped at record_event()
+by the unique stripe_event_id.
+"""
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.accounts.payment_models import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = [
+    timedelta(minutes=1), timedelta(minutes=5), timedelta(minutes=30), timedelta(hours=2),
+]
+STALE_CLAIM = timedelta(minutes=10)
+# Pending events this old are assumed to have lost their enqueue.
+PENDING_GRACE = timedelta(minutes=2)
+
+
+def _handlers():
+    from apps.accounts.payment_views import EVENT_HANDLERS
+    return EVENT_HANDLERS
+
+
+def handles(event_type):
+    return event_type in _handlers()
+
+
+def record_event(payload):
+    """Store a verified webhook body. Returns (event, created)."""
+    data = json.loads(payload)
+    obj = data['data']['object']
+    customer_id = obj.get('customer') or ''
+    if isinstance(customer_id, dict):
+        customer_id = customer_id.get('id', '')
+    try:
+        with transaction.atomic():
+            event = StripeEvent.objects.create(
+                stripe_event_id=data['id'],
+                event_type=data['type'],
+                customer_id=customer_id,
+                payload=data,
+                stripe_created=datetime.fromtimestamp(data['created'], tz=dt_timezone.utc),
+            )
+    except IntegrityError:
+        return StripeEvent.objects.get(stripe_event_id=data['id']), False
+    transaction.on_commit(lambda: enqueue(customer_id))
+    return event, True
+
+
+def enqueue(customer_id):
+    try:
+        from apps.accounts.tasks import process_stripe_events
+        process_stripe_events.delay(customer_id)
+    except Exception as e:
+        # The retry_stripe_events sweep picks the event up once the broker
+        # is back; the webhook must still acknowledge.
+        logger.error(f'Failed to enqueue Stripe events for {customer_id or "(no customer)"}: {e}')
+
+
+def _claimable(event, now):
+    if event.status == 'processing':
+        return event.locked_at is None or event.locked_at <= now - STALE_CLAIM
+    if event.status == 'failed':
+        return event.next_attempt_at is None or event.next_attempt_at <= now
+    return True
+
+
+def _apply(event):
+    handler = _handlers().get(event.event_type)
+    if handler is None:
+        return
+    with transaction.atomic():
+        handler(event.payload['data']['object'])
+
+
+def process_customer(customer_id):
+    """Apply a customer's open events in order. Returns how many succeeded."""
+    processed = 0
+    while True:
+        now = timezone.now()
+        head = (
+            StripeEvent.objects
+            .filter(customer_id=customer_id, status__in=StripeEvent.OPEN_STATUSES)
+            .order_by('stripe_created', 'id')
+            .first()
+        )
+        if head is None or not _claimable(head, now):
+            break
+        claimed = StripeEvent.objects.filter(
+            pk=head.pk, status=head.status, attempts=head.attempts,
+        ).update(status='processing', locked_at=now, attempts=F('attempts') + 1)
+        if not claimed:
+            break
+        head.attempts += 1
+
+        try:
+            _apply(head)
+        except Exception as e:
+            dead = head.attempts >= MAX_ATTEMPTS
+            StripeEvent.objects.filter(pk=head.pk).update(
+                status='dead' if dead else 'failed',
+                last_error=f'{type(e).__name__}: {e}',
+                next_attempt_at=None if dead else now + RETRY_BACKOFF[head.attempts - 1],
+                locked_at=None,
+            )
+            if dead:
+                logger.error(f'Stripe event {head.stripe_event_id} dead-lettered after {head.attempts} attempts: {e}')
+                continue
+            logger.warning(f'Stripe event {head.stripe_event_id} failed (attempt {head.attempts}): {e}')
+            break
+
+        StripeEvent.objects.filter(pk=head.pk).update(
+            status='processed', processed_at=timezone.now(), last_error='', locked_at=None,
+        )
+        processed += 1
+    return processed
+
+
+def due_customers(now=None):
+    """Customers with an open event that should be running by now."""
+    now = now or timezone.now()
+    return list(
+        StripeEvent.objects.filter(
+            Q(status='pending', received_at__lte=now - PENDING_GRACE)
+            | Q(status='failed', next_attempt_at__lte=now)
+            | Q(status='processing', locked_at__lte=now - STALE_CLAIM)
+        ).values_list('customer_id', flat=True).distinct().order_by()
+    )
+
+
+def replay(events):
+    """Put events back in line (fresh attempt budget). Returns their customers."""
+    events = events.exclude(status='processing')
+    customers = set(events.values_list('customer_id', flat=True))
+    events.update(status='pending', attempts=0, next_attempt_at=None, locked_at=None, processed_at=None)
+    return customers
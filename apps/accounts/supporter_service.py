@@ -8,6 +8,8 @@ queries craving levels, journal entries, or any free-text check-in field.
 from datetime import timedelta
 from django.utils import timezone
 
+from apps.accounts.activity_summary import get_summary
+
 MILESTONE_DAYS = [1, 7, 14, 30, 60, 90, 180, 365, 730, 1095, 1460, 1825]
 CHECKIN_WINDOW_DAYS = 7
 MOOD_TREND_DAYS = 7
@@ -39,10 +41,9 @@ def _mood_trend(member):
 
 
 def _inactivity_status(member, link):
-    last = member.daily_checkins.order_by('-date').first()
-    if not last:
+    days = get_summary(member).days_since_checkin(timezone.now().date())
+    if days is None:
         return {'days_since_checkin': None, 'over_threshold': True}
-    days = (timezone.now().date() - last.date).days
     return {'days_since_checkin': days, 'over_threshold': days >= link.inactivity_threshold_days}
 
 
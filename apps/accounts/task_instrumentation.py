@@ -0,0 +1,277 @@
+"""
+Per-run Celery task instrumentation (see task_metrics_models.TaskRun).
+
+task_prerun starts a run record; task_postrun closes it and stores a
+TaskRun row. While a task runs:
+
+- every database query goes through a connection execute_wrapper that
+  counts it and times it;
+- outbound HTTP through requests (Resend, Stripe, web push) and httpx
+  (Anthropic) is timed by wrapping Session.send / Client.send once per
+  process;
+- memory is the process's ru_maxrss high-water mark, which is what
+  CELERY_WORKER_MAX_MEMORY_PER_CHILD is enforced against.
+
+A single run can be profiled with cProfile: `manage.py profile_task <name>`
+arms the next run of that task (or runs it inline with --now) and the
+pstats summary lands in TaskRun.profile.
+
+Instrumentation never fails a task: errors while recording are logged and
+dropped.
+"""
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import time
+from datetime import timedelta
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = 'task-profile:{}'
+PROFILE_ARM_SECONDS = 24 * 60 * 60
+PROFILE_LINES = 40
+
+# task_id -> _Run for the tasks executing in this process. Eager tasks can
+# nest; HTTP time is charged to the innermost run (the top of _stack).
+_runs = {}
+_stack = []
+_http_hooked = False
+
+
+def _max_rss_kb():
+    if resource is None:
+        return None
+    # Kilobytes on Linux, which is what the worker limit is expressed in.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class _Run:
+    def __init__(self, task):
+        from recovery_hub.celery_metrics import _started_after
+
+        self.started_at = timezone.now()
+        self.started = time.perf_counter()
+        self.queue_wait = _started_after(task.request, time.time())
+        self.queue = ((task.request.delivery_info or {}).get('routing_key') or '')[:50]
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.http_calls = 0
+        self.http_seconds = 0.0
+        self.rss_before = _max_rss_kb()
+        self.profiler = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+def arm_profile(task_name):
+    """Profile the next run of `task_name` (within a day)."""
+    cache.set(PROFILE_KEY.format(task_name), True, PROFILE_ARM_SECONDS)
+
+
+def _take_profile_request(task_name):
+    key = PROFILE_KEY.format(task_name)
+    if cache.get(key):
+        cache.delete(key)
+        return True
+    return False
+
+
+def _timed_send(send):
+    @functools.wraps(send)
+    def wrapper(*args, **kwargs):
+        run = _stack[-1] if _stack else None
+        if run is None:
+            return send(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            run.http_calls += 1
+            run.http_seconds += time.perf_counter() - start
+    return wrapper
+
+
+def _install_http_hooks():
+    global _http_hooked
+    if _http_hooked:
+        return
+    _http_hooked = True
+    try:
+        import requests
+        requests.Session.send = _timed_send(requests.Session.send)
+    except ImportError:
+        pass
+    try:
+        import httpx
+        httpx.Client.send = _timed_send(httpx.Client.send)
+    except ImportError:
+        pass
+
+
+def _items(retval):
+    if isinstance(retval, bool):
+        return None
+    if isinstance(retval, int):
+        return max(retval, 0)
+    if isinstance(retval, dict):
+        counts = [v for v in retval.values() if isinstance(v, int) and not isinstance(v, bool)]
+        return sum(counts) if counts else None
+    if isinstance(retval, (list, tuple, set)):
+        return len(retval)
+    return None
+
+
+def _enabled():
+    return getattr(settings, 'TASK_METRICS_ENABLED', True)
+
+
+@task_prerun.connect
+def start_run(task_id=None, task=None, **kwargs):
+    if task is None or not _enabled():
+        return
+    try:
+        _install_http_hooks()
+        run = _Run(task)
+        for connection in connections.all():
+            connection.execute_wrappers.append(run)
+        if _take_profile_request(task.name):
+            run.profiler = cProfile.Profile()
+            run.profiler.enable()
+        _runs[task_id] = run
+        _stack.append(run)
+    except Exception as e:
+        logger.warning(f'Task instrumentation failed to start for {task.name}: {e}')
+
+
+def _finish(run):
+    if run.profiler is not None:
+        run.profiler.disable()
+    for connection in connections.all():
+        if run in connection.execute_wrappers:
+            connection.execute_wrappers.remove(run)
+    if run in _stack:
+        _stack.remove(run)
+
+
+def _profile_text(profiler):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+@task_postrun.connect
+def finish_run(task_id=None, task=None, retval=None, state=None, **kwargs):
+    run = _runs.pop(task_id, None)
+    if run is None:
+        return
+    try:
+        _finish(run)
+        runtime = time.perf_counter() - run.started
+        rss_after = _max_rss_kb()
+
+        from apps.accounts.task_metrics_models import TaskRun
+        TaskRun.objects.create(
+            task_name=task.name[:200],
+            task_id=task_id or '',
+            queue=run.queue,
+            state=(state or '')[:20],
+            started_at=run.started_at,
+            runtime_seconds=runtime,
+            queue_wait_seconds=run.queue_wait,
+            db_queries=run.db_queries,
+            db_seconds=run.db_seconds,
+            http_calls=run.http_calls,
+            http_seconds=run.http_seconds,
+            items=_items(retval) if state == 'SUCCESS' else None,
+            max_rss_kb=rss_after,
+            rss_growth_kb=(rss_after - run.rss_before) if rss_after is not None else None,
+            profile=_profile_text(run.profiler) if run.profiler is not None else '',
+        )
+    except Exception as e:
+        logger.warning(f'Task instrumentation failed to record {task.name}: {e}')
+
+
+METRICS_WINDOW_HOURS = 24
+
+_TASK_GAUGES = (
+    # (metric, help, aggregate key, scale)
+    ('celery_task_runtime_seconds_avg', 'Mean wall time per run.', 'runtime_avg', 1),
+    ('celery_task_runtime_seconds_max', 'Longest run.', 'runtime_max', 1),
+    ('celery_task_queue_wait_seconds_max', 'Longest wait in the queue before starting.', 'wait_max', 1),
+    ('celery_task_db_queries_avg', 'Mean database queries per run.', 'db_queries_avg', 1),
+    ('celery_task_db_seconds_avg', 'Mean database time per run.', 'db_seconds_avg', 1),
+    ('celery_task_http_seconds_avg', 'Mean outbound HTTP time per run.', 'http_seconds_avg', 1),
+    ('celery_task_items_avg', 'Mean items processed per successful run.', 'items_avg', 1),
+    ('celery_task_max_rss_bytes', 'Worker RSS high-water mark after a run.', 'rss_max', 1024),
+)
+
+
+def prometheus_metrics(now=None):
+    """Aggregates over the last METRICS_WINDOW_HOURS in Prometheus text format."""
+    from apps.accounts.task_metrics_models import TaskRun
+
+    now = now or timezone.now()
+    runs = TaskRun.objects.filter(started_at__gte=now - timedelta(hours=METRICS_WINDOW_HOURS))
+    lines = [
+        f'# HELP celery_task_runs Task runs in the last {METRICS_WINDOW_HOURS}h by final state.',
+        '# TYPE celery_task_runs gauge',
+    ]
+    for row in runs.values('task_name', 'state').annotate(n=Count('id')).order_by('task_name', 'state'):
+        lines.append(f'celery_task_runs{{task="{row["task_name"]}",state="{row["state"]}"}} {row["n"]}')
+
+    aggregates = list(
+        runs.values('task_name').annotate(
+            runtime_avg=Avg('runtime_seconds'), runtime_max=Max('runtime_seconds'),
+            wait_max=Max('queue_wait_seconds'),
+            db_queries_avg=Avg('db_queries'), db_seconds_avg=Avg('db_seconds'),
+            http_seconds_avg=Avg('http_seconds'), items_avg=Avg('items'),
+            rss_max=Max('max_rss_kb'),
+        ).order_by('task_name')
+    )
+    for metric, help_text, key, scale in _TASK_GAUGES:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+        for row in aggregates:
+            if row[key] is not None:
+                lines.append(f'{metric}{{task="{row["task_name"]}"}} {row[key] * scale:g}')
+
+    limit_kb = getattr(settings, 'CELERY_WORKER_MAX_MEMORY_PER_CHILD', None)
+    if limit_kb:
+        lines += [
+            '# HELP celery_worker_max_memory_per_child_bytes Worker child memory limit.',
+            '# TYPE celery_worker_max_memory_per_child_bytes gauge',
+            f'celery_worker_max_memory_per_child_bytes {limit_kb * 1024}',
+        ]
+
+    try:
+        from recovery_hub.celery_metrics import queue_stats
+        queues = queue_stats()
+    except Exception:
+        queues = {}
+    if queues:
+        lines += ['# HELP celery_queue_depth Messages waiting.', '# TYPE celery_queue_depth gauge']
+        lines += [f'celery_queue_depth{{queue="{q}"}} {s["depth"]}' for q, s in queues.items()]
+        lines += ['# HELP celery_queue_oldest_age_seconds Age of the oldest waiting message.',
+                  '# TYPE celery_queue_oldest_age_seconds gauge']
+        lines += [f'celery_queue_oldest_age_seconds{{queue="{q}"}} {s["oldest_age_seconds"]}'
+                  for q, s in queues.items() if s['oldest_age_seconds'] is not None]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,44 @@
+"""
+One row per Celery task run, written by task_instrumentation.py.
+
+A rolling window (TASK_METRICS_RETENTION_DAYS, pruned nightly) of what each
+run cost: wall time, time waiting in the queue, database and outbound HTTP
+time, how many items it processed and the worker's memory high-water mark.
+Aggregates are served in Prometheus text format at
+/admin/dashboard/task-metrics/.
+"""
+from django.db import models
+
+
+class TaskRun(models.Model):
+    task_name = models.CharField(max_length=200)
+    task_id = models.CharField(max_length=255, blank=True)
+    queue = models.CharField(max_length=50, blank=True)
+    # Celery's final state: SUCCESS, FAILURE, RETRY, ...
+    state = models.CharField(max_length=20)
+    started_at = models.DateTimeField(db_index=True)
+
+    runtime_seconds = models.FloatField()
+    queue_wait_seconds = models.FloatField(null=True, blank=True)
+    db_queries = models.PositiveIntegerField(default=0)
+    db_seconds = models.FloatField(default=0)
+    http_calls = models.PositiveIntegerField(default=0)
+    http_seconds = models.FloatField(default=0)
+    # From the task's return value: an int, the ints in a dict, or a list's length.
+    items = models.PositiveIntegerField(null=True, blank=True)
+    # Worker process RSS high-water mark after the run, and how much this
+    # run raised it.
+    max_rss_kb = models.PositiveIntegerField(null=True, blank=True)
+    rss_growth_kb = models.PositiveIntegerField(null=True, blank=True)
+
+    # pstats output when the run was profiled (`manage.py profile_task`).
+    profile = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['task_name', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} {self.state} in {self.runtime_seconds:.2f}s"
@@ -84,17 +84,23 @@ def send_onboarding_sequence_emails(self):
     (streak + journal + community action) exit the sequence early. Users
     with a crisis-triggered coach session in the last 48h are deferred to
     the next run — never emailed mid-crisis.
+
+    Every activation, skip and suppression signal arrives as an Exists()
+    annotation on the candidate query, and stamps are written back with
+    bulk_update, so a run costs a handful of queries plus the sends.
     """
     from .models import User
     from .email_sequences import (
         ONBOARDING_EMAILS, is_activated, is_crisis_suppressed,
-        has_started_streak, marketing_unsubscribe_url,
+        has_started_streak, marketing_unsubscribe_url, with_sequence_flags,
     )
+    from .activity_summary import get_summary
 
     now = timezone.now()
     site_url = getattr(settings, 'SITE_URL', 'https://myrecoverypal.com')
+    stamp_fields = [e['field'] for e in ONBOARDING_EMAILS]
 
-    users = User.objects.filter(
+    users = with_sequence_flags(User.objects.filter(
         is_active=True,
         email_notifications=True,
         marketing_emails_enabled=True,
@@ -103,82 +109,89 @@ def send_onboarding_sequence_emails(self):
         # Anchor the candidate window to E1 send (onboarding completion),
         # not date_joined, so a slow onboarder still gets the full sequence.
         welcome_email_1_sent__gte=now - timedelta(days=25),
-    )
+    )).select_related('activity_summary')
 
     sent_count = 0
     skipped_count = 0
     exited_count = 0
+    stamped = []
 
-    for user in users:
-        try:
-            if is_crisis_suppressed(user):
-                skipped_count += 1
-                continue
-
-            remaining = [e for e in ONBOARDING_EMAILS
-                         if getattr(user, e['field']) is None]
-
-            if is_activated(user):
-                # Sequence goal reached - close out without sending.
-                for email in remaining:
-                    setattr(user, email['field'], now)
-                user.save(update_fields=[e['field'] for e in remaining])
-                exited_count += 1
-                continue
-
-            # Drip is anchored to when the welcome email went out (onboarding
-            # completion), not date_joined, so slow onboarders still get the
-            # full 14-day sequence.
-            days = (now - user.welcome_email_1_sent).days
-            due = [e for e in remaining if days >= e['day']]
-            if not due:
-                continue
-
-            email = due[-1]
-            stamped_fields = []
-            # Stamp earlier missed emails as skipped rather than blasting them.
-            for missed in due[:-1]:
-                setattr(user, missed['field'], now)
-                stamped_fields.append(missed['field'])
-
-            if email['skip'] and email['skip'](user):
-                setattr(user, email['field'], now)
-                stamped_fields.append(email['field'])
-                user.save(update_fields=stamped_fields)
-                skipped_count += 1
-                continue
+    def flush():
+        # Flushed every few sends as well as at the end, so a crash mid-run
+        # can't leave already-sent emails unstamped (and resent tomorrow).
+        User.objects.bulk_update(stamped, stamp_fields)
+        stamped.clear()
 
-            context = {
-                'user': user,
-                'site_url': site_url,
-                'current_year': now.year,
-                'unsubscribe_url': marketing_unsubscribe_url(user),
-            }
-            if email['number'] == 5:
-                context['streak'] = user.get_checkin_streak()
-                context['has_streak'] = has_started_streak(user)
+    try:
+        for user in users:
+            try:
+                if is_crisis_suppressed(user):
+                    skipped_count += 1
+                    continue
+
+                remaining = [e for e in ONBOARDING_EMAILS
+                             if getattr(user, e['field']) is None]
+
+                if is_activated(user):
+                    # Sequence goal reached - close out without sending.
+                    for email in remaining:
+                        setattr(user, email['field'], now)
+                    stamped.append(user)
+                    exited_count += 1
+                    continue
+
+                # Drip is anchored to when the welcome email went out (onboarding
+                # completion), not date_joined, so slow onboarders still get the
+                # full 14-day sequence.
+                days = (now - user.welcome_email_1_sent).days
+                due = [e for e in remaining if days >= e['day']]
+                if not due:
+                    continue
+
+                email = due[-1]
+                if email['skip'] and email['skip'](user):
+                    # Stamp earlier missed emails as skipped rather than blasting them.
+                    for skipped in due:
+                        setattr(user, skipped['field'], now)
+                    stamped.append(user)
+                    skipped_count += 1
+                    continue
+
+                context = {
+                    'user': user,
+                    'site_url': site_url,
+                    'current_year': now.year,
+                    'unsubscribe_url': marketing_unsubscribe_url(user),
+                }
+                if email['number'] == 5:
+                    context['streak'] = get_summary(user).current_checkin_streak()
+                    context['has_streak'] = has_started_streak(user)
 
-            html_message = render_to_string(email['template'], context)
-            plain_message = strip_tags(html_message)
+                html_message = render_to_string(email['template'], context)
+                plain_message = strip_tags(html_message)
 
-            success, error = send_email(
-                subject=email['subject'],
-                plain_message=plain_message,
-                html_message=html_message,
-                recipient_email=user.email,
-            )
-            if not success:
-                raise Exception(f"send failed: {error}")
+                success, error = send_email(
+                    subject=email['subject'],
+                    plain_message=plain_message,
+                    html_message=html_message,
+                    recipient_email=user.email,
+                )
+                if not success:
+                    raise Exception(f"send failed: {error}")
 
-            setattr(user, email['field'], now)
-            stamped_fields.append(email['field'])
-            user.save(update_fields=stamped_fields)
-            sent_count += 1
+                for sent_or_missed in due:
+                    setattr(user, sent_or_missed['field'], now)
+                stamped.append(user)
+                sent_count += 1
+                if len(stamped) >= 25:
+                    flush()
 
-            time.sleep(0.5)
+                time.sleep(0.5)
 
-        except Exception as e:
-            logger.error(f"Error in onboarding sequence for {user.email}: {e}")
+            except Exception as e:
+                logger.error(f"Error in onboarding sequence for {user.email}: {e}")
+    finally:
+        flush()
 
     logger.info(
         f"Onboarding sequence: sent={sent_count}, skipped={skipped_count}, "
@@ -196,9 +209,9 @@ def send_reengagement_emails(self):
     """
     from .models import User
     from .email_sequences import (
-        REENGAGEMENT_EMAILS, get_last_activity, is_crisis_suppressed,
-        marketing_unsubscribe_url, INACTIVITY_DAYS, REENGAGEMENT_REENTRY_DAYS,
-        REENGAGEMENT_MAX_SENDS_PER_RUN,
+        REENGAGEMENT_EMAILS, is_crisis_suppressed, last_activity_expression,
+        marketing_unsubscribe_url, sequence_flag_subqueries, INACTIVITY_DAYS,
+        REENGAGEMENT_REENTRY_DAYS, REENGAGEMENT_MAX_SENDS_PER_RUN,
     )
 
     now = timezone.now()
@@ -206,11 +219,17 @@ def send_reengagement_emails(self):
     reentry_cutoff = now - timedelta(days=REENGAGEMENT_REENTRY_DAYS)
     site_url = getattr(settings, 'SITE_URL', 'https://myrecoverypal.com')
 
-    users = User.objects.filter(
+    # Any activity exits the sequence (see get_last_activity); the same
+    # check runs here in SQL against the joined activity summary.
+    users = User.objects.annotate(
+        last_activity=last_activity_expression(),
+        flag_crisis=sequence_flag_subqueries()['flag_crisis'],
+    ).filter(
         is_active=True,
         email_notifications=True,
         marketing_emails_enabled=True,
         date_joined__lt=inactivity_cutoff,  # never during onboarding
+        last_activity__lte=inactivity_cutoff,
     )
 
     sent_count = 0
@@ -241,8 +260,6 @@ def send_reengagement_emails(self):
                 f"users deferred to next run")
             break
         try:
-            if get_last_activity(user) > inactivity_cutoff:
-                continue  # active -> exit sequence
             if is_crisis_suppressed(user):
                 continue
 
@@ -296,7 +313,7 @@ def send_checkin_reminders(self):
     Send check-in reminders to users who haven't checked in today.
     Only sends to users who have checked in before (engaged users).
     """
-    from .models import User, DailyCheckIn
+    from .models import User
 
     today = timezone.now().date()
     yesterday = today - timedelta(days=1)
@@ -373,67 +390,12 @@ def send_checkin_reminders(self):
 # Weekly Digest Email
 # ========================================
 
-MILESTONE_DAYS = [1, 7, 14, 30, 60, 90, 180, 365, 548, 730, 1095, 1460, 1825, 2555, 3650]
-
-
 def _build_premium_recap(user, today):
     """Personal week-in-review stats for premium subscribers' weekly digest.
     Returns a dict, or None for free users / users with nothing to show."""
-    from django.db.models import Avg
-    from .models import DailyCheckIn
-
-    try:
-        if not user.subscription.is_premium():
-            return None
-    except Exception:
-        return None
-
-    week_ago = today - timedelta(days=7)
-    two_weeks_ago = today - timedelta(days=14)
-
-    this_week = DailyCheckIn.objects.filter(user=user, date__gt=week_ago, date__lte=today)
-    last_week = DailyCheckIn.objects.filter(user=user, date__gt=two_weeks_ago, date__lte=week_ago)
-
-    checkin_count = this_week.count()
-    stats = this_week.aggregate(mood=Avg('mood'), craving=Avg('craving_level'))
-    prev_stats = last_week.aggregate(mood=Avg('mood'), craving=Avg('craving_level'))
-
-    days_sober = user.get_days_sober() or 0
-    next_milestone = next((m for m in MILESTONE_DAYS if m > days_sober), None)
+    from .digest_service import premium_recaps
 
-    try:
-        pledge_streak = user.get_pledge_streak()
-    except Exception:
-        pledge_streak = 0
-    try:
-        checkin_streak = user.get_checkin_streak()
-    except Exception:
-        checkin_streak = 0
-
-    if checkin_count == 0 and days_sober == 0 and pledge_streak == 0:
-        return None
-
-    def _trend(current, previous, lower_is_better=False):
-        if current is None or previous is None:
-            return ''
-        delta = current - previous
-        if abs(delta) < 0.25:
-            return 'steady'
-        improving = delta < 0 if lower_is_better else delta > 0
-        return 'improving' if improving else 'dipping'
-
-    return {
-        'checkin_count': checkin_count,
-        'avg_mood': round(stats['mood'], 1) if stats['mood'] is not None else None,
-        'mood_trend': _trend(stats['mood'], prev_stats['mood']),
-        'avg_craving': round(stats['craving'], 1) if stats['craving'] is not None else None,
-        'craving_trend': _trend(stats['craving'], prev_stats['craving'], lower_is_better=True),
-        'pledge_streak': pledge_streak,
-        'checkin_streak': checkin_streak,
-        'days_sober': days_sober,
-        'next_milestone': next_milestone,
-        'days_to_milestone': (next_milestone - days_sober) if next_milestone else None,
-    }
+    return premium_recaps([user], today).get(user.pk)
 
 
 @shared_task(bind=True, max_retries=3)
@@ -442,97 +404,82 @@ def send_weekly_digests(self):
     Send weekly digest emails summarizing activity.
     Includes: new followers, missed posts, community highlights — and for
     premium subscribers, a personal week-in-review recap.
+
+    Content is built by digest_service for CHUNK_SIZE members at a time (a
+    handful of grouped queries per chunk); sent-stamps are written back with
+    bulk_update every 25 sends and whenever a chunk ends.
     """
-    from .models import User, SocialPost, UserConnection, Notification
-    from django.db import models as db_models
+    from .digest_service import CHUNK_SIZE, build_digests
+    from .models import User
 
-    one_week_ago = timezone.now() - timedelta(days=7)
-    last_digest_cutoff = timezone.now() - timedelta(days=6)
+    now = timezone.now()
+    last_digest_cutoff = now - timedelta(days=6)
 
     # Users who haven't received a digest in the last 6 days
-    users = User.objects.filter(
+    user_ids = list(User.objects.filter(
         email_notifications=True,
         is_active=True,
     ).exclude(
         last_weekly_digest_sent__gte=last_digest_cutoff
-    )
+    ).order_by('pk').values_list('pk', flat=True))
 
     sent_count = 0
     failed_count = 0
     skipped_count = 0
     site_url = getattr(settings, 'SITE_URL', 'https://myrecoverypal.com')
+    last_send = None
 
-    for user in users:
+    for offset in range(0, len(user_ids), CHUNK_SIZE):
+        users = list(
+            User.objects.filter(pk__in=user_ids[offset:offset + CHUNK_SIZE])
+            .select_related('subscription', 'activity_summary')
+            .order_by('pk')
+        )
+        digests = build_digests(users, now)
+        stamped = []
         try:
-            # Gather digest content
-            new_followers = UserConnection.objects.filter(
-                following=user,
-                connection_type='follow',
-                created_at__gte=one_week_ago
-            ).select_related('follower')[:5]
-
-            # Unread notifications count
-            unread_notifications = Notification.objects.filter(
-                recipient=user,
-                is_read=False,
-                created_at__gte=one_week_ago
-            ).count()
-
-            # Popular posts from people they follow
-            following_ids = UserConnection.objects.filter(
-                follower=user,
-                connection_type='follow'
-            ).values_list('following_id', flat=True)
-            popular_posts = SocialPost.objects.filter(
-                author_id__in=following_ids,
-                created_at__gte=one_week_ago,
-                visibility='public'
-            ).select_related('author').annotate(
-                like_count=db_models.Count('likes')
-            ).order_by('-like_count')[:3]
-
-            # Premium subscribers get a personal week-in-review recap
-            premium_recap = _build_premium_recap(user, timezone.now().date())
-
-            # If no activity and no recap, skip sending
-            if (not new_followers.exists() and unread_notifications == 0
-                    and not popular_posts.exists() and premium_recap is None):
-                skipped_count += 1
-                continue
-
-            html_message = render_to_string('emails/weekly_digest.html', {
-                'user': user,
-                'site_url': site_url,
-                'new_followers': new_followers,
-                'new_follower_count': new_followers.count(),
-                'unread_notifications': unread_notifications,
-                'popular_posts': popular_posts,
-                'days_sober': user.get_days_sober(),
-                'premium_recap': premium_recap,
-                'current_year': timezone.now().year,
-            })
-            plain_message = strip_tags(html_message)
-
-            success, error = send_email(
-                subject="Your weekly recovery recap 📬",
-                plain_message=plain_message,
-                html_message=html_message,
-                recipient_email=user.email,
-            )
-
-            if not success:
-                raise Exception(f"Failed to send weekly digest to {user.email}: {error}")
-
-            user.last_weekly_digest_sent = timezone.now()
-            user.save(update_fields=['last_weekly_digest_sent'])
-            sent_count += 1
-
-            # Small delay between emails to avoid rate limiting
-            time.sleep(0.5)
-
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Error sending weekly digest to {user.email}: {e}")
+            for user in users:
+                digest = digests[user.pk]
+                if digest is None:
+                    skipped_count += 1
+                    continue
+                try:
+                    html_message = render_to_string('emails/weekly_digest.html', {
+                        'user': user,
+                        'site_url': site_url,
+                        'current_year': now.year,
+                        **digest,
+                    })
+                    plain_message = strip_tags(html_message)
+
+                    # Small gap between emails to avoid rate limiting; time
+                    # spent rendering counts towards it.
+                    if last_send is not None:
+                        time.sleep(max(0.0, 0.5 - (time.monotonic() - last_send)))
+                    last_send = time.monotonic()
+
+                    success, error = send_email(
+                        subject="Your weekly recovery recap 📬",
+                        plain_message=plain_message,
+                        html_message=html_message,
+                        recipient_email=user.email,
+                    )
+
+                    if not success:
+                        raise Exception(f"Failed to send weekly digest to {user.email}: {error}")
+
+                    user.last_weekly_digest_sent = timezone.now()
+                    stamped.append(user)
+                    sent_count += 1
+                    if len(stamped) >= 25:
+                        User.objects.bulk_update(stamped, ['last_weekly_digest_sent'])
+                        stamped = []
+
+                except Exception as e:
+                    failed_count += 1
+                    logger.error(f"Error sending weekly digest to {user.email}: {e}")
+        finally:
+            User.objects.bulk_update(stamped, ['last_weekly_digest_sent'])
 
     logger.info(f"Weekly digests sent to {sent_count} users, {failed_count} failed, {skipped_count} skipped (no activity)")
     return sent_count
@@ -554,10 +501,14 @@ def send_meeting_reminders(self):
     """
     Send reminders for bookmarked meetings starting in ~30 minutes.
     Runs every 15 minutes to catch meetings in the 20-40 minute window.
+
+    Meetings in the window are found with one range query on their
+    precomputed UTC schedule index (meeting_schedule), so the cost follows
+    how many meetings start soon, not how many bookmarks exist.
     """
+    from apps.support_services.meeting_schedule import week_minute, window_q
     from apps.support_services.models import UserBookmark
     from .push_notifications import PushNotificationService
-    import pytz
 
     now = timezone.now()
     sent_count = 0
@@ -565,12 +516,13 @@ def send_meeting_reminders(self):
     site_url = getattr(settings, 'SITE_URL', 'https://myrecoverypal.com')
 
     # Get all meeting bookmarks where:
+    # - The meeting starts 20-40 minutes from now
     # - User has reminder enabled
-    # - Meeting exists (is bookmarked)
     # - Hasn't been reminded in the last 20 hours
     last_reminder_cutoff = now - timedelta(hours=20)
 
     bookmarks = UserBookmark.objects.filter(
+        window_q(week_minute(now) + 20, 20, field='meeting__utc_minute_of_week'),
         meeting__isnull=False,
         reminder_enabled=True,
         user__email_notifications=True,
@@ -583,70 +535,40 @@ def send_meeting_reminders(self):
             meeting = bookmark.meeting
             user = bookmark.user
 
-            # Skip if meeting has no time set
-            if not meeting.time:
-                continue
-
-            # Get the meeting timezone
-            try:
-                meeting_tz = pytz.timezone(meeting.timezone or 'America/Chicago')
-            except pytz.exceptions.UnknownTimeZoneError:
-                meeting_tz = pytz.timezone('America/Chicago')
-
-            # Get current time in meeting's timezone
-            now_in_meeting_tz = now.astimezone(meeting_tz)
-            today_weekday = (now_in_meeting_tz.weekday() + 1) % 7  # Convert to Sunday=0
+            # Send push notification
+            PushNotificationService.notify_meeting_reminder(user, meeting)
 
-            # Check if meeting is today
-            if meeting.day != today_weekday:
-                continue
+            # Send email reminder
+            meeting_name = meeting.name or meeting.group or 'Your meeting'
+            html_message = render_to_string('emails/meeting_reminder.html', {
+                'user': user,
+                'meeting': meeting,
+                'meeting_name': meeting_name,
+                'meeting_time': meeting.time.strftime('%I:%M %p'),
+                'site_url': site_url,
+                'current_year': now.year,
+            })
+            plain_message = strip_tags(html_message)
 
-            # Create datetime for today's meeting
-            from datetime import datetime
-            meeting_datetime = meeting_tz.localize(
-                datetime.combine(now_in_meeting_tz.date(), meeting.time)
+            success, error = send_email(
+                subject=f"Meeting Reminder: {meeting_name} starts soon!",
+                plain_message=plain_message,
+                html_message=html_message,
+                recipient_email=user.email,
             )
 
-            # Calculate minutes until meeting
-            time_until_meeting = meeting_datetime - now_in_meeting_tz
-            minutes_until = time_until_meeting.total_seconds() / 60
-
-            # Send reminder if meeting is 20-40 minutes away
-            if 20 <= minutes_until <= 40:
-                # Send push notification
-                PushNotificationService.notify_meeting_reminder(user, meeting)
-
-                # Send email reminder
-                meeting_name = meeting.name or meeting.group or 'Your meeting'
-                html_message = render_to_string('emails/meeting_reminder.html', {
-                    'user': user,
-                    'meeting': meeting,
-                    'meeting_name': meeting_name,
-                    'meeting_time': meeting.time.strftime('%I:%M %p'),
-                    'site_url': site_url,
-                    'current_year': now.year,
-                })
-                plain_message = strip_tags(html_message)
-
-                success, error = send_email(
-                    subject=f"Meeting Reminder: {meeting_name} starts soon!",
-                    plain_message=plain_message,
-                    html_message=html_message,
-                    recipient_email=user.email,
-                )
-
-                if not success:
-                    logger.warning(f"Failed to send meeting reminder email to {user.email}: {error}")
+            if not success:
+                logger.warning(f"Failed to send meeting reminder email to {user.email}: {error}")
 
-                # Update last reminder sent
-                bookmark.last_reminder_sent = now
-                bookmark.save(update_fields=['last_reminder_sent'])
-                sent_count += 1
+            # Update last reminder sent
+            bookmark.last_reminder_sent = now
+            bookmark.save(update_fields=['last_reminder_sent'])
+            sent_count += 1
 
-                logger.info(f"Meeting reminder sent to {user.email} for {meeting_name}")
+            logger.info(f"Meeting reminder sent to {user.email} for {meeting_name}")
 
-                # Small delay between emails
-                time.sleep(0.5)
+            # Small delay between emails
+            time.sleep(0.5)
 
         except Exception as e:
             failed_count += 1
@@ -671,7 +593,10 @@ def send_pal_accountability_nudges(self):
 
     Runs daily at 2 PM UTC. Max one nudge per relationship every 3 days.
     """
-    from .models import User, RecoveryPal, DailyCheckIn
+    from datetime import date
+    from django.db.models import Q, Value
+    from django.db.models.functions import Coalesce
+    from .models import RecoveryPal
     from .push_notifications import PushNotificationService
 
     now = timezone.now()
@@ -683,34 +608,37 @@ def send_pal_accountability_nudges(self):
     skipped_count = 0
     site_url = getattr(settings, 'SITE_URL', 'https://myrecoverypal.com')
 
-    # Get all active pal relationships
-    active_pals = RecoveryPal.objects.filter(status='active').select_related('user1', 'user2')
+    # Active pal relationships where exactly one side hasn't checked in for
+    # 3+ days, found in one query joined to both activity summaries. A
+    # member who never checked in sorts before any cutoff.
+    cutoff = three_days_ago.date()
+    never = date(1970, 1, 1)
+    active_pals = (
+        RecoveryPal.objects.filter(status='active')
+        .annotate(
+            user1_last_checkin=Coalesce('user1__activity_summary__last_checkin_date', Value(never)),
+            user2_last_checkin=Coalesce('user2__activity_summary__last_checkin_date', Value(never)),
+        )
+        .filter(
+            Q(user1_last_checkin__lt=cutoff, user2_last_checkin__gte=cutoff)
+            | Q(user1_last_checkin__gte=cutoff, user2_last_checkin__lt=cutoff)
+        )
+        .select_related('user1', 'user2')
+    )
 
     for pal_rel in active_pals:
         try:
             user1, user2 = pal_rel.user1, pal_rel.user2
-
-            # Get last check-in for each user
-            user1_last_checkin = DailyCheckIn.objects.filter(user=user1).order_by('-date').first()
-            user2_last_checkin = DailyCheckIn.objects.filter(user=user2).order_by('-date').first()
-
-            # Determine who is inactive (no check-in in 3+ days)
-            user1_inactive = not user1_last_checkin or user1_last_checkin.date < three_days_ago.date()
-            user2_inactive = not user2_last_checkin or user2_last_checkin.date < three_days_ago.date()
-
-            # Skip if both active or both inactive (no clear active/inactive pair)
-            if user1_inactive == user2_inactive:
-                skipped_count += 1
-                continue
+            user1_inactive = pal_rel.user1_last_checkin < cutoff
 
             # Identify inactive and active users
             inactive_user = user1 if user1_inactive else user2
             active_user = user2 if user1_inactive else user1
-            inactive_last_checkin = user1_last_checkin if user1_inactive else user2_last_checkin
+            inactive_last_checkin = pal_rel.user1_last_checkin if user1_inactive else pal_rel.user2_last_checkin
 
             # Calculate days since last check-in
-            if inactive_last_checkin:
-                days_inactive = (now.date() - inactive_last_checkin.date).days
+            if inactive_last_checkin != never:
+                days_inactive = (now.date() - inactive_last_checkin).days
             else:
                 days_inactive = 7  # Default if never checked in
 
@@ -1223,7 +1151,8 @@ def send_supporter_inactivity_alerts(self):
     Idempotent per gap via last_inactivity_alert_sent (cooldown = threshold days).
     Returns the number of alerts sent. Runs daily at 6 PM UTC.
     """
-    from .models import DailyCheckIn, Notification  # noqa
+    from django.db.models import Q
+    from .activity_summary import get_summary
     from .supporter_models import SupporterLink
     from .views import create_notification
 
@@ -1231,19 +1160,27 @@ def send_supporter_inactivity_alerts(self):
     today = now.date()
     sent = 0
 
+    # Thresholds are per link, so the inactivity and cooldown conditions are
+    # OR'd per distinct threshold value; the whole selection stays one query
+    # joined to the member's activity summary.
     links = SupporterLink.objects.filter(
-        status='active', preset='close'
-    ).select_related('member', 'supporter')
+        status='active', preset='close', supporter__isnull=False,
+    )
+    due = Q(pk__in=[])
+    for threshold in links.values_list('inactivity_threshold_days', flat=True).distinct():
+        due |= (
+            Q(inactivity_threshold_days=threshold)
+            & (Q(member__activity_summary__last_checkin_date__isnull=True)
+               | Q(member__activity_summary__last_checkin_date__lte=today - timedelta(days=threshold)))
+            # Cooldown: don't re-alert within the threshold window.
+            & (Q(last_inactivity_alert_sent__isnull=True)
+               | Q(last_inactivity_alert_sent__lte=now - timedelta(days=threshold)))
+        )
+    links = links.filter(due).select_related('member', 'supporter', 'member__activity_summary')
+
     for link in links:
-        if not link.supporter:
-            continue
-        last = DailyCheckIn.objects.filter(user=link.member).order_by('-date').first()
-        days_since = (today - last.date).days if last else link.inactivity_threshold_days + 1
-        if days_since < link.inactivity_threshold_days:
-            continue
-        # Cooldown: don't re-alert within the threshold window.
-        if link.last_inactivity_alert_sent and (now - link.last_inactivity_alert_sent).days < link.inactivity_threshold_days:
-            continue
+        last_date = get_summary(link.member).last_checkin_date
+        days_since = (today - last_date).days if last_date else link.inactivity_threshold_days + 1
 
         name = link.member.get_full_name() or link.member.username
         create_notification(
@@ -1287,7 +1224,7 @@ def send_facility_risk_digest():
     for facility in Facility.objects.filter(status='active'):
         newly_at_risk = []
         for m in fs.visible_memberships(facility):
-            level = fs.compute_member_risk(m)['risk_level']
+            level = fs.member_risk_level(m)
             if level == fs.RISK_AT_RISK:
                 if m.risk_notified_at is None:
                     newly_at_risk.append(m)
@@ -1483,3 +1420,385 @@ def send_court_monthly_po_reports():
 
     logger.info(f'Court monthly PO reports sent: {sent}')
     return sent
+
+
+# ========================================
+# Unread Counter Reconciliation
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def reconcile_unread_counters():
+    """Rewrite cached unread counts for recently active members.
+
+    The counters are INCR/DECR'd in place (notification_service), so a lost
+    increment or a write that bypassed the helpers leaves them off until the
+    key expires. Members seen in the last hour are the ones whose badges are
+    on screen; their counts are recomputed in chunks with one grouped COUNT
+    per chunk. Runs every 10 minutes.
+    """
+    from .models import User
+    from .notification_service import reconcile_unread_counters as reconcile
+
+    since = timezone.now() - timedelta(hours=1)
+    user_ids = list(
+        User.objects.filter(is_active=True, last_seen__gte=since).values_list('id', flat=True)
+    )
+    reconciled = 0
+    for start in range(0, len(user_ids), 500):
+        reconciled += reconcile(user_ids[start:start + 500])
+
+    logger.info(f'reconcile_unread_counters: reconciled={reconciled}')
+    return reconciled
+
+
+# ========================================
+# Notification Retention
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def archive_old_notifications():
+    """Archive or prune expired notifications and old broadcasts.
+
+    See notification_retention for the rules. Batched and time-boxed, so a
+    large backlog (the first run) drains over several nights. Runs daily
+    at 3:30 AM UTC.
+    """
+    from .notification_retention import archive_old_notifications as archive, prune_old_broadcasts
+
+    moved = archive()
+    broadcasts = prune_old_broadcasts()
+    logger.info(f'archive_old_notifications: notifications={moved} broadcasts={broadcasts}')
+    return {'notifications': moved, 'broadcasts': broadcasts}
+
+
+@shared_task
+def maintain_notification_partitions():
+    """Create upcoming monthly notification partitions on Postgres.
+
+    A no-op until `manage.py partition_notifications` has converted the
+    table. Runs on the 1st of each month, keeping three months ahead.
+    """
+    from .notification_retention import ensure_partitions, is_partitioned
+
+    if not is_partitioned():
+        return []
+    created = ensure_partitions()
+    if created:
+        logger.info(f'maintain_notification_partitions: created {created}')
+    return created
+
+
+# ========================================
+# Activity Summary Verification
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def verify_activity_summaries():
+    """Rebuild every member's UserActivitySummary from the source tables.
+
+    Signals keep the rows current during the day; this rolls the 7-day
+    windows forward and repairs rows that bulk writes bypassed. Runs daily
+    at 1:45 AM UTC, ahead of the morning batch jobs that read the rows.
+    """
+    from .activity_summary import rebuild
+    from .models import User
+
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(user_ids), 500):
+        changed += rebuild(user_ids[start:start + 500])
+
+    logger.info(f'verify_activity_summaries: users={len(user_ids)} changed={changed}')
+    return changed
+
+
+# ========================================
+# Recommendations
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def rebuild_recommendations():
+    """Recompute every active member's "people you may know" list.
+
+    The candidate pool is loaded once and shared by every batch. Runs daily
+    at 2:30 AM UTC, after the activity summaries are rebuilt.
+    """
+    from .models import User
+    from .recommendations import CandidatePool, rebuild
+
+    pool = CandidatePool()
+    user_ids = list(User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), 500):
+        rebuild(user_ids[start:start + 500], pool=pool)
+
+    logger.info(f'rebuild_recommendations: users={len(user_ids)} candidates={len(pool.recency)}')
+    return len(user_ids)
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def refresh_stale_recommendations():
+    """Recompute lists flagged stale by follows and profile changes.
+    Runs every 10 minutes.
+    """
+    from .recommendations import refresh_stale
+
+    refreshed = refresh_stale()
+    if refreshed:
+        logger.info(f'refresh_stale_recommendations: refreshed {refreshed}')
+    return refreshed
+
+
+# ========================================
+# Member Directory
+# ========================================
+
+@shared_task
+def refresh_directory_counts():
+    """Recount total and online members for the community page.
+    Runs every minute.
+    """
+    from .member_directory import refresh_counts
+
+    return refresh_counts()
+
+
+# ========================================
+# Group Fan-out
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def fanout_group_posts(group_id):
+    """Notify a group's members about its newly created posts.
+
+    Scheduled by group_fanout.schedule() a minute after the first post in
+    a burst, so every post made meanwhile goes out as one notification.
+    """
+    from .group_fanout import fanout_posts
+
+    notified = fanout_posts(group_id)
+    logger.info(f'fanout_group_posts: group={group_id} notified={notified}')
+    return notified
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def fanout_group_notification(group_id, notification_type, title, message, link,
+                              sender_id=None, exclude_ids=(), run_key=None):
+    """In-app notice to every member who hasn't muted the group (see
+    group_fanout.announce). A retry resumes after the last delivered page.
+    """
+    from .group_fanout import deliver
+    from .models import GroupFanoutRun, User
+
+    run = None
+    if run_key:
+        run, _ = GroupFanoutRun.objects.get_or_create(key=run_key, defaults={'group_id': group_id})
+        if run.completed_at:
+            return 0
+    sender = User.objects.filter(pk=sender_id).first() if sender_id else None
+    notified = deliver(
+        group_id, ('all', 'digest'), notification_type, title, message, link,
+        sender=sender, exclude_ids=set(exclude_ids), run=run,
+    )
+    logger.info(f'fanout_group_notification: group={group_id} notified={notified}')
+    return notified
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def send_group_digests():
+    """Daily per-group summary for members on the digest setting.
+    Runs daily at 6 PM UTC.
+    """
+    from .group_fanout import send_digests
+
+    groups = send_digests()
+    logger.info(f'send_group_digests: groups={groups}')
+    return groups
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def retry_stuck_group_fanouts():
+    """Re-run fan-outs for groups whose posts were never claimed, e.g.
+    because the broker was unreachable when they were created, and prune
+    finished fan-out runs. Runs every 10 minutes.
+    """
+    from .group_fanout import prune_runs, stuck_group_ids
+
+    prune_runs()
+    group_ids = stuck_group_ids()
+    for group_id in group_ids:
+        fanout_group_posts.delay(group_id)
+    if group_ids:
+        logger.warning(f'retry_stuck_group_fanouts: re-enqueued {len(group_ids)} groups')
+    return len(group_ids)
+
+
+# ========================================
+# A/B Testing
+# ========================================
+
+AB_FLUSH_MAX_BATCHES = 20
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def flush_ab_test_events():
+    """Bulk-insert the A/B assignments and conversions buffered by page
+    loads (see ab_testing.flush_events). Runs every minute.
+    """
+    from .ab_testing import flush_events
+
+    flushed = 0
+    for _ in range(AB_FLUSH_MAX_BATCHES):
+        drained = flush_events()
+        if not drained:
+            break
+        flushed += drained
+    if flushed:
+        logger.info(f'flush_ab_test_events: flushed {flushed} events')
+    return flushed
+
+
+# ========================================
+# Content Analytics
+# ========================================
+
+CONTENT_FLUSH_MAX_BATCHES = 20
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def flush_content_events():
+    """Apply the blog/resource view and download counters and resource
+    usage rows buffered by page loads (see recovery_hub.content_events).
+    Runs every minute.
+    """
+    from recovery_hub import content_events
+
+    flushed = 0
+    for _ in range(CONTENT_FLUSH_MAX_BATCHES):
+        drained = content_events.flush()
+        if not drained:
+            break
+        flushed += drained
+    if flushed:
+        logger.info(f'flush_content_events: flushed {flushed} events')
+    return flushed
+
+
+# ========================================
+# Stripe Webhook Events
+# ========================================
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def process_stripe_events(customer_id):
+    """Apply a customer's stored Stripe events in order.
+
+    Enqueued by the webhook after it records an event, and by
+    retry_stripe_events for anything due. See stripe_events.
+    """
+    from .stripe_events import process_customer
+
+    return process_customer(customer_id)
+
+
+@shared_task
+def retry_stripe_events():
+    """Re-dispatch Stripe events that are due: failed events past their
+    backoff, pending events whose enqueue was lost, and stale claims.
+    Runs every 5 minutes.
+    """
+    from .stripe_events import due_customers, enqueue
+
+    customers = due_customers()
+    for customer_id in customers:
+        enqueue(customer_id)
+    if customers:
+        logger.info(f'retry_stripe_events: dispatched {len(customers)} customers')
+    return len(customers)
+
+
+# ========================================
+# Task Metrics
+# ========================================
+
+@shared_task
+def prune_task_runs():
+    """Delete TaskRun metrics older than TASK_METRICS_RETENTION_DAYS.
+    Runs daily at 4:15 AM UTC.
+    """
+    from .task_metrics_models import TaskRun
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'TASK_METRICS_RETENTION_DAYS', 14))
+    deleted, _ = TaskRun.objects.filter(started_at__lt=cutoff).delete()
+    logger.info(f'prune_task_runs: deleted {deleted}')
+    return deleted
@@ -1,17 +1,19 @@
 from django import template
 
+from apps.accounts import messaging
+
 register = template.Library()
 
 @register.filter
 def unread_messages_count(user):
     """Get count of unread messages for a user"""
     if user.is_authenticated:
-        return user.received_messages.filter(is_read=False).count()
+        return messaging.unread_total(user.pk)
     return 0
 
 @register.filter
 def has_unread_messages(user):
     """Check if user has unread messages"""
     if user.is_authenticated:
-        return user.received_messages.filter(is_read=False).exists()
+        return messaging.unread_total(user.pk) > 0
     return False
\ No newline at end of file
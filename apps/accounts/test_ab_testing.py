@@ -0,0 +1,139 @@
+"""A/B testing: in-memory definitions, hashed assignment and buffered writes."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase
+from unittest import mock
+
+from apps.accounts import ab_testing
+from apps.accounts.ab_testing import (
+    ABTest, ABTestAssignment, ABTestConversion, ABTestingService, ABTestVariant,
+)
+from apps.accounts.tasks import flush_ab_test_events
+from recovery_hub import event_buffer
+
+User = get_user_model()
+
+
+class ABTestingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        event_buffer._local.clear()
+        ab_testing._definitions.update(version=None, checked_at=0.0, tests={})
+        self.test = ABTestingService.create_onboarding_test()
+        self.users = [
+            User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='x')
+            for i in range(6)
+        ]
+
+    def test_get_variant_is_deterministic_and_reads_no_database(self):
+        ABTestingService.get_variant(self.users[0], 'onboarding_flow')
+        with self.assertNumQueries(0):
+            variants = [ABTestingService.get_variant(u, 'onboarding_flow') for u in self.users]
+            again = [ABTestingService.get_variant(u, 'onboarding_flow') for u in self.users]
+        self.assertEqual(variants, again)
+        self.assertTrue(set(variants) <= {'control', 'simplified', 'progressive'})
+        self.assertIsNone(ABTestingService.get_variant(self.users[0], 'missing'))
+
+    def test_assignments_queued_once_and_flushed_in_bulk(self):
+        for user in self.users:
+            ABTestingService.get_variant(user, 'onboarding_flow')
+            ABTestingService.get_variant(user, 'onboarding_flow')
+        self.assertEqual(event_buffer.size(ab_testing.ASSIGNMENT_BUFFER), 6)
+        self.assertFalse(ABTestAssignment.objects.exists())
+
+        # Live users, live variants, the insert, and the savepoint around them.
+        with self.assertNumQueries(5):
+            ab_testing.flush_events()
+        assigned = dict(ABTestAssignment.objects.values_list('user__username', 'variant__name'))
+        self.assertEqual(assigned, {
+            u.username: ABTestingService.get_variant(u, 'onboarding_flow') for u in self.users})
+
+    def test_conversions_only_count_for_assigned_users(self):
+        assigned, unassigned = self.users[:2]
+        ABTestingService.get_variant(assigned, 'onboarding_flow')
+        self.assertTrue(ABTestingService.track_conversion(assigned, 'onboarding_flow', 'first_post'))
+        self.assertFalse(ABTestingService.track_conversion(assigned, 'onboarding_flow', 'first_post'))
+        ABTestingService.track_conversion(unassigned, 'onboarding_flow', 'first_post')
+        self.assertFalse(ABTestingService.track_conversion(assigned, 'missing', 'first_post'))
+
+        self.assertEqual(flush_ab_test_events(), 3)
+        self.assertEqual(
+            list(ABTestConversion.objects.values_list('assignment__user__username', 'conversion_type')),
+            [('u0', 'first_post')])
+
+    def test_deleted_user_or_variant_skips_only_their_records(self):
+        for user in self.users:
+            ABTestingService.get_variant(user, 'onboarding_flow')
+            ABTestingService.track_conversion(user, 'onboarding_flow', 'first_post')
+        variants = {u.username: ABTestingService.get_variant(u, 'onboarding_flow') for u in self.users}
+        dropped_variant = variants['u1']
+        kept = {name for name, variant in variants.items() if name != 'u0' and variant != dropped_variant}
+        self.assertNotEqual(kept, set())
+        ABTestVariant.objects.filter(test=self.test, name=dropped_variant).delete()
+        self.users[0].delete()
+
+        self.assertEqual(flush_ab_test_events(), 12)
+        self.assertEqual(set(ABTestAssignment.objects.values_list('user__username', flat=True)), kept)
+        self.assertEqual(
+            set(ABTestConversion.objects.values_list('assignment__user__username', flat=True)), kept)
+
+    def test_conversions_wait_for_the_assignment_backlog(self):
+        for user in self.users:
+            ABTestingService.get_variant(user, 'onboarding_flow')
+            ABTestingService.track_conversion(user, 'onboarding_flow', 'first_post')
+
+        self.assertEqual(ab_testing.flush_events(limit=4), 4)
+        self.assertFalse(ABTestConversion.objects.exists())
+        self.assertEqual(event_buffer.size(ab_testing.CONVERSION_BUFFER), 6)
+        while ab_testing.flush_events(limit=4):
+            pass
+        self.assertEqual(ABTestAssignment.objects.count(), 6)
+        self.assertEqual(ABTestConversion.objects.count(), 6)
+
+    def test_failed_write_requeues_the_batch(self):
+        for user in self.users:
+            ABTestingService.get_variant(user, 'onboarding_flow')
+        ABTestingService.track_conversion(self.users[0], 'onboarding_flow', 'first_post')
+
+        with mock.patch.object(ABTestAssignment.objects, 'bulk_create', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                ab_testing.flush_events()
+        self.assertEqual(event_buffer.size(ab_testing.ASSIGNMENT_BUFFER), 6)
+        self.assertEqual(event_buffer.size(ab_testing.CONVERSION_BUFFER), 1)
+        self.assertFalse(ABTestAssignment.objects.exists())
+
+        self.assertEqual(ab_testing.flush_events(), 7)
+        self.assertEqual(ABTestAssignment.objects.count(), 6)
+        self.assertEqual(ABTestConversion.objects.count(), 1)
+
+    def test_definition_changes_reach_other_processes_via_version_key(self):
+        ABTestingService.get_variant(self.users[0], 'onboarding_flow')
+        ABTest.objects.filter(pk=self.test.pk).update(traffic_percentage=0)
+        # Another process saved the test: only the shared version moved.
+        ab_testing._definitions['checked_at'] = 0.0
+        self.assertIsNotNone(ABTestingService.get_variant(self.users[0], 'onboarding_flow'))
+        ab_testing.invalidate_definitions()
+        self.assertIsNone(ABTestingService.get_variant(self.users[0], 'onboarding_flow'))
+
+    def test_variant_save_bumps_definitions(self):
+        ABTestingService.get_variant(self.users[0], 'onboarding_flow')
+        ABTestVariant.objects.filter(test=self.test).exclude(name='control').delete()
+        self.assertEqual(
+            {ABTestingService.get_variant(u, 'onboarding_flow') for u in self.users}, {'control'})
+
+    def test_results_from_one_grouped_query(self):
+        for user in self.users:
+            ABTestingService.get_variant(user, 'onboarding_flow')
+            ABTestingService.track_conversion(user, 'onboarding_flow', 'started_onboarding')
+        ABTestingService.track_conversion(self.users[0], 'onboarding_flow', 'completed_onboarding')
+        ab_testing.flush_events()
+
+        with self.assertNumQueries(1):
+            results = ABTestingService.get_test_results('onboarding_flow')
+        self.assertEqual(sum(r['total_users'] for r in results.values()), 6)
+        self.assertEqual(sum(r['conversions']['started_onboarding']['count'] for r in results.values()), 6)
+        winner = ABTestingService.get_variant(self.users[0], 'onboarding_flow')
+        completed = results[winner]['conversions']['completed_onboarding']
+        self.assertEqual(completed['count'], 1)
+        self.assertEqual(completed['rate'], round(1 / results[winner]['total_users'], 4))
@@ -0,0 +1,137 @@
+"""UserActivitySummary: signal maintenance, nightly rebuild, batch readers."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.activity_summary import rebuild
+from apps.accounts.models import (
+    DailyCheckIn, DailyPledge, RecoveryPal, SocialPost, UserActivitySummary,
+)
+from apps.accounts.tasks import send_pal_accountability_nudges
+from apps.journal.models import JournalEntry
+
+User = get_user_model()
+
+
+def checkin(user, days_ago, mood=3, craving=0):
+    return DailyCheckIn.objects.create(
+        user=user, date=timezone.localdate() - timedelta(days=days_ago),
+        mood=mood, craving_level=craving, energy_level=3)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class ActivitySummaryMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='member', email='member@example.com', password='x')
+
+    def summary(self):
+        return UserActivitySummary.objects.get(user=self.user)
+
+    def test_row_created_with_user(self):
+        self.assertEqual(self.summary().checkin_streak, 0)
+
+    def test_checkins_update_streak_and_window(self):
+        for days_ago, mood, craving in [(0, 4, 1), (1, 2, 3), (2, 1, 4), (10, 1, 4)]:
+            checkin(self.user, days_ago, mood, craving)
+
+        summary = self.summary()
+        self.assertEqual(summary.last_checkin_date, timezone.localdate())
+        self.assertEqual(summary.checkin_streak, 3)
+        self.assertEqual(summary.checkin_streak, self.user.get_checkin_streak())
+        self.assertEqual(summary.checkins_7d, 3)
+        self.assertEqual(summary.mood_min_7d, 1)
+        self.assertEqual(summary.craving_max_7d, 4)
+        self.assertAlmostEqual(summary.mood_avg_7d, 7 / 3)
+
+        DailyCheckIn.objects.get(user=self.user, date=timezone.localdate()).delete()
+        summary = self.summary()
+        self.assertEqual(summary.last_checkin_date, timezone.localdate() - timedelta(days=1))
+        self.assertEqual(summary.checkin_streak, 2)
+
+    def test_streak_lapses_after_a_missed_day(self):
+        checkin(self.user, 0)
+        summary = self.summary()
+        today = timezone.localdate()
+        self.assertEqual(summary.current_checkin_streak(today + timedelta(days=1)), 1)
+        self.assertEqual(summary.current_checkin_streak(today + timedelta(days=2)), 0)
+
+    def test_pledges_posts_and_journal(self):
+        DailyPledge.objects.create(user=self.user, date=timezone.localdate())
+        DailyPledge.objects.create(user=self.user, date=timezone.localdate() - timedelta(days=1))
+        post = SocialPost.objects.create(author=self.user, content='hello')
+        entry = JournalEntry.objects.create(user=self.user, content='dear diary')
+
+        summary = self.summary()
+        self.assertEqual(summary.pledge_streak, 2)
+        self.assertEqual(summary.current_pledge_streak(), self.user.get_pledge_streak())
+        self.assertEqual(summary.last_post_at, post.created_at)
+        self.assertEqual(summary.last_journal_at, entry.created_at)
+
+        post.delete()
+        self.assertIsNone(self.summary().last_post_at)
+
+    def test_last_seen_mirrored(self):
+        self.user.last_seen = timezone.now()
+        self.user.save(update_fields=['last_seen'])
+        self.assertEqual(self.summary().last_seen, self.user.last_seen)
+
+    def test_rebuild_repairs_bulk_writes(self):
+        DailyCheckIn.objects.bulk_create([
+            DailyCheckIn(user=self.user, date=timezone.localdate() - timedelta(days=i),
+                         mood=3, craving_level=0, energy_level=3)
+            for i in range(4)
+        ])
+        self.assertIsNone(self.summary().last_checkin_date)
+
+        self.assertEqual(rebuild([self.user.pk]), 1)
+        self.assertEqual(self.summary().checkin_streak, 4)
+        self.assertEqual(rebuild([self.user.pk]), 0)
+
+    def test_deleting_member_with_activity(self):
+        checkin(self.user, 0)
+        DailyPledge.objects.create(user=self.user)
+        self.user.delete()
+        self.assertFalse(UserActivitySummary.objects.exists())
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+@patch('apps.accounts.tasks.time.sleep')
+@patch('apps.accounts.tasks.send_email', return_value=(True, None))
+@patch('apps.accounts.push_notifications.PushNotificationService.notify_pal_nudge_inactive')
+@patch('apps.accounts.push_notifications.PushNotificationService.notify_pal_nudge_active')
+class PalNudgeSelectionTests(TestCase):
+    def pair(self, name, user1_days_ago, user2_days_ago):
+        users = []
+        for suffix, days_ago in (('a', user1_days_ago), ('b', user2_days_ago)):
+            user = User.objects.create_user(
+                username=f'{name}{suffix}', email=f'{name}{suffix}@example.com', password='x')
+            if days_ago is not None:
+                checkin(user, days_ago)
+            users.append(user)
+        RecoveryPal.objects.create(user1=users[0], user2=users[1], status='active')
+        return users
+
+    def test_only_one_sided_inactivity_is_nudged(self, *mocks):
+        self.pair('both_active', 0, 1)
+        self.pair('both_quiet', 5, None)
+        _, quiet = self.pair('one_quiet', 0, 4)
+        never, _ = self.pair('never', None, 0)
+
+        self.assertEqual(send_pal_accountability_nudges(), 2)
+        quiet.refresh_from_db()
+        never.refresh_from_db()
+        self.assertIsNotNone(quiet.last_pal_nudge_sent)
+        self.assertIsNotNone(never.last_pal_nudge_sent)
+
+        # Cooldown holds on the next run.
+        self.assertEqual(send_pal_accountability_nudges(), 0)
+
+    def test_selection_needs_no_per_pair_queries(self, *mocks):
+        for i in range(5):
+            self.pair(f'p{i}', 0, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(send_pal_accountability_nudges(), 0)
@@ -0,0 +1,135 @@
+"""Broadcast notifications: one row per announcement, merged per user on read."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import (
+    BroadcastNotification, BroadcastRead, Notification, NotificationReadState,
+)
+from apps.accounts.notification_service import MergedNotifications, unread_count
+from apps.blog.models import Post
+
+User = get_user_model()
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x')
+        self.members = [
+            User.objects.create_user(
+                username=f'member{i}', email=f'member{i}@example.com', password='x')
+            for i in range(3)
+        ]
+        self.member = self.members[0]
+        self.client.force_login(self.member)
+
+    def publish(self, title='Staying steady'):
+        # The push fan-out enqueue is covered by the blog tests.
+        with patch('apps.blog.signals._enqueue_blog_push_fanout'), \
+                self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                title=title, content='body', excerpt='Short excerpt',
+                status='published', author=self.author,
+            )
+
+    def test_publish_writes_one_row_regardless_of_member_count(self):
+        personal_before = Notification.objects.count()
+        post = self.publish()
+
+        self.assertEqual(BroadcastNotification.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), personal_before)
+        broadcast = BroadcastNotification.objects.get()
+        self.assertEqual(broadcast.object_id, post.pk)
+        self.assertEqual(broadcast.link, post.get_absolute_url())
+
+        # Re-saving the published post must not broadcast again.
+        post.content = 'edited'
+        post.save()
+        self.assertEqual(BroadcastNotification.objects.count(), 1)
+
+    def test_posts_are_not_announced_again_after_retention(self):
+        post = self.publish()
+        BroadcastNotification.objects.all().delete()
+        post.content = 'edited long after publishing'
+        post.save()
+        Post.objects.get(pk=post.pk).save()
+        self.assertFalse(BroadcastNotification.objects.exists())
+
+    def test_audience_excludes_author_and_later_joiners(self):
+        self.publish()
+        late = User.objects.create_user(username='late', email='late@example.com', password='x')
+
+        self.assertEqual(unread_count(self.member), 1)
+        self.assertEqual(unread_count(self.author), 0)
+        self.assertEqual(unread_count(late), 0)
+
+    def test_api_merges_personal_and_broadcast_newest_first(self):
+        Notification.objects.create(
+            recipient=self.member, sender=self.author, notification_type='follow',
+            title='New Follower', message='author followed you')
+        Notification.objects.filter(recipient=self.member).update(
+            created_at=timezone.now() - timedelta(hours=1))
+        self.publish()
+
+        data = self.client.get(reverse('accounts:notifications_api')).json()['notifications']
+        self.assertEqual([n['type'] for n in data[:2]], ['new_blog_post', 'follow'])
+        broadcast = data[0]
+        self.assertTrue(broadcast['id'].startswith('broadcast-'))
+        self.assertFalse(broadcast['is_read'])
+
+        self.assertEqual(self.client.get(reverse('accounts:unread_count_api')).json()['count'], 2)
+        self.client.post(broadcast['read_url'])
+        self.assertEqual(self.client.get(reverse('accounts:unread_count_api')).json()['count'], 1)
+
+        unread = self.client.get(
+            reverse('accounts:notifications_api'), {'unread_only': 'true'}).json()['notifications']
+        self.assertEqual([n['type'] for n in unread], ['follow'])
+        # Other members' read state is untouched.
+        self.assertEqual(unread_count(self.members[1]), 1)
+
+    def test_mark_all_read_moves_watermark_and_prunes_markers(self):
+        first = self.publish('first')
+        self.publish('second')
+        BroadcastRead.objects.create(
+            user=self.member,
+            broadcast=BroadcastNotification.objects.get(object_id=first.pk))
+
+        self.client.post(reverse('accounts:mark_all_notifications_read'))
+
+        self.assertEqual(unread_count(self.member), 0)
+        self.assertFalse(BroadcastRead.objects.filter(user=self.member).exists())
+        self.assertIsNotNone(NotificationReadState.objects.get(user=self.member).broadcasts_read_at)
+        self.assertTrue(all(n.is_read for n in MergedNotifications(self.member)[:10]))
+
+        self.publish('third')
+        self.assertEqual(unread_count(self.member), 1)
+
+    def test_notifications_page_paginates_merged_list(self):
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=self.member, notification_type='like',
+                title='New Like', message=f'like {i}')
+            for i in range(15)
+        ])
+        for i in range(10):
+            self.publish(f'post {i}')
+
+        response = self.client.get(reverse('accounts:notifications'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['notifications']), 20)
+        self.assertTrue(response.context['is_first_page'])
+        # The first ten unread items on the page get marked read.
+        self.assertEqual(response.context['unread_count'], 15)
+
+        response = self.client.get(
+            reverse('accounts:notifications'), {'after': response.context['next_cursor']})
+        self.assertEqual(len(response.context['notifications']), 5)
+        self.assertIsNone(response.context['next_cursor'])
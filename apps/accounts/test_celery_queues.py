@@ -0,0 +1,90 @@
+"""Celery queue routing, per-queue time limits and queue metrics."""
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recovery_hub.celery import app
+from recovery_hub.celery_metrics import _started_after, channel_stats, stamp_enqueued_at
+
+User = get_user_model()
+
+
+class QueueRoutingTests(SimpleTestCase):
+    def setUp(self):
+        app.loader.import_default_modules()
+
+    def route(self, name):
+        return app.amqp.router.route({}, name)['queue'].name
+
+    def test_every_task_is_assigned_a_queue(self):
+        assigned = {task for tasks in settings.CELERY_QUEUE_TASKS.values() for task in tasks}
+        registered = {name for name in app.tasks if name.startswith('apps.')}
+        self.assertEqual(registered - assigned, set())
+        self.assertEqual(assigned - registered, set())
+
+    def test_routes(self):
+        self.assertEqual(self.route('apps.accounts.tasks.send_invite_email_task'), 'interactive')
+        self.assertEqual(self.route('apps.accounts.tasks.send_weekly_digests'), 'bulk_email')
+        self.assertEqual(self.route('apps.blog.tasks.fanout_blog_push_notifications'), 'push_fanout')
+        self.assertEqual(self.route('apps.accounts.tasks.verify_activity_summaries'), 'maintenance')
+        self.assertEqual(self.route('apps.unlisted.tasks.something'), 'interactive')
+
+    def test_time_limits_follow_queue(self):
+        invite = app.tasks['apps.accounts.tasks.send_invite_email_task']
+        archive = app.tasks['apps.accounts.tasks.archive_old_notifications']
+        digest = app.tasks['apps.accounts.tasks.send_weekly_digests']
+        self.assertEqual((invite.soft_time_limit, invite.time_limit), (60, 90))
+        self.assertEqual((archive.soft_time_limit, archive.time_limit), (30 * 60, 40 * 60))
+        self.assertIsNone(digest.time_limit)
+
+
+class QueueMetricsTests(SimpleTestCase):
+    def test_publish_stamps_enqueued_at(self):
+        headers = {}
+        with patch('recovery_hub.celery_metrics.time.time', return_value=1000.0):
+            stamp_enqueued_at(headers=headers)
+            stamp_enqueued_at(headers=headers)
+        self.assertEqual(headers['enqueued_at'], 1000.0)
+
+    def test_wait_excludes_countdown(self):
+        request = SimpleNamespace(enqueued_at=1000.0, eta=None)
+        self.assertEqual(_started_after(request, 1004.0), 4.0)
+        request.eta = '1970-01-01T00:16:50+00:00'  # 1010
+        self.assertEqual(_started_after(request, 1012.0), 2.0)
+        self.assertIsNone(_started_after(SimpleNamespace(), 1000.0))
+
+    def test_channel_stats(self):
+        messages = {'interactive': [], 'bulk_email': [{'enqueued_at': 900.0}, {'enqueued_at': 500.0}]}
+
+        class Client:
+            def lindex(self, queue, index):
+                items = messages[queue]
+                return json.dumps({'headers': items[index]}) if items else None
+
+        channel = SimpleNamespace(
+            client=Client(),
+            queue_declare=lambda queue, passive: SimpleNamespace(message_count=len(messages[queue])),
+        )
+        self.assertEqual(channel_stats(channel, ['interactive', 'bulk_email'], now=1000.0), {
+            'interactive': {'depth': 0, 'oldest_age_seconds': None},
+            'bulk_email': {'depth': 2, 'oldest_age_seconds': 500.0},
+        })
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class QueueMetricsViewTests(TestCase):
+    def test_staff_only(self):
+        user = User.objects.create_user(username='member', email='m@example.com', password='x')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/admin/dashboard/queues/').status_code, 302)
+
+        user.is_staff = True
+        user.save()
+        stats = {'interactive': {'depth': 3, 'oldest_age_seconds': 1.5}}
+        with patch('recovery_hub.celery_metrics.queue_stats', return_value=stats):
+            response = self.client.get('/admin/dashboard/queues/')
+        self.assertEqual(response.json(), {'queues': stats})
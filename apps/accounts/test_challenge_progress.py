@@ -0,0 +1,168 @@
+"""Challenge progress: incremental check-in updates, cached stats and leaderboards."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import challenge_progress
+from apps.accounts.models import ChallengeCheckIn, ChallengeParticipant, GroupChallenge, RecoveryGroup
+
+User = get_user_model()
+
+
+class ChallengeProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.creator = User.objects.create_user(username='ann', email='ann@example.com', password='x')
+        group = RecoveryGroup.objects.create(name='Walkers', description='x', creator=self.creator)
+        self.challenge = GroupChallenge.objects.create(
+            title='Walk daily', description='x', challenge_type='exercise', duration_days=7,
+            start_date=self.today - timedelta(days=5), end_date=self.today + timedelta(days=1),
+            daily_goal_description='Walk', group=group, creator=self.creator, status='active',
+        )
+        self.participant = self.join('bob')
+
+    def join(self, username):
+        user = User.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+        return ChallengeParticipant.objects.create(challenge=self.challenge, user=user)
+
+    def check_in(self, participant, days_ago, completed=True):
+        return ChallengeCheckIn.objects.create(
+            participant=participant, date=self.today - timedelta(days=days_ago), completed_daily_goal=completed)
+
+    def progress(self, participant=None):
+        participant = participant or self.participant
+        participant.refresh_from_db()
+        return participant.days_completed, participant.current_streak, participant.longest_streak
+
+    def test_streaks_follow_consecutive_days(self):
+        self.check_in(self.participant, 4)
+        self.check_in(self.participant, 3)
+        self.check_in(self.participant, 1)
+        self.assertEqual(self.progress(), (3, 1, 2))
+        self.check_in(self.participant, 0)
+        self.assertEqual(self.progress(), (4, 2, 2))
+        self.assertEqual(self.participant.check_in_count, 4)
+        self.assertEqual(self.participant.last_check_in_date, self.today)
+
+    def test_save_is_one_update_without_recounting(self):
+        self.check_in(self.participant, 1)
+        with self.assertNumQueries(2):  # INSERT, then the participant UPDATE
+            self.check_in(self.participant, 0)
+
+    def test_completing_an_existing_check_in_counts_once(self):
+        check_in = self.check_in(self.participant, 0, completed=False)
+        self.assertEqual(self.progress(), (0, 0, 0))
+        check_in = ChallengeCheckIn.objects.get(pk=check_in.pk)
+        check_in.completed_daily_goal = True
+        check_in.save()
+        check_in.progress_note = 'Felt good'
+        check_in.save()
+        self.assertEqual(self.progress(), (1, 1, 1))
+        self.assertEqual(self.participant.check_in_count, 1)
+
+    def test_delete_retracts_progress(self):
+        self.check_in(self.participant, 1)
+        self.check_in(self.participant, 0).delete()
+        self.assertEqual(self.progress()[0], 1)
+        self.assertEqual(self.participant.check_in_count, 1)
+        self.assertEqual(self.participant.last_check_in_date, self.today - timedelta(days=1))
+
+    def test_finishing_the_last_day_completes_the_participant(self):
+        for days_ago in range(7):
+            self.check_in(self.participant, days_ago)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.status, 'completed')
+        self.assertIsNotNone(self.participant.completion_date)
+
+    def test_stats_cached_until_a_check_in(self):
+        other = self.join('cat')
+        self.check_in(other, 0)
+        stats = challenge_progress.stats(self.challenge.id)
+        self.assertEqual(stats['total_participants'], 2)
+        self.assertEqual(stats['total_check_ins'], 1)
+        self.assertEqual(stats['average_streak'], 0.5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.challenge.participant_count, 2)
+
+        self.check_in(self.participant, 0)
+        self.assertEqual(challenge_progress.stats(self.challenge.id)['total_check_ins'], 2)
+        self.join('dan')
+        self.assertEqual(self.challenge.participant_count, 3)
+
+    def test_leaderboard_order(self):
+        leader = self.join('cat')
+        self.check_in(leader, 1)
+        self.check_in(leader, 0)
+        self.check_in(self.participant, 0)
+        self.join('dan')
+        ranked = challenge_progress.leaderboard(self.challenge.id)
+        self.assertEqual([p.user.username for p in ranked], ['cat', 'bob', 'dan'])
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class ChallengeViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.now().date()
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x')
+        group = RecoveryGroup.objects.create(name='Walkers', description='x', creator=self.user)
+        self.challenges = [
+            GroupChallenge.objects.create(
+                title=f'Challenge {i}', description='x', challenge_type='wellness', duration_days=7,
+                start_date=today, end_date=today + timedelta(days=6),
+                daily_goal_description='x', group=group, creator=self.user, status='active',
+            )
+            for i in range(3)
+        ]
+        for challenge in self.challenges:
+            ChallengeParticipant.objects.create(challenge=challenge, user=self.user)
+        self.client.force_login(self.user)
+
+    def participants(self, challenge, n):
+        start = User.objects.count()
+        for i in range(start, start + n):
+            user = User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com', password='x')
+            participant = ChallengeParticipant.objects.create(challenge=challenge, user=user)
+            ChallengeCheckIn.objects.create(participant=participant, completed_daily_goal=True, is_shared_with_group=True)
+
+    def test_detail_queries_do_not_grow_with_participants(self):
+        url = reverse('accounts:challenge_detail', args=[self.challenges[0].id])
+        self.participants(self.challenges[0], 2)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.participants(self.challenges[0], 8)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(response.context['stats']['total_participants'], 11)
+        self.assertEqual(len(response.context['leaderboard']), 10)
+        self.assertContains(response, '11\n                        participants')
+
+    def test_my_challenges_pending_check_ins_without_per_challenge_queries(self):
+        ChallengeCheckIn.objects.create(
+            participant=ChallengeParticipant.objects.get(challenge=self.challenges[0], user=self.user),
+            completed_daily_goal=True)
+        url = reverse('accounts:my_challenges')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as three:
+            response = self.client.get(url)
+        self.challenges[0].pk = None
+        self.challenges[0].save()
+        ChallengeParticipant.objects.create(challenge=self.challenges[0], user=self.user)
+        with CaptureQueriesContext(connection) as four:
+            self.client.get(url)
+        self.assertEqual(len(four), len(three))
+        self.assertEqual(
+            [p.challenge for p in response.context['pending_checkins']],
+            [self.challenges[2], self.challenges[1]])
+        self.assertEqual(response.context['stats']['total_checkins'], 1)
+        self.assertContains(response, 'No check-ins yet')
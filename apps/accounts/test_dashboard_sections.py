@@ -0,0 +1,71 @@
+"""Cached dashboard sections and their signal-driven invalidation."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts import dashboard_sections
+from apps.accounts.models import (
+    GroupMembership, Milestone, RecoveryGroup, SponsorRelationship, SupportMessage,
+)
+
+User = get_user_model()
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class DashboardSectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='sam', email='sam@example.com', password='x', is_profile_public=True)
+        self.other = User.objects.create_user(
+            username='alex', email='alex@example.com', password='x', is_profile_public=True)
+        self.client.force_login(self.user)
+
+    def get(self):
+        return self.client.get(reverse('accounts:dashboard'))
+
+    def test_sections_cached_after_first_load(self):
+        dashboard_sections.user_sections(self.user)
+        dashboard_sections.community_stats()
+        with self.assertNumQueries(0):
+            dashboard_sections.user_sections(self.user)
+            dashboard_sections.community_stats()
+
+    def test_follow_updates_both_members(self):
+        self.assertEqual(self.get().context['suggested_users'], [self.other])
+        dashboard_sections.user_sections(self.other)
+        self.assertEqual(self.other.followers_count, 0)
+
+        self.user.follow_user(self.other)
+        response = self.get()
+        self.assertEqual(response.context['following_count'], 1)
+        self.assertEqual(response.context['suggested_users'], [])
+        self.client.force_login(self.other)
+        self.assertEqual(self.get().context['followers_count'], 1)
+
+    def test_sponsor_and_groups(self):
+        self.get()
+        SponsorRelationship.objects.create(sponsor=self.other, sponsee=self.user, status='active')
+        group = RecoveryGroup.objects.create(name='Evenings', description='x', creator=self.other)
+        GroupMembership.objects.create(user=self.user, group=group, status='active')
+
+        response = self.get()
+        self.assertEqual(response.context['active_sponsor'], self.other)
+        self.assertEqual(response.context['groups_count'], 1)
+        self.assertEqual(response.context['user_groups'][0].active_members, 1)
+        self.assertContains(response, '1 members')
+
+    def test_milestones_and_inbox(self):
+        self.get()
+        Milestone.objects.create(user=self.user, title='Thirty days')
+        with self.captureOnCommitCallbacks(execute=True):
+            message = SupportMessage.objects.create(
+                sender=self.other, recipient=self.user, subject='Hi', message='x')
+
+        response = self.get()
+        self.assertEqual([m.title for m in response.context['recent_milestones']], ['Thirty days'])
+        self.assertEqual(response.context['unread_messages'], 1)
+
+        self.client.get(reverse('accounts:conversation', args=[message.conversation_id]))
+        self.assertEqual(self.get().context['unread_messages'], 0)
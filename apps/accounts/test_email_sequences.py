@@ -2,7 +2,9 @@
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.template.loader import render_to_string
 
@@ -304,3 +306,50 @@ class ReengagementSequenceTests(TestCase):
             send_reengagement_emails()
         user.refresh_from_db()
         self.assertIsNone(user.reengagement_email_1_sent)
+
+
+class OnboardingSequenceQueryTests(TestCase):
+    """The daily run evaluates every user's rules from one annotated query."""
+
+    def make_onboarded_user(self, username, days_ago):
+        user = make_user(username=username, days_ago=days_ago)
+        User.objects.filter(pk=user.pk).update(
+            welcome_email_1_sent=timezone.now() - timedelta(days=days_ago))
+        return user
+
+    def run_task(self):
+        from apps.accounts.tasks import send_onboarding_sequence_emails
+        with patch('apps.accounts.tasks.send_email', return_value=(True, None)), \
+                patch('apps.accounts.tasks.time.sleep'):
+            return send_onboarding_sequence_emails()
+
+    def test_query_count_does_not_grow_with_candidates(self):
+        for i in range(3):
+            self.make_onboarded_user(f'small{i}', days_ago=3)
+        with CaptureQueriesContext(connection) as small:
+            self.run_task()
+
+        User.objects.update(onboarding_email_3_sent=None)
+        for i in range(12):
+            user = self.make_onboarded_user(f'large{i}', days_ago=3)
+            if i % 3 == 0:
+                DailyCheckIn.objects.create(user=user, mood=4, energy_level=4)
+                JournalEntry.objects.create(user=user, content='line')
+                SocialPost.objects.create(author=user, content='hi')
+        with CaptureQueriesContext(connection) as large:
+            result = self.run_task()
+
+        self.assertEqual(result, {'sent': 11, 'skipped': 0, 'exited': 4})
+        self.assertEqual(len(large), len(small))
+
+    def test_flags_match_per_user_predicates(self):
+        user = self.make_onboarded_user('flags', days_ago=1)
+        SocialPost.objects.create(author=user, content='hi')
+        annotated = seq.with_sequence_flags(User.objects.filter(pk=user.pk)).get()
+        plain = User.objects.get(pk=user.pk)
+        for predicate in (seq.has_started_streak, seq.has_journal_entry,
+                          seq.has_community_action, seq.has_used_anchor,
+                          seq.is_crisis_suppressed, seq.is_activated):
+            with self.assertNumQueries(0):
+                annotated_value = predicate(annotated)
+            self.assertEqual(annotated_value, predicate(plain), predicate.__name__)
@@ -0,0 +1,222 @@
+"""Background group fan-out: coalescing, preferences, paging and push batches."""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import group_fanout
+from apps.accounts.models import (
+    DeviceToken, GroupFanoutRun, GroupMembership, GroupPost, Notification, RecoveryGroup,
+)
+from apps.accounts.tasks import fanout_group_notification, retry_stuck_group_fanouts
+
+User = get_user_model()
+
+
+class GroupFanoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='ann', email='ann@example.com', password='x')
+        self.group = RecoveryGroup.objects.create(name='Morning Group', description='x', creator=self.author)
+        GroupMembership.objects.create(user=self.author, group=self.group, status='admin')
+        self.members = {}
+        for level in ('all', 'digest', 'muted'):
+            member = User.objects.create_user(username=level, email=f'{level}@example.com', password='x')
+            GroupMembership.objects.create(user=member, group=self.group, status='active', notification_level=level)
+            self.members[level] = member
+        GroupMembership.objects.create(
+            user=User.objects.create_user(username='gone', email='gone@example.com', password='x'),
+            group=self.group, status='left')
+
+    def post(self, title, author=None, **fields):
+        return GroupPost.objects.create(
+            group=self.group, author=author or self.author, title=title, content='x', **fields)
+
+    def notified(self):
+        return list(Notification.objects.filter(notification_type='group_post').values_list(
+            'recipient__username', 'title', 'message'))
+
+    @mock.patch('apps.accounts.group_fanout.send_push_to_users', return_value={'sent': 1, 'failed': 0})
+    def test_burst_becomes_one_notification_for_all_level_members(self, push):
+        self.post('First')
+        self.post('Second')
+        self.post('Third')
+        self.assertEqual(group_fanout.fanout_posts(self.group.id), 1)
+
+        self.assertEqual(self.notified(), [
+            ('all', '3 new posts in Morning Group', '"Third" and 2 more in Morning Group'),
+        ])
+        push.assert_called_once()
+        self.assertEqual(push.call_args.args[0], [self.members['all'].pk])
+        self.assertFalse(GroupPost.objects.filter(fanout_at__isnull=True).exists())
+        # Nothing left to claim.
+        self.assertEqual(group_fanout.fanout_posts(self.group.id), 0)
+
+    @mock.patch('apps.accounts.group_fanout.send_push_to_users', return_value={'sent': 0, 'failed': 0})
+    def test_single_post_names_the_poster_unless_anonymous(self, push):
+        self.post('Hello', is_anonymous=True)
+        group_fanout.fanout_posts(self.group.id)
+        self.assertEqual(self.notified(), [('all', 'New post in Morning Group', 'Someone posted "Hello" in Morning Group')])
+        self.assertIsNone(Notification.objects.get().sender)
+        self.assertEqual(push.call_args.args[3]['post_id'], str(GroupPost.objects.get().pk))
+
+    @mock.patch('apps.accounts.group_fanout.send_push_to_users', return_value={'sent': 0, 'failed': 0})
+    def test_recipients_paged_by_keyset(self, push):
+        for i in range(5):
+            member = User.objects.create_user(username=f'm{i}', email=f'm{i}@example.com', password='x')
+            GroupMembership.objects.create(user=member, group=self.group, status='active')
+        self.post('Hello')
+        with mock.patch.object(group_fanout, 'BATCH_SIZE', 2):
+            self.assertEqual(group_fanout.fanout_posts(self.group.id), 6)
+        self.assertEqual(push.call_count, 4)
+        self.assertEqual(sum(len(call.args[0]) for call in push.call_args_list), 6)
+
+    def fail_on_page(self, n):
+        """Patch Notification bulk inserts to raise on the n-th page."""
+        original = Notification.objects.bulk_create
+        calls = []
+
+        def bulk_create(objs, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == n:
+                raise OperationalError('connection lost')
+            return original(objs, *args, **kwargs)
+        return mock.patch.object(Notification.objects, 'bulk_create', side_effect=bulk_create)
+
+    def add_members(self, count):
+        for i in range(count):
+            member = User.objects.create_user(username=f'm{i}', email=f'm{i}@example.com', password='x')
+            GroupMembership.objects.create(user=member, group=self.group, status='active')
+
+    @mock.patch('apps.accounts.group_fanout.send_push_to_users', return_value={'sent': 0, 'failed': 0})
+    def test_retry_after_mid_fanout_failure_resumes_after_last_page(self, push):
+        self.add_members(5)
+        self.post('Hello')
+        with mock.patch.object(group_fanout, 'BATCH_SIZE', 2):
+            with self.fail_on_page(2), self.assertRaises(OperationalError):
+                group_fanout.fanout_posts(self.group.id)
+            # Page one (the author, excluded, and 'all') went out.
+            self.assertEqual(Notification.objects.count(), 1)
+            self.assertFalse(GroupPost.objects.filter(fanout_at__isnull=True).exists())
+
+            # The task's autoretry: nothing left to claim, but the run resumes.
+            self.assertEqual(group_fanout.fanout_posts(self.group.id), 5)
+        recipients = list(Notification.objects.values_list('recipient_id', flat=True))
+        self.assertEqual(len(recipients), 6)
+        self.assertEqual(len(set(recipients)), 6)
+        self.assertIsNotNone(GroupFanoutRun.objects.get().completed_at)
+        self.assertEqual(group_fanout.fanout_posts(self.group.id), 0)
+
+    @mock.patch('apps.accounts.group_fanout.send_push_to_users', return_value={'sent': 0, 'failed': 0})
+    def test_two_workers_on_one_run_deliver_each_page_once(self, push):
+        self.add_members(5)
+        self.post('Hello')
+        with mock.patch.object(group_fanout, 'BATCH_SIZE', 2):
+            with self.fail_on_page(2), self.assertRaises(OperationalError):
+                group_fanout.fanout_posts(self.group.id)
+            # A stuck-run retry and the original's autoretry both read the run.
+            first, second = GroupFanoutRun.objects.get(), GroupFanoutRun.objects.get()
+            self.assertEqual(group_fanout._deliver_posts(first), 5)
+            self.assertEqual(group_fanout._deliver_posts(second), 0)
+        recipients = list(Notification.objects.values_list('recipient_id', flat=True))
+        self.assertEqual(len(recipients), 6)
+        self.assertEqual(len(set(recipients)), 6)
+        self.assertEqual(GroupFanoutRun.objects.get().notified, 6)
+
+    def test_unfinished_run_counts_as_stuck(self):
+        self.post('Hello')
+        with self.fail_on_page(1), self.assertRaises(OperationalError):
+            group_fanout.fanout_posts(self.group.id)
+        later = timezone.now() + timedelta(minutes=group_fanout.STUCK_AFTER_MINUTES + 1)
+        self.assertEqual(group_fanout.stuck_group_ids(now=later), [self.group.id])
+
+    def test_notice_retry_does_not_resend_delivered_pages(self):
+        self.add_members(4)
+        with mock.patch('apps.accounts.tasks.fanout_group_notification.delay') as delay:
+            group_fanout.announce(self.group, 'group_invite', 'Archived', 'x', '/accounts/groups/')
+        args, kwargs = delay.call_args.args, delay.call_args.kwargs
+        with mock.patch.object(group_fanout, 'BATCH_SIZE', 2):
+            with self.fail_on_page(3), self.assertRaises(OperationalError):
+                fanout_group_notification(*args, **kwargs)
+            fanout_group_notification(*args, **kwargs)
+            self.assertEqual(fanout_group_notification(*args, **kwargs), 0)
+        recipients = list(Notification.objects.values_list('recipient_id', flat=True))
+        self.assertEqual(len(recipients), len(set(recipients)))
+        self.assertEqual(len(recipients), 7)  # author, 'all', 'digest' and four more
+
+    def test_daily_digest_for_digest_members(self):
+        self.post('One')
+        self.post('Two')
+        self.assertEqual(group_fanout.send_digests(), 1)
+        self.assertEqual(self.notified(), [('digest', '2 new posts in Morning Group today', 'Catch up on what Morning Group shared today.')])
+        # A retry of the same day's task doesn't send it again.
+        group_fanout.send_digests()
+        self.assertEqual(len(self.notified()), 1)
+
+    def test_schedule_coalesces_and_stuck_posts_are_retried(self):
+        with mock.patch('apps.accounts.tasks.fanout_group_posts.apply_async') as apply_async:
+            group_fanout.schedule(self.group.id)
+            group_fanout.schedule(self.group.id)
+        apply_async.assert_called_once_with(args=[self.group.id], countdown=group_fanout.COALESCE_SECONDS)
+
+        post = self.post('Late')
+        GroupPost.objects.filter(pk=post.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        with mock.patch('apps.accounts.tasks.fanout_group_posts.delay') as delay:
+            self.assertEqual(retry_stuck_group_fanouts(), 1)
+        delay.assert_called_once_with(self.group.id)
+
+    def test_archive_notice_skips_muted_members(self):
+        with mock.patch('apps.accounts.tasks.fanout_group_notification.delay') as delay:
+            group_fanout.announce(self.group, 'group_invite', 'Archived', 'x', '/accounts/groups/', exclude_user=self.author)
+        fanout_group_notification(*delay.call_args.args, **delay.call_args.kwargs)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient__username', flat=True)), ['all', 'digest'])
+
+
+class PushBatchTests(TestCase):
+    def test_tokens_loaded_once_and_opted_out_users_skipped(self):
+        from apps.accounts.push_notifications import PUSH_SENT, send_push_to_users
+
+        users = [
+            User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='x', email_notifications=i != 2)
+            for i in range(3)
+        ]
+        for user in users:
+            DeviceToken.objects.create(user=user, token=f'token-{user.pk}', platform='android')
+        with mock.patch('apps.accounts.push_notifications.send_fcm_notification', return_value=PUSH_SENT) as fcm:
+            with self.assertNumQueries(2):
+                totals = send_push_to_users([u.pk for u in users], 'T', 'B', {})
+        self.assertEqual(totals, {'sent': 2, 'failed': 0})
+        self.assertEqual(fcm.call_count, 2)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class GroupPostViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x')
+        self.group = RecoveryGroup.objects.create(name='Evenings', description='x', creator=self.user)
+        self.membership = GroupMembership.objects.create(user=self.user, group=self.group, status='admin')
+        self.client.force_login(self.user)
+
+    def test_posting_schedules_fanout_instead_of_notifying_inline(self):
+        with mock.patch('apps.accounts.group_fanout.schedule') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('accounts:create_group_post', args=[self.group.id]),
+                    {'title': 'Hi', 'content': 'x', 'post_type': 'discussion'})
+        self.assertTrue(response.json()['success'])
+        schedule.assert_called_once_with(self.group.id)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_set_notification_level(self):
+        url = reverse('accounts:group_notification_level', args=[self.group.id])
+        self.assertEqual(self.client.post(url, {'level': 'digest'}).status_code, 200)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.notification_level, 'digest')
+        self.assertEqual(self.client.post(url, {'level': 'loud'}).status_code, 400)
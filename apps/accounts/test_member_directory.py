@@ -0,0 +1,106 @@
+"""Member directory: search, keyset paging, cached counts and page batching."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import member_directory, social_graph
+from apps.accounts.models import RecoveryPal, UserProfile
+
+User = get_user_model()
+
+
+class MemberDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        social_graph._local.clear()
+        self.now = timezone.now()
+        self.viewer = User.objects.create_user(username='viewer', email='v@example.com', password='x')
+        self.members = [
+            User.objects.create_user(
+                username=f'member{i}', email=f'm{i}@example.com', password='x',
+                last_seen=self.now - timedelta(minutes=i) if i < 4 else None)
+            for i in range(6)
+        ]
+
+    def walk(self, queryset, size):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = member_directory.page(queryset, cursor, size)
+            seen.extend(rows)
+            if cursor is None:
+                return seen
+
+    def test_keyset_pages_cover_everyone_once_in_order(self):
+        # Two members share a last_seen, so the id tie-break matters.
+        User.objects.filter(pk=self.members[2].pk).update(last_seen=self.members[1].last_seen)
+        walked = self.walk(member_directory.members(self.viewer), 2)
+        ids = [m.pk for m in walked]
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(ids[:3], [self.members[0].pk, self.members[2].pk, self.members[1].pk])
+        self.assertEqual(ids[4:], sorted(ids[4:], reverse=True))
+        self.assertEqual({m.last_seen for m in walked[4:]}, {None})
+
+    def test_malformed_cursor_starts_over(self):
+        first, _ = member_directory.page(member_directory.members(self.viewer), None, 3)
+        again, _ = member_directory.page(member_directory.members(self.viewer), 'nonsense', 3)
+        self.assertEqual(first, again)
+
+    def test_short_terms_match_name_prefixes_longer_terms_bios(self):
+        UserProfile.objects.update_or_create(user=self.members[5], defaults={'bio': 'Loves hiking at dawn'})
+        self.assertEqual(len(member_directory.members(self.viewer, search='me')), 6)
+        self.assertEqual(len(member_directory.members(self.viewer, search='er')), 0)
+        self.assertEqual(list(member_directory.members(self.viewer, search='ember3')), [self.members[3]])
+        self.assertEqual(list(member_directory.members(self.viewer, search='HIKING')), [self.members[5]])
+
+    def test_filters(self):
+        self.viewer.follow_user(self.members[4])
+        self.assertEqual(list(member_directory.members(self.viewer, 'following')), [self.members[4]])
+        online = member_directory.members(self.viewer, 'online', now=self.now)
+        self.assertEqual(len(online), 4)
+
+    def test_counts_cached_until_refreshed(self):
+        self.assertEqual(member_directory.counts(), {'total': 7, 'online': 4})
+        User.objects.create_user(username='late', email='l@example.com', password='x', last_seen=self.now)
+        with self.assertNumQueries(0):
+            self.assertEqual(member_directory.counts()['total'], 7)
+        self.assertEqual(member_directory.refresh_counts(), {'total': 8, 'online': 5})
+
+    def test_annotate_page_in_one_query(self):
+        self.viewer.follow_user(self.members[0])
+        RecoveryPal.objects.create(user1=self.viewer, user2=self.members[1], status='active')
+        rows, _ = member_directory.page(member_directory.members(self.viewer), None, 3)
+        with self.assertNumQueries(1):
+            viewer_has_pal = member_directory.annotate_page(self.viewer, rows)
+        self.assertTrue(viewer_has_pal)
+        self.assertEqual([m.is_followed for m in rows], [True, False, False])
+        self.assertEqual([m.has_recovery_pal for m in rows], [False, True, False])
+        self.assertEqual(rows[0].followers_count, 1)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class CommunityViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x')
+        for i in range(member_directory.PAGE_SIZE + 2):
+            User.objects.create_user(
+                username=f'peer{i}', email=f'p{i}@example.com', password='x',
+                last_seen=timezone.now() - timedelta(hours=i))
+        self.client.force_login(self.user)
+
+    def test_next_page_via_cursor(self):
+        url = reverse('accounts:community')
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['members']), member_directory.PAGE_SIZE)
+        self.assertEqual(response.context['total_members'], member_directory.PAGE_SIZE + 2)
+        cursor = response.context['next_cursor']
+        self.assertContains(response, f'cursor={cursor}')
+
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertEqual([m.username for m in response.context['members']], ['peer24', 'peer25'])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, '>First</a>')
@@ -0,0 +1,137 @@
+"""Direct messages: conversations, unread counters and keyset paging."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts import messaging
+from apps.accounts.models import Conversation, ConversationParticipant, SupportMessage
+
+User = get_user_model()
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class MessagingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='a@example.com', password='x')
+        self.bob = User.objects.create_user(username='bob', email='b@example.com', password='x')
+
+    def send(self, sender, recipient, text='hello'):
+        return SupportMessage.objects.create(
+            sender=sender, recipient=recipient, subject='Hi', message=text)
+
+    def participant(self, user, conversation):
+        return ConversationParticipant.objects.get(user=user, conversation=conversation)
+
+    def test_messages_share_one_conversation_per_pair(self):
+        first = self.send(self.alice, self.bob)
+        reply = self.send(self.bob, self.alice)
+        self.assertEqual(first.conversation_id, reply.conversation_id)
+        self.assertEqual(Conversation.objects.count(), 1)
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message_id, reply.pk)
+        self.assertEqual(self.participant(self.bob, conversation).unread_count, 1)
+        alice = self.participant(self.alice, conversation)
+        self.assertEqual(alice.unread_count, 1)
+        self.assertEqual(alice.last_read_message_id, first.pk)
+
+    def test_unread_total_is_cached_and_kept_current(self):
+        self.send(self.alice, self.bob)
+        self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send(self.alice, self.bob)
+        with self.assertNumQueries(0):
+            self.assertEqual(messaging.unread_total(self.bob.pk), 2)
+        self.assertTrue(self.bob.has_unread_messages)
+        self.assertFalse(self.alice.has_unread_messages)
+
+    def test_rolled_back_message_leaves_the_badge_alone(self):
+        self.send(self.alice, self.bob)
+        self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+        try:
+            with transaction.atomic():
+                self.send(self.alice, self.bob)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+
+    def test_opening_a_thread_marks_it_read(self):
+        message = self.send(self.alice, self.bob)
+        self.client.force_login(self.bob)
+
+        self.client.get(reverse('accounts:messages'))
+        self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+
+        response = self.client.get(reverse('accounts:conversation', args=[message.conversation_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['thread_messages'][0].is_new)
+        self.assertEqual(messaging.unread_total(self.bob.pk), 0)
+        message.refresh_from_db()
+        self.assertTrue(message.is_read)
+
+        response = self.client.get(reverse('accounts:conversation', args=[message.conversation_id]))
+        self.assertFalse(response.context['thread_messages'][0].is_new)
+
+    def test_deleting_an_unread_message_retracts_it(self):
+        first = self.send(self.alice, self.bob, 'one')
+        second = self.send(self.alice, self.bob, 'two')
+        self.assertEqual(messaging.unread_total(self.bob.pk), 2)
+
+        second.delete()
+        self.assertEqual(messaging.unread_total(self.bob.pk), 1)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.last_message_id, first.pk)
+
+    def test_inbox_pages_by_cursor(self):
+        for i in range(5):
+            other = User.objects.create_user(username=f'friend{i}', email=f'f{i}@example.com', password='x')
+            self.send(other, self.alice)
+
+        page, cursor = messaging.threads(self.alice, size=3)
+        self.assertEqual([p.other_user.username for p in page], ['friend4', 'friend3', 'friend2'])
+        self.assertIsNotNone(cursor)
+        page, cursor = messaging.threads(self.alice, cursor=cursor, size=3)
+        self.assertEqual([p.other_user.username for p in page], ['friend1', 'friend0'])
+        self.assertIsNone(cursor)
+        self.assertTrue(all(p.is_unread for p in page))
+
+        self.client.force_login(self.alice)
+        with self.assertNumQueries(4):  # session, user, subscription, one page of threads
+            response = self.client.get(reverse('accounts:messages'), {'filter': 'unread'})
+        self.assertEqual(len(response.context['threads']), 5)
+
+    def test_thread_pages_oldest_first_with_older_cursor(self):
+        sent = [self.send(self.alice, self.bob, f'm{i}') for i in range(5)]
+        participant = self.participant(self.bob, sent[0].conversation)
+
+        page, older = messaging.thread_page(participant, size=3)
+        self.assertEqual([m.message for m in page], ['m2', 'm3', 'm4'])
+        self.assertEqual(older, sent[2].pk)
+        page, older = messaging.thread_page(participant, before=older, size=3)
+        self.assertEqual([m.message for m in page], ['m0', 'm1'])
+        self.assertIsNone(older)
+
+    def test_reply_from_conversation_view(self):
+        message = self.send(self.alice, self.bob)
+        self.client.force_login(self.bob)
+        url = reverse('accounts:conversation', args=[message.conversation_id])
+
+        response = self.client.post(url, {'message': 'hi back'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        reply = SupportMessage.objects.latest('id')
+        self.assertEqual((reply.sender, reply.recipient, reply.subject), (self.bob, self.alice, 'Re: Hi'))
+        self.assertEqual(reply.conversation_id, message.conversation_id)
+        self.assertEqual(messaging.unread_total(self.alice.pk), 1)
+
+    def test_conversation_is_private_to_its_members(self):
+        message = self.send(self.alice, self.bob)
+        outsider = User.objects.create_user(username='eve', email='e@example.com', password='x')
+        self.client.force_login(outsider)
+        response = self.client.get(reverse('accounts:conversation', args=[message.conversation_id]))
+        self.assertEqual(response.status_code, 404)
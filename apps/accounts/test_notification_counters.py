@@ -0,0 +1,146 @@
+"""Cached unread counters and the notification event stream."""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts.models import (
+    BroadcastNotification, BroadcastRead, Notification, NotificationReadState,
+)
+from apps.accounts.notification_service import (
+    UNREAD_KEY, reconcile_unread_counters, unread_broadcasts, unread_count,
+)
+from apps.accounts.tasks import reconcile_unread_counters as reconcile_task
+
+User = get_user_model()
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@example.com', password='x')
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='x')
+        self.client.force_login(self.user)
+
+    def notify(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                recipient=self.user, sender=self.other, notification_type='like',
+                title='New Like', message='other liked your post', **kwargs)
+
+    def test_polling_is_served_from_cache(self):
+        self.notify()
+        self.assertEqual(unread_count(self.user), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), 1)
+
+    def test_new_notifications_increment_the_cached_counter(self):
+        self.assertEqual(unread_count(self.user), 0)
+        self.notify()
+        self.notify()
+        self.assertEqual(cache.get(UNREAD_KEY.format(user_id=self.user.pk)), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), 2)
+
+    def test_reading_decrements_and_mark_all_resets(self):
+        first = self.notify()
+        self.notify()
+        self.assertEqual(unread_count(self.user), 2)
+
+        self.client.post(reverse('accounts:mark_notification_read', args=[first.pk]))
+        self.assertEqual(self.client.get(reverse('accounts:unread_count_api')).json()['count'], 1)
+        # Reading it twice must not decrement twice.
+        self.client.post(reverse('accounts:mark_notification_read', args=[first.pk]))
+        self.assertEqual(unread_count(self.user), 1)
+
+        self.client.post(reverse('accounts:mark_all_notifications_read'))
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), 0)
+
+    def test_deleting_unread_notification_drops_the_counter(self):
+        notification = self.notify()
+        self.assertEqual(unread_count(self.user), 1)
+        notification.delete()
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_reconciliation_repairs_drift(self):
+        self.notify()
+        self.assertEqual(unread_count(self.user), 1)
+        # A write that bypassed the helpers leaves the counter stale...
+        Notification.objects.filter(recipient=self.user).update(is_read=True)
+        self.assertEqual(unread_count(self.user), 1)
+
+        self.assertEqual(reconcile_unread_counters([self.user.pk]), 1)
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_reconciliation_counts_broadcasts_for_the_chunk_at_once(self):
+        members = [self.user, self.other] + [
+            User.objects.create_user(username=f'm{i}', email=f'm{i}@example.com', password='x')
+            for i in range(3)
+        ]
+        broadcasts = [
+            BroadcastNotification.objects.create(
+                sender=self.other, notification_type='new_post', title=f'Post {i}', message='x')
+            for i in range(3)
+        ]
+        BroadcastRead.objects.create(user=members[2], broadcast=broadcasts[0])
+        NotificationReadState.objects.create(user=members[3], broadcasts_read_at=broadcasts[1].created_at)
+        late = User.objects.create_user(username='late', email='late@example.com', password='x')
+        members.append(late)
+        expected = {user.pk: unread_broadcasts(user).count() for user in members}
+        self.assertEqual(len(set(expected.values())), 4)
+
+        # Personal counts, broadcast counts and the latest broadcast id,
+        # however many members are in the chunk.
+        with self.assertNumQueries(3):
+            reconcile_unread_counters([user.pk for user in members])
+        self.assertEqual({user.pk: unread_count(user) for user in members}, expected)
+
+    def test_reconcile_task_covers_recently_active_members(self):
+        User.objects.filter(pk=self.user.pk).update(last_seen=self.user.date_joined)
+        cache.set(UNREAD_KEY.format(user_id=self.user.pk), 7)
+        User.objects.filter(pk=self.user.pk).update(last_seen=None)
+        self.assertEqual(reconcile_task(), 0)
+
+        from django.utils import timezone
+        User.objects.filter(pk=self.user.pk).update(last_seen=timezone.now())
+        self.assertEqual(reconcile_task(), 1)
+        self.assertEqual(unread_count(self.user), 0)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@example.com', password='x')
+
+    def test_wsgi_requests_are_told_to_poll(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('accounts:notification_stream'))
+        self.assertEqual(response.status_code, 503)
+
+    def test_anonymous_is_rejected(self):
+        response = self.client.get(reverse('accounts:notification_stream'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_opens_with_current_count(self):
+        await sync_to_async(Notification.objects.create)(
+            recipient=self.user, notification_type='follow',
+            title='New Follower', message='someone followed you')
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('accounts:notification_stream'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = response.streaming_content
+        retry = await anext(chunks)
+        first_event = await anext(chunks)
+        await chunks.aclose()
+        self.assertTrue(retry.decode().startswith('retry:'))
+        self.assertEqual(first_event.decode(), 'event: count\ndata: {"count": 1}\n\n')
@@ -0,0 +1,152 @@
+"""Notification retention, archiving and keyset pagination."""
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import (
+    ArchivedNotification, BroadcastNotification, Notification,
+)
+from apps.accounts.notification_retention import (
+    archive_old_notifications, month_ranges, prune_old_broadcasts,
+)
+from apps.accounts.notification_service import (
+    MergedNotifications, decode_cursor, unread_count,
+)
+
+User = get_user_model()
+
+
+@override_settings(
+    PREPEND_WWW=False, SECURE_SSL_REDIRECT=False,
+    NOTIFICATION_RETENTION_DAYS=90, NOTIFICATION_UNREAD_RETENTION_DAYS=365,
+)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@example.com', password='x')
+
+    def notify(self, days_old, is_read, title='n'):
+        notification = Notification.objects.create(
+            recipient=self.user, notification_type='like', title=title,
+            message='m', is_read=is_read)
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=days_old))
+        return notification
+
+    def test_archives_expired_rows_and_keeps_the_rest(self):
+        old_read = [self.notify(120, True, f'old read {i}') for i in range(5)]
+        recent_read = self.notify(10, True)
+        old_unread = self.notify(120, False)
+        ancient_unread = self.notify(400, False)
+
+        moved = archive_old_notifications(batch_size=2)
+
+        self.assertEqual(moved, 6)
+        remaining = set(Notification.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {recent_read.pk, old_unread.pk})
+        archived = ArchivedNotification.objects.order_by('original_id')
+        self.assertEqual(
+            [a.original_id for a in archived],
+            [n.pk for n in old_read] + [ancient_unread.pk])
+        self.assertEqual(archived[0].title, 'old read 0')
+        self.assertEqual(archived[0].recipient, self.user)
+
+    def test_delete_mode_skips_the_archive(self):
+        self.notify(120, True)
+        self.assertEqual(archive_old_notifications(archive=False), 1)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(ArchivedNotification.objects.exists())
+
+    def test_archiving_unread_rows_resets_the_cached_badge(self):
+        self.notify(400, False)
+        self.assertEqual(unread_count(self.user), 1)
+        archive_old_notifications()
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_prunes_old_broadcasts(self):
+        old = BroadcastNotification.objects.create(
+            notification_type='new_blog_post', title='old', message='m')
+        BroadcastNotification.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=100))
+        BroadcastNotification.objects.create(
+            notification_type='new_blog_post', title='new', message='m')
+
+        User.objects.filter(pk=self.user.pk).update(date_joined=timezone.now() - timedelta(days=200))
+        self.user.refresh_from_db()
+        self.assertEqual(unread_count(self.user), 2)
+
+        self.assertEqual(prune_old_broadcasts(), 1)
+        self.assertEqual(list(BroadcastNotification.objects.values_list('title', flat=True)), ['new'])
+        self.assertEqual(unread_count(self.user), 1)
+
+    def test_month_ranges(self):
+        self.assertEqual(month_ranges(date(2024, 11, 15), date(2025, 1, 3)), [
+            (date(2024, 11, 1), date(2024, 12, 1)),
+            (date(2024, 12, 1), date(2025, 1, 1)),
+            (date(2025, 1, 1), date(2025, 2, 1)),
+        ])
+
+    def test_partition_command_needs_postgres(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('Refusal only applies to other databases')
+        with self.assertRaises(CommandError):
+            call_command('partition_notifications', stdout=StringIO())
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@example.com', password='x')
+        now = timezone.now()
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='like',
+                         title=f'like {i}', message='m')
+            for i in range(7)
+        ])
+        # Two personal rows share a timestamp with a broadcast to exercise
+        # the tie-breaks.
+        for i, notification in enumerate(Notification.objects.order_by('id')):
+            Notification.objects.filter(pk=notification.pk).update(
+                created_at=now - timedelta(minutes=i // 2))
+        broadcast = BroadcastNotification.objects.create(
+            notification_type='new_blog_post', title='post', message='m')
+        BroadcastNotification.objects.filter(pk=broadcast.pk).update(created_at=now)
+        self.user.date_joined = now - timedelta(days=1)
+        self.user.save(update_fields=['date_joined'])
+
+    def test_pages_cover_everything_once_in_order(self):
+        merged = MergedNotifications(self.user)
+        expected = [(type(n), n.pk) for n in merged[:100]]
+        self.assertEqual(len(expected), 8)
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = merged.page(after=cursor, size=3)
+            seen.extend((type(n), n.pk) for n in items)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_page_never_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            MergedNotifications(self.user).page(size=3)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in queries))
+
+    def test_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('1.7.3')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('accounts:notifications'), {'after': 'nope'})
+        self.assertRedirects(response, reverse('accounts:notifications'))
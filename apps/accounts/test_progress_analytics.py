@@ -0,0 +1,80 @@
+"""Single-pass check-in analytics behind progress_view."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import progress_analytics
+from apps.accounts.models import DailyCheckIn
+
+User = get_user_model()
+
+
+class ProgressAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x')
+        self.today = timezone.localdate()
+        # (days ago, mood, craving, energy)
+        for ago, mood, craving, energy in ((0, 5, 0, 4), (1, 2, 3, 2), (10, 5, 0, 3), (60, 1, 4, 1), (120, 6, 0, 5)):
+            DailyCheckIn.objects.create(
+                user=self.user, date=self.today - timedelta(days=ago),
+                mood=mood, craving_level=craving, energy_level=energy)
+
+    def test_ranges_from_one_query(self):
+        with self.assertNumQueries(1):
+            analytics = progress_analytics.build(self.user, self.today)
+
+        week, month, quarter = (analytics['ranges'][d] for d in (7, 30, 90))
+        self.assertEqual((week['total'], month['total'], quarter['total']), (2, 3, 4))
+        self.assertEqual(month['mood'], [5, 2, 5])
+        self.assertEqual(month['avg_mood'], 4.0)
+        self.assertEqual(month['avg_craving'], 1.0)
+        self.assertEqual(month['zero_craving_days'], 2)
+        self.assertEqual(month['best'], (self.today - timedelta(days=10), 5))
+        self.assertEqual(quarter['worst'], (self.today - timedelta(days=60), 1))
+        self.assertEqual(month['mood_distribution'], {'😄 Great': 2, '😔 Down': 1})
+        self.assertEqual(len(analytics['heatmap']), 4)
+        self.assertEqual(analytics['todays_checkin'], (self.today, 5))
+
+    def test_weekly_comparison(self):
+        this_week = sum(1 for ago in (0, 1) if ago <= self.today.weekday())
+        weekly = progress_analytics.build(self.user, self.today)['weekly_comparison']
+        self.assertEqual(weekly['this_week']['count'], this_week)
+        self.assertEqual(weekly['mood_improved'], weekly['mood_change'] > 0)
+
+    def test_memoized_until_checkin_changes(self):
+        progress_analytics.get_analytics(self.user, self.today)
+        with self.assertNumQueries(0):
+            progress_analytics.get_analytics(self.user, self.today)
+
+        DailyCheckIn.objects.filter(user=self.user, date=self.today).get().delete()
+        analytics = progress_analytics.get_analytics(self.user, self.today)
+        self.assertEqual(analytics['ranges'][7]['total'], 1)
+        self.assertEqual(analytics['todays_checkin'], (self.today - timedelta(days=1), 2))
+
+    def test_new_day_rebuilds(self):
+        progress_analytics.get_analytics(self.user, self.today)
+        tomorrow = progress_analytics.get_analytics(self.user, self.today + timedelta(days=1))
+        self.assertEqual(tomorrow['day'], self.today + timedelta(days=1))
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class ProgressViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x')
+        DailyCheckIn.objects.create(
+            user=self.user, date=timezone.localdate(), mood=4, craving_level=0, energy_level=3)
+        self.client.force_login(self.user)
+
+    def test_renders_from_analytics(self):
+        response = self.client.get(reverse('accounts:progress'), {'days': 7})
+        self.assertEqual(response.context['total_checkins'], 1)
+        self.assertEqual(response.context['current_streak'], 1)
+        self.assertEqual(response.context['todays_checkin'].get_mood_display(), '😊 Good')
+        self.assertEqual(response.context['best_mood_checkin'].date, timezone.localdate())
+        self.assertEqual(response.context['avg_mood_emoji'], '😊')
@@ -0,0 +1,116 @@
+"""Query-count and wall-time budgets for the hot views.
+
+Each test seeds a community with sample_data.seed_community, measures the
+view, adds a second batch of the same size (doubling the data) and measures
+again. Two things are asserted:
+
+- absolute ceilings on query count and wall time at the larger size, and
+- that the query count does not grow with the data. Per-row query patterns
+  (N+1s, per-post visibility EXISTS checks) double their cost when the data
+  doubles, so they fail here instead of reaching production.
+
+Set QUERY_BUDGET_REPORT=1 to print how every view's cost scaled.
+"""
+import os
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.sample_data import seed_community
+
+User = get_user_model()
+
+BASE_MEMBERS = 12
+# Data-dependent branches (e.g. the sparse-feed suggestions block) may add a
+# query or two between sizes; anything beyond this is growth with N.
+QUERY_GROWTH_SLACK = 2
+# Generous wall-time ceiling: catches pathological regressions without
+# making CI flaky on slow runners.
+DEFAULT_MAX_SECONDS = 3.0
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class QueryBudgetTests(TestCase):
+    report = []
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='x',
+            first_name='Viewer', is_profile_public=True,
+            has_completed_onboarding=True,
+        )
+        self.client.force_login(self.viewer)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if os.environ.get('QUERY_BUDGET_REPORT') and cls.report:
+            lines = ['', 'Query budget scaling (data size N -> 2N):']
+            for name, small, large in cls.report:
+                ratio = large[1] / small[1] if small[1] else 0
+                lines.append(
+                    f'  {name:<28} queries {small[0]:>3} -> {large[0]:>3}   '
+                    f'time {small[1] * 1000:7.1f}ms -> {large[1] * 1000:7.1f}ms (x{ratio:.2f})'
+                )
+            sys.stderr.write('\n'.join(lines) + '\n')
+
+    def _measure(self, url, params=None):
+        # Warm-up request fills per-process caches (content types, daily
+        # thought, sessions) so they don't count against the view.
+        self.client.get(url, params or {})
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = self.client.get(url, params or {})
+            elapsed = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200, f'{url} returned {response.status_code}')
+        return len(ctx.captured_queries), elapsed
+
+    def assertBudget(self, name, url, max_queries, params=None,
+                     max_seconds=DEFAULT_MAX_SECONDS):
+        seed_community(BASE_MEMBERS, seed=1, prefix='a', viewer=self.viewer)
+        small = self._measure(url, params)
+        seed_community(BASE_MEMBERS, seed=2, prefix='b', viewer=self.viewer)
+        large = self._measure(url, params)
+        self.report.append((name, small, large))
+
+        summary = f'{name}: {small[0]} -> {large[0]} queries when the data doubled'
+        self.assertLessEqual(
+            large[0] - small[0], QUERY_GROWTH_SLACK,
+            f'{summary}; query count must not grow with data size')
+        self.assertLessEqual(large[0], max_queries, f'{summary}; budget is {max_queries}')
+        self.assertLessEqual(
+            large[1], max_seconds,
+            f'{name}: took {large[1]:.2f}s, budget is {max_seconds:.2f}s')
+
+    def test_social_feed_view(self):
+        self.assertBudget('social_feed_view', reverse('accounts:social_feed'), max_queries=20)
+
+    def test_social_feed_posts_api(self):
+        self.assertBudget(
+            'social_feed_posts_api', reverse('accounts:social_feed_posts_api'),
+            max_queries=10, params={'page': 1})
+
+    def test_dashboard_view(self):
+        self.assertBudget('dashboard_view', reverse('accounts:dashboard'), max_queries=18)
+
+    def test_progress_view(self):
+        self.assertBudget('progress_view', reverse('accounts:progress'), max_queries=12)
+
+    def test_enhanced_community_view(self):
+        self.assertBudget('EnhancedCommunityView', reverse('accounts:community'), max_queries=18)
+
+    def test_notifications_api(self):
+        self.assertBudget('notifications_api', reverse('accounts:notifications_api'), max_queries=5)
+
+    def test_meeting_list(self):
+        self.assertBudget('meeting_list', reverse('support_services:meeting_list'), max_queries=8)
+
+    def test_nearby_meetings(self):
+        self.assertBudget(
+            'nearby_meetings', reverse('support_services:nearby_meetings'),
+            max_queries=5, params={'lat': 39.8, 'lng': -89.6, 'radius': 500})
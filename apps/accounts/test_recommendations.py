@@ -0,0 +1,125 @@
+"""Offline recommendations: scoring, storage, staleness and readers."""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import recommendations, social_graph
+from apps.accounts.models import UserRecommendations
+from apps.accounts.tasks import rebuild_recommendations, refresh_stale_recommendations
+
+User = get_user_model()
+
+
+class VectorTests(TestCase):
+    def test_unit_length_with_neighbouring_stages(self):
+        features = recommendations.vector(['Fitness', 'meditation '], 'building')
+        self.assertAlmostEqual(sum(w * w for w in features.values()), 1.0)
+        self.assertEqual(
+            set(features),
+            {'interest:fitness', 'interest:meditation', 'stage:starting', 'stage:building', 'stage:growing'},
+        )
+        self.assertGreater(features['stage:building'], features['stage:growing'])
+
+    def test_comma_separated_interests_and_empty_profile(self):
+        self.assertEqual(set(recommendations.vector('art, music', None)), {'interest:art', 'interest:music'})
+        self.assertEqual(recommendations.vector([], ''), {})
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        social_graph._local.clear()
+        now = timezone.now()
+
+        def member(name, **fields):
+            fields.setdefault('last_seen', now)
+            fields.setdefault('is_profile_public', True)
+            return User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='x', **fields)
+
+        self.me = member('me', interests=['fitness', 'music'], recovery_stage='building')
+        self.friend = member('friend')
+        self.fof = member('fof', last_seen=now - timedelta(days=60))
+        self.alike = member('alike', interests=['music', 'fitness'], recovery_stage='building')
+        self.stranger = member('stranger', last_seen=now - timedelta(days=60))
+        self.hidden = member('hidden', is_profile_public=False)
+        self.me.follow_user(self.friend)
+        self.friend.follow_user(self.fof)
+        self.friend.follow_user(self.hidden)
+
+    def ranked(self, user):
+        return [candidate_id for candidate_id, _, _ in recommendations.rebuild([user.pk])[user.pk]]
+
+    def test_similarity_and_graph_rank_above_recency(self):
+        ranked = self.ranked(self.me)
+        self.assertEqual(ranked, [self.alike.pk, self.fof.pk, self.stranger.pk])
+        self.assertNotIn(self.friend.pk, ranked)
+        self.assertNotIn(self.hidden.pk, ranked)
+        self.assertNotIn(self.me.pk, ranked)
+        row = UserRecommendations.objects.get(user=self.me)
+        self.assertEqual([mutual for _, _, mutual in row.suggestions], [0, 1, 0])
+        self.assertFalse(row.stale)
+
+    def test_readers_drop_members_followed_since(self):
+        recommendations.rebuild([self.me.pk])
+        self.me.follow_user(self.fof)
+        with self.assertNumQueries(2):
+            suggested = recommendations.suggestions_for(self.me, 2)
+        self.assertEqual(suggested, [self.alike, self.stranger])
+        self.assertEqual(suggested[0].mutual_count, 0)
+
+    def test_missing_row_gets_recent_members_and_is_queued(self):
+        # The row, its placeholder insert, and the recent members; nothing scored.
+        with self.assertNumQueries(3):
+            suggested = recommendations.suggested_ids(self.fof)
+        self.assertEqual(
+            {candidate_id for candidate_id, _ in suggested},
+            {self.me.pk, self.friend.pk, self.alike.pk, self.stranger.pk})
+        self.assertTrue(UserRecommendations.objects.get(user=self.fof).stale)
+
+        self.assertEqual(refresh_stale_recommendations(), 1)
+        row = UserRecommendations.objects.get(user=self.fof)
+        self.assertFalse(row.stale)
+        self.assertEqual(
+            recommendations.suggested_ids(self.fof),
+            [(candidate_id, mutual) for candidate_id, _, mutual in row.suggestions])
+
+    def test_follows_and_profile_edits_mark_stale(self):
+        recommendations.rebuild([self.me.pk, self.alike.pk, self.stranger.pk])
+        self.me.follow_user(self.alike)
+        self.stranger.interests = ['fitness']
+        self.stranger.save()
+        self.alike.last_seen = timezone.now()
+        self.alike.save(update_fields=['last_seen'])
+
+        stale = set(UserRecommendations.objects.filter(stale=True).values_list('user_id', flat=True))
+        self.assertEqual(stale, {self.me.pk, self.stranger.pk})
+        self.assertEqual(refresh_stale_recommendations(), 2)
+        self.assertFalse(UserRecommendations.objects.filter(stale=True).exists())
+
+    def test_nightly_rebuild_covers_active_members(self):
+        self.assertEqual(rebuild_recommendations(), User.objects.filter(is_active=True).count())
+        self.assertEqual(UserRecommendations.objects.count(), 6)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class SuggestedUsersViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='sam', email='sam@example.com', password='x', interests=['art'])
+        self.other = User.objects.create_user(
+            username='alex', email='alex@example.com', password='x', is_profile_public=True,
+            interests=['art'], date_joined=timezone.now())
+        self.client.force_login(self.user)
+
+    def test_lists_recommendations(self):
+        response = self.client.get(reverse('accounts:suggested_users'))
+        self.assertEqual(response.context['suggested_users'], [self.other])
+        self.assertEqual(response.context['new_members'], [self.other])
+        self.assertEqual(response.context['mutual_suggestions'], [])
+        self.assertContains(response, '@alex')
@@ -0,0 +1,69 @@
+"""Staff-only on-demand request profiler."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.accounts.rate_limiting import get_rate_limit_cache
+from apps.accounts.request_profiler import flame_layout, get_profile
+
+User = get_user_model()
+
+URL = '/admin/dashboard/profiles/'
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False, REQUEST_PROFILER_ENABLED=True)
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_rate_limit_cache().clear()
+        self.staff = User.objects.create_user(
+            username='ops', email='ops@example.com', password='x', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def profile_id(self, response):
+        return response['X-Profile-URL'].rstrip('/').rsplit('/', 1)[-1]
+
+    def test_sampled_profile_stored_and_viewable(self):
+        response = self.client.get(URL, {'__profile': '1'})
+        profile = get_profile(self.profile_id(response))
+        self.assertEqual((profile['mode'], profile['status'], profile['user']), ('sample', 200, 'ops'))
+        self.assertEqual(profile['sql_count'], len(profile['sql']))
+        self.assertGreater(profile['sql_count'], 0)
+
+        detail = self.client.get(response['X-Profile-URL'])
+        self.assertContains(detail, 'SQL timeline')
+        self.assertContains(detail, 'Flame graph')
+        self.assertContains(self.client.get(URL), '__profile=1')
+
+    def test_cprofile_mode_via_header(self):
+        response = self.client.get(URL, HTTP_X_PROFILE='cprofile')
+        profile = get_profile(self.profile_id(response))
+        self.assertIn('cumulative', profile['cprofile'])
+        self.assertContains(self.client.get(response['X-Profile-URL']), 'cProfile')
+
+    def test_non_staff_flag_ignored(self):
+        member = User.objects.create_user(username='member', email='m@example.com', password='x')
+        self.client.force_login(member)
+        response = self.client.get('/accounts/login/', {'__profile': '1'})
+        self.assertNotIn('X-Profile-URL', response)
+
+    @override_settings(REQUEST_PROFILER_RATE=(1, 60))
+    def test_rate_limited(self):
+        self.assertIn('X-Profile-URL', self.client.get(URL, {'__profile': '1'}))
+        self.assertNotIn('X-Profile-URL', self.client.get(URL, {'__profile': '1'}))
+
+    @override_settings(REQUEST_PROFILER_ENABLED=False)
+    def test_off_by_default(self):
+        self.assertNotIn('X-Profile-URL', self.client.get(URL, {'__profile': '1'}))
+
+    def test_expired_profile_404(self):
+        self.assertEqual(self.client.get(URL + 'missing/').status_code, 404)
+
+
+class FlameLayoutTests(SimpleTestCase):
+    def test_boxes_nest_and_share_width(self):
+        stacks = [[['view', 'query'], 3], [['view', 'render'], 1]]
+        boxes = {box['label']: box for box in flame_layout(stacks, 4)}
+        self.assertEqual((boxes['view']['depth'], boxes['view']['width']), (0, 100.0))
+        self.assertEqual((boxes['query']['left'], boxes['query']['width']), (0.0, 75.0))
+        self.assertEqual((boxes['render']['left'], boxes['render']['width']), (75.0, 25.0))
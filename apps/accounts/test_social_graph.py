@@ -0,0 +1,106 @@
+"""Cached follow graph and its write-through from follow changes."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts import social_graph
+from apps.accounts.models import ActivityFeed, SocialPost, UserConnection
+
+User = get_user_model()
+
+
+class SocialGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        social_graph._local.clear()
+        self.a, self.b, self.c = (
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('ann', 'ben', 'cat')
+        )
+
+    def test_follow_and_unfollow_write_through(self):
+        self.a.follow_user(self.b)
+        self.c.follow_user(self.b)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.a.is_following(self.b))
+            self.assertFalse(self.b.is_following(self.a))
+            self.assertEqual(social_graph.follower_ids(self.b.pk), {self.a.pk, self.c.pk})
+            self.assertEqual((self.b.followers_count, self.a.following_count), (2, 1))
+
+        self.a.unfollow_user(self.b)
+        self.assertFalse(self.a.is_following(self.b))
+        self.assertEqual(self.b.followers_count, 1)
+
+    def test_uncommitted_follows_stay_out_of_the_shared_cache(self):
+        self.assertEqual(social_graph.following_ids(self.a.pk), frozenset())
+        try:
+            with transaction.atomic():
+                self.a.follow_user(self.b)
+                with self.assertNumQueries(0):
+                    self.assertTrue(self.a.is_following(self.b))
+                self.assertIsNone(cache.get(social_graph._key(social_graph.FOLLOWING, self.a.pk)))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # Another worker, without this process's LRU, reads the rolled-back state.
+        social_graph._local.clear()
+        self.assertFalse(self.a.is_following(self.b))
+        self.assertEqual(self.b.followers_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a.follow_user(self.b)
+        social_graph._local.clear()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.a.is_following(self.b))
+            self.assertEqual(self.b.followers_count, 1)
+
+    def test_misses_load_in_one_query_per_direction(self):
+        UserConnection.objects.bulk_create([
+            UserConnection(follower=self.a, following=self.b),
+            UserConnection(follower=self.a, following=self.c),
+            UserConnection(follower=self.b, following=self.c),
+        ])
+        cache.clear()
+        social_graph._local.clear()
+
+        with self.assertNumQueries(1):
+            following = social_graph.following_map([self.a.pk, self.b.pk, self.c.pk])
+        self.assertEqual(following[self.a.pk], {self.b.pk, self.c.pk})
+        self.assertEqual(following[self.c.pk], frozenset())
+        with self.assertNumQueries(2):
+            counts = social_graph.counts([self.a.pk, self.c.pk])
+        self.assertEqual(counts, {self.a.pk: (0, 2), self.c.pk: (2, 0)})
+
+        # The shared cache alone is enough once the local copy is gone.
+        social_graph._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(social_graph.followed_among(self.a.pk, [self.b.pk, 99]), {self.b.pk})
+
+    def test_attach_counts(self):
+        self.b.follow_user(self.a)
+        users = social_graph.attach_counts(User.objects.order_by('username'))
+        with self.assertNumQueries(0):
+            self.assertEqual([u.followers_count for u in users], [1, 0, 0])
+
+    def test_friends_only_visibility(self):
+        post = SocialPost.objects.create(author=self.a, content='hi', visibility='friends')
+        self.assertFalse(post.is_visible_to(self.b))
+        self.b.follow_user(self.a)
+        with self.assertNumQueries(0):
+            self.assertTrue(post.is_visible_to(self.b))
+            self.assertFalse(post.is_visible_to(self.c))
+
+    @override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+    def test_follow_toggle_ignores_a_stale_cached_graph(self):
+        # Another worker's unfollow hasn't reached this worker's LRU yet.
+        social_graph._local.set_many({
+            social_graph._key(social_graph.FOLLOWING, self.a.pk): frozenset({self.b.pk})})
+        self.assertTrue(self.a.is_following(self.b))
+
+        self.client.force_login(self.a)
+        response = self.client.post(reverse('accounts:follow_user', args=[self.b.username]))
+        self.assertEqual(response.json()['action'], 'followed')
+        self.assertTrue(UserConnection.objects.filter(follower=self.a, following=self.b).exists())
+        self.assertEqual(ActivityFeed.objects.filter(user=self.a, activity_type='user_followed').count(), 1)
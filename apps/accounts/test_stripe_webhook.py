@@ -0,0 +1,161 @@
+"""Stripe webhook: signed ingestion, ordered per-customer processing, retries."""
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import stripe_events
+from apps.accounts.payment_models import StripeEvent
+
+User = get_user_model()
+
+SECRET = 'whsec_test'
+BASE_TS = 1_760_000_000
+
+
+def event(event_id, event_type, obj, created=BASE_TS):
+    return {
+        'id': event_id, 'object': 'event', 'type': event_type,
+        'created': created, 'livemode': False,
+        'data': {'object': obj},
+    }
+
+
+def subscription_event(event_id, event_type, created=BASE_TS, **fields):
+    obj = {
+        'id': 'sub_1', 'object': 'subscription', 'customer': 'cus_1', 'status': 'active',
+        'current_period_start': BASE_TS, 'current_period_end': BASE_TS + 30 * 86400,
+        'cancel_at_period_end': False,
+    }
+    obj.update(fields)
+    return event(event_id, event_type, obj, created)
+
+
+def sign(payload, secret=SECRET, timestamp=None):
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(
+        secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False, STRIPE_WEBHOOK_SECRET=SECRET)
+@patch('apps.accounts.stripe_events.enqueue')
+class StripeWebhookIngestTests(TestCase):
+    def post(self, body, signature=None):
+        payload = json.dumps(body)
+        return self.client.post(
+            reverse('accounts:stripe_webhook'), data=payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=signature or sign(payload))
+
+    def test_event_is_stored_not_handled(self, mock_enqueue):
+        user = User.objects.create_user(username='payer', email='p@example.com', password='x')
+        user.subscription.stripe_subscription_id = 'sub_1'
+        user.subscription.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(subscription_event('evt_1', 'customer.subscription.deleted'))
+
+        self.assertEqual(response.status_code, 200)
+        stored = StripeEvent.objects.get()
+        self.assertEqual((stored.stripe_event_id, stored.customer_id, stored.status),
+                         ('evt_1', 'cus_1', 'pending'))
+        mock_enqueue.assert_called_once_with('cus_1')
+        user.subscription.refresh_from_db()
+        self.assertNotEqual(user.subscription.status, 'canceled')
+
+    def test_redelivery_is_idempotent(self, mock_enqueue):
+        body = subscription_event('evt_1', 'customer.subscription.updated')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.post(body).status_code, 200)
+            self.assertEqual(self.post(body).status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(mock_enqueue.call_count, 1)
+
+    def test_bad_signature_rejected(self, mock_enqueue):
+        body = subscription_event('evt_1', 'customer.subscription.updated')
+        response = self.post(body, signature=sign(json.dumps(body), secret='whsec_other'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_unhandled_types_acknowledged_without_storing(self, mock_enqueue):
+        response = self.post(event('evt_1', 'customer.created', {'id': 'cus_1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(StripeEvent.objects.exists())
+
+
+@patch('apps.accounts.payment_views.send_email', return_value=(True, None))
+@patch('apps.accounts.stripe_events.enqueue')
+class StripeEventProcessingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='payer', email='p@example.com', password='x')
+        self.subscription = self.user.subscription
+        self.subscription.tier = 'premium'
+        self.subscription.stripe_customer_id = 'cus_1'
+        self.subscription.stripe_subscription_id = 'sub_1'
+        self.subscription.save()
+
+    def record(self, body):
+        return stripe_events.record_event(json.dumps(body))[0]
+
+    def test_events_applied_in_stripe_order(self, mock_enqueue, mock_send):
+        # Delivered out of order: the cancellation arrives before the update
+        # that preceded it.
+        self.record(subscription_event('evt_2', 'customer.subscription.deleted', created=BASE_TS + 60))
+        self.record(subscription_event('evt_1', 'customer.subscription.updated', status='past_due'))
+
+        self.assertEqual(stripe_events.process_customer('cus_1'), 2)
+        self.subscription.refresh_from_db()
+        self.assertEqual((self.subscription.tier, self.subscription.status), ('free', 'canceled'))
+        self.assertFalse(StripeEvent.objects.exclude(status='processed').exists())
+
+    def test_failure_backs_off_and_blocks_later_events(self, mock_enqueue, mock_send):
+        first = self.record(subscription_event('evt_1', 'customer.subscription.updated'))
+        second = self.record(subscription_event('evt_2', 'customer.subscription.deleted', created=BASE_TS + 60))
+
+        failing = {'customer.subscription.updated': lambda obj: 1 / 0}
+        with patch.dict('apps.accounts.payment_views.EVENT_HANDLERS', failing):
+            self.assertEqual(stripe_events.process_customer('cus_1'), 0)
+            # Not due yet, so a second run does nothing.
+            self.assertEqual(stripe_events.process_customer('cus_1'), 0)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), ('failed', 1))
+        self.assertIn('ZeroDivisionError', first.last_error)
+        self.assertGreater(first.next_attempt_at, timezone.now())
+        self.assertEqual(second.status, 'pending')
+        self.assertEqual(stripe_events.due_customers(), [])
+        self.assertEqual(
+            stripe_events.due_customers(timezone.now() + timedelta(minutes=2)), ['cus_1'])
+
+    def test_dead_letter_then_replay(self, mock_enqueue, mock_send):
+        first = self.record(subscription_event('evt_1', 'customer.subscription.updated', status='past_due'))
+        self.record(subscription_event('evt_2', 'customer.subscription.deleted', created=BASE_TS + 60))
+
+        failing = {'customer.subscription.updated': lambda obj: 1 / 0}
+        with patch.dict('apps.accounts.payment_views.EVENT_HANDLERS', failing):
+            for _ in range(stripe_events.MAX_ATTEMPTS):
+                StripeEvent.objects.filter(pk=first.pk).update(next_attempt_at=None)
+                stripe_events.process_customer('cus_1')
+
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), ('dead', stripe_events.MAX_ATTEMPTS))
+        # The dead event no longer holds up the customer's queue.
+        self.assertEqual(StripeEvent.objects.get(stripe_event_id='evt_2').status, 'processed')
+
+        out = StringIO()
+        call_command('replay_stripe_events', '--now', stdout=out)
+        self.assertIn('Replayed 1 event(s)', out.getvalue())
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), ('processed', 1))
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'past_due')
@@ -0,0 +1,104 @@
+"""Per-run Celery task metrics, profiling and the Prometheus endpoint."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.task_instrumentation import arm_profile, prometheus_metrics
+from apps.accounts.task_metrics_models import TaskRun
+from apps.accounts.tasks import prune_task_runs
+from recovery_hub.celery import app
+
+User = get_user_model()
+
+
+def _fake_response(request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.request = request
+    return response
+
+
+@app.task(name='tests.instrumented_task')
+def instrumented_task(fail=False):
+    User.objects.count()
+    User.objects.exists()
+    requests.Session().get('https://example.com/ping')
+    if fail:
+        raise ValueError('boom')
+    return {'sent': 3, 'skipped': 2, 'done': True}
+
+
+@patch('requests.adapters.HTTPAdapter.send', side_effect=_fake_response)
+class TaskInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_run_is_recorded(self, mock_http):
+        result = instrumented_task.apply()
+        run = TaskRun.objects.get(task_id=result.id)
+        self.assertEqual((run.task_name, run.state), ('tests.instrumented_task', 'SUCCESS'))
+        self.assertEqual(run.db_queries, 2)
+        self.assertEqual(run.http_calls, 1)
+        self.assertEqual(run.items, 5)
+        self.assertGreater(run.runtime_seconds, 0)
+        self.assertEqual(run.profile, '')
+
+    def test_failure_is_recorded(self, mock_http):
+        result = instrumented_task.apply(kwargs={'fail': True})
+        run = TaskRun.objects.get(task_id=result.id)
+        self.assertEqual(run.state, 'FAILURE')
+        self.assertIsNone(run.items)
+
+    def test_profile_captures_one_run(self, mock_http):
+        arm_profile('tests.instrumented_task')
+        first = TaskRun.objects.get(task_id=instrumented_task.apply().id)
+        second = TaskRun.objects.get(task_id=instrumented_task.apply().id)
+        self.assertIn('cumulative', first.profile)
+        self.assertEqual(second.profile, '')
+
+    @override_settings(TASK_METRICS_ENABLED=False)
+    def test_can_be_disabled(self, mock_http):
+        instrumented_task.apply()
+        self.assertFalse(TaskRun.objects.exists())
+
+    def test_prune(self, mock_http):
+        instrumented_task.apply()
+        TaskRun.objects.create(
+            task_name='old', state='SUCCESS', runtime_seconds=1,
+            started_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune_task_runs(), 1)
+        self.assertEqual(TaskRun.objects.count(), 1)
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False, TASK_METRICS_TOKEN='scrape-me')
+@patch('recovery_hub.celery_metrics.queue_stats', return_value={})
+class TaskMetricsEndpointTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for runtime, state in ((2.0, 'SUCCESS'), (4.0, 'SUCCESS'), (1.0, 'FAILURE')):
+            TaskRun.objects.create(
+                task_name='apps.accounts.tasks.send_weekly_digests', state=state,
+                started_at=now, runtime_seconds=runtime, items=10, max_rss_kb=1000)
+
+    def test_prometheus_text(self, mock_queues):
+        text = prometheus_metrics()
+        self.assertIn('celery_task_runs{task="apps.accounts.tasks.send_weekly_digests",state="SUCCESS"} 2', text)
+        self.assertIn('celery_task_runtime_seconds_max{task="apps.accounts.tasks.send_weekly_digests"} 4', text)
+        self.assertIn('celery_task_max_rss_bytes{task="apps.accounts.tasks.send_weekly_digests"} 1.024e+06', text)
+
+    def test_token_or_staff_required(self, mock_queues):
+        url = '/admin/dashboard/task-metrics/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'celery_task_runs', response.content)
+
+        staff = User.objects.create_user(username='ops', email='ops@example.com', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
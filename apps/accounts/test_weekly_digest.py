@@ -0,0 +1,135 @@
+"""Weekly digest: per-chunk payload queries and send bookkeeping."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.digest_service import build_digests
+from apps.accounts.models import DailyCheckIn, Notification, SocialPost, UserConnection
+from apps.accounts.tasks import send_weekly_digests
+
+User = get_user_model()
+
+
+def make_user(username, tier='free'):
+    user = User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='x')
+    if tier != 'free':
+        user.subscription.tier = tier
+        user.subscription.save()
+    return user
+
+
+def follow(follower, following):
+    return UserConnection.objects.create(
+        follower=follower, following=following, connection_type='follow')
+
+
+def digest_users(users):
+    return User.objects.filter(pk__in=[u.pk for u in users]).select_related(
+        'subscription', 'activity_summary')
+
+
+class BuildDigestsTests(TestCase):
+    def setUp(self):
+        self.reader = make_user('reader')
+        self.author = make_user('author')
+        self.other = make_user('other')
+        follow(self.reader, self.author)
+        follow(self.reader, self.other)
+
+    def test_followers_capped_with_total(self):
+        for i in range(7):
+            follow(make_user(f'fan{i}'), self.reader)
+
+        digest = build_digests(digest_users([self.reader]))[self.reader.pk]
+        self.assertEqual(len(digest['new_followers']), 5)
+        self.assertEqual(digest['new_follower_count'], 7)
+        self.assertEqual(digest['new_followers'][0].follower.username, 'fan6')
+
+    def test_popular_posts_ranked_per_reader(self):
+        fans = [make_user(f'liker{i}') for i in range(4)]
+        posts = [SocialPost.objects.create(author=self.author, content=f'post {i}') for i in range(3)]
+        quiet = SocialPost.objects.create(author=self.other, content='quiet')
+        SocialPost.objects.create(author=self.other, content='private', visibility='private')
+        for post, likes in zip(posts, (1, 4, 2)):
+            post.likes.add(*fans[:likes])
+        # The author follows `other` too, and must only see other's posts.
+        follow(self.author, self.other)
+
+        digests = build_digests(digest_users([self.reader, self.author]))
+        reader_posts = digests[self.reader.pk]['popular_posts']
+        self.assertEqual([p.pk for p in reader_posts], [posts[1].pk, posts[2].pk, posts[0].pk])
+        self.assertEqual([p.like_count for p in reader_posts], [4, 2, 1])
+        self.assertEqual([p.pk for p in digests[self.author.pk]['popular_posts']], [quiet.pk])
+
+    def test_unread_notifications_and_empty_digest(self):
+        Notification.objects.create(
+            recipient=self.other, sender=self.reader, notification_type='follow',
+            title='New follower', message='hi')
+
+        loner = make_user('loner')
+        digests = build_digests(digest_users([loner, self.other]))
+        self.assertIsNone(digests[loner.pk])
+        self.assertEqual(digests[self.other.pk]['unread_notifications'], 1)
+
+    def test_queries_do_not_grow_with_members(self):
+        def populate(prefix):
+            members = []
+            for i in range(3):
+                member = make_user(f'{prefix}{i}', tier='premium')
+                follow(member, self.author)
+                follow(self.reader, member)
+                DailyCheckIn.objects.create(
+                    user=member, date=timezone.localdate() - timedelta(days=1),
+                    mood=4, craving_level=1, energy_level=3)
+                members.append(member)
+            return members
+
+        SocialPost.objects.create(author=self.author, content='hello')
+        small = list(digest_users(populate('a')))
+        with self.assertNumQueries(4) as small_ctx:
+            build_digests(small)
+        large = list(digest_users(populate('b') + populate('c') + small))
+        with self.assertNumQueries(len(small_ctx.captured_queries)):
+            digests = build_digests(large)
+        self.assertTrue(all(digests[m.pk]['premium_recap'] for m in large))
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+@patch('apps.accounts.tasks.time.sleep')
+@patch('apps.accounts.tasks.send_email', return_value=(True, None))
+class SendWeeklyDigestsTests(TestCase):
+    def test_sends_and_stamps(self, mock_send, mock_sleep):
+        author = make_user('author')
+        readers = [make_user(f'reader{i}') for i in range(3)]
+        make_user('nobody')
+        for reader in readers:
+            follow(reader, author)
+        SocialPost.objects.create(author=author, content='news')
+
+        # The readers see the post; the author sees their new followers.
+        self.assertEqual(send_weekly_digests(), 4)
+        self.assertEqual(
+            sorted(call.kwargs['recipient_email'] for call in mock_send.call_args_list),
+            sorted(u.email for u in readers + [author]))
+        self.assertEqual(
+            User.objects.filter(last_weekly_digest_sent__isnull=False).count(), 4)
+
+        # Stamped members are not sent again inside the week.
+        mock_send.reset_mock()
+        self.assertEqual(send_weekly_digests(), 0)
+        mock_send.assert_not_called()
+
+    def test_failed_send_is_not_stamped(self, mock_send, mock_sleep):
+        author = make_user('author')
+        reader = make_user('reader')
+        follow(reader, author)
+        SocialPost.objects.create(author=author, content='news')
+        mock_send.return_value = (False, 'boom')
+
+        self.assertEqual(send_weekly_digests(), 0)
+        reader.refresh_from_db()
+        self.assertIsNone(reader.last_weekly_digest_sent)
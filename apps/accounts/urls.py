@@ -13,6 +13,7 @@ from apps.accounts.court_views import (
 )
 from apps.accounts import supporter_views
 from apps.accounts import plan_views
+from apps.accounts.notification_stream import notification_stream
 from .facility_views import (
     facility_join, facility_leave, facility_dashboard, facility_roster,
     facility_member_detail, facility_generate_invite, facility_revoke_member,
@@ -71,6 +72,7 @@ urlpatterns = [
 
     # Messages
     path('messages/', views.MessageListView.as_view(), name='messages'),
+    path('messages/<int:conversation_id>/', views.conversation_view, name='conversation'),
     path('messages/<int:message_id>/delete/', views.delete_message_view, name='delete_message'),
     path('send-message/<str:username>/', views.send_message_view, name='send_message'),
     
@@ -127,6 +129,7 @@ urlpatterns = [
     path('groups/my-groups/', views.my_groups, name='my_groups'),
     path('groups/<int:group_id>/join/', views.join_group, name='join_group'),
     path('groups/<int:group_id>/leave/', views.leave_group, name='leave_group'),
+    path('groups/<int:group_id>/notifications/', views.group_notification_level, name='group_notification_level'),
     path('groups/<int:group_id>/post/', views.create_group_post, name='create_group_post'),
     path('groups/<int:group_id>/edit/', views.edit_group, name='edit_group'),
     path('groups/<int:group_id>/approve/<int:user_id>/', views.approve_member, name='approve_member'),
@@ -174,10 +177,13 @@ urlpatterns = [
     # Add these notification URLs
     path('notifications/', views.notifications_page, name='notifications'),
     path('api/notifications/', views.notifications_api, name='notifications_api'),
+    path('api/notifications/stream/', notification_stream, name='notification_stream'),
     path('api/notifications/unread-count/',
          views.unread_count_api, name='unread_count_api'),
     path('api/notifications/<int:notification_id>/read/',
          views.mark_notification_read, name='mark_notification_read'),
+    path('api/notifications/broadcast/<int:broadcast_id>/read/',
+         views.mark_broadcast_read, name='mark_broadcast_read'),
     path('api/notifications/mark-all-read/',
          views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('api/update-last-seen/', views.update_last_seen, name='update_last_seen'),
@@ -7,10 +7,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import DetailView, UpdateView, ListView, CreateView
+from django.views.generic import DetailView, UpdateView, ListView, CreateView, TemplateView
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
-from django.db.models import Q, Count, Prefetch, Avg
+from django.db.models import Q, Count, Prefetch, Sum
 from django.utils import timezone
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST, require_http_methods
@@ -30,7 +30,8 @@ from .invite_models import WaitlistRequest, InviteCode, SystemSettings
 from .forms import WaitlistRequestForm, CustomUserCreationFormWithInvite
 from .models import (
     GroupChallenge, ChallengeParticipant, ChallengeCheckIn,
-    ChallengeComment, ChallengeBadge, UserChallengeBadge, Notification
+    ChallengeComment, ChallengeBadge, UserChallengeBadge, Notification,
+    ConversationParticipant,
 )
 from .forms import (
     GroupChallengeForm, JoinChallengeForm, ChallengeCheckInForm,
@@ -38,6 +39,7 @@ from .forms import (
 )
 from .payment_models import Subscription
 from .ab_testing import ABTestingService
+from . import challenge_progress, group_fanout, member_directory, messaging, recommendations, social_graph
 
 def register_view(request):
     """
@@ -602,65 +604,26 @@ def admin_approve_waitlist(request, request_id):
 @login_required
 def dashboard_view(request):
     """Enhanced dashboard with community activity feed"""
+    from apps.accounts import dashboard_sections
+
     user = request.user
 
     # Basic user stats
     days_sober = user.get_days_sober()
 
-    # Get recent milestones
-    recent_milestones = user.milestones.all()[:5]
-
-    # Get unread messages count
-    unread_messages = user.received_messages.filter(is_read=False).count()
+    # Per-member sections (cached, invalidated by signals) and the
+    # site-wide weekly community stats (cached for a few minutes).
+    sections = dashboard_sections.user_sections(user)
+    following_ids = social_graph.following_ids(user.id)
 
     # Activity Feed - Show activities from users this user follows + own activities
-    following_users = list(user.get_following().values_list('id', flat=True))
-    following_users.append(user.id)  # Include own activities
-
     recent_activities = ActivityFeed.objects.filter(
-        user_id__in=following_users,
+        user_id__in=[*following_ids, user.id],
         is_public=True
     ).select_related('user').prefetch_related(
         'comments__user', 'likes'
     ).order_by('-created_at')[:15]
 
-    # Community stats for the current week
-    from datetime import timedelta
-    week_ago = timezone.now() - timedelta(days=7)
-
-    recent_milestones_count = Milestone.objects.filter(
-        created_at__gte=week_ago
-    ).count()
-
-    active_users_week = User.objects.filter(
-        last_seen__gte=week_ago,
-        is_active=True
-    ).count()
-
-    # User's connection stats
-    followers_count = user.followers_count
-    following_count = user.following_count
-
-    # Suggested users to follow (users not already followed)
-    excluded_ids = list(user.get_following().values_list('id', flat=True))
-    excluded_ids.append(user.id)
-
-    suggested_users = User.objects.filter(
-        is_active=True,
-        is_profile_public=True
-    ).exclude(id__in=excluded_ids).annotate(
-        mutual_count=Count('follower_connections__follower',
-                           filter=Q(follower_connections__follower__in=user.get_following()))
-    ).order_by('-mutual_count', '-date_joined')[:3]
-
-    # User's recovery connections
-    active_sponsor = user.get_active_sponsor()
-    recovery_pal = user.get_recovery_pal()
-    active_sponsorships = user.get_active_sponsorships()[:3]
-
-    # User's groups
-    user_groups = user.get_joined_groups()[:3]
-
     # Check if user has done daily check-in today
     today = timezone.localdate()
     today_checkin = DailyCheckIn.objects.filter(
@@ -672,30 +635,19 @@ def dashboard_view(request):
         # User basics
         'user': user,
         'days_sober': days_sober,
-        'unread_messages': unread_messages,
+        'unread_messages': sections['inbox']['unread_messages'],
 
         # Milestones
-        'recent_milestones': recent_milestones,
+        'recent_milestones': sections['milestones'],
 
         # Activity Feed
         'recent_activities': recent_activities,
 
         # Community stats
-        'recent_milestones_count': recent_milestones_count,
-        'active_users_week': active_users_week,
+        **dashboard_sections.community_stats(),
 
-        # User connections
-        'followers_count': followers_count,
-        'following_count': following_count,
-        'suggested_users': suggested_users,
-
-        # Recovery connections
-        'active_sponsor': active_sponsor,
-        'recovery_pal': recovery_pal,
-        'active_sponsorships': active_sponsorships,
-
-        # Groups
-        'user_groups': user_groups,
+        # User connections, recovery connections and groups
+        **dashboard_sections.load_network(user, sections['network']),
 
         # Daily check-in
         'today_checkin': today_checkin,
@@ -710,9 +662,10 @@ def dashboard_view(request):
         ).all()[:10]
 
         # Filter posts based on visibility
+        connected_ids = following_ids | social_graph.follower_ids(user.id)
         visible_social_posts = []
         for post in social_posts:
-            if post.is_visible_to(user):
+            if post.is_visible_to(user, connected_ids):
                 # Single pass over prefetched reactions (cache list once)
                 reactions_list = list(post.reactions.all())
                 post.reaction_count = len(reactions_list)
@@ -1131,113 +1084,18 @@ def progress_view(request):
         days = 30
 
     today = timezone.localdate()
-    start_date = today - timedelta(days=days)
 
-    # Get check-ins for the period
-    checkins = DailyCheckIn.objects.filter(
-        user=request.user,
-        date__gte=start_date
-    ).order_by('date')
-
-    # Prepare chart data
-    chart_data = {
-        'labels': [c.date.strftime('%b %d') for c in checkins],
-        'mood': [c.mood for c in checkins],
-        'craving': [c.craving_level for c in checkins],
-        'energy': [c.energy_level for c in checkins],
-    }
-
-    # Calculate statistics
-    total_checkins = checkins.count()
+    # One 90-day check-in query, memoized per member and day; every chart,
+    # statistic, the weekly comparison and the heatmap come from it.
+    from apps.accounts import progress_analytics
+    from apps.accounts.activity_summary import get_summary
+    analytics = progress_analytics.get_analytics(request.user, today)
+    period = analytics['ranges'][days]
+    chart_data = {key: period[key] for key in ('labels', 'mood', 'craving', 'energy')}
+    total_checkins = period['total']
     checkin_rate = round((total_checkins / days) * 100) if days > 0 else 0
-
-    # Mood statistics
-    if total_checkins > 0:
-        avg_mood = round(sum(c.mood for c in checkins) / total_checkins, 1)
-        avg_craving = round(sum(c.craving_level for c in checkins) / total_checkins, 1)
-        avg_energy = round(sum(c.energy_level for c in checkins) / total_checkins, 1)
-
-        # Best and worst days
-        best_mood_checkin = max(checkins, key=lambda c: c.mood)
-        worst_mood_checkin = min(checkins, key=lambda c: c.mood)
-
-        # Days with zero cravings
-        zero_craving_days = sum(1 for c in checkins if c.craving_level == 0)
-
-        # Mood distribution for pie chart
-        mood_distribution = {}
-        for c in checkins:
-            mood_label = c.get_mood_display()
-            mood_distribution[mood_label] = mood_distribution.get(mood_label, 0) + 1
-    else:
-        avg_mood = 0
-        avg_craving = 0
-        avg_energy = 0
-        best_mood_checkin = None
-        worst_mood_checkin = None
-        zero_craving_days = 0
-        mood_distribution = {}
-
-    # Get emoji for average mood
-    mood_emojis = {1: '😰', 2: '😔', 3: '😐', 4: '😊', 5: '😄', 6: '🌟'}
-    avg_mood_emoji = mood_emojis.get(round(avg_mood), '😐') if avg_mood else ''
-
-    # Weekly comparison: this week vs last week
-    this_week_start = today - timedelta(days=today.weekday())
-    last_week_start = this_week_start - timedelta(days=7)
-    last_week_end = this_week_start - timedelta(days=1)
-
-    # Single aggregate query per week (replaces 6+ separate COUNT/SUM queries)
-    this_week_stats = DailyCheckIn.objects.filter(
-        user=request.user,
-        date__gte=this_week_start,
-        date__lte=today
-    ).aggregate(
-        count=Count('id'),
-        avg_mood=Avg('mood'),
-        avg_craving=Avg('craving_level'),
-    )
-    last_week_stats = DailyCheckIn.objects.filter(
-        user=request.user,
-        date__gte=last_week_start,
-        date__lte=last_week_end
-    ).aggregate(
-        count=Count('id'),
-        avg_mood=Avg('mood'),
-        avg_craving=Avg('craving_level'),
-    )
-
-    weekly_comparison = {
-        'this_week': {
-            'count': this_week_stats['count'],
-            'avg_mood': round(this_week_stats['avg_mood'], 1) if this_week_stats['avg_mood'] else 0,
-            'avg_craving': round(this_week_stats['avg_craving'], 1) if this_week_stats['avg_craving'] is not None else 0,
-        },
-        'last_week': {
-            'count': last_week_stats['count'],
-            'avg_mood': round(last_week_stats['avg_mood'], 1) if last_week_stats['avg_mood'] else 0,
-            'avg_craving': round(last_week_stats['avg_craving'], 1) if last_week_stats['avg_craving'] is not None else 0,
-        },
-    }
-
-    # Calculate mood change percentage
-    if weekly_comparison['last_week']['avg_mood'] > 0:
-        mood_change = round(((weekly_comparison['this_week']['avg_mood'] - weekly_comparison['last_week']['avg_mood']) / weekly_comparison['last_week']['avg_mood']) * 100)
-    else:
-        mood_change = 0
-
-    weekly_comparison['mood_change'] = mood_change
-    weekly_comparison['mood_improved'] = mood_change > 0
-
-    # Calendar heatmap data (last 90 days)
-    heatmap_start = today - timedelta(days=90)
-    heatmap_checkins = DailyCheckIn.objects.filter(
-        user=request.user,
-        date__gte=heatmap_start
-    ).values('date', 'mood')
-
-    # Create heatmap data: date -> mood level
-    heatmap_data = {c['date'].isoformat(): c['mood'] for c in heatmap_checkins}
+    avg_mood = period['avg_mood']
+    summary = get_summary(request.user)
 
     # Milestone progress
     days_sober = request.user.get_days_sober() or 0
@@ -1277,15 +1135,10 @@ def progress_view(request):
         rd = relativedelta(timezone.now().date(), request.user.sobriety_date)
         is_milestone_day = rd.months == 0 and rd.days == 0
 
-    # Today's check-in for inline check-in widget
-    # Fetch today and yesterday (UTC) because check-in dates are stored in UTC
-    # but users think in local time. The client-side JS compares the stored
-    # date against the user's local date to decide what to show.
-    todays_checkin = DailyCheckIn.objects.filter(
-        user=request.user,
-        date__gte=today - timedelta(days=1),
-        date__lte=today,
-    ).order_by('-date').first()
+    # Today's check-in for inline check-in widget: today or yesterday, since
+    # the client-side JS compares the stored date against the user's local
+    # date to decide what to show.
+    todays_checkin = progress_analytics.checkin(analytics['todays_checkin'])
 
     # Today's pledge (note/photo), fetched once and reused for pledged_today
     # instead of a second .exists() query.
@@ -1305,17 +1158,17 @@ def progress_view(request):
         'total_checkins': total_checkins,
         'checkin_rate': checkin_rate,
         'avg_mood': avg_mood,
-        'avg_mood_emoji': avg_mood_emoji,
-        'avg_craving': avg_craving,
-        'avg_energy': avg_energy,
-        'current_streak': request.user.get_checkin_streak(),
-        'best_mood_checkin': best_mood_checkin,
-        'worst_mood_checkin': worst_mood_checkin,
-        'zero_craving_days': zero_craving_days,
-        'mood_distribution': json.dumps(mood_distribution),
+        'avg_mood_emoji': progress_analytics.avg_mood_emoji(avg_mood),
+        'avg_craving': period['avg_craving'],
+        'avg_energy': period['avg_energy'],
+        'current_streak': summary.current_checkin_streak(today),
+        'best_mood_checkin': progress_analytics.checkin(period['best']),
+        'worst_mood_checkin': progress_analytics.checkin(period['worst']),
+        'zero_craving_days': period['zero_craving_days'],
+        'mood_distribution': json.dumps(period['mood_distribution']),
         'days_sober': days_sober,
-        'weekly_comparison': weekly_comparison,
-        'heatmap_data': json.dumps(heatmap_data),
+        'weekly_comparison': analytics['weekly_comparison'],
+        'heatmap_data': json.dumps(analytics['heatmap']),
         'milestone_progress': milestone_progress,
         'next_milestone': next_milestone,
         'days_to_milestone': days_to_milestone,
@@ -1323,7 +1176,7 @@ def progress_view(request):
         'is_milestone_day': is_milestone_day,
         'years_sober': 0,
         'months_sober': 0,
-        'pledge_streak': request.user.get_pledge_streak(),
+        'pledge_streak': summary.current_pledge_streak(today),
         'pledged_today': todays_pledge is not None,
         'pledge_note': todays_pledge.note if todays_pledge else '',
         'pledge_photo_url': todays_pledge.photo.url if todays_pledge and todays_pledge.photo else '',
@@ -1423,93 +1276,14 @@ def comment_on_activity(request, activity_id):
 
 @login_required
 def suggested_users(request):
-    """Suggest users to follow based on mutual connections and interests"""
-    # Users not already followed
-    excluded_ids = list(
-        request.user.get_following().values_list('id', flat=True))
-    excluded_ids.append(request.user.id)
-
-    # Collect all suggestions, avoiding duplicates
-    all_suggestions = []
-    seen_ids = set()
-
-    # 1. Get users with mutual followers (people followed by people you follow)
-    following_users = request.user.get_following()
-    if following_users.exists():
-        mutual_suggestions = User.objects.filter(
-            follower_connections__follower__in=following_users,
-            is_active=True,
-            is_profile_public=True
-        ).exclude(id__in=excluded_ids).annotate(
-            mutual_count=Count('follower_connections__follower')
-        ).order_by('-mutual_count')[:5]
-
-        for user in mutual_suggestions:
-            if user.id not in seen_ids:
-                all_suggestions.append(user)
-                seen_ids.add(user.id)
-
-    # 2. Get users with similar recovery stage or interests
-    if hasattr(request.user, 'recovery_stage') and request.user.recovery_stage:
-        similar_stage = User.objects.filter(
-            is_active=True,
-            is_profile_public=True,
-            recovery_stage=request.user.recovery_stage
-        ).exclude(id__in=excluded_ids).exclude(id__in=seen_ids)[:5]
-
-        for user in similar_stage:
-            if user.id not in seen_ids:
-                all_suggestions.append(user)
-                seen_ids.add(user.id)
-
-    # 3. Get users with similar interests
-    if hasattr(request.user, 'interests') and request.user.interests:
-        user_interests = [i.strip().lower() for i in request.user.interests.split(',') if i.strip()]
-        if user_interests:
-            from django.db.models import Q
-            interest_q = Q()
-            for interest in user_interests[:3]:  # Limit to first 3 interests
-                interest_q |= Q(interests__icontains=interest)
-
-            similar_interests = User.objects.filter(
-                interest_q,
-                is_active=True,
-                is_profile_public=True
-            ).exclude(id__in=excluded_ids).exclude(id__in=seen_ids)[:5]
-
-            for user in similar_interests:
-                if user.id not in seen_ids:
-                    all_suggestions.append(user)
-                    seen_ids.add(user.id)
-
-    # 4. Get new members (joined in last 30 days)
-    new_members = User.objects.filter(
-        is_active=True,
-        is_profile_public=True,
-        date_joined__gte=timezone.now() - timezone.timedelta(days=30)
-    ).exclude(id__in=excluded_ids).exclude(id__in=seen_ids).order_by('-date_joined')[:5]
-
-    for user in new_members:
-        if user.id not in seen_ids:
-            all_suggestions.append(user)
-            seen_ids.add(user.id)
-
-    # 5. Fallback: if still no suggestions, get any active public users
-    if len(all_suggestions) < 6:
-        fallback_users = User.objects.filter(
-            is_active=True,
-            is_profile_public=True
-        ).exclude(id__in=excluded_ids).exclude(id__in=seen_ids).order_by('-date_joined')[:10 - len(all_suggestions)]
-
-        for user in fallback_users:
-            if user.id not in seen_ids:
-                all_suggestions.append(user)
-                seen_ids.add(user.id)
+    """Suggest users to follow from the member's precomputed recommendations"""
+    suggestions = recommendations.suggestions_for(request.user, 12)
+    new_since = timezone.now() - timezone.timedelta(days=30)
 
     context = {
-        'suggested_users': all_suggestions[:12],  # Limit to 12 total
-        'mutual_suggestions': [u for u in all_suggestions if hasattr(u, 'mutual_count')][:5],
-        'new_members': new_members[:5],
+        'suggested_users': suggestions,
+        'mutual_suggestions': [u for u in suggestions if u.mutual_count][:5],
+        'new_members': [u for u in suggestions if u.date_joined >= new_since][:5],
     }
     return render(request, 'accounts/suggested_users.html', context)
 
@@ -1523,23 +1297,9 @@ def _render_connections_list(request, profile_owner, members_qs, *, is_followers
     profile owner as ``user`` — that would shadow request.user in base.html
     and render the nav/follow buttons as the wrong person.
     """
-    from django.db.models import (
-        Case, When, Value, BooleanField, OuterRef, Subquery, IntegerField)
-    from django.db.models.functions import Coalesce
-
-    following_ids = list(
-        request.user.get_following().values_list('id', flat=True))
-
-    # Per-member follower/following counts via subqueries, so the page renders
-    # in a constant number of queries instead of 2 per member (the User
-    # .followers_count/.following_count properties each fire their own COUNT).
-    # We annotate under distinct names because those properties have no setter,
-    # so an annotation reusing their names would fail to bind to the instance.
-    follows = UserConnection.objects.filter(connection_type='follow')
-    n_followers_sq = follows.filter(following=OuterRef('pk')).order_by().values(
-        'following').annotate(c=Count('*')).values('c')
-    n_following_sq = follows.filter(follower=OuterRef('pk')).order_by().values(
-        'follower').annotate(c=Count('*')).values('c')
+    from django.db.models import Case, When, Value, BooleanField
+
+    following_ids = social_graph.following_ids(request.user.id)
 
     members_qs = members_qs.annotate(
         is_followed=Case(
@@ -1547,10 +1307,6 @@ def _render_connections_list(request, profile_owner, members_qs, *, is_followers
             default=Value(False),
             output_field=BooleanField(),
         ),
-        n_followers=Coalesce(
-            Subquery(n_followers_sq, output_field=IntegerField()), 0),
-        n_following=Coalesce(
-            Subquery(n_following_sq, output_field=IntegerField()), 0),
     )
 
     search = (request.GET.get('search') or '').strip()
@@ -1567,6 +1323,10 @@ def _render_connections_list(request, profile_owner, members_qs, *, is_followers
 
     paginator = Paginator(members_qs, 20)
     page_obj = paginator.get_page(request.GET.get('page'))
+    # Per-member follower/following counts from the cached graph in one batch.
+    # The template reads them as n_followers/n_following.
+    for member in social_graph.attach_counts(page_obj.object_list):
+        member.n_followers, member.n_following = member._graph_counts
 
     public_users = User.objects.filter(
         is_profile_public=True, is_active=True
@@ -2240,17 +2000,9 @@ def create_group_post(request, group_id):
     membership.last_active = timezone.now()
     membership.save(update_fields=['last_active'])
 
-    # Notify group members about new post
-    poster_name = 'Someone' if is_anonymous else (request.user.get_full_name() or request.user.username)
-    notify_group_members(
-        group=group,
-        sender=None if is_anonymous else request.user,
-        notification_type='group_post',
-        title=f'New post in {group.name}',
-        message=f'{poster_name} posted "{title}" in {group.name}',
-        link=f'/accounts/groups/{group.id}/',
-        exclude_user=request.user
-    )
+    # Notify group members in the background; posts made within a minute of
+    # each other go out as one notification (see group_fanout.py).
+    transaction.on_commit(lambda: group_fanout.schedule(group.id))
 
     return JsonResponse({
         'success': True,
@@ -2296,6 +2048,37 @@ def leave_group(request, group_id):
     })
 
 
+@login_required
+@require_POST
+def group_notification_level(request, group_id):
+    """Set how the current member hears about new posts in a group"""
+    from .models import GroupMembership
+
+    level = request.POST.get('level')
+    if level not in dict(GroupMembership.NOTIFICATION_LEVELS):
+        return JsonResponse({
+            'success': False,
+            'message': 'Unknown notification setting.'
+        }, status=400)
+
+    updated = GroupMembership.objects.filter(
+        user=request.user,
+        group_id=group_id,
+        status__in=['active', 'moderator', 'admin']
+    ).update(notification_level=level)
+
+    if not updated:
+        return JsonResponse({
+            'success': False,
+            'message': 'You are not a member of this group.'
+        }, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Notification settings updated.'
+    })
+
+
 @login_required
 @require_POST
 def approve_member(request, group_id, user_id):
@@ -2459,31 +2242,6 @@ def edit_group(request, group_id):
     return render(request, 'accounts/groups/edit_group.html', context)
 
 
-def notify_group_members(group, sender, notification_type, title, message, link, exclude_user=None):
-    """Helper function to notify all active group members"""
-    from .models import GroupMembership, Notification
-
-    members = GroupMembership.objects.filter(
-        group=group,
-        status__in=['active', 'moderator', 'admin']
-    ).select_related('user')
-
-    notifications = []
-    for membership in members:
-        if membership.user != exclude_user and membership.user != sender:
-            notifications.append(Notification(
-                recipient=membership.user,
-                sender=sender,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                link=link
-            ))
-
-    if notifications:
-        Notification.objects.bulk_create(notifications)
-
-
 @login_required
 @require_POST
 def comment_group_post(request, group_id, post_id):
@@ -2675,15 +2433,15 @@ def archive_group(request, group_id):
     group.save()
 
     # Notify all members that the group has been archived
-    notify_group_members(
-        group=group,
-        sender=request.user,
+    transaction.on_commit(lambda: group_fanout.announce(
+        group,
         notification_type='group_invite',
         title=f'{group.name} has been archived',
         message=f'The group "{group.name}" has been archived by its administrator.',
         link='/accounts/groups/',
-        exclude_user=request.user
-    )
+        sender=request.user,
+        exclude_user=request.user,
+    ))
 
     return JsonResponse({
         'success': True,
@@ -3090,8 +2848,7 @@ class CommunityView(ListView):
         # Add follow status for authenticated users
         if self.request.user.is_authenticated:
             # Get list of users this user is following
-            following_ids = list(
-                self.request.user.get_following().values_list('id', flat=True))
+            following_ids = social_graph.following_ids(self.request.user.id)
 
             # Add annotation to show if user is followed
             from django.db.models import Case, When, Value, BooleanField
@@ -3122,7 +2879,7 @@ class CommunityView(ListView):
         connection_filter = self.request.GET.get('filter')
         if connection_filter == 'following' and self.request.user.is_authenticated:
             queryset = queryset.filter(
-                id__in=self.request.user.get_following())
+                id__in=social_graph.following_ids(self.request.user.id))
         elif connection_filter == 'new':
             from datetime import timedelta
             queryset = queryset.filter(
@@ -3133,6 +2890,8 @@ class CommunityView(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        # Member cards show follower/following counts; batch them.
+        social_graph.attach_counts(context['object_list'])
 
         # Calculate total members
         total_members = User.objects.filter(
@@ -3156,31 +2915,23 @@ class CommunityView(ListView):
             context.update({
                 'followers_count': user.followers_count,
                 'following_count': user.following_count,
-                'suggested_users': User.objects.filter(
-                    is_active=True,
-                    is_profile_public=True
-                ).exclude(id=user.id).exclude(
-                    id__in=user.get_following()
-                )[:3],
+                'suggested_users': recommendations.suggestions_for(user, 3),
             })
 
         return context
     
-@login_required
-def send_message_view(request, username):
-    recipient = get_object_or_404(User, username=username)
-
+def _message_limit_redirect(request, recipient):
+    """Redirect if `recipient` can't be messaged by the current member, else None."""
     # Check if recipient allows messages
     if not recipient.allow_messages and not request.user.is_staff:
         messages.error(request, 'This user has disabled messages.')
-        return redirect('accounts:profile', username=username)
+        return redirect('accounts:profile', username=recipient.username)
 
     # Check message limit for free users
     if not (hasattr(request.user, 'subscription') and request.user.subscription.is_premium()):
-        from datetime import datetime
+        month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         messages_this_month = request.user.sent_messages.filter(
-            sent_at__month=datetime.now().month,
-            sent_at__year=datetime.now().year
+            created_at__gte=month_start
         ).count()
 
         if messages_this_month >= 10:
@@ -3190,6 +2941,28 @@ def send_message_view(request, username):
                 'Upgrade to Premium for unlimited messaging!'
             )
             return redirect('accounts:pricing')
+    return None
+
+
+def _notify_new_message(message):
+    create_notification(
+        recipient=message.recipient,
+        sender=message.sender,
+        notification_type='message',
+        title='New Message',
+        message=f"You have a new message from {message.sender.get_full_name() or message.sender.username}",
+        link=reverse('accounts:conversation', args=[message.conversation_id]),
+        content_object=message
+    )
+
+
+@login_required
+def send_message_view(request, username):
+    recipient = get_object_or_404(User, username=username)
+
+    blocked = _message_limit_redirect(request, recipient)
+    if blocked:
+        return blocked
 
     if request.method == 'POST':
         form = SupportMessageForm(request.POST)
@@ -3198,17 +2971,7 @@ def send_message_view(request, username):
             message.sender = request.user
             message.recipient = recipient
             message.save()
-
-            # Create notification
-            create_notification(
-                recipient=recipient,
-                sender=request.user,
-                notification_type='message',
-                title='New Message',
-                message=f"You have a new message from {request.user.get_full_name() or request.user.username}",
-                link='/accounts/messages/',
-                content_object=message
-            )
+            _notify_new_message(message)
 
             messages.success(request, 'Your message has been sent!')
             return redirect('accounts:profile', username=username)
@@ -3230,16 +2993,12 @@ def follow_user(request, username):
     if target_user == request.user:
         return JsonResponse({'error': 'Cannot follow yourself'}, status=400)
 
-    # Check if already following
-    connection = UserConnection.objects.filter(
-        follower=request.user,
-        following=target_user,
-        connection_type='follow'
-    ).first()
-
-    if connection:
+    # Toggle on the database, not the cached graph: another worker's
+    # short-lived copy may not have seen this member's last click yet.
+    if UserConnection.objects.filter(
+            follower=request.user, following=target_user, connection_type='follow').exists():
         # Unfollow
-        connection.delete()
+        request.user.unfollow_user(target_user)
         is_following = False
         action = 'unfollowed'
     else:
@@ -3285,103 +3044,46 @@ def follow_user(request, username):
 
 # Update the EnhancedCommunityView class
 class EnhancedCommunityView(LoginRequiredMixin, ListView):
-    """Enhanced community view with follow functionality and online status"""
+    """Enhanced community view with follow functionality and online status.
+
+    Search, ordering, keyset paging and counts live in member_directory.py.
+    """
     model = User
     template_name = 'accounts/enhanced_community.html'
     context_object_name = 'members'
-    paginate_by = 24
 
     def get_queryset(self):
-        queryset = User.objects.filter(
-            is_active=True
-        ).exclude(id=self.request.user.id if self.request.user.is_authenticated else None)
-
-        # Add follow status and connection counts
-        if self.request.user.is_authenticated:
-            following_ids = list(
-                self.request.user.get_following().values_list('id', flat=True))
-
-            from django.db.models import Case, When, Value, BooleanField
-            queryset = queryset.annotate(
-                is_followed=Case(
-                    When(id__in=following_ids, then=Value(True)),
-                    default=Value(False),
-                    output_field=BooleanField()
-                )
-            )
-
-        # Filters
-        connection_filter = self.request.GET.get('filter')
-
-        # NEW: Online filter
-        if connection_filter == 'online':
-            # Show users active in the last 5 minutes
-            five_minutes_ago = timezone.now() - timedelta(minutes=5)
-            queryset = queryset.filter(last_seen__gte=five_minutes_ago)
-        elif connection_filter == 'following' and self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                id__in=self.request.user.get_following())
-        elif connection_filter == 'sponsors':
-            queryset = queryset.filter(is_sponsor=True)
-        elif connection_filter == 'new':
-            queryset = queryset.filter(
-                date_joined__gte=timezone.now() - timedelta(days=30)
-            )
-
-        # Search
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(username__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(profile__bio__icontains=search)
-            )
-
-        # Order by last_seen to show most recently active first
-        return queryset.select_related('profile').order_by('-last_seen', '-date_joined')
+        queryset = member_directory.members(
+            self.request.user,
+            connection_filter=self.request.GET.get('filter'),
+            search=self.request.GET.get('search'),
+        )
+        members, self.next_cursor = member_directory.page(queryset, self.request.GET.get('cursor'))
+        self.viewer_has_pal = member_directory.annotate_page(self.request.user, members)
+        return members
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        # Calculate total members count (all active users, not just paginated)
-        total_members = User.objects.filter(
-            is_active=True
-        ).exclude(id=self.request.user.id if self.request.user.is_authenticated else None).count()
-        context['total_members'] = total_members
-
-        # Calculate online count
-        five_minutes_ago = timezone.now() - timedelta(minutes=5)
-        online_count = User.objects.filter(
-            is_active=True,
-            last_seen__gte=five_minutes_ago
-        ).count()
-
-        context['online_count'] = online_count
-
-        if self.request.user.is_authenticated:
-            user = self.request.user
-
-            # Update user's last_seen
-            user.last_seen = timezone.now()
-            user.save(update_fields=['last_seen'])
-
-            # Get suggested users (excluding followed users)
-            excluded_ids = list(
-                user.get_following().values_list('id', flat=True))
-            excluded_ids.append(user.id)
-
-            suggested_users = User.objects.filter(
-                is_active=True
-            ).exclude(id__in=excluded_ids)[:3]
-
-            context.update({
-                'followers_count': user.followers_count,
-                'following_count': user.following_count,
-                'suggested_users': suggested_users,
-                'mutual_followers': user.get_mutual_followers()[:5],
-            })
-
+        user = self.request.user
+        counts = member_directory.counts()
+
+        # Update user's last_seen
+        user.last_seen = timezone.now()
+        user.save(update_fields=['last_seen'])
+
+        context.update({
+            # The cached total includes the viewer, who isn't listed.
+            'total_members': max(counts['total'] - 1, 0),
+            'online_count': counts['online'],
+            'next_cursor': self.next_cursor,
+            'viewer_has_pal': self.viewer_has_pal,
+            'viewer_has_sponsor': any(m.is_sponsor for m in context['members']) and (
+                user.sponsor_relationships.filter(status='active').exists()),
+            'followers_count': user.followers_count,
+            'following_count': user.following_count,
+            'suggested_users': recommendations.suggestions_for(user, 3),
+            'mutual_followers': user.get_mutual_followers()[:5],
+        })
         return context
 
 
@@ -3394,36 +3096,70 @@ def update_last_seen(request):
     request.user.save(update_fields=['last_seen'])
     return JsonResponse({'status': 'updated', 'timestamp': request.user.last_seen.isoformat()})
 
-class MessageListView(LoginRequiredMixin, ListView):
-    model = SupportMessage
+class MessageListView(LoginRequiredMixin, TemplateView):
+    """Inbox: one row per conversation, newest activity first.
+
+    Listing doesn't mark anything read; opening a thread does.
+    """
     template_name = 'accounts/messages.html'
-    context_object_name = 'user_messages'  # Changed from 'messages' to avoid conflict with Django's messages framework
-    paginate_by = 20
 
-    def get_queryset(self):
-        user = self.request.user
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         filter_type = self.request.GET.get('filter', 'all')
+        threads, next_cursor = messaging.threads(
+            self.request.user,
+            cursor=self.request.GET.get('cursor'),
+            unread_only=filter_type == 'unread',
+        )
+        context.update({
+            'threads': threads,
+            'next_cursor': next_cursor,
+            'filter': filter_type,
+        })
+        return context
 
-        # Base queryset based on filter
-        if filter_type == 'sent':
-            queryset = SupportMessage.objects.filter(sender=user)
-        elif filter_type == 'unread':
-            queryset = SupportMessage.objects.filter(recipient=user, is_read=False)
-        else:
-            queryset = SupportMessage.objects.filter(
-                Q(sender=user) | Q(recipient=user)
-            )
 
-        return queryset.order_by('-created_at')
+@login_required
+def conversation_view(request, conversation_id):
+    """One conversation: a page of messages (older pages by ?before=<id>) and a reply box."""
+    participant = get_object_or_404(
+        ConversationParticipant.objects.select_related(
+            'conversation__user_low', 'conversation__user_high'),
+        conversation_id=conversation_id, user=request.user,
+    )
+    conversation = participant.conversation
+    other_user = conversation.user_high if conversation.user_low_id == request.user.pk else conversation.user_low
 
-    def get(self, request, *args, **kwargs):
-        # Mark messages as read when viewing inbox (not when viewing sent)
-        if request.GET.get('filter') != 'sent':
-            SupportMessage.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).update(is_read=True)
-        return super().get(request, *args, **kwargs)
+    if request.method == 'POST':
+        blocked = _message_limit_redirect(request, other_user)
+        if blocked:
+            return blocked
+        body = request.POST.get('message', '').strip()
+        if body:
+            last_subject = conversation.last_message.subject if conversation.last_message_id else ''
+            if last_subject and not last_subject.startswith('Re: '):
+                last_subject = f'Re: {last_subject}'
+            message = SupportMessage.objects.create(
+                sender=request.user, recipient=other_user,
+                subject=last_subject[:200] or 'Message', message=body,
+            )
+            _notify_new_message(message)
+        return redirect('accounts:conversation', conversation_id=conversation.id)
+
+    try:
+        before = int(request.GET['before']) if request.GET.get('before') else None
+    except ValueError:
+        before = None
+    thread_messages, older_cursor = messaging.thread_page(participant, before=before)
+    if before is None:
+        messaging.mark_read(participant)
+
+    return render(request, 'accounts/conversation.html', {
+        'conversation': conversation,
+        'other_user': other_user,
+        'thread_messages': thread_messages,
+        'older_cursor': older_cursor,
+    })
 
 
 @login_required
@@ -3547,34 +3283,26 @@ def challenge_detail(request, challenge_id):
             return redirect('accounts:challenges_home')
 
     # Get user's participation if any
-    user_participation = None
-    try:
-        user_participation = challenge.participants.get(user=request.user)
-    except ChallengeParticipant.DoesNotExist:
-        pass
+    user_participation = challenge.participants.filter(
+        user=request.user
+    ).select_related('accountability_partner__user').first()
 
-    # Get leaderboard (top participants by completion)
-    leaderboard = challenge.participants.filter(
-        status='active'
-    ).order_by('-days_completed', '-current_streak', '-longest_streak')[:10]
+    # Leaderboard straight off challenge_leaderboard_idx
+    leaderboard = challenge_progress.leaderboard(
+        challenge.id) if challenge.enable_leaderboard else []
 
     # Get recent shared check-ins
     recent_check_ins = ChallengeCheckIn.objects.filter(
         participant__challenge=challenge,
         is_shared_with_group=True
-    ).select_related('participant__user').order_by('-created_at')[:20]
-
-    # Challenge statistics
-    stats = {
-        'total_participants': challenge.participant_count,
-        'completion_rate': challenge.completion_rate,
-        'average_streak': challenge.participants.filter(status='active').aggregate(
-            avg_streak=Avg('current_streak')
-        )['avg_streak'] or 0,
-        'total_check_ins': ChallengeCheckIn.objects.filter(
-            participant__challenge=challenge
-        ).count(),
-    }
+    ).select_related('participant__user').prefetch_related(
+        'comments__user'
+    ).annotate(
+        encouragement_total=Count('encouragement_received', distinct=True)
+    ).order_by('-created_at')[:20]
+
+    # Challenge statistics, cached until the next check-in or roster change
+    stats = challenge_progress.stats(challenge.id)
 
     context = {
         'challenge': challenge,
@@ -3754,38 +3482,34 @@ def challenge_check_in(request, challenge_id):
 def my_challenges(request):
     """User's challenge dashboard"""
 
+    participations = request.user.challenge_participations.select_related('challenge')
+
     # Get user's active participations
-    active_participations = request.user.challenge_participations.filter(
-        status='active'
-    ).select_related('challenge').order_by('-joined_date')
+    active_participations = list(
+        participations.filter(status='active').order_by('-joined_date'))
 
     # Get completed participations
-    completed_participations = request.user.challenge_participations.filter(
-        status='completed'
-    ).select_related('challenge').order_by('-completion_date')
+    completed_participations = participations.filter(
+        status='completed').order_by('-completion_date')
 
-    # Get today's check-ins needed
+    # Today's check-ins needed, from each participation's last check-in date
     today = timezone.now().date()
-    todays_check_ins = []
-
-    for participation in active_participations:
-        check_in_today = ChallengeCheckIn.objects.filter(
-            participant=participation, date=today
-        ).first()
-        todays_check_ins.append({
-            'participation': participation,
-            'check_in': check_in_today,
-            'needs_check_in': not check_in_today and participation.challenge.enable_daily_check_in
-        })
+    pending_checkins = [
+        participation for participation in active_participations
+        if participation.challenge.enable_daily_check_in
+        and participation.last_check_in_date != today
+    ]
 
     # Get user's badges
     user_badges = request.user.challenge_badges.select_related(
         'badge').order_by('-earned_date')
 
-    # Calculate total stats
-    total_challenges_completed = completed_participations.count()
-    total_days_participated = sum(p.days_completed for p in active_participations) + \
-        sum(p.days_completed for p in completed_participations)
+    # Calculate total stats from the maintained counters
+    totals = request.user.challenge_participations.aggregate(
+        completed=Count('id', filter=Q(status='completed')),
+        days=Sum('days_completed', filter=Q(status__in=['active', 'completed'])),
+        check_ins=Sum('check_in_count'),
+    )
     current_streaks = [
         p.current_streak for p in active_participations if p.current_streak > 0]
     longest_current_streak = max(current_streaks) if current_streaks else 0
@@ -3794,11 +3518,12 @@ def my_challenges(request):
         'active_participations': active_participations,
         # Show recent 5
         'completed_participations': completed_participations[:5],
-        'todays_check_ins': todays_check_ins,
+        'pending_checkins': pending_checkins,
         'user_badges': user_badges[:10],  # Show recent 10
         'stats': {
-            'total_challenges_completed': total_challenges_completed,
-            'total_days_participated': total_days_participated,
+            'total_challenges_completed': totals['completed'],
+            'total_days_participated': totals['days'] or 0,
+            'total_checkins': totals['check_ins'] or 0,
             'longest_current_streak': longest_current_streak,
             'badges_earned': user_badges.count(),
         }
@@ -3943,39 +3668,14 @@ def leave_challenge(request, challenge_id):
 
 @login_required
 def notifications_api(request):
-    """API endpoint to get user's notifications"""
-    notifications = request.user.notifications.all()[:20]
+    """API endpoint to get user's notifications, personal and broadcast"""
+    from apps.accounts.notification_service import MergedNotifications, serialize_notification
 
     # Filter by read status if requested
     filter_unread = request.GET.get('unread_only', 'false').lower() == 'true'
-    if filter_unread:
-        notifications = notifications.filter(is_read=False)
-
-    # Prepare notification data
-    notification_data = []
-    for notif in notifications:
-        time_diff = timezone.now() - notif.created_at
-        if time_diff.days > 0:
-            time_ago = f"{time_diff.days}d ago"
-        elif time_diff.seconds > 3600:
-            time_ago = f"{time_diff.seconds // 3600}h ago"
-        elif time_diff.seconds > 60:
-            time_ago = f"{time_diff.seconds // 60}m ago"
-        else:
-            time_ago = "Just now"
-
-        notification_data.append({
-            'id': notif.id,
-            'type': notif.notification_type,
-            'title': notif.title,
-            'message': notif.message,
-            'link': notif.link,
-            'is_read': notif.is_read,
-            'time_ago': time_ago,
-            'icon': notif.get_icon(),
-            'sender_name': notif.sender.get_full_name() or notif.sender.username if notif.sender else None,
-            'sender_avatar': notif.sender.avatar.url if notif.sender and notif.sender.avatar else None,
-        })
+    notifications = MergedNotifications(request.user, unread_only=filter_unread)[:20]
+
+    notification_data = [serialize_notification(notif) for notif in notifications]
 
     return JsonResponse({'notifications': notification_data})
 
@@ -3983,18 +3683,31 @@ def notifications_api(request):
 @login_required
 def unread_count_api(request):
     """API endpoint to get unread notification count"""
-    count = request.user.notifications.filter(is_read=False).count()
-    return JsonResponse({'count': count})
+    from apps.accounts.notification_service import unread_count
+    return JsonResponse({'count': unread_count(request.user)})
 
 
 @login_required
 @require_POST
 def mark_notification_read(request, notification_id):
     """Mark a single notification as read"""
+    from apps.accounts.notification_service import adjust_unread
     notification = get_object_or_404(
         Notification, id=notification_id, recipient=request.user
     )
-    notification.mark_as_read()
+    if not notification.is_read:
+        notification.mark_as_read()
+        adjust_unread(request.user.pk, -1)
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_POST
+def mark_broadcast_read(request, broadcast_id):
+    """Mark a single broadcast notification as read for this user"""
+    from apps.accounts.notification_service import mark_read, visible_broadcasts
+    broadcast = get_object_or_404(visible_broadcasts(request.user), id=broadcast_id)
+    mark_read(request.user, [broadcast])
     return JsonResponse({'success': True})
 
 
@@ -4002,9 +3715,8 @@ def mark_notification_read(request, notification_id):
 @require_POST
 def mark_all_notifications_read(request):
     """Mark all user's notifications as read"""
-    request.user.notifications.filter(is_read=False).update(
-        is_read=True, read_at=timezone.now()
-    )
+    from apps.accounts.notification_service import mark_all_read
+    mark_all_read(request.user)
     return JsonResponse({'success': True})
 
 
@@ -4091,23 +3803,24 @@ def unregister_device_token(request):
 @login_required
 def notifications_page(request):
     """Full page view of all notifications"""
-    notifications = request.user.notifications.all()
+    from apps.accounts.notification_service import MergedNotifications, mark_read, unread_count
 
-    # Pagination
-    paginator = Paginator(notifications, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: ?after=<cursor> from the previous page's last item.
+    # No COUNT, and page 50 costs the same as page 1.
+    try:
+        notifications, next_cursor = MergedNotifications(request.user).page(
+            after=request.GET.get('after'), size=20)
+    except ValueError:
+        return redirect('accounts:notifications')
 
     # Mark viewed notifications as read
-    notification_ids = [n.id for n in page_obj if not n.is_read]
-    if notification_ids:
-        Notification.objects.filter(
-            id__in=notification_ids[:10]  # Mark first 10 as read
-        ).update(is_read=True, read_at=timezone.now())
+    mark_read(request.user, [n for n in notifications if not n.is_read][:10])  # Mark first 10 as read
 
     context = {
-        'page_obj': page_obj,
-        'unread_count': request.user.notifications.filter(is_read=False).count(),
+        'notifications': notifications,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+        'unread_count': unread_count(request.user),
     }
     return render(request, 'accounts/notifications.html', context)
 
@@ -4164,9 +3877,11 @@ def social_feed_view(request):
         following_posts = []  # Posts from users they follow
 
         if user.is_authenticated:
-            following_ids = set(user.get_following().values_list('id', flat=True))
+            following_ids = social_graph.following_ids(user.id)
+            connected_ids = following_ids | social_graph.follower_ids(user.id)
         else:
             following_ids = set()
+            connected_ids = set()
 
         # Mood tag styling for posts linked to a check-in (feed mood pill)
         mood_tags = {
@@ -4179,7 +3894,7 @@ def social_feed_view(request):
         }
 
         for post in posts:
-            if post.is_visible_to(user if user.is_authenticated else None):
+            if post.is_visible_to(user if user.is_authenticated else None, connected_ids):
                 # Single pass over prefetched reactions (cache list once)
                 reactions_list = list(post.reactions.all())
                 post.reaction_count = len(reactions_list)
@@ -4272,36 +3987,7 @@ def social_feed_view(request):
             has_sparse_feed = len(following_posts) < 5
 
             if is_new_user or has_sparse_feed:
-                # Get suggested users to follow
-                from django.db.models import Count, Q
-
-                # First try users who have posted
-                suggested_users = User.objects.filter(
-                    is_active=True,
-                    is_profile_public=True
-                ).exclude(
-                    id=user.id
-                ).exclude(
-                    id__in=following_ids
-                ).annotate(
-                    annotated_followers=Count('follower_connections', filter=Q(follower_connections__connection_type='follow')),
-                    posts_count=Count('social_posts')
-                ).filter(
-                    posts_count__gt=0  # Only suggest users who have posted
-                ).order_by('-annotated_followers', '-posts_count')[:6]
-
-                # Fallback: if no users have posted, get any active users
-                if not suggested_users.exists():
-                    suggested_users = User.objects.filter(
-                        is_active=True,
-                        is_profile_public=True
-                    ).exclude(
-                        id=user.id
-                    ).exclude(
-                        id__in=following_ids
-                    ).order_by('-date_joined')[:6]
-
-                context['suggested_users'] = suggested_users
+                context['suggested_users'] = recommendations.suggestions_for(user, 6)
                 context['show_suggestions'] = True
                 context['is_new_user'] = is_new_user
                 context['following_count'] = len(following_ids)
@@ -4346,7 +4032,8 @@ def social_feed_posts_api(request):
             ).order_by('-created_at')
 
             # Filter posts based on visibility
-            visible_posts = [post for post in posts if post.is_visible_to(user)]
+            connected_ids = user.get_connected_ids()
+            visible_posts = [post for post in posts if post.is_visible_to(user, connected_ids)]
         else:
             # For unauthenticated users, only show public posts
             visible_posts = list(SocialPost.objects.select_related('author', 'author__subscription', 'linked_checkin').prefetch_related(
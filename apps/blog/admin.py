@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
+from . import post_cache
 from .models import Category, Tag, Post, Comment
 
 @admin.register(Category)
@@ -75,9 +77,21 @@ class CommentAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content Preview'
     
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
+        self._set_approved(queryset, True)
     approve_comments.short_description = 'Approve selected comments'
     
     def disapprove_comments(self, request, queryset):
-        queryset.update(is_approved=False)
-    disapprove_comments.short_description = 'Disapprove selected comments'
\ No newline at end of file
+        self._set_approved(queryset, False)
+    disapprove_comments.short_description = 'Disapprove selected comments'
+
+    def _set_approved(self, queryset, approved):
+        # Read the posts first: a changelist filtered on is_approved no
+        # longer matches them after the update.
+        posts = set(queryset.values_list('post_id', 'post__slug'))
+        queryset.update(is_approved=approved)
+        # update() skips the Comment signals that normally do this.
+        # After commit, as in blog/signals.py.
+        def invalidate():
+            for post_id, slug in posts:
+                post_cache.comments_changed(post_id, slug)
+        transaction.on_commit(invalidate)
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def backfill_notified_at(apps, schema_editor):
+    """Treat already-published posts as announced.
+
+    Their broadcasts may already have been pruned; without this the next
+    save of an old post would announce it to every member again.
+    """
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        status='published',
+        published_at__isnull=False,
+        notified_at__isnull=True,
+    ).update(notified_at=models.F('published_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_fix_empty_slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_notified_at, migrations.RunPython.noop),
+    ]
@@ -87,6 +87,10 @@ class Post(models.Model):
     # survive Redis outages longer than the kombu retry window.
     push_fanout_completed_at = models.DateTimeField(null=True, blank=True)
 
+    # Set when the "New Blog Post" broadcast is created, so later saves
+    # don't announce the post again once retention has pruned the broadcast.
+    notified_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ['-published_at', '-created_at']
 
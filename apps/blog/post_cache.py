@@ -0,0 +1,100 @@
+"""
+Cached pieces of the blog post page.
+
+PostDetailView used to re-render the whole article and re-run the tag,
+related-post, related-resource and comment queries on every view, though
+posts rarely change once published. Now:
+
+- The article body is a {% cache %} fragment keyed by post_version()
+  (post.updated_at); tags, related posts and related resources come from
+  related(), cached under the same version.
+- Approved comments come from comments(), keyed by the post's comment
+  version: a token replaced with a fresh one whenever a comment is added,
+  edited, removed or moderated (after the change commits).
+- Anonymous crawlers get a whole rendered page from cached_page(), which
+  the Post/Comment signals delete (page_changed).
+
+Versioned keys are never overwritten, only abandoned, and are moved only
+once the change has committed, so an edit can't race a render into
+caching stale HTML; the old entries expire on their own.
+Related posts/resources pick up the nightly similarity rebuild
+(resources/similarity.py) when their entry expires.
+"""
+import time
+
+from django.core.cache import cache
+
+FRAGMENT_SECONDS = 6 * 60 * 60
+PAGE_SECONDS = 15 * 60
+RELATED_POSTS = 3
+RELATED_RESOURCES = 3
+
+RELATED_KEY = 'blog:post:{post_id}:related:{version}'
+COMMENTS_KEY = 'blog:post:{post_id}:comments:{version}'
+COMMENTS_VERSION_KEY = 'blog:post:{post_id}:comments-version'
+PAGE_KEY = 'blog:page:{slug}'
+
+
+def post_version(post):
+    return str(int(post.updated_at.timestamp() * 1_000_000))
+
+
+def comments_version(post_id):
+    key = COMMENTS_VERSION_KEY.format(post_id=post_id)
+    version = cache.get(key)
+    if version is None:
+        # Evicted or never set: a fresh token, so no older entry can match.
+        version = f'{time.time_ns()}'
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def related(post):
+    """{'post_tags', 'related_posts', 'related_resources'} for the page."""
+    from resources.related_content import related_posts_for_post, related_resources_for_post
+
+    key = RELATED_KEY.format(post_id=post.pk, version=post_version(post))
+    data = cache.get(key)
+    if data is None:
+        data = {
+            'post_tags': list(post.tags.all()),
+            'related_posts': list(related_posts_for_post(post, limit=RELATED_POSTS)),
+            'related_resources': list(related_resources_for_post(post, limit=RELATED_RESOURCES)),
+        }
+        cache.set(key, data, FRAGMENT_SECONDS)
+    return data
+
+
+def comments(post):
+    """Approved top-level comments, oldest first."""
+    key = COMMENTS_KEY.format(post_id=post.pk, version=comments_version(post.pk))
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(post.comments.filter(is_approved=True, parent=None).select_related('author'))
+        cache.set(key, rows, FRAGMENT_SECONDS)
+    return rows
+
+
+# ---- Crawler pages ----
+
+def cached_page(slug):
+    return cache.get(PAGE_KEY.format(slug=slug))
+
+
+def store_page(slug, response):
+    if response.status_code == 200:
+        cache.set(PAGE_KEY.format(slug=slug), response.content, PAGE_SECONDS)
+
+
+# ---- Invalidation (signals.py) ----
+
+def page_changed(slug):
+    cache.delete(PAGE_KEY.format(slug=slug))
+
+
+def comments_changed(post_id, slug=None):
+    # Any fresh token works; it only has to differ from the last one.
+    cache.set(COMMENTS_VERSION_KEY.format(post_id=post_id), f'{time.time_ns()}', None)
+    if slug:
+        page_changed(slug)
@@ -1,7 +1,9 @@
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import Post
+from django.utils import timezone
+from . import post_cache
+from .models import Comment, Post
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +11,11 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Post)
 def notify_users_on_blog_publish(sender, instance, created, **kwargs):
-    """Create in-app notifications for all active users when a blog post is published."""
+    """Broadcast an in-app notification to all members when a blog post is published.
+
+    One BroadcastNotification row per post, whatever the member count; read
+    state is tracked per user by apps.accounts.notification_service.
+    """
     if instance.status != 'published':
         return
 
@@ -19,59 +25,44 @@ def notify_users_on_blog_publish(sender, instance, created, **kwargs):
     if update_fields is not None and 'status' not in update_fields:
         return
 
-    # For existing posts being re-saved while already published, skip
-    if not created:
-        # Check if this is a status change by looking for existing notifications
-        from apps.accounts.models import Notification
-        from django.contrib.contenttypes.models import ContentType
-        ct = ContentType.objects.get_for_model(Post)
-        already_notified = Notification.objects.filter(
-            notification_type='new_blog_post',
-            content_type=ct,
-            object_id=instance.pk,
-        ).exists()
-        if already_notified:
-            return
-
-    # Bulk-create notifications for all active users
-    from apps.accounts.models import User, Notification
+    # Claim the announcement. Post.notified_at outlives the broadcast row,
+    # which notification retention deletes after a few months.
+    notified_at = timezone.now()
+    if not Post.objects.filter(pk=instance.pk, notified_at__isnull=True).update(notified_at=notified_at):
+        return
+    # Later full saves of this instance must not write the old NULL back.
+    instance.notified_at = notified_at
+
+    from apps.accounts.models import BroadcastNotification
+    from apps.accounts.notification_service import broadcast_created
     from django.contrib.contenttypes.models import ContentType
 
     ct = ContentType.objects.get_for_model(Post)
-    active_users = User.objects.filter(is_active=True).exclude(pk=instance.author_id)
 
     excerpt = instance.excerpt or instance.title
     if len(excerpt) > 120:
         excerpt = excerpt[:117] + '...'
 
-    notifications = [
-        Notification(
-            recipient=user,
-            sender=instance.author,
-            notification_type='new_blog_post',
-            title='New Blog Post',
-            message=f'"{instance.title}" — {excerpt}',
-            link=instance.get_absolute_url(),
-            content_type=ct,
-            object_id=instance.pk,
-        )
-        for user in active_users
-    ]
+    broadcast = BroadcastNotification.objects.create(
+        sender=instance.author,
+        notification_type='new_blog_post',
+        title='New Blog Post',
+        message=f'"{instance.title}" — {excerpt}',
+        link=instance.get_absolute_url(),
+        content_type=ct,
+        object_id=instance.pk,
+    )
+    logger.info(f"Broadcast notification created for blog post: {instance.title}")
+    transaction.on_commit(lambda: broadcast_created(broadcast))
 
-    if notifications:
-        Notification.objects.bulk_create(notifications)
-        logger.info(
-            f"Created {len(notifications)} notifications for blog post: {instance.title}"
-        )
-
-        # bulk_create bypasses post_save, so fan out push notifications via Celery
-        # to keep the publish request fast. Defer the enqueue until after the
-        # surrounding transaction commits so we never publish a task for a post
-        # that could still roll back. The kombu retry policy covers brief Redis
-        # blips; longer outages are reconciled by the
-        # `retry_stuck_blog_push_fanouts` beat task every 15 minutes.
-        post_id = instance.pk
-        transaction.on_commit(lambda: _enqueue_blog_push_fanout(post_id))
+    # Fan out push notifications via Celery to keep the publish request
+    # fast. Defer the enqueue until after the surrounding transaction
+    # commits so we never publish a task for a post that could still roll
+    # back. The kombu retry policy covers brief Redis blips; longer outages
+    # are reconciled by the `retry_stuck_blog_push_fanouts` beat task every
+    # 15 minutes.
+    post_id = instance.pk
+    transaction.on_commit(lambda: _enqueue_blog_push_fanout(post_id))
 
 
 def _enqueue_blog_push_fanout(post_id):
@@ -96,3 +87,43 @@ def _enqueue_blog_push_fanout(post_id):
             f"immediate recovery: python manage.py retry_blog_push_fanout "
             f"{post_id}"
         )
+
+
+# Post page caches (post_cache.py). Body and related fragments are keyed by
+# updated_at, so only the crawler page and the comment version need a push.
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_page(sender, instance, **kwargs):
+    # After commit, so a render in between can't re-store the old page.
+    slug = instance.slug
+    transaction.on_commit(lambda: post_cache.page_changed(slug))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # From the Tag side pk_set holds post ids (None for tag.posts.clear(),
+    # which the fragments then pick up when they expire).
+    post_ids = (pk_set or ()) if reverse else [instance.pk]
+    posts = Post.objects.filter(pk__in=post_ids)
+    slugs = list(posts.values_list('slug', flat=True))
+    # Moving updated_at re-keys the cached body and tag list.
+    posts.update(updated_at=timezone.now())
+    transaction.on_commit(lambda: _pages_changed(slugs))
+
+
+def _pages_changed(slugs):
+    for slug in slugs:
+        post_cache.page_changed(slug)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_comments(sender, instance, **kwargs):
+    post_id = instance.post_id
+    slug = Post.objects.filter(pk=post_id).values_list('slug', flat=True).first()
+    # After commit: a render between a new token and the commit would
+    # cache the old comments under it (see post_cache).
+    transaction.on_commit(lambda: post_cache.comments_changed(post_id, slug))
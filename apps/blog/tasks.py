@@ -16,9 +16,9 @@ logger = logging.getLogger(__name__)
 def fanout_blog_push_notifications(self, post_id):
     """Send iOS/Android/web push notifications for a newly published blog post.
 
-    In-app Notification records are created synchronously in the post_save
-    signal via bulk_create. This task handles the slow fan-out to APNs/FCM
-    so the publish request returns immediately.
+    The in-app notification is a single BroadcastNotification created in the
+    post_save signal. This task handles the slow fan-out to APNs/FCM so the
+    publish request returns immediately.
 
     Idempotent: skips if `push_fanout_completed_at` is already set. This
     protects against duplicate pushes when the beat reconciliation task races
@@ -242,3 +242,23 @@ def send_daily_blog_digest():
     logger.info(
         f"send_daily_blog_digest: sent={sent} failed={failed} posts={len(posts)}"
     )
+
+
+@shared_task(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    retry_jitter=True,
+    max_retries=5,
+)
+def rebuild_content_neighbours():
+    """Re-rank related posts and resources by text similarity.
+
+    Replaces the whole ContentNeighbour table (resources/similarity.py).
+    Runs daily at 3:15 AM UTC.
+    """
+    from resources.similarity import rebuild
+
+    written = rebuild()
+    logger.info(f"rebuild_content_neighbours: neighbours={written}")
+    return written
@@ -0,0 +1,122 @@
+"""Blog post page caching: versioned fragments and the crawler page cache."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.blog import post_cache
+from apps.blog.models import Category, Comment, Post, Tag
+from recovery_hub import event_buffer
+
+User = get_user_model()
+
+CRAWLER = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class PostCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        event_buffer._local.clear()
+        self.author = User.objects.create_user(username='author', email='a@example.com', password='x')
+        self.category = Category.objects.create(name='Daily Living')
+        self.post = Post.objects.create(
+            title='Day one', author=self.author, content='<p>First body</p>',
+            category=self.category, status='published')
+        Post.objects.create(
+            title='Day two', author=self.author, content='x', category=self.category, status='published')
+        self.url = reverse('blog:post_detail', args=[self.post.slug])
+
+    def tables(self, queries):
+        return {table for q in queries for table in ('blog_tag', 'blog_comment', 'resources_resource')
+                if table in q['sql']}
+
+    def test_warm_page_skips_fragment_queries(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'First body')
+        self.assertEqual([p.title for p in response.context['related_posts']], ['Day two'])
+        self.assertEqual(self.tables(queries), set())
+
+    def test_edits_tags_and_comments_show_up(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.content = '<p>Edited body</p>'
+            self.post.save()
+            self.post.tags.add(Tag.objects.create(name='Hope', slug='hope'))
+            Comment.objects.create(post=self.post, author=self.author, content='Welcome!')
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Edited body')
+        self.assertNotContains(response, 'First body')
+        self.assertContains(response, reverse('blog:tag_posts', args=['hope']))
+        self.assertContains(response, 'Welcome!')
+
+        Comment.objects.filter(post=self.post).update(is_approved=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.get(post=self.post).save()
+        self.assertNotContains(self.client.get(self.url), 'Welcome!')
+
+    def test_crawlers_get_cached_page_until_post_changes(self):
+        self.client.get(self.url, HTTP_USER_AGENT=CRAWLER)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_USER_AGENT=CRAWLER)
+        self.assertContains(response, 'First body')
+        self.assertFalse(any('blog_post' in q['sql'] for q in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.content = '<p>Edited body</p>'
+            self.post.save()
+        self.assertContains(self.client.get(self.url, HTTP_USER_AGENT=CRAWLER), 'Edited body')
+
+    def test_members_never_get_the_crawler_page(self):
+        self.client.get(self.url, HTTP_USER_AGENT=CRAWLER)
+        self.client.force_login(self.author)
+        response = self.client.get(self.url, HTTP_USER_AGENT=CRAWLER)
+        self.assertContains(response, reverse('blog:post_edit', args=[self.post.slug]))
+
+    def test_admin_moderation_actions_refresh_comments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(post=self.post, author=self.author, content='Welcome!')
+        self.assertContains(self.client.get(self.url), 'Welcome!')
+        self.assertContains(self.client.get(self.url, HTTP_USER_AGENT=CRAWLER), 'Welcome!')
+
+        admin = User.objects.create_superuser(username='mod', email='mod@example.com', password='x')
+        changelist = reverse('admin:blog_comment_changelist')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(changelist, {'action': 'disapprove_comments', '_selected_action': [comment.pk]})
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.url), 'Welcome!')
+        self.assertNotContains(self.client.get(self.url, HTTP_USER_AGENT=CRAWLER), 'Welcome!')
+
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(changelist + '?is_approved__exact=0',
+                             {'action': 'approve_comments', '_selected_action': [comment.pk]})
+        self.client.logout()
+        self.assertContains(self.client.get(self.url), 'Welcome!')
+
+    def test_comment_version_moves_only_after_commit(self):
+        self.client.get(self.url)
+        version = post_cache.comments_version(self.post.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(post=self.post, author=self.author, content='Welcome!')
+        # A render before the commit still caches under the old version.
+        self.assertEqual(post_cache.comments_version(self.post.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(post_cache.comments_version(self.post.pk), version)
+        self.assertContains(self.client.get(self.url), 'Welcome!')
+
+    def test_evicted_comment_version_never_matches_an_old_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content='Welcome!')
+        self.assertContains(self.client.get(self.url), 'Welcome!')
+        # Hidden without signals, then the version key is evicted.
+        Comment.objects.filter(post=self.post).update(is_approved=False)
+        cache.delete(post_cache.COMMENTS_VERSION_KEY.format(post_id=self.post.pk))
+        self.assertNotContains(self.client.get(self.url), 'Welcome!')
@@ -4,13 +4,15 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.db.models import Q, F, Count
+from django.db.models import Q, Count
 from django.urls import reverse_lazy
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
 from django.core.cache import cache
 from django.core.management import call_command
 from io import StringIO
+from recovery_hub import content_events
+from . import post_cache
 from .models import Post, Category, Tag, Comment
 from .forms import CommentForm, PostForm
 
@@ -71,12 +73,15 @@ class PostListView(ListView):
 
 
 class PostDetailView(DetailView):
+    """A published post. The body, tags, related content and comments come
+    from post_cache; anonymous crawlers are served a cached page.
+    """
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
 
     def get_queryset(self):
-        return Post.objects.filter(status='published')
+        return Post.objects.filter(status='published').select_related('author', 'category')
 
     BOT_PATTERNS = (
         'bot', 'crawl', 'spider', 'slurp', 'facebookexternalhit',
@@ -90,34 +95,40 @@ class PostDetailView(DetailView):
         ua = (self.request.META.get('HTTP_USER_AGENT') or '').lower()
         return any(p in ua for p in self.BOT_PATTERNS)
 
+    def get(self, request, *args, **kwargs):
+        slug = kwargs.get(self.slug_url_kwarg)
+        crawler = not request.user.is_authenticated and self._is_bot()
+        if crawler:
+            page = post_cache.cached_page(slug)
+            if page is not None:
+                return HttpResponse(page)
+        response = super().get(request, *args, **kwargs)
+        if crawler:
+            response.add_post_render_callback(lambda r: post_cache.store_page(slug, r))
+        return response
+
     def get_object(self):
         obj = super().get_object()
-        # Increment view count once per session per post, skip bots
-        if not self._is_bot():
-            viewed_key = f'viewed_post_{obj.pk}'
-            if not self.request.session.get(viewed_key):
-                Post.objects.filter(pk=obj.pk).update(views=F('views') + 1)
-                self.request.session[viewed_key] = True
+        # Count the view once per session per post, skip bots. The
+        # increment is buffered and applied by flush_content_events.
+        if not self._is_bot() and content_events.first_view(self.request, obj):
+            content_events.count(obj, 'views')
         return obj
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         post = self.object
 
-        # Get approved comments
-        context['comments'] = post.comments.filter(
-            is_approved=True, parent=None
-        ).select_related('author')
+        # Tags, related posts and topically related resources (blog ->
+        # resources cross-links), cached per post version
+        context.update(post_cache.related(post))
 
-        # Get related posts
-        context['related_posts'] = Post.objects.filter(
-            status='published',
-            category=post.category
-        ).exclude(pk=post.pk)[:3]
+        # Get approved comments
+        context['comments'] = post_cache.comments(post)
 
-        # Topically related resources (cross-link blog -> resources)
-        from resources.related_content import related_resources_for_post
-        context['related_resources'] = related_resources_for_post(post, limit=3)
+        # Keys the cached article body fragment in the template
+        context['post_version'] = post_cache.post_version(post)
+        context['fragment_seconds'] = post_cache.FRAGMENT_SECONDS
 
         # Comment form
         context['comment_form'] = CommentForm()
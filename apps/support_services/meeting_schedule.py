@@ -0,0 +1,117 @@
+"""UTC schedule index for weekly meetings.
+
+Meetings store day + time in their home IANA timezone. Asking "what starts
+in the next N minutes" against those columns needs one query per zone plus
+Python-side date math. Instead every meeting carries utc_minute_of_week:
+minutes from Sunday 00:00 UTC (the Meeting model's 0=Sunday scheme) to its
+next occurrence, so the question becomes one indexed range query, split in
+two only when the window wraps past Saturday midnight UTC.
+
+The value depends on the UTC offset in effect at the next occurrence, so it
+goes stale when a zone changes offset. Meeting.save() keeps it current for
+edits; refresh_meeting_schedule_task re-derives it hourly for meetings in
+zones with a DST transition within TRANSITION_MARGIN of now. Outside those
+weeks nothing needs touching.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.db.models import Q
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# A weekly value computed before a transition can be wrong for up to a week
+# after it, so zones are refreshed for a week (plus slack) on either side.
+TRANSITION_MARGIN = timedelta(days=8)
+
+
+def _zone(tz_name):
+    try:
+        return ZoneInfo(tz_name)
+    except Exception:
+        return None
+
+
+def week_minute(moment):
+    """Minute of the UTC week (Sunday 00:00 = 0) for an aware datetime."""
+    moment = moment.astimezone(dt_timezone.utc)
+    day = (moment.weekday() + 1) % 7
+    return day * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def next_occurrence(day, time, tz_name, at):
+    """Aware local datetime of the next day/time occurrence at or after `at`.
+
+    None for an unscheduled meeting or an unknown timezone.
+    """
+    tz = _zone(tz_name)
+    if day is None or time is None or tz is None:
+        return None
+    local_now = at.astimezone(tz)
+    today = (local_now.weekday() + 1) % 7
+    date = local_now.date() + timedelta(days=(day - today) % 7)
+    occurrence = datetime.combine(date, time, tzinfo=tz)
+    if occurrence < local_now:
+        occurrence = datetime.combine(date + timedelta(days=7), time, tzinfo=tz)
+    return occurrence
+
+
+def utc_minute_of_week(day, time, tz_name, at=None):
+    occurrence = next_occurrence(day, time, tz_name, at or datetime.now(dt_timezone.utc))
+    return week_minute(occurrence) if occurrence is not None else None
+
+
+def window_q(start, minutes, field='utc_minute_of_week'):
+    """Q for week minutes in [start, start + minutes], wrapping at week end.
+
+    `start` may run past the end of the week (e.g. week_minute(now) + 20).
+    """
+    start %= MINUTES_PER_WEEK
+    end = start + minutes
+    if end < MINUTES_PER_WEEK:
+        return Q(**{f'{field}__gte': start, f'{field}__lte': end})
+    return Q(**{f'{field}__gte': start}) | Q(**{f'{field}__lte': end - MINUTES_PER_WEEK})
+
+
+def minutes_until(week_minute_value, now):
+    """Whole minutes from `now` until a meeting at `week_minute_value`."""
+    now = now.astimezone(dt_timezone.utc)
+    ahead = (week_minute_value - week_minute(now)) % MINUTES_PER_WEEK
+    seconds = ahead * 60 - now.second - now.microsecond / 1_000_000
+    return max(0, int(seconds // 60))
+
+
+def near_transition(tz_name, at):
+    """True if `tz_name` changes UTC offset within TRANSITION_MARGIN of `at`."""
+    tz = _zone(tz_name)
+    if tz is None:
+        return False
+    return (at - TRANSITION_MARGIN).astimezone(tz).utcoffset() != \
+        (at + TRANSITION_MARGIN).astimezone(tz).utcoffset()
+
+
+def refresh_utc_schedule(queryset=None, at=None, only_near_transitions=False):
+    """Recompute utc_minute_of_week; returns the number of meetings changed.
+
+    With only_near_transitions, zones whose offset is stable around `at`
+    are skipped entirely, which is every zone for most of the year.
+    """
+    from apps.support_services.models import Meeting
+
+    at = at or datetime.now(dt_timezone.utc)
+    meetings = queryset if queryset is not None else Meeting.objects.all()
+    if only_near_transitions:
+        zones = [
+            tz_name for tz_name in meetings.values_list('timezone', flat=True).distinct()
+            if near_transition(tz_name, at)
+        ]
+        meetings = meetings.filter(timezone__in=zones)
+
+    changed = []
+    for meeting in meetings.only('id', 'day', 'time', 'timezone', 'utc_minute_of_week').iterator():
+        value = utc_minute_of_week(meeting.day, meeting.time, meeting.timezone, at)
+        if value != meeting.utc_minute_of_week:
+            meeting.utc_minute_of_week = value
+            changed.append(meeting)
+    Meeting.objects.bulk_update(changed, ['utc_minute_of_week'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.10 on 2026-10-19 05:16
+
+from django.db import migrations, models
+
+
+def backfill_utc_minute_of_week(apps, schema_editor):
+    from apps.support_services.meeting_schedule import utc_minute_of_week
+
+    Meeting = apps.get_model('support_services', 'Meeting')
+    meetings = list(Meeting.objects.only('id', 'day', 'time', 'timezone'))
+    for meeting in meetings:
+        meeting.utc_minute_of_week = utc_minute_of_week(meeting.day, meeting.time, meeting.timezone)
+    Meeting.objects.bulk_update(meetings, ['utc_minute_of_week'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support_services', '0002_add_meeting_reminder_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='utc_minute_of_week',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_utc_minute_of_week, migrations.RunPython.noop),
+    ]
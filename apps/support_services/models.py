@@ -94,6 +94,9 @@ class Meeting(models.Model):
     time = models.TimeField(null=True, blank=True)
     end_time = models.TimeField(null=True, blank=True)
     timezone = models.CharField(max_length=50, default='America/Chicago')
+    # Next occurrence as minutes from Sunday 00:00 UTC; see meeting_schedule.
+    utc_minute_of_week = models.PositiveSmallIntegerField(
+        null=True, blank=True, editable=False, db_index=True)
 
     # Location fields
     location = models.CharField(max_length=255, blank=True)
@@ -174,6 +177,15 @@ class Meeting(models.Model):
             '%I:%M %p') if self.time else 'No time set'
         return f"{self.name} - {day_display} {time_display}"
 
+    def save(self, *args, **kwargs):
+        from apps.support_services.meeting_schedule import utc_minute_of_week
+
+        self.utc_minute_of_week = utc_minute_of_week(self.day, self.time, self.timezone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'day', 'time', 'timezone'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'utc_minute_of_week'}
+        super().save(*args, **kwargs)
+
     def to_meeting_guide_format(self):
         """Convert to Meeting Guide API format"""
         data = {
@@ -4,11 +4,15 @@
 Weekly online-meeting sync: refresh_online_meetings_task (Mondays, 4am UTC).
 Re-imports every configured TSML feed so conference links stay current and
 deactivates meetings that vanished from their source feed.
+
+Meeting schedule index: refresh_meeting_schedule_task (hourly). Re-derives
+utc_minute_of_week for meetings in zones near a DST transition.
 """
 import logging
 
 from celery import shared_task
 
+from apps.support_services.meeting_schedule import refresh_utc_schedule
 from apps.support_services.meeting_sync import sync_all
 
 logger = logging.getLogger(__name__)
@@ -29,3 +33,16 @@ def refresh_online_meetings_task(self):
     """
     results = sync_all()
     logger.info('Online meetings sync complete: %s', results)
+
+
+@shared_task
+def refresh_meeting_schedule_task():
+    """Keep utc_minute_of_week right across DST transitions.
+
+    Zones with no offset change within a week of now are skipped, so this
+    is a single DISTINCT query for most of the year.
+    """
+    changed = refresh_utc_schedule(only_near_transitions=True)
+    if changed:
+        logger.info('Meeting schedule index: %s meetings moved', changed)
+    return changed
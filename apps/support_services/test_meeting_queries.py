@@ -11,6 +11,7 @@ from zoneinfo import ZoneInfo
 from django.test import TestCase
 
 from apps.support_services.meeting_queries import starting_soon
+from apps.support_services.meeting_schedule import refresh_utc_schedule
 from apps.support_services.models import Meeting
 
 FIXED_NOW = datetime(2026, 7, 8, 22, 0, tzinfo=ZoneInfo("America/Chicago"))
@@ -29,7 +30,12 @@ def make_meeting(slug, day, t, tz="America/Chicago", **kw):
         is_active=True, is_approved=True,
     )
     defaults.update(kw)
-    return Meeting.objects.create(**defaults)
+    meeting = Meeting.objects.create(**defaults)
+    # Derive the schedule index as of the frozen 'now', not the real clock,
+    # so the DST offset in effect matches the test's July dates.
+    refresh_utc_schedule(Meeting.objects.filter(pk=meeting.pk), at=FIXED_NOW)
+    meeting.refresh_from_db()
+    return meeting
 
 
 @patch("apps.support_services.meeting_queries.datetime", FixedDatetime)
@@ -0,0 +1,132 @@
+"""Tests for the UTC minute-of-week meeting schedule index."""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.tasks import send_meeting_reminders
+from apps.support_services.meeting_schedule import (
+    minutes_until, near_transition, refresh_utc_schedule, utc_minute_of_week,
+    week_minute, window_q,
+)
+from apps.support_services.models import Meeting, UserBookmark
+
+User = get_user_model()
+CHICAGO = ZoneInfo("America/Chicago")
+# US DST ends Sunday 2026-11-01 02:00 local.
+BEFORE_FALL_BACK = datetime(2026, 10, 20, 12, 0, tzinfo=dt_timezone.utc)
+FALL_BACK_WEEK = datetime(2026, 10, 28, 12, 0, tzinfo=dt_timezone.utc)
+MIDSUMMER = datetime(2026, 7, 8, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def make_meeting(slug, day, t, tz="America/Chicago", **kw):
+    return Meeting.objects.create(
+        name=slug, slug=slug, day=day, time=t, timezone=tz,
+        attendance_option="online", is_active=True, is_approved=True, **kw)
+
+
+class UtcMinuteOfWeekTests(TestCase):
+    def test_offset_follows_next_occurrence_across_dst(self):
+        # Sunday 10:00 Chicago: 15:00 UTC under CDT, 16:00 UTC under CST.
+        self.assertEqual(utc_minute_of_week(0, time(10, 0), "America/Chicago", BEFORE_FALL_BACK), 900)
+        self.assertEqual(utc_minute_of_week(0, time(10, 0), "America/Chicago", FALL_BACK_WEEK), 960)
+
+    def test_local_day_rolls_into_next_utc_day(self):
+        # Saturday 19:30 Chicago (CDT) is Sunday 00:30 UTC.
+        self.assertEqual(utc_minute_of_week(6, time(19, 30), "America/Chicago", MIDSUMMER), 30)
+
+    def test_unscheduled_or_unknown_zone_has_no_index(self):
+        self.assertIsNone(utc_minute_of_week(None, time(10, 0), "America/Chicago"))
+        self.assertIsNone(utc_minute_of_week(1, None, "America/Chicago"))
+        self.assertIsNone(utc_minute_of_week(1, time(10, 0), "Not/AZone"))
+
+    def test_save_keeps_index_current(self):
+        meeting = make_meeting("m", day=1, t=time(9, 0))
+        self.assertIsNotNone(meeting.utc_minute_of_week)
+        meeting.day = 2
+        meeting.save(update_fields=["day"])
+        meeting.refresh_from_db()
+        self.assertEqual(
+            meeting.utc_minute_of_week, utc_minute_of_week(2, time(9, 0), "America/Chicago"))
+
+    def test_window_wraps_past_saturday_midnight(self):
+        saturday_late = datetime(2026, 7, 11, 23, 50, tzinfo=dt_timezone.utc)
+        start = week_minute(saturday_late)
+        self.assertEqual(start, 6 * 1440 + 23 * 60 + 50)
+        make_meeting("sunday-early", day=6, t=time(19, 10))   # Sun 00:10 UTC
+        make_meeting("saturday-late", day=6, t=time(18, 55))  # Sat 23:55 UTC
+        make_meeting("sunday-later", day=0, t=time(9, 0))     # Sun 14:00 UTC
+        refresh_utc_schedule(at=saturday_late)
+
+        found = Meeting.objects.filter(window_q(start, 30)).order_by("slug")
+        self.assertEqual([m.slug for m in found], ["saturday-late", "sunday-early"])
+        self.assertEqual(minutes_until(10, saturday_late), 20)
+
+    def test_window_starting_past_week_end_wraps(self):
+        # Reminder window at Sat 23:50 UTC: now + 20 minutes is past the week.
+        saturday_late = datetime(2026, 7, 11, 23, 50, tzinfo=dt_timezone.utc)
+        make_meeting("too-soon", day=6, t=time(19, 5))     # Sun 00:05 UTC
+        make_meeting("in-window", day=6, t=time(19, 20))   # Sun 00:20 UTC
+        make_meeting("too-late", day=6, t=time(19, 45))    # Sun 00:45 UTC
+        refresh_utc_schedule(at=saturday_late)
+
+        found = Meeting.objects.filter(window_q(week_minute(saturday_late) + 20, 20))
+        self.assertEqual([m.slug for m in found], ["in-window"])
+
+
+class RefreshScheduleTests(TestCase):
+    def test_only_zones_near_a_transition_are_refreshed(self):
+        self.assertTrue(near_transition("America/Chicago", FALL_BACK_WEEK))
+        self.assertFalse(near_transition("America/Chicago", MIDSUMMER))
+        self.assertFalse(near_transition("America/Phoenix", FALL_BACK_WEEK))
+
+        chicago = make_meeting("chicago", day=0, t=time(10, 0))
+        phoenix = make_meeting("phoenix", day=0, t=time(10, 0), tz="America/Phoenix")
+        Meeting.objects.update(utc_minute_of_week=0)
+
+        self.assertEqual(refresh_utc_schedule(only_near_transitions=True, at=MIDSUMMER), 0)
+        self.assertEqual(refresh_utc_schedule(only_near_transitions=True, at=FALL_BACK_WEEK), 1)
+        chicago.refresh_from_db()
+        phoenix.refresh_from_db()
+        self.assertEqual(chicago.utc_minute_of_week, 960)
+        self.assertEqual(phoenix.utc_minute_of_week, 0)
+
+
+@patch("apps.accounts.tasks.time.sleep")
+@patch("apps.accounts.tasks.send_email", return_value=(True, None))
+@patch("apps.accounts.push_notifications.PushNotificationService.notify_meeting_reminder")
+class MeetingReminderTests(TestCase):
+    def bookmark(self, username, meeting):
+        user = User.objects.create_user(
+            username=username, email=f"{username}@example.com", password="x")
+        return UserBookmark.objects.create(user=user, meeting=meeting)
+
+    def meeting_in(self, slug, minutes):
+        # Whole minutes, so the start sits squarely inside or outside 20-40.
+        starts = (timezone.now() + timedelta(minutes=minutes)).astimezone(CHICAGO)
+        return make_meeting(slug, day=(starts.weekday() + 1) % 7,
+                            t=time(starts.hour, starts.minute))
+
+    def test_reminds_only_meetings_in_window(self, push, send_email, sleep):
+        soon = self.bookmark("soon", self.meeting_in("soon", 30))
+        later = self.meeting_in("later", 120)
+        for i in range(5):
+            self.bookmark(f"later{i}", later)
+
+        self.assertEqual(send_meeting_reminders(), 1)
+        push.assert_called_once()
+        soon.refresh_from_db()
+        self.assertIsNotNone(soon.last_reminder_sent)
+
+        # Already reminded: not again within 20 hours.
+        self.assertEqual(send_meeting_reminders(), 0)
+
+    def test_selection_is_one_query_regardless_of_bookmarks(self, push, send_email, sleep):
+        later = self.meeting_in("later", 120)
+        for i in range(10):
+            self.bookmark(f"later{i}", later)
+        with self.assertNumQueries(1):
+            self.assertEqual(send_meeting_reminders(), 0)
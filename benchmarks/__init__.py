@@ -0,0 +1,17 @@
+"""
+End-to-end load benchmarks for MyRecoveryPal.
+
+Builds deterministic datasets (1k / 10k / 100k users), serves the app from a
+local gunicorn and drives the main user journeys with a scripted HTTP load
+generator, writing per-endpoint latency percentiles and throughput to a
+JSON file that can be diffed between commits.
+
+Everything runs under benchmarks.settings, which points at a separate
+database per dataset size and stubs out the LLM, email and Celery broker:
+
+    export DJANGO_SETTINGS_MODULE=benchmarks.settings
+    python manage.py build_bench_dataset --size 10k
+    python manage.py run_bench --size 10k --workers 2 --concurrency 16 \\
+        --duration 60 --output bench-results/10k-main.json
+    python manage.py compare_bench bench-results/10k-main.json bench-results/10k-branch.json
+"""
@@ -0,0 +1,255 @@
+"""
+Deterministic benchmark datasets.
+
+`build_dataset` fills the current database with a community of the given
+size using only bulk inserts (signals are bypassed on purpose — at 100k
+users the welcome/notification fan-out would take longer than the benchmark
+itself). Every random choice comes from one seeded generator, so the same
+size and seed always produce the same rows in the same order; results from
+two commits are only comparable when they ran against the same dataset.
+"""
+import random
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+SIZES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+}
+
+BENCH_PASSWORD = 'bench-password'
+USERNAME_PREFIX = 'bench'
+
+# Per-user volumes, tuned from production ratios: most members follow a
+# handful of people, a minority post, and about a third check in daily.
+AVG_FOLLOWS = 8
+POSTING_RATIO = 0.3
+POSTS_PER_POSTER = 3
+REACTIONS_PER_POST = 4
+COMMENTS_PER_POST = 1
+CHECKIN_RATIO = 0.35
+CHECKIN_DAYS = 30
+NOTIFICATIONS_PER_USER = 5
+USERS_PER_MEETING = 20
+BLOG_POSTS = 200
+BATCH_SIZE = 5_000
+
+MEETING_TIMEZONES = ['America/Chicago', 'America/New_York', 'America/Los_Angeles', 'America/Denver']
+MEETING_CITIES = [('Chicago', 'IL'), ('Houston', 'TX'), ('Seattle', 'WA'), ('New York', 'NY'), ('Denver', 'CO')]
+BLOG_CATEGORIES = ['Recovery Stories', 'Coping Skills', 'Family', 'Wellness', 'Relapse Prevention']
+
+
+def resolve_size(size):
+    """Accept a named size ('10k') or a plain integer string."""
+    if size in SIZES:
+        return SIZES[size]
+    try:
+        return int(size)
+    except (TypeError, ValueError):
+        raise ValueError(f"Unknown dataset size {size!r}; use one of {', '.join(SIZES)} or an integer")
+
+
+def bench_username(index):
+    return f'{USERNAME_PREFIX}_{index}'
+
+
+def _bulk(model, objs, **kwargs):
+    return model.objects.bulk_create(objs, batch_size=BATCH_SIZE, **kwargs)
+
+
+def build_dataset(users, seed=0, stdout=None):
+    """Populate the database with `users` members and their activity.
+
+    Returns a dict of row counts per table, also stored by run_bench in the
+    results file so a reader can tell which dataset produced the numbers.
+    """
+    from apps.accounts.models import (
+        DailyCheckIn, Notification, PostReaction, RecoveryCoachSession,
+        SocialPost, SocialPostComment, User, UserConnection,
+    )
+    from apps.accounts.payment_models import Subscription
+    from apps.blog.models import Category, Post
+    from apps.accounts.activity_summary import rebuild
+    from apps.support_services.meeting_schedule import utc_minute_of_week
+    from apps.support_services.models import Meeting
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = timezone.localdate()
+    # One hash for everyone: hashing 100k passwords would take minutes.
+    password_hash = make_password(BENCH_PASSWORD)
+    counts = {}
+
+    with transaction.atomic():
+        log(f'Creating {users} users...')
+        _bulk(User, [
+            User(
+                username=bench_username(i),
+                email=f'{bench_username(i)}@bench.invalid',
+                password=password_hash,
+                first_name=f'Bench{i}',
+                bio='Taking it one day at a time.',
+                sobriety_date=today - timedelta(days=rng.randint(1, 3000)),
+                is_profile_public=rng.random() < 0.7,
+                has_completed_onboarding=True,
+                recovery_stage=rng.choice(['starting', 'building', 'growing', 'thriving']),
+                interests=rng.sample(['exercise', 'meditation', 'music', 'reading', 'outdoors', 'art'], 2),
+                last_seen=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+                date_joined=now - timedelta(days=rng.randint(0, 720)),
+            )
+            for i in range(users)
+        ])
+        user_ids = list(
+            User.objects.filter(username__startswith=f'{USERNAME_PREFIX}_')
+            .order_by('id').values_list('id', flat=True)
+        )
+        counts['users'] = len(user_ids)
+
+        # Premium so the coach journey isn't capped at the free 3/day.
+        _bulk(Subscription, [
+            Subscription(user_id=uid, tier='premium', status='active', subscription_source='manual')
+            for uid in user_ids
+        ])
+
+        log('Creating follow graph...')
+        # Preferential attachment: a small set of popular members collects a
+        # large share of follows, like the real graph.
+        popular = user_ids[:max(10, len(user_ids) // 50)]
+        edges = set()
+        for uid in user_ids:
+            for _ in range(rng.randint(0, AVG_FOLLOWS * 2)):
+                target = rng.choice(popular) if rng.random() < 0.3 else rng.choice(user_ids)
+                if target != uid:
+                    edges.add((uid, target))
+        _bulk(UserConnection, [
+            UserConnection(follower_id=a, following_id=b, connection_type='follow', is_mutual=(b, a) in edges)
+            for a, b in sorted(edges)
+        ])
+        counts['follows'] = len(edges)
+
+        log('Creating feed posts...')
+        posters = [uid for uid in user_ids if rng.random() < POSTING_RATIO]
+        visibilities = ['public'] * 6 + ['friends'] * 3 + ['private']
+        _bulk(SocialPost, [
+            SocialPost(
+                author_id=uid,
+                content=f'Day {rng.randint(1, 2000)}. Grateful for another sober day.',
+                visibility=rng.choice(visibilities),
+            )
+            for uid in posters
+            for _ in range(rng.randint(1, POSTS_PER_POSTER))
+        ])
+        post_ids = list(SocialPost.objects.order_by('id').values_list('id', flat=True))
+        counts['social_posts'] = len(post_ids)
+
+        reactions = {}
+        comments = []
+        for pid in post_ids:
+            for uid in rng.sample(user_ids, min(rng.randint(0, REACTIONS_PER_POST * 2), len(user_ids))):
+                reactions[(pid, uid)] = rng.choice(['like', 'support', 'strong', 'celebrate'])
+            for _ in range(rng.randint(0, COMMENTS_PER_POST * 2)):
+                comments.append(SocialPostComment(post_id=pid, author_id=rng.choice(user_ids), content='Keep going!'))
+        _bulk(PostReaction, [
+            PostReaction(post_id=pid, user_id=uid, reaction_type=kind)
+            for (pid, uid), kind in reactions.items()
+        ])
+        _bulk(SocialPostComment, comments)
+        counts['reactions'] = len(reactions)
+        counts['comments'] = len(comments)
+
+        log('Creating check-ins...')
+        checkins = [
+            DailyCheckIn(
+                user_id=uid,
+                date=today - timedelta(days=offset),
+                mood=rng.randint(1, 6),
+                craving_level=rng.randint(0, 4),
+                energy_level=rng.randint(1, 5),
+            )
+            for uid in user_ids if rng.random() < CHECKIN_RATIO
+            # Leave today open so the check-in journey exercises the insert path.
+            for offset in range(1, CHECKIN_DAYS + 1) if rng.random() < 0.8
+        ]
+        _bulk(DailyCheckIn, checkins)
+        counts['checkins'] = len(checkins)
+
+        log('Creating notifications...')
+        notifications = [
+            Notification(
+                recipient_id=uid,
+                sender_id=rng.choice(user_ids),
+                notification_type=rng.choice(['like', 'comment', 'follow']),
+                title='New activity',
+                message='Someone interacted with your post.',
+                is_read=rng.random() < 0.6,
+            )
+            for uid in user_ids
+            for _ in range(rng.randint(0, NOTIFICATIONS_PER_USER * 2))
+        ]
+        _bulk(Notification, notifications)
+        counts['notifications'] = len(notifications)
+
+        _bulk(RecoveryCoachSession, [
+            RecoveryCoachSession(user_id=uid, title='New Conversation') for uid in user_ids
+        ])
+
+        log('Creating meetings...')
+        meeting_count = max(50, users // USERS_PER_MEETING)
+        meetings = []
+        for i in range(meeting_count):
+            city, state = rng.choice(MEETING_CITIES)
+            meetings.append(Meeting(
+                name=f'{city} {rng.choice(["Serenity", "Hope", "New Beginnings", "Step"])} Group {i}',
+                slug=f'bench-meeting-{i}',
+                day=rng.randint(0, 6),
+                time=time(rng.randint(6, 21), rng.choice([0, 15, 30, 45])),
+                timezone=rng.choice(MEETING_TIMEZONES),
+                attendance_option=rng.choice(['in_person', 'online', 'hybrid']),
+                city=city,
+                state=state,
+                latitude=round(rng.uniform(30.0, 47.0), 6),
+                longitude=round(rng.uniform(-122.0, -74.0), 6),
+                types=rng.sample(['O', 'C', 'D', 'B', 'ST', 'SP'], 2),
+                is_approved=True,
+                is_active=True,
+            ))
+        # bulk_create skips Meeting.save(), which maintains the schedule index.
+        for meeting in meetings:
+            meeting.utc_minute_of_week = utc_minute_of_week(meeting.day, meeting.time, meeting.timezone)
+        _bulk(Meeting, meetings)
+        counts['meetings'] = meeting_count
+
+        log('Creating blog posts...')
+        categories = _bulk(Category, [
+            Category(name=name, slug=name.lower().replace(' ', '-')) for name in BLOG_CATEGORIES
+        ])
+        paragraph = '<p>' + ' '.join(['Recovery is built one honest day at a time.'] * 12) + '</p>'
+        _bulk(Post, [
+            Post(
+                title=f'Benchmark article {i}',
+                slug=f'bench-article-{i}',
+                author_id=rng.choice(user_ids[:50]),
+                content=paragraph * rng.randint(4, 12),
+                excerpt='A short read about staying on track.',
+                category=rng.choice(categories),
+                status='published',
+                published_at=now - timedelta(days=i),
+            )
+            for i in range(BLOG_POSTS)
+        ])
+        counts['blog_posts'] = BLOG_POSTS
+
+        # Bulk inserts bypass the signals that maintain activity summaries.
+        log('Building activity summaries...')
+        for start in range(0, len(user_ids), 500):
+            rebuild(user_ids[start:start + 500])
+
+    return counts
@@ -0,0 +1,65 @@
+"""
+A stand-in for the Anthropic Messages API.
+
+run_bench points the app at this server via ANTHROPIC_BASE_URL, so the coach
+journey exercises the real view, SDK client and persistence path while the
+model call itself costs a fixed, configurable delay instead of tokens.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPLY = (
+    "That sounds like a lot to carry today. What's one small thing that "
+    "helped you stay steady the last time you felt this way?"
+)
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        time.sleep(self.latency)
+        body = json.dumps({
+            'id': 'msg_bench',
+            'type': 'message',
+            'role': 'assistant',
+            'model': 'bench-stub',
+            'content': [{'type': 'text', 'text': STUB_REPLY}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': 100, 'output_tokens': 30},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LLMStub:
+    """Context manager running the stub on a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.8):
+        handler = type('Handler', (_MessagesHandler,), {'latency': latency})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
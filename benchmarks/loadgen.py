@@ -0,0 +1,166 @@
+"""
+Scripted HTTP load generator.
+
+Each virtual user runs journeys back to back until the deadline. A journey
+starts by logging in as a bench member (a different one each time, so
+session and per-user caches see a realistic spread) and then walks one of
+the main flows. Every request is timed and recorded under a stable endpoint
+name, so results from different commits line up row for row.
+"""
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from .datasets import BENCH_PASSWORD, BLOG_POSTS, bench_username
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+COACH_SESSION_RE = re.compile(r'var sessionId = (\d+);')
+
+SEARCH_TERMS = ['hope', 'serenity', 'step', 'new beginnings', 'chicago', 'denver', '']
+COACH_PROMPTS = [
+    "I'm having a hard day and cravings are strong.",
+    'How do I handle a family dinner where everyone drinks?',
+    'I hit 90 days today!',
+]
+
+# Relative weights of each journey in the mix. The feed dominates real
+# traffic; the coach is rare but each call holds a worker for the LLM round trip.
+JOURNEY_WEIGHTS = {
+    'feed': 4,
+    'checkin': 2,
+    'coach': 1,
+    'meetings': 2,
+    'blog': 2,
+}
+
+
+class VirtualUser:
+    def __init__(self, base_url, recorder, users, rng, vu_id, timeout=30.0):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.users = users
+        self.rng = rng
+        self.vu_id = vu_id
+        self.timeout = timeout
+        self.iteration = 0
+
+    def _request(self, client, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, time.perf_counter() - start, ok=False)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - start, ok=response.status_code < 400)
+        return response
+
+    def _client(self):
+        # A distinct client address per journey keeps the per-IP login rate
+        # limit from turning the run into a 429 benchmark.
+        self.iteration += 1
+        forwarded_for = f'10.{self.vu_id % 250}.{self.iteration // 250 % 250}.{self.iteration % 250 + 1}'
+        return httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            follow_redirects=False,
+            headers={'X-Forwarded-For': forwarded_for},
+        )
+
+    def _login(self, client):
+        response = self._request(client, 'login_page', 'GET', '/accounts/login/')
+        if response is None:
+            return False
+        match = CSRF_INPUT_RE.search(response.text)
+        username = bench_username(self.rng.randrange(self.users))
+        response = self._request(client, 'login', 'POST', '/accounts/login/', data={
+            'username': username,
+            'password': BENCH_PASSWORD,
+            'csrfmiddlewaretoken': match.group(1) if match else client.cookies.get('csrftoken', ''),
+        })
+        return response is not None and response.status_code == 302
+
+    def _csrf_headers(self, client):
+        return {'X-CSRFToken': client.cookies.get('csrftoken', ''), 'Referer': self.base_url + '/'}
+
+    def feed(self, client):
+        if not self._login(client):
+            return
+        self._request(client, 'progress', 'GET', '/accounts/progress/')
+        for page in range(1, self.rng.randint(2, 4) + 1):
+            self._request(client, 'feed_posts_api', 'GET', '/accounts/social-feed/posts/', params={'page': page})
+
+    def checkin(self, client):
+        if not self._login(client):
+            return
+        self._request(client, 'progress', 'GET', '/accounts/progress/')
+        # The dataset leaves today and every future date open, so a random
+        # future date almost always takes the insert path rather than the
+        # already-checked-in shortcut.
+        local_date = date.today() + timedelta(days=self.rng.randint(0, 3650))
+        self._request(client, 'quick_checkin', 'POST', '/accounts/quick-checkin/', data={
+            'mood': self.rng.randint(1, 6),
+            'local_date': local_date.isoformat(),
+        }, headers=self._csrf_headers(client))
+
+    def coach(self, client):
+        if not self._login(client):
+            return
+        response = self._request(client, 'coach_page', 'GET', '/accounts/recovery-coach/')
+        match = COACH_SESSION_RE.search(response.text) if response is not None else None
+        if match is None:
+            return
+        self._request(client, 'coach_send', 'POST', '/accounts/recovery-coach/send/', data={
+            'message': self.rng.choice(COACH_PROMPTS),
+            'session_id': match.group(1),
+        }, headers=self._csrf_headers(client))
+
+    def meetings(self, client):
+        params = {'q': self.rng.choice(SEARCH_TERMS)}
+        if self.rng.random() < 0.5:
+            params['day'] = self.rng.randint(0, 6)
+        self._request(client, 'meeting_search', 'GET', '/support/meetings/', params=params)
+        self._request(client, 'nearby_meetings', 'GET', '/support/api/nearby/', params={
+            'lat': round(self.rng.uniform(30.0, 47.0), 4),
+            'lng': round(self.rng.uniform(-122.0, -74.0), 4),
+            'radius': 50,
+        })
+
+    def blog(self, client):
+        self._request(client, 'blog_list', 'GET', '/blog/')
+        for _ in range(self.rng.randint(1, 3)):
+            slug = f'bench-article-{self.rng.randrange(BLOG_POSTS)}'
+            self._request(client, 'blog_detail', 'GET', f'/blog/post/{slug}/')
+
+    def run_until(self, deadline):
+        names = list(JOURNEY_WEIGHTS)
+        weights = [JOURNEY_WEIGHTS[name] for name in names]
+        while time.monotonic() < deadline:
+            journey = getattr(self, self.rng.choices(names, weights)[0])
+            with self._client() as client:
+                journey(client)
+
+
+def run_load(base_url, recorder, users, concurrency=8, duration=30, seed=0):
+    """Run `concurrency` virtual users for `duration` seconds.
+
+    Returns the measured wall time, used as the throughput denominator.
+    """
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=VirtualUser(base_url, recorder, users, random.Random(f'{seed}:{i}'), i).run_until,
+            args=(deadline,),
+            daemon=True,
+        )
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.datasets import SIZES, build_dataset, resolve_size
+
+
+class Command(BaseCommand):
+    help = 'Builds a deterministic benchmark dataset in the benchmark database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', default=getattr(settings, 'BENCH_SIZE', '1k'),
+            help=f"Number of users: {', '.join(SIZES)} or an integer (default: $BENCH_SIZE)",
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed, same data)')
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Flush the benchmark database before building',
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'BENCH_SIZE', None):
+            raise CommandError('Run with DJANGO_SETTINGS_MODULE=benchmarks.settings')
+        try:
+            users = resolve_size(options['size'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        call_command('migrate', interactive=False, verbosity=0)
+        if options['flush']:
+            call_command('flush', interactive=False, verbosity=0)
+
+        from apps.accounts.models import User
+        if User.objects.filter(username__startswith='bench_').exists():
+            raise CommandError('Benchmark users already exist; pass --flush to rebuild')
+
+        counts = build_dataset(users, seed=options['seed'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(json.dumps(counts, indent=2)))
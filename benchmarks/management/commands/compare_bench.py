@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.results import compare, load_results
+
+# Changes smaller than this are usually run-to-run noise.
+NOTABLE_CHANGE_PCT = 5
+
+
+class Command(BaseCommand):
+    help = 'Compares two run_bench result files endpoint by endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Results JSON from the reference commit')
+        parser.add_argument('candidate', help='Results JSON from the commit under test')
+
+    def handle(self, *args, **options):
+        baseline = load_results(options['baseline'])
+        candidate = load_results(options['candidate'])
+
+        for label, results in (('baseline', baseline), ('candidate', candidate)):
+            meta = results.get('meta', {})
+            self.stdout.write(
+                f"{label:<10} {meta.get('git_commit', '?')[:10]}  size={meta.get('size')} "
+                f"workers={meta.get('workers')} concurrency={meta.get('concurrency')}"
+            )
+        if baseline.get('meta', {}).get('dataset') != candidate.get('meta', {}).get('dataset'):
+            self.stdout.write(self.style.WARNING('Datasets differ; numbers are not directly comparable'))
+
+        self.stdout.write(f"\n{'endpoint':<18} {'metric':<15} {'before':>10} {'after':>10} {'change':>9}")
+        for endpoint, metric, before, after, change in compare(baseline, candidate):
+            delta = f"{'n/a' if change is None else f'{change:+.1f}%':>9}"
+            if change is not None and abs(change) >= NOTABLE_CHANGE_PCT:
+                # Lower latency is better; higher throughput is better.
+                worse = change > 0 if metric.endswith('_ms') else change < 0
+                delta = (self.style.ERROR if worse else self.style.SUCCESS)(delta)
+            self.stdout.write(f'{endpoint:<18} {metric:<15} {before:>10} {after:>10} {delta}')
@@ -0,0 +1,162 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.llm_stub import LLMStub
+from benchmarks.loadgen import JOURNEY_WEIGHTS, run_load
+from benchmarks.results import Recorder, write_results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _dataset_counts():
+    from apps.accounts.models import DailyCheckIn, Notification, SocialPost, User, UserConnection
+    from apps.blog.models import Post
+    from apps.support_services.models import Meeting
+
+    return {
+        'users': User.objects.filter(username__startswith='bench_').count(),
+        'follows': UserConnection.objects.count(),
+        'social_posts': SocialPost.objects.count(),
+        'checkins': DailyCheckIn.objects.count(),
+        'notifications': Notification.objects.count(),
+        'meetings': Meeting.objects.count(),
+        'blog_posts': Post.objects.count(),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Serves the app from a local gunicorn and drives the benchmark journeys against it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', default=getattr(settings, 'BENCH_SIZE', '1k'),
+                            help='Dataset to run against (default: $BENCH_SIZE)')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent virtual users')
+        parser.add_argument('--duration', type=int, default=30, help='Measured seconds')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Unmeasured seconds first, to fill caches and connection pools')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the journey mix')
+        parser.add_argument('--llm-latency', type=float, default=0.8,
+                            help='Seconds the stubbed LLM takes to answer')
+        parser.add_argument('--output', default=None,
+                            help='Results file (default: bench-results/<size>-<commit>.json)')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'BENCH_SIZE', None):
+            raise CommandError('Run with DJANGO_SETTINGS_MODULE=benchmarks.settings')
+        size = options['size']
+        if size != settings.BENCH_SIZE and not os.environ.get('BENCH_DATABASE_URL'):
+            # The database path is chosen at settings import, so re-exec
+            # under the right one rather than benchmarking the wrong data.
+            os.environ['BENCH_SIZE'] = size
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+
+        counts = _dataset_counts()
+        if not counts['users']:
+            raise CommandError(f'No benchmark data; run build_bench_dataset --size {size} first')
+
+        commit = _git_commit()
+        output = Path(options['output'] or f'bench-results/{size}-{commit[:10]}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+
+        with LLMStub(latency=options['llm_latency']) as stub:
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+                'BENCH_SIZE': size,
+                'ANTHROPIC_BASE_URL': stub.base_url,
+            }
+            server = subprocess.Popen(
+                [
+                    sys.executable, '-m', 'gunicorn', 'recovery_hub.wsgi:application',
+                    '-c', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                    '--bind', f'127.0.0.1:{port}',
+                    '--workers', str(options['workers']),
+                    '--threads', str(options['threads']),
+                    '--timeout', '120',
+                    '--preload',
+                ],
+                cwd=settings.BASE_DIR,
+                env=env,
+            )
+            try:
+                self._wait_until_ready(base_url, server)
+                if options['warmup']:
+                    self.stdout.write(f"Warming up for {options['warmup']}s...")
+                    run_load(base_url, Recorder(), counts['users'], options['concurrency'],
+                             options['warmup'], seed=options['seed'] + 1)
+
+                self.stdout.write(
+                    f"Running {options['concurrency']} virtual users for {options['duration']}s "
+                    f"against {options['workers']} worker(s)..."
+                )
+                recorder = Recorder()
+                elapsed = run_load(base_url, recorder, counts['users'], options['concurrency'],
+                                   options['duration'], seed=options['seed'])
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        summary = recorder.summary(elapsed)
+        meta = {
+            'git_commit': commit,
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'size': size,
+            'dataset': counts,
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+            'elapsed': round(elapsed, 2),
+            'seed': options['seed'],
+            'llm_latency': options['llm_latency'],
+            'journey_weights': JOURNEY_WEIGHTS,
+        }
+        write_results(output, meta, summary)
+
+        self.stdout.write(f"\n{'endpoint':<18} {'count':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, row in [*summary['endpoints'].items(), ('TOTAL', summary['total'])]:
+            self.stdout.write(
+                f"{name:<18} {row['count']:>7} {row['errors']:>5} {row['throughput_rps']:>8} "
+                f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {output}'))
+
+    def _wait_until_ready(self, base_url, server, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {server.returncode}')
+            try:
+                httpx.get(f'{base_url}/accounts/login/', timeout=2)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.5)
+        raise CommandError(f'gunicorn did not become ready within {timeout}s')
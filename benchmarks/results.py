@@ -0,0 +1,86 @@
+"""
+Latency recording, summarising and diffing for benchmark runs.
+
+Results files are plain JSON so they can be committed next to a change, or
+attached to a PR, and diffed with compare_bench.
+"""
+import json
+import threading
+from collections import defaultdict
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+class Recorder:
+    """Thread-safe sink for (endpoint, seconds, ok) samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        """Per-endpoint stats in milliseconds plus a combined 'total' row."""
+        with self._lock:
+            latencies = {name: sorted(values) for name, values in self._latencies.items()}
+            errors = dict(self._errors)
+
+        def stats(values, error_count):
+            return {
+                'count': len(values),
+                'errors': error_count,
+                'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'mean_ms': round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+            }
+
+        endpoints = {name: stats(values, errors.get(name, 0)) for name, values in sorted(latencies.items())}
+        everything = sorted(v for values in latencies.values() for v in values)
+        return {
+            'endpoints': endpoints,
+            'total': stats(everything, sum(errors.values())),
+        }
+
+
+def write_results(path, meta, summary):
+    with open(path, 'w') as fh:
+        json.dump({'meta': meta, **summary}, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(baseline, candidate, metrics=('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')):
+    """Rows of (endpoint, metric, before, after, pct_change) for every shared endpoint."""
+    rows = []
+    before_endpoints = {**baseline['endpoints'], 'TOTAL': baseline['total']}
+    after_endpoints = {**candidate['endpoints'], 'TOTAL': candidate['total']}
+    for name in sorted(set(before_endpoints) & set(after_endpoints), key=lambda n: (n == 'TOTAL', n)):
+        for metric in metrics:
+            before = before_endpoints[name][metric]
+            after = after_endpoints[name][metric]
+            change = round((after - before) / before * 100, 1) if before else None
+            rows.append((name, metric, before, after, change))
+    return rows
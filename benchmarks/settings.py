@@ -0,0 +1,53 @@
+"""
+Settings for benchmark runs.
+
+Imports the production settings and overrides only what a local load test
+needs: a dedicated database per dataset size, plain-HTTP serving, and stubs
+for everything that would leave the machine (LLM, email, Celery broker).
+"""
+import os
+
+import dj_database_url
+
+from recovery_hub.settings import *  # noqa: F401,F403
+from recovery_hub.settings import BASE_DIR, INSTALLED_APPS, LOGGING
+
+INSTALLED_APPS = INSTALLED_APPS + ['benchmarks']
+
+BENCH_SIZE = os.environ.get('BENCH_SIZE', '1k')
+BENCH_DATA_DIR = BASE_DIR / 'benchmarks' / 'data'
+
+# BENCH_DATABASE_URL lets runs use Postgres (recommended for 100k); otherwise
+# each size gets its own SQLite file so datasets never overwrite each other.
+if os.environ.get('BENCH_DATABASE_URL'):
+    DATABASES = {'default': dj_database_url.parse(os.environ['BENCH_DATABASE_URL'], conn_max_age=60)}
+else:
+    BENCH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BENCH_DATA_DIR / f'bench_{BENCH_SIZE}.sqlite3',
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+PREPEND_WWW = False
+SECURE_SSL_REDIRECT = False
+SESSION_COOKIE_SECURE = False
+CSRF_COOKIE_SECURE = False
+
+# Nothing leaves the machine: emails go to memory, tasks are accepted by an
+# in-memory broker and dropped, and the coach talks to the local LLM stub
+# started by run_bench (the Anthropic SDK honours ANTHROPIC_BASE_URL).
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY', 'bench-stub-key')
+
+# Per-request access logging would dominate the measurement.
+LOGGING = {**LOGGING, 'root': {'handlers': ['console'], 'level': 'WARNING'}}
+LOGGING['loggers'] = {
+    name: {**config, 'level': 'WARNING'} for name, config in LOGGING['loggers'].items()
+}
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from apps.accounts.models import SocialPost, User, UserConnection
+from apps.blog.models import Category
+from apps.support_services.models import Meeting
+from benchmarks.datasets import BENCH_PASSWORD, bench_username, build_dataset, resolve_size
+from benchmarks.results import Recorder, compare, percentile
+
+
+class ResultsTests(TestCase):
+    def test_percentile_interpolates(self):
+        values = [0.1, 0.2, 0.3, 0.4, 0.5]
+        self.assertAlmostEqual(percentile(values, 50), 0.3)
+        self.assertAlmostEqual(percentile(values, 95), 0.48)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_summary_reports_per_endpoint_and_total(self):
+        recorder = Recorder()
+        for seconds in (0.1, 0.2, 0.3):
+            recorder.record('progress', seconds)
+        recorder.record('login', 0.5, ok=False)
+
+        summary = recorder.summary(elapsed=2.0)
+        self.assertEqual(summary['endpoints']['progress']['count'], 3)
+        self.assertEqual(summary['endpoints']['progress']['p50_ms'], 200.0)
+        self.assertEqual(summary['endpoints']['login']['errors'], 1)
+        self.assertEqual(summary['total']['count'], 4)
+        self.assertEqual(summary['total']['throughput_rps'], 2.0)
+
+    def test_compare_reports_relative_change(self):
+        def result(p50):
+            row = {'p50_ms': p50, 'p95_ms': p50, 'p99_ms': p50, 'throughput_rps': 10}
+            return {'endpoints': {'progress': row}, 'total': row}
+
+        rows = compare(result(100), result(80), metrics=('p50_ms',))
+        self.assertEqual(rows, [('progress', 'p50_ms', 100, 80, -20.0), ('TOTAL', 'p50_ms', 100, 80, -20.0)])
+
+
+class DatasetTests(TestCase):
+    def test_named_sizes(self):
+        self.assertEqual(resolve_size('10k'), 10_000)
+        self.assertEqual(resolve_size('250'), 250)
+        with self.assertRaises(ValueError):
+            resolve_size('huge')
+
+    def test_build_is_deterministic_and_loginable(self):
+        first = build_dataset(60, seed=3)
+        edges = sorted(UserConnection.objects.values_list('follower__username', 'following__username'))
+        posts = list(SocialPost.objects.order_by('id').values_list('author__username', 'visibility'))
+
+        User.objects.all().delete()
+        Meeting.objects.all().delete()
+        Category.objects.all().delete()
+        second = build_dataset(60, seed=3)
+        self.assertEqual(first, second)
+        self.assertEqual(
+            edges, sorted(UserConnection.objects.values_list('follower__username', 'following__username')))
+        self.assertEqual(
+            posts, list(SocialPost.objects.order_by('id').values_list('author__username', 'visibility')))
+        self.assertTrue(User.objects.get(username=bench_username(0)).check_password(BENCH_PASSWORD))
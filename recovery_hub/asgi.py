@@ -4,7 +4,6 @@ ASGI config for recovery_hub project.
 import os
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE',
-                      'recovery_hub.settings.production')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recovery_hub.settings')
 
 application = get_asgi_application()
@@ -7,6 +7,11 @@ app = Celery('recovery_hub')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+# Connects the enqueued_at / queue-wait and per-run metrics signal handlers
+import recovery_hub.celery_metrics  # noqa: E402, F401
+import apps.accounts.task_instrumentation  # noqa: E402, F401
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
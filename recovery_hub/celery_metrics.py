@@ -0,0 +1,90 @@
+"""
+Celery queue metrics: how deep each queue is and how long its oldest
+message has been waiting.
+
+Every published message is stamped with an `enqueued_at` header. Workers
+log how long each task waited before starting (a warning when an
+interactive task waited longer than INTERACTIVE_WAIT_WARNING), and
+queue_stats() peeks at the oldest message of every queue for the
+/admin/dashboard/queues/ endpoint. Peeking needs the Redis transport;
+other brokers report depth only.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+from celery.signals import before_task_publish, task_prerun
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_WAIT_WARNING = 10  # seconds
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('enqueued_at', time.time())
+
+
+def _started_after(request, now):
+    enqueued_at = getattr(request, 'enqueued_at', None)
+    if enqueued_at is None:
+        return None
+    # A countdown/eta is a deliberate wait, not queueing delay.
+    if request.eta:
+        try:
+            enqueued_at = max(enqueued_at, datetime.fromisoformat(request.eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    return max(0.0, now - enqueued_at)
+
+
+@task_prerun.connect
+def log_queue_wait(task=None, **kwargs):
+    if task is None:
+        return
+    wait = _started_after(task.request, time.time())
+    if wait is None:
+        return
+    queue = (task.request.delivery_info or {}).get('routing_key') or '?'
+    if queue == 'interactive' and wait > INTERACTIVE_WAIT_WARNING:
+        logger.warning(f'{task.name} waited {wait:.1f}s on queue {queue}')
+    else:
+        logger.debug(f'{task.name} waited {wait:.1f}s on queue {queue}')
+
+
+def _oldest_enqueued_at(client, queue):
+    # Kombu's Redis transport LPUSHes and BRPOPs, so the oldest message is
+    # at the right-hand end of the list.
+    raw = client.lindex(queue, -1)
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)['headers'].get('enqueued_at')
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def channel_stats(channel, queues, now=None):
+    now = now or time.time()
+    client = getattr(channel, 'client', None)
+    stats = {}
+    for queue in queues:
+        depth = channel.queue_declare(queue=queue, passive=True).message_count
+        oldest_age = None
+        if depth and client is not None:
+            enqueued_at = _oldest_enqueued_at(client, queue)
+            if enqueued_at is not None:
+                oldest_age = round(max(0.0, now - enqueued_at), 1)
+        stats[queue] = {'depth': depth, 'oldest_age_seconds': oldest_age}
+    return stats
+
+
+def queue_stats():
+    """{queue: {'depth': n, 'oldest_age_seconds': s or None}}"""
+    from recovery_hub.celery import app
+
+    with app.connection_for_read() as connection:
+        return channel_stats(connection.default_channel, settings.CELERY_QUEUE_NAMES)
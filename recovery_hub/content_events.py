@@ -0,0 +1,110 @@
+"""
+Buffered view/download counters and resource usage rows.
+
+Reading a blog post or a resource used to write on every hit: an UPDATE
+of the views/downloads column (Resource.increment_* even did a
+read-modify-write save) plus a ResourceUsage INSERT. Those writes now go
+to an event_buffer and the flush_content_events task applies a batch at
+a time: counter deltas summed per row and written with one
+`UPDATE ... SET col = col + n` per (column, n), usage rows with one
+bulk_create. Counters therefore trail by up to a minute and usage rows
+are stamped with the flush time.
+
+Views are still counted once per session (first_view); downloads and
+usage rows once per hit, as before. If the buffer can't be reached the
+write happens inline, so events aren't lost.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from recovery_hub import event_buffer
+
+logger = logging.getLogger(__name__)
+
+BUFFER = 'content-events'
+
+# Columns count() may bump, by model label.
+COUNTERS = {
+    'blog.post': {'views'},
+    'resources.resource': {'views', 'downloads'},
+}
+
+
+def first_view(request, instance):
+    """True the first time this session views `instance` (and remembers it)."""
+    key = f'viewed_{instance._meta.model_name}_{instance.pk}'
+    if request.session.get(key):
+        return False
+    request.session[key] = True
+    return True
+
+
+def count(instance, field):
+    """Add one to instance.<field>, applied at the next flush."""
+    label = instance._meta.label_lower
+    if field not in COUNTERS.get(label, ()):
+        raise ValueError(f"{label}.{field} is not a buffered counter")
+    if not event_buffer.push(BUFFER, {'model': label, 'id': instance.pk, 'field': field}):
+        type(instance).objects.filter(pk=instance.pk).update(**{field: F(field) + 1})
+
+
+def log_usage(user, resource, action, completed=False):
+    """Record a ResourceUsage row for `user`, written at the next flush."""
+    record = {'user_id': user.pk, 'resource_id': resource.pk, 'action': action, 'completed': completed}
+    if not event_buffer.push(BUFFER, {'usage': record}):
+        apps.get_model('resources', 'ResourceUsage').objects.create(**record)
+
+
+def flush(limit=event_buffer.DRAIN_BATCH):
+    """Apply a batch of buffered events. Returns the number drained.
+
+    The batch is applied in one transaction; if that fails the events go
+    back on the buffer for the task's retry, rather than being half
+    applied or lost.
+    """
+    events = event_buffer.drain(BUFFER, limit)
+    if not events:
+        return 0
+    try:
+        with transaction.atomic():
+            _apply(events)
+    except DatabaseError:
+        event_buffer.push(BUFFER, *events)
+        raise
+    return len(events)
+
+
+def _apply(events):
+    deltas = Counter()
+    usage = []
+    for event in events:
+        if 'usage' in event:
+            usage.append(event['usage'])
+        elif event.get('field') in COUNTERS.get(event.get('model'), ()):
+            deltas[(event['model'], event['field'], event['id'])] += 1
+        else:
+            logger.warning(f"content_events: dropping malformed event {event}")
+
+    # One UPDATE per (column, delta) rather than per row.
+    grouped = defaultdict(list)
+    for (label, field, pk), n in deltas.items():
+        grouped[(label, field, n)].append(pk)
+    for (label, field, n), ids in grouped.items():
+        apps.get_model(label).objects.filter(pk__in=ids).update(**{field: F(field) + n})
+
+    if usage:
+        ResourceUsage = apps.get_model('resources', 'ResourceUsage')
+        User = ResourceUsage._meta.get_field('user').related_model
+        Resource = ResourceUsage._meta.get_field('resource').related_model
+        # Skip rows whose member or resource was deleted since the event.
+        users = set(User.objects.filter(pk__in={u['user_id'] for u in usage}).values_list('pk', flat=True))
+        resources = set(Resource.objects.filter(
+            pk__in={u['resource_id'] for u in usage}).values_list('pk', flat=True))
+        ResourceUsage.objects.bulk_create([
+            ResourceUsage(**u) for u in usage
+            if u['user_id'] in users and u['resource_id'] in resources
+        ])
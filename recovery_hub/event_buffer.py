@@ -0,0 +1,73 @@
+"""
+Append-only event buffers drained in bulk by periodic Celery tasks.
+
+Request paths push small JSON records with push() instead of writing rows;
+a scheduled task calls drain() and applies a whole batch with bulk_create /
+grouped updates. With Redis each buffer is a list (RPUSH, then LRANGE+LTRIM
+in one MULTI), so every web process feeds the same buffer. Without Redis
+(local dev, tests) records go to a list in this process, which only a
+drain() in the same process sees.
+
+push() returns False when the record could not be buffered, so callers
+that can't afford to lose it can fall back to writing directly.
+"""
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY = 'event-buffer:{name}'
+DRAIN_BATCH = 1000
+
+_local = defaultdict(list)
+_local_lock = threading.Lock()
+
+
+def _redis():
+    if not getattr(settings, 'REDIS_URL', None):
+        return None
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def push(name, *records):
+    """Append records (JSON-serializable dicts) to buffer `name`."""
+    if not records:
+        return True
+    try:
+        client = _redis()
+        if client is None:
+            with _local_lock:
+                _local[name].extend(json.loads(json.dumps(r)) for r in records)
+            return True
+        client.rpush(KEY.format(name=name), *(json.dumps(r) for r in records))
+        return True
+    except Exception as e:
+        logger.warning(f"event_buffer: push to {name} failed: {e}")
+        return False
+
+
+def drain(name, limit=DRAIN_BATCH):
+    """Remove and return up to `limit` of the oldest records in buffer `name`."""
+    client = _redis()
+    if client is None:
+        with _local_lock:
+            batch, _local[name][:limit] = _local[name][:limit], []
+        return batch
+    key = KEY.format(name=name)
+    pipe = client.pipeline(transaction=True)
+    pipe.lrange(key, 0, limit - 1)
+    pipe.ltrim(key, limit, -1)
+    raw, _ = pipe.execute()
+    return [json.loads(item) for item in raw]
+
+
+def size(name):
+    client = _redis()
+    if client is None:
+        return len(_local[name])
+    return client.llen(KEY.format(name=name))
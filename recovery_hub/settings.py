@@ -3,6 +3,7 @@ Django settings for recovery_hub project.
 """
 import ssl
 from celery.schedules import crontab
+from kombu import Queue
 import os
 from pathlib import Path
 import dj_database_url
@@ -189,13 +190,14 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'apps.accounts.middleware.DatabaseConnectionMiddleware',  # Fix stale DB connections
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
-    'django.middleware.gzip.GZipMiddleware',  # Compress HTML/JSON responses (reduces egress ~70%)
+    'apps.accounts.middleware.StreamingAwareGZipMiddleware',  # Compress HTML/JSON responses (reduces egress ~70%)
     'apps.accounts.middleware.NoCacheHTMLMiddleware',  # Prevent WKWebView from caching HTML
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.accounts.request_profiler.RequestProfilerMiddleware',  # Staff ?__profile=1 (off unless enabled)
     'apps.accounts.middleware.UserTimezoneMiddleware',  # Activate user's IANA tz for localdate()
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -228,6 +230,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 # Subscription context for premium feature gating
                 'apps.accounts.context_processors.subscription_context',
+                'apps.accounts.context_processors.notification_context',
                 # SEO defaults for better search engine visibility
                 'apps.core.context_processors.seo_defaults',
                 # Add PWA context processor if using django-pwa
@@ -748,6 +751,20 @@ if REDIS_URL:
     SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
     SESSION_CACHE_ALIAS = 'default'
 
+# Server-Sent Events endpoint for live notification counts. Only set this
+# when the stream is served by an ASGI process (Procfile `stream`) that the
+# proxy routes /accounts/api/notifications/stream/ to; left empty, clients
+# poll unread_count_api instead.
+NOTIFICATION_STREAM_URL = os.environ.get('NOTIFICATION_STREAM_URL', '')
+
+# Notification retention (apps/accounts/notification_retention.py): read
+# notifications older than NOTIFICATION_RETENTION_DAYS, and unread ones
+# older than NOTIFICATION_UNREAD_RETENTION_DAYS, leave the hot table nightly.
+# With NOTIFICATION_ARCHIVE they are copied to ArchivedNotification first.
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_UNREAD_RETENTION_DAYS', 365))
+NOTIFICATION_ARCHIVE = os.environ.get('NOTIFICATION_ARCHIVE', 'True') == 'True'
+
 # ========================================
 # Celery Settings
 # ========================================
@@ -807,6 +824,11 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.blog.tasks.retry_stuck_blog_push_fanouts',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    # Nightly related posts/resources ranked by text similarity
+    'rebuild-content-neighbours': {
+        'task': 'apps.blog.tasks.rebuild_content_neighbours',
+        'schedule': crontab(hour=3, minute=15),  # Daily at 3:15 AM UTC
+    },
     # Daily blog digest — 7 AM UTC roundup of the last 24h of published posts
     'send-daily-blog-digest': {
         'task': 'apps.blog.tasks.send_daily_blog_digest',
@@ -849,19 +871,191 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.support_services.tasks.refresh_online_meetings_task',
         'schedule': crontab(hour=4, minute=0, day_of_week=1),  # Weekly, Mondays 4 AM UTC
     },
+    # DST-aware meeting schedule index used by reminders and "starting soon"
+    'refresh-meeting-schedule': {
+        'task': 'apps.support_services.tasks.refresh_meeting_schedule_task',
+        'schedule': crontab(minute=5),  # Hourly; only zones near a DST change do work
+    },
     'send_facility_risk_digest': {
         'task': 'apps.accounts.tasks.send_facility_risk_digest',
         'schedule': crontab(hour=9, minute=0, day_of_week=1),  # Mondays 9 AM
     },
+    # Undo drift in the cached notification unread counters
+    'reconcile-unread-counters': {
+        'task': 'apps.accounts.tasks.reconcile_unread_counters',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Daily group summaries for members on the digest setting
+    'send-group-digests': {
+        'task': 'apps.accounts.tasks.send_group_digests',
+        'schedule': crontab(hour=18, minute=0),  # Daily at 6 PM UTC
+    },
+    # Group post fan-outs that never ran (broker outage)
+    'retry-stuck-group-fanouts': {
+        'task': 'apps.accounts.tasks.retry_stuck_group_fanouts',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Total / online member counts shown on the community page
+    'refresh-directory-counts': {
+        'task': 'apps.accounts.tasks.refresh_directory_counts',
+        'schedule': crontab(),  # Every minute
+    },
+    # Write buffered A/B test assignments and conversions
+    'flush-ab-test-events': {
+        'task': 'apps.accounts.tasks.flush_ab_test_events',
+        'schedule': crontab(),  # Every minute
+    },
+    # Apply buffered blog/resource view counts, downloads and usage rows
+    'flush-content-events': {
+        'task': 'apps.accounts.tasks.flush_content_events',
+        'schedule': crontab(),  # Every minute
+    },
+    # Rebuild denormalized activity summaries before the morning batch jobs
+    'verify-activity-summaries': {
+        'task': 'apps.accounts.tasks.verify_activity_summaries',
+        'schedule': crontab(hour=1, minute=45),  # Daily at 1:45 AM UTC
+    },
+    # Nightly "people you may know" lists for every member
+    'rebuild-recommendations': {
+        'task': 'apps.accounts.tasks.rebuild_recommendations',
+        'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM UTC
+    },
+    # Recompute lists invalidated by follows and profile edits
+    'refresh-stale-recommendations': {
+        'task': 'apps.accounts.tasks.refresh_stale_recommendations',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Move expired notifications out of the hot table
+    'archive-old-notifications': {
+        'task': 'apps.accounts.tasks.archive_old_notifications',
+        'schedule': crontab(hour=3, minute=30),  # Daily at 3:30 AM UTC, low traffic
+    },
+    # Pre-create next months' notification partitions (no-op unless partitioned)
+    'maintain-notification-partitions': {
+        'task': 'apps.accounts.tasks.maintain_notification_partitions',
+        'schedule': crontab(hour=3, minute=0, day_of_month=1),
+    },
+    # Retry failed / stranded Stripe webhook events (backoff lives on the event)
+    'retry-stripe-events': {
+        'task': 'apps.accounts.tasks.retry_stripe_events',
+        'schedule': crontab(minute='*/5'),
+    },
+    # Drop TaskRun metrics older than TASK_METRICS_RETENTION_DAYS
+    'prune-task-runs': {
+        'task': 'apps.accounts.tasks.prune_task_runs',
+        'schedule': crontab(hour=4, minute=15),
+    },
 }
 
 # Celery worker memory optimization (Railway cost reduction)
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 50  # Restart worker after 50 tasks to reclaim memory
 CELERY_WORKER_MAX_MEMORY_PER_CHILD = 200_000  # Kill child if it exceeds 200MB (kB)
-CELERY_WORKER_CONCURRENCY = 1  # Only 1 worker process needed for this workload
+CELERY_WORKER_CONCURRENCY = 1  # Default when -c is not given; per-queue workers size themselves (Procfile)
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Don't prefetch extra tasks
 CELERY_TASK_RESULT_EXPIRES = 3600  # Expire results after 1 hour instead of default 24h
 
+# Task queues. A member waiting on an email (invite, welcome, billing) must
+# not queue behind a Sunday digest or a blog push fan-out, so work is split
+# by kind and each kind gets its own worker (see Procfile):
+#   interactive  - triggered by a request; small, latency-sensitive
+#   bulk_email   - scheduled campaigns and reminder sweeps, paced by the
+#                  email provider's rate limit
+#   push_fanout  - push notification fan-outs
+#   maintenance  - rebuilds, retention, reconciliation, sweeps
+# Unlisted tasks go to interactive. A worker started without -Q consumes
+# every queue, so a single combined worker keeps working.
+CELERY_QUEUE_NAMES = ('interactive', 'bulk_email', 'push_fanout', 'maintenance')
+CELERY_QUEUE_TASKS = {
+    'interactive': [
+        'apps.accounts.tasks.send_invite_email_task',
+        'apps.accounts.tasks.send_welcome_email_day_1',
+        'apps.accounts.tasks.process_stripe_events',
+    ],
+    'bulk_email': [
+        'apps.accounts.tasks.send_onboarding_sequence_emails',
+        'apps.accounts.tasks.send_reengagement_emails',
+        'apps.accounts.tasks.send_checkin_reminders',
+        'apps.accounts.tasks.send_weekly_digests',
+        'apps.accounts.tasks.send_meeting_reminders',
+        'apps.accounts.tasks.send_pal_accountability_nudges',
+        'apps.accounts.tasks.send_supporter_inactivity_alerts',
+        'apps.accounts.tasks.send_trial_ending_notifications',
+        'apps.accounts.tasks.send_premium_trial_nudge',
+        'apps.accounts.tasks.send_winback_offers',
+        'apps.accounts.tasks.send_court_meeting_reminders',
+        'apps.accounts.tasks.send_court_monthly_po_reports',
+        'apps.accounts.tasks.send_facility_risk_digest',
+        'apps.blog.tasks.send_daily_blog_digest',
+        'apps.newsletter.tasks.send_scheduled_newsletters',
+        'apps.newsletter.tasks.send_newsletter_task',
+        'apps.store.tasks.weekly_shop_digest_task',
+        'apps.store.tasks.daily_milestone_celebration_task',
+    ],
+    'push_fanout': [
+        'apps.blog.tasks.fanout_blog_push_notifications',
+        'apps.blog.tasks.retry_stuck_blog_push_fanouts',
+        'apps.accounts.tasks.fanout_group_posts',
+        'apps.accounts.tasks.fanout_group_notification',
+        'apps.accounts.tasks.send_group_digests',
+        'apps.accounts.tasks.retry_stuck_group_fanouts',
+    ],
+    'maintenance': [
+        'apps.accounts.tasks.archive_old_notifications',
+        'apps.accounts.tasks.maintain_notification_partitions',
+        'apps.accounts.tasks.reconcile_unread_counters',
+        'apps.accounts.tasks.verify_activity_summaries',
+        'apps.accounts.tasks.rebuild_recommendations',
+        'apps.accounts.tasks.refresh_stale_recommendations',
+        'apps.accounts.tasks.refresh_directory_counts',
+        'apps.accounts.tasks.flush_ab_test_events',
+        'apps.accounts.tasks.flush_content_events',
+        'apps.accounts.tasks.expire_ended_trials',
+        'apps.accounts.tasks.publish_daily_thought',
+        'apps.accounts.tasks.retry_stripe_events',
+        'apps.accounts.tasks.prune_task_runs',
+        'apps.blog.tasks.rebuild_content_neighbours',
+        'apps.newsletter.tasks.update_subscriber_stats',
+        'apps.support_services.tasks.refresh_meeting_schedule_task',
+        'apps.support_services.tasks.refresh_online_meetings_task',
+    ],
+}
+# (soft, hard) time limits in seconds per queue. Bulk sends are paced at
+# ~2 emails/s and stamp progress as they go, so they run unbounded rather
+# than being killed mid-campaign.
+CELERY_QUEUE_TIME_LIMITS = {
+    'interactive': (60, 90),
+    'bulk_email': (None, None),
+    'push_fanout': (15 * 60, 20 * 60),
+    'maintenance': (30 * 60, 40 * 60),
+}
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_QUEUES = [Queue(name, routing_key=name) for name in CELERY_QUEUE_NAMES]
+CELERY_TASK_ROUTES = {
+    task: {'queue': queue}
+    for queue, tasks in CELERY_QUEUE_TASKS.items() for task in tasks
+}
+CELERY_TASK_ANNOTATIONS = {
+    task: {'soft_time_limit': CELERY_QUEUE_TIME_LIMITS[queue][0],
+           'time_limit': CELERY_QUEUE_TIME_LIMITS[queue][1]}
+    for queue, tasks in CELERY_QUEUE_TASKS.items() for task in tasks
+}
+
+# Per-run task metrics (apps/accounts/task_instrumentation.py): one TaskRun
+# row per task run, kept for TASK_METRICS_RETENTION_DAYS. Prometheus can
+# scrape /admin/dashboard/task-metrics/ with "Authorization: Bearer
+# <TASK_METRICS_TOKEN>"; staff sessions work too.
+TASK_METRICS_ENABLED = os.environ.get('TASK_METRICS_ENABLED', 'True') == 'True'
+TASK_METRICS_RETENTION_DAYS = int(os.environ.get('TASK_METRICS_RETENTION_DAYS', 14))
+TASK_METRICS_TOKEN = os.environ.get('TASK_METRICS_TOKEN', '')
+
+# On-demand request profiler (apps/accounts/request_profiler.py): staff add
+# ?__profile=1 (sampling flame graph) or ?__profile=cprofile to a request.
+# Results are kept in the cache for REQUEST_PROFILER_TTL seconds; each staff
+# member gets REQUEST_PROFILER_RATE = (requests, per seconds).
+REQUEST_PROFILER_ENABLED = os.environ.get('REQUEST_PROFILER_ENABLED', 'False') == 'True'
+REQUEST_PROFILER_TTL = int(os.environ.get('REQUEST_PROFILER_TTL', 3600))
+REQUEST_PROFILER_RATE = (20, 3600)
+
 # ========================================
 # API Keys and External Services
 # ========================================
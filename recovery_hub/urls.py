@@ -10,7 +10,10 @@ from apps.core.views import robots_txt_view, ads_txt_view
 from apps.accounts.court_views import verify_court_report
 from apps.accounts.email_views import unsubscribe_marketing, cold_outreach_unsubscribe
 from recovery_hub.sitemaps import sitemaps
-from apps.accounts.admin_dashboard import engagement_dashboard, ab_test_results
+from apps.accounts.admin_dashboard import (
+    engagement_dashboard, ab_test_results, celery_queue_metrics, task_metrics,
+    request_profiles, request_profile_detail,
+)
 
 urlpatterns = [
     # Redirects for common 404 sources (old URLs, common crawl patterns)
@@ -39,6 +42,10 @@ urlpatterns = [
 
     # Custom admin dashboards (must be before admin.site.urls)
     path('admin/dashboard/ab-tests/', ab_test_results, name='admin_ab_test_results'),
+    path('admin/dashboard/queues/', celery_queue_metrics, name='admin_celery_queue_metrics'),
+    path('admin/dashboard/task-metrics/', task_metrics, name='admin_task_metrics'),
+    path('admin/dashboard/profiles/', request_profiles, name='admin_request_profiles'),
+    path('admin/dashboard/profiles/<str:profile_id>/', request_profile_detail, name='admin_request_profile'),
     path('admin/dashboard/', engagement_dashboard, name='admin_engagement_dashboard'),
     path('admin/', admin.site.urls),
     path('', include('apps.core.urls', namespace='core')),
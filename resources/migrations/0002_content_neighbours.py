@@ -0,0 +1,31 @@
+# Generated by Django 5.0.10 on 2026-10-19 08:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_fix_empty_slugs'),
+        ('resources', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_kind', models.CharField(choices=[('post', 'Blog post'), ('resource', 'Resource')], max_length=10)),
+                ('source_id', models.PositiveIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='content_neighbours', to='blog.post')),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='content_neighbours', to='resources.resource')),
+            ],
+            options={
+                'ordering': ['source_kind', 'source_id', 'rank'],
+                'indexes': [models.Index(fields=['source_kind', 'source_id', 'rank'], name='content_neighbour_idx')],
+            },
+        ),
+    ]
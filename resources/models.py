@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
 
+from recovery_hub import content_events
+
 User = get_user_model()
 
 
@@ -197,12 +199,10 @@ class Resource(models.Model):
         return None
 
     def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
+        content_events.count(self, 'views')
 
     def increment_downloads(self):
-        self.downloads += 1
-        self.save(update_fields=['downloads'])
+        content_events.count(self, 'downloads')
 
     @property
     def is_external(self):
@@ -342,3 +342,45 @@ class CrisisResource(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ContentNeighbour(models.Model):
+    """Precomputed "related" link from a blog post or resource to another
+    post or resource, ranked by text similarity (see similarity.py).
+
+    Exactly one of post / resource is set: the neighbour being linked to.
+    """
+    SOURCE_POST = 'post'
+    SOURCE_RESOURCE = 'resource'
+
+    source_kind = models.CharField(
+        max_length=10,
+        choices=[(SOURCE_POST, 'Blog post'), (SOURCE_RESOURCE, 'Resource')]
+    )
+    source_id = models.PositiveIntegerField()
+    post = models.ForeignKey(
+        'blog.Post',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='content_neighbours'
+    )
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='content_neighbours'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['source_kind', 'source_id', 'rank']
+        indexes = [
+            models.Index(fields=['source_kind', 'source_id', 'rank'], name='content_neighbour_idx'),
+        ]
+
+    def __str__(self):
+        target = f"post {self.post_id}" if self.post_id else f"resource {self.resource_id}"
+        return f"{self.source_kind} {self.source_id} -> {target} (#{self.rank})"
@@ -1,9 +1,10 @@
 """Cross-linking between recovery resources and blog posts.
 
-Resources and blog posts use separate taxonomies, so we bridge them with an
-explicit category map. This keeps internal links topical and works at any scale
-(no per-item curation) as new posts/resources are added. Model imports are lazy
-inside the helpers to avoid an import cycle between the two apps.
+Links come from the neighbours the nightly similarity rebuild ranks by
+text (similarity.py), read in one indexed query. Content published since
+the last rebuild has none yet, so it falls back to the explicit category
+map below, which bridges the two apps' separate taxonomies. Model imports
+are lazy inside the helpers to avoid an import cycle between the two apps.
 """
 
 # Resource category slug -> blog category names whose posts are topically related.
@@ -36,30 +37,57 @@ BLOG_TO_RESOURCE_CATEGORIES = {
 }
 
 
+def _neighbours(queryset, source_kind, source_id, limit):
+    """Up to `limit` of `queryset` precomputed as neighbours of the source, best first."""
+    return list(queryset.filter(
+        content_neighbours__source_kind=source_kind,
+        content_neighbours__source_id=source_id,
+    ).order_by('content_neighbours__rank')[:limit])
+
+
 def related_blog_posts(resource, limit=3):
-    """Published blog posts topically related to a resource (by category map)."""
+    """Published blog posts topically related to a resource."""
     from apps.blog.models import Post
+    from resources.models import ContentNeighbour
+
+    published = Post.objects.filter(status='published').select_related('author', 'category')
+    posts = _neighbours(published, ContentNeighbour.SOURCE_RESOURCE, resource.pk, limit)
+    if posts:
+        return posts
 
     cat_names = RESOURCE_TO_BLOG_CATEGORIES.get(resource.category.slug, [])
     if not cat_names:
         return Post.objects.none()
-    return (
-        Post.objects.filter(status='published', category__name__in=cat_names)
-        .select_related('author', 'category')
-        .order_by('-published_at')[:limit]
-    )
+    return published.filter(category__name__in=cat_names).order_by('-published_at')[:limit]
+
+
+def related_posts_for_post(post, limit=3):
+    """Other published posts most similar to a blog post (else its category)."""
+    from apps.blog.models import Post
+    from resources.models import ContentNeighbour
+
+    published = Post.objects.filter(status='published')
+    posts = _neighbours(published, ContentNeighbour.SOURCE_POST, post.pk, limit)
+    if posts:
+        return posts
+    return published.filter(category=post.category).exclude(pk=post.pk)[:limit]
 
 
 def related_resources_for_post(post, limit=3):
-    """Active resources relevant to a blog post (by category map).
+    """Active resources relevant to a blog post.
 
-    Falls back to featured resources when the post's blog category isn't mapped,
-    so every post still surfaces a few useful tools.
+    Without precomputed neighbours, falls back to the category map and then
+    to featured resources when the post's blog category isn't mapped, so
+    every post still surfaces a few useful tools.
     """
-    from resources.models import Resource
+    from resources.models import ContentNeighbour, Resource
 
-    slugs = BLOG_TO_RESOURCE_CATEGORIES.get(post.category.name, []) if post.category else []
     qs = Resource.objects.filter(is_active=True).select_related('category', 'resource_type')
+    resources = _neighbours(qs, ContentNeighbour.SOURCE_POST, post.pk, limit)
+    if resources:
+        return resources
+
+    slugs = BLOG_TO_RESOURCE_CATEGORIES.get(post.category.name, []) if post.category else []
     if slugs:
         qs = qs.filter(category__slug__in=slugs)
     return qs.order_by('-featured', '-created_at')[:limit]
@@ -0,0 +1,142 @@
+"""
+Offline text similarity between blog posts and resources (see
+ContentNeighbour in models.py).
+
+Every published post and active resource becomes a sparse TF-IDF vector
+over its words: title (counted TITLE_WEIGHT times), excerpt/description,
+body with the HTML stripped, and its category and tag names. Term
+frequency is sublinear (1 + log tf), terms in more than MAX_DF_RATIO of
+documents are dropped as noise, each document keeps its MAX_TERMS
+heaviest terms, and vectors are L2-normalised so a dot product is the
+cosine.
+
+Cosines are computed through an inverted index from term to documents, so
+a document is only compared with documents sharing a term. The TOP_K best
+posts and resources for each post, and the best posts for each resource,
+replace the whole ContentNeighbour table in one transaction.
+
+The nightly rebuild_content_neighbours task runs rebuild(). Readers in
+related_content.py get a page of neighbours in one indexed query and fall
+back to the category map for content published since the last run.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils.html import strip_tags
+
+from resources.models import ContentNeighbour, Resource
+
+TOP_K = 6
+MAX_TERMS = 64
+MAX_DF_RATIO = 0.5
+TITLE_WEIGHT = 3
+MIN_SCORE = 0.05
+
+TOKEN_RE = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset("""
+    about after again all also and any are back because been before being
+    but can could day days did does doing don't down during each even every
+    for from get gets getting going had has have having her here hers him
+    his how i'm into it's its just know like made make many more most much
+    must need not now off once one only other our out over own really said
+    same see she should some still such than that the their them then there
+    these they thing things this those through too under until very want
+    was way well were what when where which while who why will with without
+    would year years you your you're
+""".split())
+
+
+def tokens(text):
+    return [t for t in TOKEN_RE.findall(strip_tags(text or '').lower()) if t not in STOPWORDS]
+
+
+def _post_documents():
+    from apps.blog.models import Post
+
+    tags = defaultdict(list)
+    for post_id, name in Post.tags.through.objects.filter(
+            post__status='published').values_list('post_id', 'tag__name'):
+        tags[post_id].append(name)
+    rows = Post.objects.filter(status='published').values_list(
+        'id', 'title', 'excerpt', 'content', 'category__name')
+    for pk, title, excerpt, content, category in rows.iterator():
+        words = tokens(title) * TITLE_WEIGHT + tokens(excerpt) + tokens(content)
+        words += tokens(category) + tokens(' '.join(tags[pk]))
+        yield (ContentNeighbour.SOURCE_POST, pk), words
+
+
+def _resource_documents():
+    rows = Resource.objects.filter(is_active=True).values_list(
+        'id', 'title', 'description', 'content', 'category__name')
+    for pk, title, description, content, category in rows.iterator():
+        words = tokens(title) * TITLE_WEIGHT + tokens(description) + tokens(content) + tokens(category)
+        yield (ContentNeighbour.SOURCE_RESOURCE, pk), words
+
+
+def vectorize(documents):
+    """{doc: {term: weight}} with unit length, from {doc: [token, ...]}."""
+    counts = {doc: Counter(words) for doc, words in documents.items()}
+    df = Counter(term for terms in counts.values() for term in terms)
+    n = len(counts)
+    max_df = max(2, int(n * MAX_DF_RATIO))
+    vectors = {}
+    for doc, terms in counts.items():
+        weights = {
+            term: (1 + math.log(tf)) * math.log(n / df[term])
+            for term, tf in terms.items() if 1 < df[term] <= max_df
+        }
+        weights = dict(heapq.nlargest(MAX_TERMS, weights.items(), key=lambda kv: kv[1]))
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm:
+            vectors[doc] = {term: w / norm for term, w in weights.items()}
+    return vectors
+
+
+def neighbours(vectors, top_k=TOP_K):
+    """{doc: {kind: [(score, doc), ...]}}, best first, excluding the doc itself."""
+    postings = defaultdict(list)
+    for doc, vector in vectors.items():
+        for term, weight in vector.items():
+            postings[term].append((doc, weight))
+
+    result = {}
+    for doc, vector in vectors.items():
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            for other, other_weight in postings[term]:
+                scores[other] += weight * other_weight
+        scores.pop(doc, None)
+        by_kind = defaultdict(list)
+        for other, score in scores.items():
+            if score >= MIN_SCORE:
+                by_kind[other[0]].append((score, other))
+        result[doc] = {kind: heapq.nlargest(top_k, pairs) for kind, pairs in by_kind.items()}
+    return result
+
+
+def rebuild():
+    """Recompute every neighbour list. Returns the number of rows written."""
+    documents = dict(_post_documents())
+    documents.update(_resource_documents())
+    ranked = neighbours(vectorize(documents))
+
+    rows = []
+    for (source_kind, source_id), by_kind in ranked.items():
+        for kind, pairs in by_kind.items():
+            # Resources link out to posts only; their resource links still
+            # come from the category.
+            if source_kind == ContentNeighbour.SOURCE_RESOURCE and kind == ContentNeighbour.SOURCE_RESOURCE:
+                continue
+            field = 'post_id' if kind == ContentNeighbour.SOURCE_POST else 'resource_id'
+            for rank, (score, (_, target_id)) in enumerate(pairs):
+                rows.append(ContentNeighbour(
+                    source_kind=source_kind, source_id=source_id,
+                    rank=rank, score=round(score, 4), **{field: target_id},
+                ))
+    with transaction.atomic():
+        ContentNeighbour.objects.all().delete()
+        ContentNeighbour.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
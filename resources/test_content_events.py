@@ -0,0 +1,116 @@
+"""Blog/resource view and download counters and usage rows are buffered."""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.tasks import flush_content_events
+from apps.blog.models import Post
+from recovery_hub import content_events, event_buffer
+from resources.models import Resource, ResourceCategory, ResourceType, ResourceUsage
+
+User = get_user_model()
+
+
+def writes(queries):
+    # Sessions live in the cache in production; tests use the database.
+    return [
+        q['sql'] for q in queries
+        if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) and 'django_session' not in q['sql']
+    ]
+
+
+@override_settings(PREPEND_WWW=False, SECURE_SSL_REDIRECT=False)
+class ContentEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        event_buffer._local.clear()
+        self.user = User.objects.create_user(username='reader', email='r@example.com', password='x')
+        category = ResourceCategory.objects.create(name='Tools', description='x')
+        kind = ResourceType.objects.create(name='Article', slug='article')
+        self.resource = Resource.objects.create(
+            title='Coping skills', category=category, resource_type=kind, description='x')
+        self.post = Post.objects.create(
+            title='Day one', author=self.user, content='hi', status='published')
+
+    def test_post_views_are_buffered_once_per_session(self):
+        url = reverse('blog:post_detail', args=[self.post.slug])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(writes(queries), [])
+        self.client.get(url, HTTP_USER_AGENT='Googlebot/2.1')
+        self.assertEqual(event_buffer.size(content_events.BUFFER), 1)
+
+        self.assertEqual(flush_content_events(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_resource_detail_buffers_view_and_usage(self):
+        self.client.force_login(self.user)
+        url = reverse('resources:detail', args=[self.resource.slug])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(writes(queries), [])
+
+        flush_content_events()
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.views, 1)
+        self.assertEqual(ResourceUsage.objects.filter(action='view').count(), 2)
+
+    def test_flush_groups_counter_deltas(self):
+        other = Resource.objects.create(
+            title='Checklist', category=self.resource.category,
+            resource_type=self.resource.resource_type, description='x')
+        for _ in range(3):
+            self.resource.increment_downloads()
+            content_events.log_usage(self.user, self.resource, 'download')
+        other.increment_downloads()
+        other.increment_views()
+
+        # One UPDATE per (column, delta), the user/resource existence
+        # checks and one bulk INSERT, inside a savepoint.
+        with self.assertNumQueries(8):
+            self.assertEqual(content_events.flush(), 8)
+        self.resource.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.resource.downloads, other.downloads, other.views), (3, 1, 1))
+        self.assertEqual(ResourceUsage.objects.filter(action='download').count(), 3)
+
+    def test_usage_for_deleted_resource_is_dropped(self):
+        content_events.log_usage(self.user, self.resource, 'interact')
+        self.resource.delete()
+        content_events.flush()
+        self.assertFalse(ResourceUsage.objects.exists())
+
+    def test_failed_flush_requeues_the_batch(self):
+        self.resource.increment_downloads()
+        content_events.log_usage(self.user, self.resource, 'download')
+        with patch.object(ResourceUsage.objects, 'bulk_create', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                content_events.flush()
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.downloads, 0)
+        self.assertEqual(event_buffer.size(content_events.BUFFER), 2)
+
+        self.assertEqual(content_events.flush(), 2)
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.downloads, 1)
+        self.assertEqual(ResourceUsage.objects.count(), 1)
+
+    def test_writes_inline_when_buffer_unavailable(self):
+        with patch('recovery_hub.content_events.event_buffer.push', return_value=False):
+            self.resource.increment_downloads()
+            content_events.log_usage(self.user, self.resource, 'download')
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.downloads, 1)
+        self.assertEqual(ResourceUsage.objects.count(), 1)
+
+    def test_only_known_counters(self):
+        with self.assertRaises(ValueError):
+            content_events.count(self.resource, 'title')
@@ -0,0 +1,83 @@
+"""Related posts/resources ranked offline by text similarity."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.blog.models import Category, Post
+from apps.blog.tasks import rebuild_content_neighbours
+from resources import similarity
+from resources.models import ContentNeighbour, Resource, ResourceCategory, ResourceType
+from resources.related_content import (
+    related_blog_posts, related_posts_for_post, related_resources_for_post,
+)
+
+User = get_user_model()
+
+TOPICS = {
+    'sleep': 'insomnia sleep hygiene bedtime routine melatonin restless nights',
+    'cravings': 'cravings urges triggers surfing urges distraction coping cravings',
+    'family': 'family parents children boundaries relationships trust rebuilding',
+    'meetings': 'meetings sponsor fellowship twelve steps home group service',
+}
+
+
+class SimilarityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author', email='a@example.com', password='x')
+        self.category = Category.objects.create(name='Personal Journey')
+        resource_category = ResourceCategory.objects.create(name='Tools', slug='tools', description='x')
+        kind = ResourceType.objects.create(name='Article', slug='article')
+
+        self.posts, self.resources = {}, {}
+        for topic, words in TOPICS.items():
+            for n in (1, 2):
+                self.posts[topic, n] = Post.objects.create(
+                    title=f'{topic} story {n}', author=author, category=self.category,
+                    content=f'<p>{words} {words}</p>', status='published')
+            self.resources[topic] = Resource.objects.create(
+                title=f'{topic} worksheet', category=resource_category,
+                resource_type=kind, description=words)
+
+    def test_vectors_are_unit_length_and_drop_stopwords(self):
+        vectors = similarity.vectorize({
+            'a': similarity.tokens('<b>The</b> cravings and urges'),
+            'b': similarity.tokens('cravings at night'),
+            'c': similarity.tokens('sleep at night'),
+            'd': similarity.tokens('family dinners'),
+        })
+        self.assertEqual(set(vectors['a']), {'cravings'})
+        self.assertAlmostEqual(sum(w * w for w in vectors['c'].values()), 1.0)
+
+    def test_neighbours_are_ranked_by_topic(self):
+        self.assertGreater(rebuild_content_neighbours(), 0)
+        sleep = self.posts['sleep', 1]
+
+        with self.assertNumQueries(1):
+            posts = related_posts_for_post(sleep, limit=1)
+        self.assertEqual(posts, [self.posts['sleep', 2]])
+        with self.assertNumQueries(1):
+            resources = related_resources_for_post(sleep, limit=1)
+        self.assertEqual(resources, [self.resources['sleep']])
+        self.assertEqual(
+            set(related_blog_posts(self.resources['family'], limit=2)),
+            {self.posts['family', 1], self.posts['family', 2]})
+        self.assertFalse(ContentNeighbour.objects.filter(
+            source_kind=ContentNeighbour.SOURCE_RESOURCE, resource__isnull=False).exists())
+
+    def test_rebuild_replaces_previous_neighbours(self):
+        similarity.rebuild()
+        first = ContentNeighbour.objects.count()
+        similarity.rebuild()
+        self.assertEqual(ContentNeighbour.objects.count(), first)
+
+    def test_unpublished_neighbours_are_skipped(self):
+        similarity.rebuild()
+        Post.objects.filter(pk=self.posts['sleep', 2].pk).update(status='draft')
+        self.assertNotIn(self.posts['sleep', 2], related_posts_for_post(self.posts['sleep', 1]))
+
+    def test_falls_back_to_category_without_neighbours(self):
+        post = self.posts['sleep', 1]
+        related = list(related_posts_for_post(post, limit=10))
+        self.assertEqual(len(related), 7)
+        self.assertNotIn(post, related)
@@ -10,9 +10,11 @@ from django.db.models import Count, Q
 from django.utils import timezone
 import json
 
+from recovery_hub import content_events
+
 from .models import (
     Resource, ResourceCategory, ResourceType,
-    ResourceBookmark, ResourceRating, ResourceUsage,
+    ResourceBookmark, ResourceRating,
     InteractiveResourceProgress, CrisisResource
 )
 
@@ -119,16 +121,13 @@ class ResourceDetailView(DetailView):
 
     def get_object(self):
         obj = super().get_object()
-        # Increment view count
-        obj.increment_views()
+        # Count the view once per session; both writes are buffered
+        if content_events.first_view(self.request, obj):
+            obj.increment_views()
 
         # Track usage
         if self.request.user.is_authenticated:
-            ResourceUsage.objects.create(
-                user=self.request.user,
-                resource=obj,
-                action='view'
-            )
+            content_events.log_usage(self.request.user, obj, 'view')
 
         return obj
 
@@ -182,11 +181,7 @@ def interactive_resource_view(request, slug):
         return redirect('store:premium')
 
     # Track usage
-    ResourceUsage.objects.create(
-        user=request.user,
-        resource=resource,
-        action='interact'
-    )
+    content_events.log_usage(request.user, resource, 'interact')
 
     # Get or create progress tracking
     progress, created = InteractiveResourceProgress.objects.get_or_create(
@@ -231,11 +226,7 @@ def download_resource_pdf(request, slug):
 
     # Track download
     resource.increment_downloads()
-    ResourceUsage.objects.create(
-        user=request.user,
-        resource=resource,
-        action='download'
-    )
+    content_events.log_usage(request.user, resource, 'download')
 
     # If there's an existing PDF file, serve it
     if resource.file:
@@ -611,12 +602,7 @@ def save_interactive_progress(request, slug):
             progress.completed_at = timezone.now()
 
             # Track completion
-            ResourceUsage.objects.create(
-                user=request.user,
-                resource=resource,
-                action='complete',
-                completed=True
-            )
+            content_events.log_usage(request.user, resource, 'complete', completed=True)
 
         progress.save()
 
@@ -659,13 +645,10 @@ def educational_resources_view(request):
         resource = Resource.objects.get(
             slug='comprehensive-educational-resources')
         # Track view
-        resource.increment_views()
+        if content_events.first_view(request, resource):
+            resource.increment_views()
         if request.user.is_authenticated:
-            ResourceUsage.objects.create(
-                user=request.user,
-                resource=resource,
-                action='view'
-            )
+            content_events.log_usage(request.user, resource, 'view')
     except Resource.DoesNotExist:
         resource = None
 